@@ -0,0 +1,158 @@
+__filename__ = "admission.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Security"
+
+# Admission control for incoming requests, to avoid flooding.
+# Each client has a token bucket for each type of request. A request
+# uses up a token, and tokens are gradually replenished over time up
+# to the capacity of the bucket. When a bucket is empty the request
+# is declined, but only for that client, so that a busy instance or
+# a slow form submission doesn't hold up everybody else.
+
+# the number of tokens in a full bucket, and the number of tokens
+# replenished per second, for each type of request
+ADMISSION_BUDGETS = {
+    'inbox': {
+        'capacity': 60,
+        'rate': 10
+    },
+    'c2s': {
+        'capacity': 30,
+        'rate': 5
+    },
+    'ui': {
+        'capacity': 20,
+        'rate': 2
+    },
+    'get': {
+        'capacity': 60,
+        'rate': 20
+    }
+}
+
+# maximum number of clients for which buckets are kept
+ADMISSION_MAX_CLIENTS = 4096
+
+# the most extra tokens needed for an inbox delivery
+# when the inbox queue is full
+ADMISSION_QUEUE_COST = 4
+
+# addresses of reverse proxies whose forwarded for headers are trusted,
+# if none are configured. Usually the proxy is on the same host
+ADMISSION_DEFAULT_PROXIES = ('127.0.0.1', '::1')
+
+
+def admission_post_type(headers: {}) -> str:
+    """Returns the type of budget used for a POST request
+    """
+    if headers.get('Signature') or headers.get('signature'):
+        # deliveries from other instances
+        return 'inbox'
+    content_type = headers.get('Content-type')
+    if not content_type:
+        content_type = headers.get('Content-Type')
+    if content_type:
+        if content_type.startswith('application/x-www-form-urlencoded') or \
+           content_type.startswith('multipart/form-data'):
+            # submissions from the web interface
+            return 'ui'
+    return 'c2s'
+
+
+def admission_reverse_proxies(reverse_proxies_str: str) -> []:
+    """Returns the addresses of reverse proxies from a comma separated
+    configuration string
+    """
+    if not reverse_proxies_str:
+        return list(ADMISSION_DEFAULT_PROXIES)
+    reverse_proxies = []
+    for proxy_address in reverse_proxies_str.split(','):
+        proxy_address = proxy_address.strip()
+        if proxy_address and proxy_address not in reverse_proxies:
+            reverse_proxies.append(proxy_address)
+    return reverse_proxies
+
+
+def admission_client(headers: {}, client_address: str,
+                     reverse_proxies: []) -> str:
+    """Returns the client which a request is from. This is the ip address
+    of the connection, or the address forwarded by a reverse proxy.
+    Signature keyIds are not used, because they have not been verified
+    at this point and could be anything
+    """
+    if client_address not in reverse_proxies:
+        return client_address
+    forwarded_for = headers.get('X-Forward-For')
+    if not forwarded_for:
+        forwarded_for = headers.get('X-Forwarded-For')
+    if not forwarded_for:
+        return client_address
+    # the last address is the one added by the proxy
+    forwarded_address = forwarded_for.split(',')[-1].strip()
+    if not forwarded_address:
+        return client_address
+    return forwarded_address
+
+
+def _prune_admission_buckets(buckets: {}, curr_time: float) -> None:
+    """Removes buckets for clients which have not been seen recently
+    """
+    oldest_time = 0
+    oldest_key = None
+    for bucket_key in list(buckets.keys()):
+        bucket = buckets.get(bucket_key)
+        if not bucket:
+            continue
+        budget = ADMISSION_BUDGETS[bucket['type']]
+        elapsed = curr_time - bucket['time']
+        if bucket['tokens'] + (elapsed * budget['rate']) >= \
+           budget['capacity']:
+            # a full bucket is the same as no bucket
+            buckets.pop(bucket_key, None)
+            continue
+        if oldest_time == 0 or bucket['time'] < oldest_time:
+            oldest_time = bucket['time']
+            oldest_key = bucket_key
+    if len(buckets) >= ADMISSION_MAX_CLIENTS and oldest_key:
+        buckets.pop(oldest_key, None)
+
+
+def admit_request(buckets: {}, request_type: str, client: str,
+                  curr_time: float, queue_length: int,
+                  max_queue_length: int) -> bool:
+    """Returns True if the given client may make a request of the
+    given type. As the inbox queue fills up, inbox deliveries use more
+    tokens so that the instances sending the most are slowed first
+    """
+    budget = ADMISSION_BUDGETS[request_type]
+    cost = 1
+    if request_type == 'inbox' and max_queue_length > 0:
+        cost += (ADMISSION_QUEUE_COST * queue_length) // max_queue_length
+
+    bucket_key = request_type + ' ' + str(client)
+    bucket = buckets.get(bucket_key)
+    if not bucket:
+        if len(buckets) >= ADMISSION_MAX_CLIENTS:
+            _prune_admission_buckets(buckets, curr_time)
+        bucket = {
+            'type': request_type,
+            'tokens': budget['capacity'],
+            'time': curr_time
+        }
+        buckets[bucket_key] = bucket
+    else:
+        elapsed = curr_time - bucket['time']
+        if elapsed > 0:
+            tokens = bucket['tokens'] + (elapsed * budget['rate'])
+            bucket['tokens'] = min(budget['capacity'], tokens)
+            bucket['time'] = curr_time
+
+    if bucket['tokens'] < cost:
+        return False
+    bucket['tokens'] -= cost
+    return True
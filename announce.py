@@ -206,7 +206,7 @@ def create_announce(session, base_dir: str, federation_list: [],
                          person_cache,
                          debug, project_version, None, group_account,
                          signing_priv_key_pem, 639633,
-                         curr_domain, onion_domain, i2p_domain)
+                         curr_domain, onion_domain, i2p_domain, None)
 
     return new_announce
 
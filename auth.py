@@ -13,11 +13,17 @@ import binascii
 import os
 import secrets
 import datetime
+import time
 from utils import is_system_account
 from utils import has_users_path
 from utils import text_in_file
 from utils import remove_eol
 
+# number of seconds for which a successful basic auth check
+# is remembered, so that polling clients don't repeatedly
+# need their passwords to be hashed
+AUTH_CACHE_SECONDS = 120
+
 
 def _hash_password(password: str) -> str:
     """Hash a password for storing
@@ -86,8 +92,42 @@ def create_basic_auth_header(nickname: str, password: str) -> str:
         base64.b64encode(auth_str.encode('utf-8')).decode('utf-8')
 
 
+def _load_passwords(password_file: str, auth_cache: {}) -> {}:
+    """Returns the stored password hashes indexed by nickname.
+    These are only loaded again if the passwords file has changed,
+    in which case any remembered credential checks are also cleared.
+    Returns None if there is no passwords file
+    """
+    try:
+        file_stat = os.stat(password_file)
+    except OSError:
+        return None
+    file_state = \
+        str(file_stat.st_ino) + ' ' + str(file_stat.st_size) + ' ' + \
+        str(file_stat.st_mtime_ns)
+    if auth_cache.get('passwordsState') == file_state:
+        return auth_cache['passwords']
+
+    passwords = {}
+    try:
+        with open(password_file, 'r', encoding='utf-8') as passfile:
+            for line in passfile:
+                if ':' not in line:
+                    continue
+                nickname = line.split(':')[0]
+                stored_password_base = line.split(':')[1]
+                passwords[nickname] = remove_eol(stored_password_base)
+    except OSError:
+        print('EX: failed to open password file')
+        return None
+    auth_cache['passwords'] = passwords
+    auth_cache['passwordsState'] = file_state
+    auth_cache['verified'] = {}
+    return passwords
+
+
 def authorize_basic(base_dir: str, path: str, auth_header: str,
-                    debug: bool) -> bool:
+                    debug: bool, auth_cache: {}) -> bool:
     """HTTP basic auth
     """
     if ' ' not in auth_header:
@@ -139,29 +179,40 @@ def authorize_basic(base_dir: str, path: str, auth_header: str,
                   nickname + ')')
         return False
     password_file = base_dir + '/accounts/passwords'
-    if not os.path.isfile(password_file):
+    passwords = _load_passwords(password_file, auth_cache)
+    if passwords is None:
         if debug:
             print('DEBUG: passwords file missing')
         return False
+    if not passwords.get(nickname):
+        print('DEBUG: Did not find credentials for ' + nickname +
+              ' in ' + password_file)
+        return False
+    stored_password = passwords[nickname]
     provided_password = plain.split(':')[1]
-    try:
-        with open(password_file, 'r', encoding='utf-8') as passfile:
-            for line in passfile:
-                if not line.startswith(nickname + ':'):
-                    continue
-                stored_password_base = line.split(':')[1]
-                stored_password = remove_eol(stored_password_base)
-                success = _verify_password(stored_password, provided_password)
-                if not success:
-                    if debug:
-                        print('DEBUG: Password check failed for ' + nickname)
-                return success
-    except OSError:
-        print('EX: failed to open password file')
+
+    # was this password recently verified?
+    credential_str = stored_password + ':' + provided_password
+    credential_digest = \
+        hashlib.sha256(credential_str.encode('utf-8')).hexdigest()
+    curr_time = int(time.time())
+    verified = auth_cache['verified'].get(nickname)
+    if verified:
+        if curr_time - verified['time'] < AUTH_CACHE_SECONDS:
+            if constant_time_string_check(verified['digest'],
+                                          credential_digest):
+                return True
+
+    success = _verify_password(stored_password, provided_password)
+    if not success:
+        if debug:
+            print('DEBUG: Password check failed for ' + nickname)
         return False
-    print('DEBUG: Did not find credentials for ' + nickname +
-          ' in ' + password_file)
-    return False
+    auth_cache['verified'][nickname] = {
+        'digest': credential_digest,
+        'time': curr_time
+    }
+    return True
 
 
 def store_basic_credentials(base_dir: str,
@@ -241,11 +292,13 @@ def remove_password(base_dir: str, nickname: str) -> None:
             return
 
 
-def authorize(base_dir: str, path: str, auth_header: str, debug: bool) -> bool:
+def authorize(base_dir: str, path: str, auth_header: str, debug: bool,
+              auth_cache: {}) -> bool:
     """Authorize using http header
     """
     if auth_header.lower().startswith('basic '):
-        return authorize_basic(base_dir, path, auth_header, debug)
+        return authorize_basic(base_dir, path, auth_header, debug,
+                               auth_cache)
     return False
 
 
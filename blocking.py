@@ -8,7 +8,6 @@ __status__ = "Production"
 __module_group__ = "Core"
 
 import os
-import json
 import time
 from datetime import datetime
 from utils import remove_eol
@@ -35,8 +34,11 @@ from utils import acct_dir
 from utils import local_actor_url
 from utils import has_actor
 from utils import text_in_file
+from utils import remove_from_recent_posts_cache
 from conversation import mute_conversation
 from conversation import unmute_conversation
+from matcher import build_matcher
+from matcher import matcher_contains
 
 
 def get_global_block_reason(search_text: str,
@@ -519,8 +521,94 @@ def get_domain_blocklist(base_dir: str) -> str:
     return blocked_str
 
 
+# compiled block lists for callers which don't have a blocked cache
+_block_lists = {}
+
+
+def _load_block_list(blocked_cache: {}, filename: str) -> {}:
+    """Returns the compiled contents of a block or allow list file.
+    This is held in memory and only loaded again if the file changes
+    """
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        if blocked_cache.get(filename):
+            del blocked_cache[filename]
+        return None
+    block_list = blocked_cache.get(filename)
+    if block_list:
+        if block_list['modified'] == file_stat.st_mtime_ns and \
+           block_list['size'] == file_stat.st_size:
+            return block_list
+    block_list = {
+        'modified': file_stat.st_mtime_ns,
+        'size': file_stat.st_size,
+        'entries': set(),
+        'domains': set(),
+        'handles': set()
+    }
+    try:
+        with open(filename, 'r', encoding='utf-8') as fp_blocked:
+            for line in fp_blocked:
+                line = remove_eol(line).strip()
+                if not line:
+                    continue
+                block_list['entries'].add(line)
+                if ':' in line and '@' not in line:
+                    # allowed instances may include a port number
+                    block_list['entries'].add(remove_domain_port(line))
+                if line.startswith('*@'):
+                    block_list['domains'].add(line[2:])
+                elif '@' in line:
+                    block_list['handles'].add(line)
+    except OSError as ex:
+        print('EX: unable to read ' + filename + ' ' + str(ex))
+        return None
+    blocked_cache[filename] = block_list
+    return block_list
+
+
+def _domain_in_list(domain: str, domains: set) -> bool:
+    """Is the given domain, or one of its parent domains, within
+    the given set of domains?
+    """
+    if domain in domains:
+        return True
+    sections = domain.split('.')
+    for index in range(1, len(sections) - 1):
+        if '.'.join(sections[index:]) in domains:
+            return True
+    return False
+
+
+def _in_block_list(block_list: {}, block_domain: str,
+                   block_handle: str) -> bool:
+    """Is the given domain or handle within the given compiled block list?
+    """
+    if not block_list:
+        return False
+    if block_domain:
+        if _domain_in_list(block_domain, block_list['domains']):
+            return True
+    if block_handle:
+        if block_handle in block_list['handles']:
+            return True
+    return False
+
+
+def _not_in_allow_list(blocked_cache: {}, allow_filename: str,
+                       domain: str) -> bool:
+    """Returns true if the given domain is not within the given
+    compiled allow list
+    """
+    allow_list = _load_block_list(blocked_cache, allow_filename)
+    if not allow_list:
+        return True
+    return not _domain_in_list(domain, allow_list['entries'])
+
+
 def update_blocked_cache(base_dir: str,
-                         blocked_cache: [],
+                         blocked_cache: {},
                          blocked_cache_last_updated: int,
                          blocked_cache_update_secs: int) -> int:
     """Updates the cache of globally blocked domains held in memory
@@ -535,36 +623,15 @@ def update_blocked_cache(base_dir: str,
     global_blocking_filename = base_dir + '/accounts/blocking.txt'
     if not os.path.isfile(global_blocking_filename):
         return blocked_cache_last_updated
-    try:
-        with open(global_blocking_filename, 'r',
-                  encoding='utf-8') as fp_blocked:
-            blocked_lines = fp_blocked.readlines()
-            # remove newlines
-            for index, _ in enumerate(blocked_lines):
-                blocked_lines[index] = remove_eol(blocked_lines[index])
-            # update the cache
-            blocked_cache.clear()
-            blocked_cache += blocked_lines
-    except OSError as ex:
-        print('EX: unable to read ' + global_blocking_filename + ' ' + str(ex))
+    _load_block_list(blocked_cache, global_blocking_filename)
     return curr_time
 
 
-def _get_short_domain(domain: str) -> str:
-    """ by checking a shorter version we can thwart adversaries
-    who constantly change their subdomain
-    e.g. subdomain123.mydomain.com becomes mydomain.com
-    """
-    sections = domain.split('.')
-    no_of_sections = len(sections)
-    if no_of_sections > 2:
-        return sections[no_of_sections-2] + '.' + sections[-1]
-    return None
-
-
 def is_blocked_domain(base_dir: str, domain: str,
-                      blocked_cache: [] = None) -> bool:
+                      blocked_cache: {} = None) -> bool:
     """Is the given domain blocked?
+    Block lists are compiled and held in memory, and parent domains
+    are also checked
     """
     if '.' not in domain:
         return False
@@ -572,101 +639,69 @@ def is_blocked_domain(base_dir: str, domain: str,
     if is_evil(domain):
         return True
 
-    short_domain = _get_short_domain(domain)
+    if blocked_cache is None:
+        blocked_cache = _block_lists
 
     if not broch_mode_is_active(base_dir):
-        if blocked_cache:
-            for blocked_str in blocked_cache:
-                if blocked_str == '*@' + domain:
-                    return True
-                if short_domain:
-                    if blocked_str == '*@' + short_domain:
-                        return True
-        else:
-            # instance block list
-            global_blocking_filename = base_dir + '/accounts/blocking.txt'
-            if os.path.isfile(global_blocking_filename):
-                try:
-                    with open(global_blocking_filename, 'r',
-                              encoding='utf-8') as fp_blocked:
-                        blocked_str = fp_blocked.read()
-                        if '*@' + domain + '\n' in blocked_str:
-                            return True
-                        if short_domain:
-                            if '*@' + short_domain + '\n' in blocked_str:
-                                return True
-                except OSError as ex:
-                    print('EX: unable to read ' + global_blocking_filename +
-                          ' ' + str(ex))
+        # instance block list
+        global_blocking_filename = base_dir + '/accounts/blocking.txt'
+        block_list = \
+            _load_block_list(blocked_cache, global_blocking_filename)
+        if _in_block_list(block_list, domain, None):
+            return True
     else:
-        allow_filename = base_dir + '/accounts/allowedinstances.txt'
         # instance allow list
-        if not short_domain:
-            if not text_in_file(domain, allow_filename):
-                return True
-        else:
-            if not text_in_file(short_domain, allow_filename):
-                return True
+        allow_filename = base_dir + '/accounts/allowedinstances.txt'
+        if _not_in_allow_list(blocked_cache, allow_filename, domain):
+            return True
 
     return False
 
 
 def is_blocked(base_dir: str, nickname: str, domain: str,
                block_nickname: str, block_domain: str,
-               blocked_cache: [] = None) -> bool:
+               blocked_cache: {} = None) -> bool:
     """Is the given nickname blocked?
+    Block lists are compiled and held in memory, and parent domains
+    are also checked
     """
     if is_evil(block_domain):
         return True
 
+    if blocked_cache is None:
+        blocked_cache = _block_lists
+
     block_handle = None
     if block_nickname and block_domain:
         block_handle = block_nickname + '@' + block_domain
 
     if not broch_mode_is_active(base_dir):
         # instance level block list
-        if blocked_cache:
-            for blocked_str in blocked_cache:
-                if '*@' + domain in blocked_str:
-                    return True
-                if block_handle:
-                    if blocked_str == block_handle:
-                        return True
-        else:
-            global_blocks_filename = base_dir + '/accounts/blocking.txt'
-            if os.path.isfile(global_blocks_filename):
-                if text_in_file('*@' + block_domain, global_blocks_filename):
-                    return True
-                if block_handle:
-                    block_str = block_handle + '\n'
-                    if text_in_file(block_str, global_blocks_filename):
-                        return True
+        global_blocks_filename = base_dir + '/accounts/blocking.txt'
+        block_list = \
+            _load_block_list(blocked_cache, global_blocks_filename)
+        if _in_block_list(block_list, block_domain, block_handle):
+            return True
     else:
         # instance allow list
         allow_filename = base_dir + '/accounts/allowedinstances.txt'
-        short_domain = _get_short_domain(block_domain)
-        if not short_domain:
-            if not text_in_file(block_domain + '\n', allow_filename):
-                return True
-        else:
-            if not text_in_file(short_domain + '\n', allow_filename):
-                return True
+        if _not_in_allow_list(blocked_cache, allow_filename,
+                              block_domain):
+            return True
 
     # account level allow list
     account_dir = acct_dir(base_dir, nickname, domain)
     allow_filename = account_dir + '/allowedinstances.txt'
     if os.path.isfile(allow_filename):
-        if not text_in_file(block_domain + '\n', allow_filename):
+        if _not_in_allow_list(blocked_cache, allow_filename,
+                              block_domain):
             return True
 
     # account level block list
     blocking_filename = account_dir + '/blocking.txt'
-    if os.path.isfile(blocking_filename):
-        if text_in_file('*@' + block_domain + '\n', blocking_filename):
-            return True
-        if block_handle:
-            if text_in_file(block_handle + '\n', blocking_filename):
-                return True
+    block_list = _load_block_list(blocked_cache, blocking_filename)
+    if _in_block_list(block_list, block_domain, block_handle):
+        return True
     return False
 
 
@@ -961,20 +996,11 @@ def mute_post(base_dir: str, nickname: str, domain: str, port: int,
         return
     print('MUTE: ' + post_filename + '.muted file added')
 
-    # if the post is in the recent posts cache then mark it as muted
-    if recent_posts_cache.get('index'):
-        post_id = \
-            remove_id_ending(post_json_object['id']).replace('/', '#')
-        if post_id in recent_posts_cache['index']:
-            print('MUTE: ' + post_id + ' is in recent posts cache')
-        if recent_posts_cache.get('json'):
-            recent_posts_cache['json'][post_id] = json.dumps(post_json_object)
-            print('MUTE: ' + post_id +
-                  ' marked as muted in recent posts memory cache')
-        if recent_posts_cache.get('html'):
-            if recent_posts_cache['html'].get(post_id):
-                del recent_posts_cache['html'][post_id]
-                print('MUTE: ' + post_id + ' removed cached html')
+    # if the post is in the recent posts cache then remove it, so that
+    # the muted version gets loaded and cached again
+    post_id = remove_id_ending(post_json_object['id']).replace('/', '#')
+    if remove_from_recent_posts_cache(recent_posts_cache, post_id):
+        print('MUTE: ' + post_id + ' removed from recent posts cache')
 
     if also_update_post_id:
         post_filename = locate_post(base_dir, nickname, domain,
@@ -995,16 +1021,10 @@ def mute_post(base_dir: str, nickname: str, domain: str, port: int,
                               'MUTE cached referenced post not removed ' +
                               cached_post_filename)
 
-        if recent_posts_cache.get('json'):
-            if recent_posts_cache['json'].get(also_update_post_id):
-                del recent_posts_cache['json'][also_update_post_id]
-                print('MUTE: ' + also_update_post_id +
-                      ' removed referenced json')
-        if recent_posts_cache.get('html'):
-            if recent_posts_cache['html'].get(also_update_post_id):
-                del recent_posts_cache['html'][also_update_post_id]
-                print('MUTE: ' + also_update_post_id +
-                      ' removed referenced html')
+        if remove_from_recent_posts_cache(recent_posts_cache,
+                                          also_update_post_id):
+            print('MUTE: ' + also_update_post_id +
+                  ' removed referenced post from recent posts cache')
 
 
 def unmute_post(base_dir: str, nickname: str, domain: str, port: int,
@@ -1078,20 +1098,12 @@ def unmute_post(base_dir: str, nickname: str, domain: str, port: int,
                     print('EX: unmute_post cached post not deleted ' +
                           str(cached_post_filename))
 
-    # if the post is in the recent posts cache then mark it as unmuted
-    if recent_posts_cache.get('index'):
-        post_id = \
-            remove_id_ending(post_json_object['id']).replace('/', '#')
-        if post_id in recent_posts_cache['index']:
-            print('UNMUTE: ' + post_id + ' is in recent posts cache')
-        if recent_posts_cache.get('json'):
-            recent_posts_cache['json'][post_id] = json.dumps(post_json_object)
-            print('UNMUTE: ' + post_id +
-                  ' marked as unmuted in recent posts cache')
-        if recent_posts_cache.get('html'):
-            if recent_posts_cache['html'].get(post_id):
-                del recent_posts_cache['html'][post_id]
-                print('UNMUTE: ' + post_id + ' removed cached html')
+    # if the post is in the recent posts cache then remove it, so that
+    # the unmuted version gets loaded and cached again
+    post_id = remove_id_ending(post_json_object['id']).replace('/', '#')
+    if remove_from_recent_posts_cache(recent_posts_cache, post_id):
+        print('UNMUTE: ' + post_id + ' removed from recent posts cache')
+
     if also_update_post_id:
         post_filename = locate_post(base_dir, nickname, domain,
                                     also_update_post_id)
@@ -1112,16 +1124,10 @@ def unmute_post(base_dir: str, nickname: str, domain: str, port: int,
                                   'unmute_post cached ref post not removed ' +
                                   str(cached_post_filename))
 
-        if recent_posts_cache.get('json'):
-            if recent_posts_cache['json'].get(also_update_post_id):
-                del recent_posts_cache['json'][also_update_post_id]
-                print('UNMUTE: ' +
-                      also_update_post_id + ' removed referenced json')
-        if recent_posts_cache.get('html'):
-            if recent_posts_cache['html'].get(also_update_post_id):
-                del recent_posts_cache['html'][also_update_post_id]
-                print('UNMUTE: ' +
-                      also_update_post_id + ' removed referenced html')
+        if remove_from_recent_posts_cache(recent_posts_cache,
+                                          also_update_post_id):
+            print('UNMUTE: ' + also_update_post_id +
+                  ' removed referenced post from recent posts cache')
 
 
 def outbox_mute(base_dir: str, http_prefix: str,
@@ -1338,6 +1344,18 @@ def broch_modeLapses(base_dir: str, lapseDays: int) -> bool:
     return False
 
 
+def _cw_list_matcher(list_json: {}) -> {}:
+    """Returns a matcher for the domains and words within a CW list
+    """
+    terms = []
+    if list_json.get('domains'):
+        terms += list_json['domains']
+    if list_json.get('words'):
+        for word_str in list_json['words']:
+            terms += [word_str, word_str.title()]
+    return build_matcher(terms)
+
+
 def load_cw_lists(base_dir: str, verbose: bool) -> {}:
     """Load lists used for content warnings
     """
@@ -1362,6 +1380,7 @@ def load_cw_lists(base_dir: str, verbose: bool) -> {}:
             name = list_json['name']
             if verbose:
                 print('List: ' + name)
+            list_json['matcher'] = _cw_list_matcher(list_json)
             result[name] = list_json
     return result
 
@@ -1405,31 +1424,14 @@ def add_cw_from_lists(post_json_object: {}, cw_lists: {}, translate: {},
         if warning in cw_text:
             continue
 
-        matched = False
-
-        # match domains within the content
-        if item.get('domains'):
-            for domain in item['domains']:
-                if domain in content:
-                    if cw_text:
-                        cw_text = warning + ' / ' + cw_text
-                    else:
-                        cw_text = warning
-                    matched = True
-                    break
-
-        if matched:
-            continue
-
-        # match words within the content
-        if item.get('words'):
-            for word_str in item['words']:
-                if word_str in content or word_str.title() in content:
-                    if cw_text:
-                        cw_text = warning + ' / ' + cw_text
-                    else:
-                        cw_text = warning
-                    break
+        # match domains or words within the content in a single pass
+        if not item.get('matcher'):
+            item['matcher'] = _cw_list_matcher(item)
+        if matcher_contains(item['matcher'], content):
+            if cw_text:
+                cw_text = warning + ' / ' + cw_text
+            else:
+                cw_text = warning
     if cw_text:
         post_json_object['object']['summary'] = cw_text
         post_json_object['object']['sensitive'] = True
@@ -18,7 +18,8 @@ from webapp_utils import get_post_attachments_as_html
 from webapp_utils import edit_text_area
 from webapp_media import add_embedded_elements
 from utils import remove_eol
-from utils import text_in_file
+from boxindex import box_index_exists
+from boxindex import box_index_contains_text
 from utils import local_actor_url
 from utils import get_actor_languages_list
 from utils import get_base_content_from_post
@@ -536,7 +537,7 @@ def html_blog_page(authorized: bool, session,
     _html_blog_remove_cw_button(blog_str, translate)
 
     blogs_index = acct_dir(base_dir, nickname, domain) + '/tlblogs.index'
-    if not os.path.isfile(blogs_index):
+    if not box_index_exists(blogs_index):
         return blog_str + html_footer()
 
     timeline_json = \
@@ -622,7 +623,7 @@ def html_blog_page_rss2(base_dir: str, http_prefix: str, translate: {},
                                'Blog', translate)
 
     blogs_index = acct_dir(base_dir, nickname, domain) + '/tlblogs.index'
-    if not os.path.isfile(blogs_index):
+    if not box_index_exists(blogs_index):
         if include_header:
             return blog_rss2 + rss2footer()
         return blog_rss2
@@ -664,7 +665,7 @@ def html_blog_page_rss3(base_dir: str, http_prefix: str,
     blog_rss3 = ''
 
     blogs_index = acct_dir(base_dir, nickname, domain) + '/tlblogs.index'
-    if not os.path.isfile(blogs_index):
+    if not box_index_exists(blogs_index):
         return blog_rss3
 
     timeline_json = \
@@ -696,7 +697,7 @@ def _no_of_blog_accounts(base_dir: str) -> int:
                 continue
             account_dir = os.path.join(base_dir + '/accounts', acct)
             blogs_index = account_dir + '/tlblogs.index'
-            if os.path.isfile(blogs_index):
+            if box_index_exists(blogs_index):
                 ctr += 1
         break
     return ctr
@@ -711,7 +712,7 @@ def _single_blog_account_nickname(base_dir: str) -> str:
                 continue
             account_dir = os.path.join(base_dir + '/accounts', acct)
             blogs_index = account_dir + '/tlblogs.index'
-            if os.path.isfile(blogs_index):
+            if box_index_exists(blogs_index):
                 return acct.split('@')[0]
         break
     return None
@@ -752,7 +753,7 @@ def html_blog_view(authorized: bool,
                 continue
             account_dir = os.path.join(base_dir + '/accounts', acct)
             blogs_index = account_dir + '/tlblogs.index'
-            if os.path.isfile(blogs_index):
+            if box_index_exists(blogs_index):
                 blog_str += '<p class="blogaccount">'
                 blog_str += '<a href="' + \
                     http_prefix + '://' + domain_full + '/blog/' + \
@@ -931,9 +932,10 @@ def path_contains_blog_link(base_dir: str,
     # check for blog posts
     blog_index_filename = \
         acct_dir(base_dir, nickname, domain) + '/tlblogs.index'
-    if not os.path.isfile(blog_index_filename):
+    if not box_index_exists(blog_index_filename):
         return None, None
-    if not text_in_file('#' + user_ending2[1] + '.', blog_index_filename):
+    if not box_index_contains_text(blog_index_filename,
+                                   '#' + user_ending2[1] + '.'):
         return None, None
     message_id = local_actor_url(http_prefix, nickname, domain_full) + \
         '/statuses/' + user_ending2[1]
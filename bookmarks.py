@@ -31,6 +31,8 @@ from utils import has_object_string_type
 from utils import text_in_file
 from utils import remove_eol
 from posts import get_person_box
+from searchindex import search_index_add
+from searchindex import search_index_remove
 from session import post_json
 
 
@@ -90,6 +92,9 @@ def undo_bookmarks_collection_entry(recent_posts_cache: {},
         except OSError:
             print('EX: unable to write bookmarks index ' +
                   bookmarks_index_filename)
+    account_dir = acct_dir(base_dir, nickname, domain)
+    search_index_remove(account_dir, 'bookmarks',
+                        post_filename, post_json_object)
     if not post_json_object.get('type'):
         return
     if post_json_object['type'] != 'Create':
@@ -260,6 +265,9 @@ def update_bookmarks_collection(recent_posts_cache: {},
         except OSError:
             print('EX: unable to write bookmarks index ' +
                   bookmarks_index_filename)
+    account_dir = acct_dir(base_dir, nickname, domain)
+    search_index_add(account_dir, 'bookmarks',
+                     post_filename, post_json_object)
 
 
 def bookmark_post(recent_posts_cache: {},
@@ -0,0 +1,551 @@
+__filename__ = "boxindex.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Timeline"
+
+import os
+from indexlock import index_lock
+
+# Each record within an offsets file is a zero padded
+# decimal number followed by a newline
+OFFSET_RECORD_WIDTH = 13
+
+# timelines which are stored as append only logs
+TIMELINE_INDEXES = ('inbox', 'outbox', 'dm', 'tlreplies', 'tlmedia',
+                    'tlblogs')
+
+
+def _box_index_offsets_filename(index_filename: str) -> str:
+    """Returns the filename of the offsets file for a timeline index
+    """
+    return index_filename + '.offsets'
+
+
+def _box_index_timeline_filename(index_filename: str) -> str:
+    """Returns the filename of the append only log for a timeline index.
+    Entries within the log are in chronological order, oldest first
+    """
+    if index_filename.endswith('.index'):
+        return index_filename[:-len('.index')] + '.timeline'
+    return index_filename + '.timeline'
+
+
+def _rebuild_box_index_offsets(index_filename: str,
+                               from_end: bool) -> int:
+    """Creates the offsets file for a timeline index.
+    Older indexes are stored newest first, so each record is the
+    distance of the start of a line from the end of the index, with
+    records being stored oldest line first. That way prepending a line
+    to the index only requires one record to be appended.
+    For append only logs each record is the position of the end of a line.
+    Returns the number of lines within the index
+    """
+    with index_lock(index_filename):
+        line_ends = []
+        try:
+            with open(index_filename, 'rb') as fp_index:
+                index_bytes = fp_index.read()
+        except OSError:
+            print('EX: _rebuild_box_index_offsets unable to read ' +
+                  index_filename)
+            return -1
+        index_size = len(index_bytes)
+        pos = 0
+        while pos < index_size:
+            pos = index_bytes.find(b'\n', pos)
+            if pos == -1:
+                pos = index_size
+            else:
+                pos += 1
+            line_ends.append(pos)
+
+        offsets_str = ''
+        if from_end:
+            line_start = 0
+            line_starts = []
+            for line_end in line_ends:
+                line_starts.append(line_start)
+                line_start = line_end
+            for line_start in reversed(line_starts):
+                offsets_str += \
+                    str(index_size -
+                        line_start).zfill(OFFSET_RECORD_WIDTH - 1) + '\n'
+        else:
+            for line_end in line_ends:
+                offsets_str += \
+                    str(line_end).zfill(OFFSET_RECORD_WIDTH - 1) + '\n'
+        offsets_filename = _box_index_offsets_filename(index_filename)
+        try:
+            with open(offsets_filename, 'w+',
+                      encoding='utf-8') as fp_offsets:
+                fp_offsets.write(offsets_str)
+        except OSError:
+            print('EX: _rebuild_box_index_offsets unable to write ' +
+                  offsets_filename)
+            return -1
+        return len(line_ends)
+
+
+def _box_index_offsets_count(index_filename: str, index_size: int) -> int:
+    """Returns the number of records within the offsets file for
+    a timeline index, or -1 if the offsets file is missing or
+    does not match the index
+    """
+    offsets_filename = _box_index_offsets_filename(index_filename)
+    if not os.path.isfile(offsets_filename):
+        return -1
+    offsets_size = os.path.getsize(offsets_filename)
+    if offsets_size % OFFSET_RECORD_WIDTH != 0:
+        return -1
+    no_of_records = int(offsets_size / OFFSET_RECORD_WIDTH)
+    if no_of_records == 0:
+        if index_size == 0:
+            return 0
+        return -1
+    # the most recent record is either the start of a newest first
+    # index or the end of an append only log, and in both cases
+    # this is the size of the index
+    try:
+        with open(offsets_filename, 'rb') as fp_offsets:
+            fp_offsets.seek(offsets_size - OFFSET_RECORD_WIDTH)
+            newest_str = fp_offsets.read(OFFSET_RECORD_WIDTH).strip()
+    except OSError:
+        print('EX: _box_index_offsets_count unable to read ' +
+              offsets_filename)
+        return -1
+    if not newest_str.isdigit():
+        return -1
+    if int(newest_str) != index_size:
+        return -1
+    return no_of_records
+
+
+def _box_index_offset_records(index_filename: str, index_size: int,
+                              from_end: bool,
+                              first_record: int, last_record: int) -> []:
+    """Returns a range of offset records for a timeline index,
+    where the first record is the oldest line
+    """
+    no_of_records = _box_index_offsets_count(index_filename, index_size)
+    if no_of_records < 0:
+        no_of_records = _rebuild_box_index_offsets(index_filename, from_end)
+    first_record = max(first_record, 0)
+    last_record = min(last_record, no_of_records - 1)
+    if first_record > last_record:
+        return []
+    offsets_filename = _box_index_offsets_filename(index_filename)
+    try:
+        with open(offsets_filename, 'rb') as fp_offsets:
+            fp_offsets.seek(first_record * OFFSET_RECORD_WIDTH)
+            records_bytes = \
+                fp_offsets.read((last_record - first_record + 1) *
+                                OFFSET_RECORD_WIDTH)
+    except OSError:
+        print('EX: _box_index_offset_records unable to read ' +
+              offsets_filename)
+        return []
+    records = []
+    for record_str in records_bytes.split(b'\n'):
+        record_str = record_str.strip()
+        if not record_str:
+            continue
+        if not record_str.isdigit():
+            return []
+        records.append(int(record_str))
+    return records
+
+
+def _box_index_no_of_lines(index_filename: str, index_size: int,
+                           from_end: bool) -> int:
+    """Returns the number of lines within a timeline index
+    """
+    no_of_lines = _box_index_offsets_count(index_filename, index_size)
+    if no_of_lines < 0:
+        no_of_lines = _rebuild_box_index_offsets(index_filename, from_end)
+    return no_of_lines
+
+
+def _box_index_lines_newest_first(index_filename: str,
+                                  start_line: int, no_of_lines: int) -> []:
+    """Returns lines from an older index which is stored newest first
+    """
+    index_size = os.path.getsize(index_filename)
+    total_lines = _box_index_no_of_lines(index_filename, index_size, True)
+    if start_line >= total_lines:
+        return []
+    record = total_lines - 1 - start_line
+    records = \
+        _box_index_offset_records(index_filename, index_size, True,
+                                  record, record)
+    if not records:
+        return []
+    position = index_size - records[0]
+    if position < 0:
+        return []
+
+    lines = []
+    try:
+        with open(index_filename, 'rb') as fp_index:
+            fp_index.seek(position)
+            while len(lines) < no_of_lines:
+                line = fp_index.readline()
+                if not line:
+                    break
+                lines.append(line.decode('utf-8').strip())
+    except OSError:
+        print('EX: _box_index_lines_newest_first unable to read ' +
+              index_filename)
+    except UnicodeDecodeError:
+        print('EX: _box_index_lines_newest_first unable to decode ' +
+              index_filename)
+    return lines
+
+
+def timeline_log_lines(timeline_filename: str,
+                       start_line: int, no_of_lines: int) -> []:
+    """Returns lines from an append only log, newest first
+    """
+    if not os.path.isfile(timeline_filename):
+        return []
+    start_line = max(start_line, 0)
+    index_size = os.path.getsize(timeline_filename)
+    total_lines = \
+        _box_index_no_of_lines(timeline_filename, index_size, False)
+    if start_line >= total_lines:
+        return []
+    newest_record = total_lines - 1 - start_line
+    oldest_record = max(newest_record - no_of_lines + 1, 0)
+    # the record before the oldest line marks where it begins
+    records = \
+        _box_index_offset_records(timeline_filename, index_size, False,
+                                  oldest_record - 1, newest_record)
+    if not records:
+        return []
+    start_pos = 0
+    if oldest_record > 0:
+        start_pos = records[0]
+    end_pos = records[-1]
+    if end_pos < start_pos or end_pos > index_size:
+        return []
+
+    lines = []
+    try:
+        with open(timeline_filename, 'rb') as fp_timeline:
+            fp_timeline.seek(start_pos)
+            lines_str = fp_timeline.read(end_pos - start_pos).decode('utf-8')
+            for line in lines_str.splitlines():
+                lines.append(line.strip())
+    except OSError:
+        print('EX: timeline_log_lines unable to read ' +
+              timeline_filename)
+    except UnicodeDecodeError:
+        print('EX: timeline_log_lines unable to decode ' +
+              timeline_filename)
+    lines.reverse()
+    return lines
+
+
+def box_index_lines(index_filename: str,
+                    start_line: int, no_of_lines: int) -> []:
+    """Returns a number of entries from a timeline index, newest first,
+    beginning at the given line number without reading the preceding lines
+    """
+    start_line = max(start_line, 0)
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    if os.path.isfile(timeline_filename):
+        return timeline_log_lines(timeline_filename,
+                                  start_line, no_of_lines)
+    if os.path.isfile(index_filename):
+        return _box_index_lines_newest_first(index_filename,
+                                             start_line, no_of_lines)
+    return []
+
+
+def timeline_log_line_count(timeline_filename: str) -> int:
+    """Returns the number of entries within an append only log
+    """
+    if not os.path.isfile(timeline_filename):
+        return 0
+    index_size = os.path.getsize(timeline_filename)
+    no_of_lines = \
+        _box_index_no_of_lines(timeline_filename, index_size, False)
+    return max(no_of_lines, 0)
+
+
+def box_index_version(index_filename: str) -> str:
+    """Returns a string which changes whenever the given timeline
+    index is changed
+    """
+    version = ''
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    for filename in (timeline_filename, index_filename):
+        try:
+            file_stat = os.stat(filename)
+        except OSError:
+            continue
+        version += \
+            str(file_stat.st_mtime_ns) + ':' + str(file_stat.st_size) + ' '
+    return version
+
+
+def box_index_exists(index_filename: str) -> bool:
+    """Returns true if the given timeline index exists in either format
+    """
+    if os.path.isfile(_box_index_timeline_filename(index_filename)):
+        return True
+    return os.path.isfile(index_filename)
+
+
+def box_index_contains_text(index_filename: str, text: str) -> bool:
+    """Returns true if the given text appears anywhere within
+    a timeline index
+    """
+    filename = _box_index_timeline_filename(index_filename)
+    if not os.path.isfile(filename):
+        filename = index_filename
+        if not os.path.isfile(filename):
+            return False
+    try:
+        with open(filename, 'r', encoding='utf-8') as fp_index:
+            if text in fp_index.read():
+                return True
+    except OSError:
+        print('EX: box_index_contains_text unable to read ' + filename)
+    return False
+
+
+def _write_box_index_timeline(timeline_filename: str, entries: []) -> bool:
+    """Writes an append only log from a list of entries, oldest first.
+    The log is written to a temporary file first, so that it is never
+    read when partially written
+    """
+    with index_lock(timeline_filename):
+        new_timeline_filename = timeline_filename + '.new'
+        try:
+            with open(new_timeline_filename, 'w+',
+                      encoding='utf-8') as fp_timeline:
+                for entry in entries:
+                    fp_timeline.write(entry + '\n')
+            os.rename(new_timeline_filename, timeline_filename)
+        except OSError:
+            print('EX: _write_box_index_timeline unable to write ' +
+                  timeline_filename)
+            return False
+        _rebuild_box_index_offsets(timeline_filename, False)
+        return True
+
+
+def _box_index_entry_key(entry: str) -> str:
+    """Returns the part of an entry which is used to detect duplicates.
+    This is the last field, so that lines containing a date or
+    nickname before the post id are only added once for each post
+    """
+    return entry.split('  ')[-1]
+
+
+def _read_newest_first_entries(index_filename: str) -> []:
+    """Returns the distinct entries of an older newest first index,
+    oldest first
+    """
+    entries = []
+    entries_set = set()
+    try:
+        with open(index_filename, 'r', encoding='utf-8') as fp_index:
+            for line in fp_index:
+                entry = line.strip()
+                if not entry:
+                    continue
+                entry_key = _box_index_entry_key(entry)
+                if entry_key in entries_set:
+                    continue
+                entries_set.add(entry_key)
+                entries.append(entry)
+    except OSError:
+        print('EX: _read_newest_first_entries unable to read ' +
+              index_filename)
+        return None
+    entries.reverse()
+    return entries
+
+
+def _convert_box_index(index_filename: str) -> bool:
+    """Converts an older newest first index into an append only log
+    """
+    entries = _read_newest_first_entries(index_filename)
+    if entries is None:
+        return False
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    if not _write_box_index_timeline(timeline_filename, entries):
+        return False
+    for filename in (index_filename,
+                     _box_index_offsets_filename(index_filename)):
+        if not os.path.isfile(filename):
+            continue
+        try:
+            os.remove(filename)
+        except OSError:
+            print('EX: _convert_box_index unable to delete ' + filename)
+    return True
+
+
+def timeline_log_convert(index_filename: str) -> bool:
+    """Converts an older newest first index into an append only log
+    having the same filename
+    """
+    with index_lock(index_filename):
+        entries = _read_newest_first_entries(index_filename)
+        if entries is None:
+            return False
+        return _write_box_index_timeline(index_filename, entries)
+
+
+def _box_index_entries(box_index_cache: {}, timeline_filename: str) -> set:
+    """Returns the set of entry keys within an append only log.
+    These are held in memory so that duplicates can be detected
+    without reading the log
+    """
+    index_size = 0
+    if os.path.isfile(timeline_filename):
+        index_size = os.path.getsize(timeline_filename)
+    if box_index_cache.get(timeline_filename):
+        # if the log was changed elsewhere then reload it
+        if box_index_cache[timeline_filename]['size'] == index_size:
+            return box_index_cache[timeline_filename]['entries']
+    entries = set()
+    if index_size > 0:
+        try:
+            with open(timeline_filename, 'r',
+                      encoding='utf-8') as fp_timeline:
+                for line in fp_timeline:
+                    entries.add(_box_index_entry_key(line.strip()))
+        except OSError:
+            print('EX: _box_index_entries unable to read ' +
+                  timeline_filename)
+    box_index_cache[timeline_filename] = {
+        'size': index_size,
+        'entries': entries
+    }
+    return entries
+
+
+def timeline_log_add(box_index_cache: {}, timeline_filename: str,
+                     entry: str) -> bool:
+    """Adds a new entry to the end of an append only log.
+    Returns True if the entry was added, or False if it already exists
+    """
+    entry = entry.strip()
+    if not entry:
+        return False
+    with index_lock(timeline_filename):
+        entries = _box_index_entries(box_index_cache, timeline_filename)
+        entry_key = _box_index_entry_key(entry)
+        if entry_key in entries:
+            return False
+
+        prev_index_size = box_index_cache[timeline_filename]['size']
+        no_of_lines = \
+            _box_index_offsets_count(timeline_filename, prev_index_size)
+        try:
+            with open(timeline_filename, 'a+',
+                      encoding='utf-8') as fp_timeline:
+                fp_timeline.write(entry + '\n')
+                index_size = fp_timeline.tell()
+        except OSError as ex:
+            print('EX: Failed to write entry to index ' + str(ex))
+            return False
+        entries.add(entry_key)
+        box_index_cache[timeline_filename]['size'] = index_size
+
+        # if the offsets were not valid then they will be
+        # regenerated on the next read
+        offsets_mode = 'a+'
+        if prev_index_size == 0:
+            offsets_mode = 'w+'
+        elif no_of_lines < 0:
+            return True
+        offsets_filename = _box_index_offsets_filename(timeline_filename)
+        try:
+            with open(offsets_filename, offsets_mode,
+                      encoding='utf-8') as fp_offsets:
+                fp_offsets.write(str(index_size).zfill(
+                    OFFSET_RECORD_WIDTH - 1) + '\n')
+        except OSError:
+            print('EX: timeline_log_add unable to append to ' +
+                  offsets_filename)
+        return True
+
+
+def box_index_add(box_index_cache: {}, index_filename: str,
+                  entry: str) -> bool:
+    """Adds a new entry to the end of a timeline log,
+    if it doesn't already exist
+    """
+    entry = entry.strip()
+    if not entry:
+        return False
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    with index_lock(timeline_filename):
+        if not os.path.isfile(timeline_filename):
+            if os.path.isfile(index_filename):
+                if not _convert_box_index(index_filename):
+                    return False
+        entries = _box_index_entries(box_index_cache, timeline_filename)
+        if _box_index_entry_key(entry) in entries:
+            return True
+        return timeline_log_add(box_index_cache, timeline_filename, entry)
+
+
+def box_index_create(index_filename: str, entries: []) -> bool:
+    """Creates a timeline log from a list of entries, oldest first
+    """
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    return _write_box_index_timeline(timeline_filename, entries)
+
+
+def box_index_truncate(index_filename: str, max_entries: int) -> None:
+    """Retains only the most recent entries within a timeline log
+    """
+    timeline_filename = _box_index_timeline_filename(index_filename)
+    if not os.path.isfile(timeline_filename):
+        if not os.path.isfile(index_filename):
+            return
+        if not _convert_box_index(index_filename):
+            return
+    with index_lock(timeline_filename):
+        index_size = os.path.getsize(timeline_filename)
+        if _box_index_no_of_lines(timeline_filename, index_size,
+                                  False) <= max_entries:
+            return
+        entries = timeline_log_lines(timeline_filename, 0, max_entries)
+        entries.reverse()
+        _write_box_index_timeline(timeline_filename, entries)
+
+
+def migrate_box_indexes(base_dir: str) -> int:
+    """Converts any older timeline indexes into append only logs
+    Returns the number of indexes converted
+    """
+    ctr = 0
+    dir_str = base_dir + '/accounts'
+    for _, dirs, _ in os.walk(dir_str):
+        for handle in dirs:
+            if '@' not in handle:
+                continue
+            account_dir = os.path.join(dir_str, handle)
+            for box_name in TIMELINE_INDEXES:
+                index_filename = account_dir + '/' + box_name + '.index'
+                if not os.path.isfile(index_filename):
+                    continue
+                timeline_filename = \
+                    _box_index_timeline_filename(index_filename)
+                if os.path.isfile(timeline_filename):
+                    continue
+                if _convert_box_index(index_filename):
+                    print('Migrated ' + handle + ' ' + box_name + ' index')
+                    ctr += 1
+        break
+    return ctr
@@ -8,13 +8,20 @@ __status__ = "Production"
 __module_group__ = "Core"
 
 import os
-import datetime
+import time
 from session import url_exists
 from session import get_json
 from utils import load_json
 from utils import save_json
 from utils import get_file_case_insensitive
 from utils import get_user_paths
+from utils import person_cache_actors
+from utils import person_cache_pub_keys
+from httpsig import remove_public_keys_from_cache
+from skillsindex import skills_index_update
+
+# default maximum number of actors held in memory
+MAX_PERSON_CACHE_ENTRIES = 4096
 
 
 def _remove_person_from_cache(base_dir: str, person_url: str,
@@ -28,8 +35,10 @@ def _remove_person_from_cache(base_dir: str, person_url: str,
             os.remove(cache_filename)
         except OSError:
             print('EX: unable to delete cached actor ' + str(cache_filename))
-    if person_cache.get(person_url):
-        del person_cache[person_url]
+    person_cache_actors(person_cache).pop(person_url, None)
+    skills_index_update(base_dir, person_url, None)
+    pub_keys = person_cache_pub_keys(person_cache)
+    remove_public_keys_from_cache(pub_keys, person_url)
 
 
 def check_for_changed_actor(session, base_dir: str,
@@ -50,6 +59,62 @@ def check_for_changed_actor(session, base_dir: str,
     _remove_person_from_cache(base_dir, person_url, person_cache)
 
 
+def set_person_cache_limit(person_cache: {}, max_entries: int) -> None:
+    """Sets the maximum number of actors held in memory
+    """
+    if max_entries < 1:
+        max_entries = 1
+    person_cache['maxEntries'] = max_entries
+
+
+def _person_cache_stats(person_cache: {}) -> {}:
+    """Returns the hit and miss counters for the cache
+    """
+    return person_cache.setdefault('stats', {
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0
+    })
+
+
+def person_cache_stats(person_cache: {}) -> {}:
+    """Returns the counters and size of the cache
+    """
+    stats = _person_cache_stats(person_cache).copy()
+    stats['entries'] = len(person_cache_actors(person_cache))
+    stats['maxEntries'] = \
+        person_cache.get('maxEntries', MAX_PERSON_CACHE_ENTRIES)
+    return stats
+
+
+def _evict_from_person_cache(person_cache: {}) -> None:
+    """Removes the least recently used actors from memory when the
+    cache is full. Evicted actors can still be loaded from cache/actors
+    """
+    actors = person_cache_actors(person_cache)
+    max_entries = person_cache.get('maxEntries', MAX_PERSON_CACHE_ENTRIES)
+    stats = _person_cache_stats(person_cache)
+    pub_keys = person_cache_pub_keys(person_cache)
+    while len(actors) > max_entries:
+        try:
+            person_url = next(iter(actors))
+        except (StopIteration, RuntimeError):
+            break
+        if actors.pop(person_url, None):
+            stats['evictions'] += 1
+            remove_public_keys_from_cache(pub_keys, person_url)
+
+
+def _actor_public_key_pem(actor_json: {}) -> str:
+    """Returns the public key PEM for the given actor
+    """
+    if not isinstance(actor_json, dict):
+        return None
+    if isinstance(actor_json.get('publicKey'), dict):
+        return actor_json['publicKey'].get('publicKeyPem')
+    return actor_json.get('publicKeyPem')
+
+
 def store_person_in_cache(base_dir: str, person_url: str,
                           person_json: {}, person_cache: {},
                           allow_write_to_file: bool) -> None:
@@ -59,11 +124,21 @@ def store_person_in_cache(base_dir: str, person_url: str,
         # This is not an actor or person account
         return
 
-    curr_time = datetime.datetime.utcnow()
-    person_cache[person_url] = {
+    actors = person_cache_actors(person_cache)
+    # the most recently used actors are at the end
+    previous = actors.pop(person_url, None)
+    if previous:
+        # if the public key has changed then any parsed version
+        # of it is no longer valid
+        if _actor_public_key_pem(previous['actor']) != \
+           _actor_public_key_pem(person_json):
+            pub_keys = person_cache_pub_keys(person_cache)
+            remove_public_keys_from_cache(pub_keys, person_url)
+    actors[person_url] = {
         "actor": person_json,
-        "timestamp": curr_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        "timestamp": int(time.time())
     }
+    _evict_from_person_cache(person_cache)
     if not base_dir:
         return
 
@@ -75,51 +150,64 @@ def store_person_in_cache(base_dir: str, person_url: str,
             person_url.replace('/', '#') + '.json'
         if not os.path.isfile(cache_filename):
             save_json(person_json, cache_filename)
+    skills_index_update(base_dir, person_url, person_json)
 
 
 def get_person_from_cache(base_dir: str, person_url: str,
                           person_cache: {}) -> {}:
     """Get an actor from the cache
     """
+    actors = person_cache_actors(person_cache)
+    stats = _person_cache_stats(person_cache)
+    try:
+        cached = actors.pop(person_url)
+    except KeyError:
+        cached = None
+    if cached:
+        # update the time when the actor was last retrieved
+        # and move it to the most recently used end
+        cached['timestamp'] = int(time.time())
+        actors[person_url] = cached
+        stats['hits'] += 1
+        return cached['actor']
+
+    stats['misses'] += 1
+    if not base_dir:
+        return None
+
     # if the actor is not in memory then try to load it from file
-    loaded_from_file = False
-    if not person_cache.get(person_url):
-        # does the person exist as a cached file?
-        cache_filename = base_dir + '/cache/actors/' + \
-            person_url.replace('/', '#') + '.json'
-        actor_filename = get_file_case_insensitive(cache_filename)
-        if actor_filename:
-            person_json = load_json(actor_filename)
-            if person_json:
-                store_person_in_cache(base_dir, person_url, person_json,
-                                      person_cache, False)
-                loaded_from_file = True
-
-    if person_cache.get(person_url):
-        if not loaded_from_file:
-            # update the timestamp for the last time the actor was retrieved
-            curr_time = datetime.datetime.utcnow()
-            curr_time_str = curr_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-            person_cache[person_url]['timestamp'] = curr_time_str
-        return person_cache[person_url]['actor']
+    cache_filename = base_dir + '/cache/actors/' + \
+        person_url.replace('/', '#') + '.json'
+    actor_filename = get_file_case_insensitive(cache_filename)
+    if actor_filename:
+        person_json = load_json(actor_filename)
+        if person_json:
+            store_person_in_cache(base_dir, person_url, person_json,
+                                  person_cache, False)
+            return person_json
     return None
 
 
 def expire_person_cache(person_cache: {}):
     """Expires old entries from the cache in memory
     """
-    curr_time = datetime.datetime.utcnow()
-    removals = []
-    for person_url, cache_json in person_cache.items():
-        cache_time = datetime.datetime.strptime(cache_json['timestamp'],
-                                                "%Y-%m-%dT%H:%M:%SZ")
-        days_since_cached = (curr_time - cache_time).days
-        if days_since_cached > 2:
-            removals.append(person_url)
-    if len(removals) > 0:
-        for person_url in removals:
-            del person_cache[person_url]
-        print(str(len(removals)) + ' actors were expired from the cache')
+    actors = person_cache_actors(person_cache)
+    expire_time = int(time.time()) - (60 * 60 * 24 * 2)
+    removals = 0
+    # actors are in order of last use, so only the oldest
+    # need to be checked
+    while actors:
+        try:
+            person_url = next(iter(actors))
+        except (StopIteration, RuntimeError):
+            break
+        cached = actors.get(person_url)
+        if cached and cached['timestamp'] > expire_time:
+            break
+        actors.pop(person_url, None)
+        removals += 1
+    if removals > 0:
+        print(str(removals) + ' actors were expired from the cache')
 
 
 def store_webfinger_in_cache(handle: str, webfing,
@@ -41,6 +41,9 @@ MUSIC_SITES = ('soundcloud.com', 'bandcamp.com')
 
 MAX_LINK_LENGTH = 40
 
+# size of the chunks in which form POSTs containing media are read
+FORM_POST_CHUNK_SIZE = 65536
+
 REMOVE_MARKUP = (
     'b', 'i', 'ul', 'ol', 'li', 'em', 'strong',
     'blockquote', 'h1', 'h2', 'h3', 'h4', 'h5'
@@ -60,6 +63,15 @@ INVALID_CONTENT_STRINGS = (
     'handle', 'blockdomain'
 )
 
+# the most recently compiled dogwhistles. The dogwhistles dict is
+# replaced rather than changed when they are edited, so it is only
+# compiled again when a different dict is used. Each entry is a tuple
+# of the dogwhistles and their compiled version, so that they are
+# always replaced together
+_dogwhistles_cache = {
+    "entry": (None, None)
+}
+
 
 def valid_url_lengths(content: str, max_url_length: int) -> bool:
     """Returns true if the given content contains urls which are too long
@@ -1042,99 +1054,128 @@ def _get_simplified_content(content: str) -> str:
     return content_simplified
 
 
-def detect_dogwhistles(content: str, dogwhistles: {}) -> {}:
-    """Returns a dict containing any detected dogwhistle words
+def _compile_dogwhistles(dogwhistles: {}) -> {}:
+    """Indexes dogwhistles by the way in which they are matched,
+    so that each word of the content only needs to be looked up
     """
-    content = remove_html(content).lower()
-    result = {}
-    words = _get_simplified_content(content).split(' ')
+    compiled = {
+        "exact": {},
+        "starting": {},
+        "ending": {},
+        "middle": [],
+        "longestStart": 0,
+        "longestEnd": 0
+    }
     for whistle, category in dogwhistles.items():
         if not category:
             continue
-        ending = False
-        starting = False
         whistle = whistle.lower()
 
         if whistle.startswith('x-'):
             whistle = whistle[2:]
-            ending = True
-        elif (whistle.startswith('*') or
-              whistle.startswith('~') or
-              whistle.startswith('-')):
+            if not compiled['ending'].get(whistle):
+                compiled['ending'][whistle] = category
+            if len(whistle) > compiled['longestEnd']:
+                compiled['longestEnd'] = len(whistle)
+            continue
+        if (whistle.startswith('*') or
+                whistle.startswith('~') or
+                whistle.startswith('-')):
             whistle = whistle[1:]
-            ending = True
-
-        if ending:
-            prev_wrd = ''
-            for wrd in words:
-                wrd2 = (prev_wrd + ' ' + wrd).strip()
-                if wrd.endswith(whistle) or wrd2.endswith(whistle):
-                    if not result.get(whistle):
-                        result[whistle] = {
-                            "count": 1,
-                            "category": category
-                        }
-                    else:
-                        result[whistle]['count'] += 1
-                prev_wrd = wrd
+            if not compiled['ending'].get(whistle):
+                compiled['ending'][whistle] = category
+            if len(whistle) > compiled['longestEnd']:
+                compiled['longestEnd'] = len(whistle)
             continue
 
-        if whistle.lower().endswith('-x'):
+        if whistle.endswith('-x'):
             whistle = whistle[:len(whistle)-2]
-            starting = True
-        elif (whistle.endswith('*') or
-              whistle.endswith('~') or
-              whistle.endswith('-')):
+            if not compiled['starting'].get(whistle):
+                compiled['starting'][whistle] = category
+            if len(whistle) > compiled['longestStart']:
+                compiled['longestStart'] = len(whistle)
+            continue
+        if (whistle.endswith('*') or
+                whistle.endswith('~') or
+                whistle.endswith('-')):
             whistle = whistle[:len(whistle)-1]
-            starting = True
-
-        if starting:
-            prev_wrd = ''
-            for wrd in words:
-                wrd2 = (prev_wrd + ' ' + wrd).strip()
-                if wrd.startswith(whistle) or wrd2.startswith(whistle):
-                    if not result.get(whistle):
-                        result[whistle] = {
-                            "count": 1,
-                            "category": category
-                        }
-                    else:
-                        result[whistle]['count'] += 1
-                prev_wrd = wrd
+            if not compiled['starting'].get(whistle):
+                compiled['starting'][whistle] = category
+            if len(whistle) > compiled['longestStart']:
+                compiled['longestStart'] = len(whistle)
             continue
 
         if '*' in whistle:
             whistle_start = whistle.split('*', 1)[0]
             whistle_end = whistle.split('*', 1)[1]
-            prev_wrd = ''
-            for wrd in words:
-                wrd2 = (prev_wrd + ' ' + wrd).strip()
-                if ((wrd.startswith(whistle_start) and
-                     wrd.endswith(whistle_end)) or
-                    (wrd2.startswith(whistle_start) and
-                     wrd2.endswith(whistle_end))):
-                    if not result.get(whistle):
-                        result[whistle] = {
-                            "count": 1,
-                            "category": category
-                        }
-                    else:
-                        result[whistle]['count'] += 1
-                prev_wrd = wrd
+            compiled['middle'].append([whistle, whistle_start,
+                                       whistle_end, category])
             continue
 
-        prev_wrd = ''
-        for wrd in words:
-            wrd2 = (prev_wrd + ' ' + wrd).strip()
-            if whistle in (wrd, wrd2):
-                if not result.get(whistle):
-                    result[whistle] = {
-                        "count": 1,
-                        "category": category
-                    }
-                else:
-                    result[whistle]['count'] += 1
-            prev_wrd = wrd
+        if not compiled['exact'].get(whistle):
+            compiled['exact'][whistle] = category
+    return compiled
+
+
+def _compiled_dogwhistles(dogwhistles: {}) -> {}:
+    """Returns the compiled dogwhistles, which are only compiled again
+    if the dogwhistles have changed
+    """
+    cached_dogwhistles, compiled = _dogwhistles_cache['entry']
+    if cached_dogwhistles is not dogwhistles:
+        compiled = _compile_dogwhistles(dogwhistles)
+        _dogwhistles_cache['entry'] = (dogwhistles, compiled)
+    return compiled
+
+
+def _dogwhistles_in_word(compiled: {}, wrd: str, wrd2: str) -> {}:
+    """Returns the dogwhistles matching a word, or the word together
+    with the previous one
+    """
+    matches = {}
+    for text in (wrd, wrd2):
+        if compiled['exact'].get(text):
+            matches[text] = compiled['exact'][text]
+        if compiled['starting']:
+            max_len = min(len(text), compiled['longestStart'])
+            for length in range(max_len + 1):
+                whistle = text[:length]
+                if compiled['starting'].get(whistle):
+                    matches[whistle] = compiled['starting'][whistle]
+        if compiled['ending']:
+            max_len = min(len(text), compiled['longestEnd'])
+            for length in range(max_len + 1):
+                whistle = text[len(text)-length:]
+                if compiled['ending'].get(whistle):
+                    matches[whistle] = compiled['ending'][whistle]
+        for whistle, whistle_start, whistle_end, category in \
+                compiled['middle']:
+            if text.startswith(whistle_start) and \
+               text.endswith(whistle_end):
+                matches[whistle] = category
+    return matches
+
+
+def detect_dogwhistles(content: str, dogwhistles: {}) -> {}:
+    """Returns a dict containing any detected dogwhistle words
+    """
+    content = remove_html(content).lower()
+    result = {}
+    words = _get_simplified_content(content).split(' ')
+    compiled = _compiled_dogwhistles(dogwhistles)
+    prev_wrd = ''
+    for wrd in words:
+        wrd2 = (prev_wrd + ' ' + wrd).strip()
+        matches = _dogwhistles_in_word(compiled, wrd, wrd2)
+        for whistle, category in matches.items():
+            if not result.get(whistle):
+                result[whistle] = {
+                    "count": 1,
+                    "category": category
+                }
+            else:
+                result[whistle]['count'] += 1
+        prev_wrd = wrd
     return result
 
 
@@ -1392,42 +1433,11 @@ def _valid_follows_csv(content: str) -> bool:
     return True
 
 
-def save_media_in_form_post(media_bytes, debug: bool,
-                            filename_base: str = None) -> (str, str):
-    """Saves the given media bytes extracted from http form POST
-    Returns the filename and attachment type
+def _form_post_media_type(media_bytes) -> (int, bytes, str, str):
+    """Returns the location of the content type within media bytes from
+    a http form POST, together with the file extension and
+    attachment media type
     """
-    if not media_bytes:
-        if filename_base:
-            # remove any existing files
-            extension_types = get_image_extensions()
-            for ex in extension_types:
-                possible_other_format = filename_base + '.' + ex
-                if os.path.isfile(possible_other_format):
-                    try:
-                        os.remove(possible_other_format)
-                    except OSError:
-                        if debug:
-                            print('EX: save_media_in_form_post ' +
-                                  'unable to delete other ' +
-                                  str(possible_other_format))
-            if os.path.isfile(filename_base):
-                try:
-                    os.remove(filename_base)
-                except OSError:
-                    if debug:
-                        print('EX: save_media_in_form_post ' +
-                              'unable to delete ' +
-                              str(filename_base))
-
-        if debug:
-            print('DEBUG: No media found within POST')
-        return None, None
-
-    media_location = -1
-    search_str = ''
-    filename = None
-
     # directly search the binary array for the beginning
     # of an image, zip or csv
     extension_list = {
@@ -1454,7 +1464,6 @@ def save_media_in_form_post(media_bytes, debug: bool,
         'csv': 'text/csv',
         'csv2': 'text/plain'
     }
-    detected_extension = None
     for extension, content_type in extension_list.items():
         search_str = b'Content-Type: ' + content_type.encode('utf8', 'ignore')
         media_location = media_bytes.find(search_str)
@@ -1472,13 +1481,96 @@ def save_media_in_form_post(media_bytes, debug: bool,
                 extension = 'wav'
             elif extension == 'wav4':
                 extension = 'wav'
-            if filename_base:
-                filename = filename_base + '.' + extension
             search_lst = search_str.decode().split('/', maxsplit=1)
             attachment_media_type = \
                 search_lst[0].replace('Content-Type: ', '')
-            detected_extension = extension
-            break
+            return media_location, search_str, extension, attachment_media_type
+    return -1, b'', None, None
+
+
+def _remove_other_media_formats(filename: str, detected_extension: str,
+                                debug: bool) -> None:
+    """Removes any existing image files with a different format
+    """
+    if detected_extension == 'zip':
+        return
+    extension_types = get_image_extensions()
+    for ex in extension_types:
+        if ex == detected_extension:
+            continue
+        possible_other_format = \
+            filename.replace('.temp', '').replace('.' +
+                                                  detected_extension, '.' +
+                                                  ex)
+        if os.path.isfile(possible_other_format):
+            try:
+                os.remove(possible_other_format)
+            except OSError:
+                if debug:
+                    print('EX: save_media_in_form_post ' +
+                          'unable to delete other 2 ' +
+                          str(possible_other_format))
+
+
+def _valid_form_post_media(media_bytes, detected_extension: str) -> bool:
+    """Checks that svg and csv files received within a http form POST
+    are allowed
+    """
+    # don't allow scripts within svg files
+    if detected_extension == 'svg':
+        svg_str = media_bytes.decode()
+        if dangerous_svg(svg_str, False):
+            return False
+    elif detected_extension == 'csv':
+        csv_str = media_bytes.decode()
+        if not _valid_follows_csv(csv_str):
+            return False
+    return True
+
+
+def _remove_form_post_media(filename_base: str, debug: bool) -> None:
+    """Removes any previously uploaded media
+    """
+    extension_types = get_image_extensions()
+    for ex in extension_types:
+        possible_other_format = filename_base + '.' + ex
+        if os.path.isfile(possible_other_format):
+            try:
+                os.remove(possible_other_format)
+            except OSError:
+                if debug:
+                    print('EX: save_media_in_form_post ' +
+                          'unable to delete other ' +
+                          str(possible_other_format))
+    if os.path.isfile(filename_base):
+        try:
+            os.remove(filename_base)
+        except OSError:
+            if debug:
+                print('EX: save_media_in_form_post ' +
+                      'unable to delete ' +
+                      str(filename_base))
+
+
+def save_media_in_form_post(media_bytes, debug: bool,
+                            filename_base: str = None) -> (str, str):
+    """Saves the given media bytes extracted from http form POST
+    Returns the filename and attachment type
+    """
+    if not media_bytes:
+        if filename_base:
+            # remove any existing files
+            _remove_form_post_media(filename_base, debug)
+
+        if debug:
+            print('DEBUG: No media found within POST')
+        return None, None
+
+    filename = None
+    media_location, search_str, detected_extension, attachment_media_type = \
+        _form_post_media_type(media_bytes)
+    if media_location > -1 and filename_base:
+        filename = filename_base + '.' + detected_extension
 
     if not filename:
         return None, None
@@ -1493,35 +1585,11 @@ def save_media_in_form_post(media_bytes, debug: bool,
                 break
 
     # remove any existing image files with a different format
-    if detected_extension != 'zip':
-        extension_types = get_image_extensions()
-        for ex in extension_types:
-            if ex == detected_extension:
-                continue
-            possible_other_format = \
-                filename.replace('.temp', '').replace('.' +
-                                                      detected_extension, '.' +
-                                                      ex)
-            if os.path.isfile(possible_other_format):
-                try:
-                    os.remove(possible_other_format)
-                except OSError:
-                    if debug:
-                        print('EX: save_media_in_form_post ' +
-                              'unable to delete other 2 ' +
-                              str(possible_other_format))
+    _remove_other_media_formats(filename, detected_extension, debug)
 
-    # don't allow scripts within svg files
-    if detected_extension == 'svg':
-        svg_str = media_bytes[start_pos:]
-        svg_str = svg_str.decode()
-        if dangerous_svg(svg_str, False):
-            return None, None
-    elif detected_extension == 'csv':
-        csv_str = media_bytes[start_pos:]
-        csv_str = csv_str.decode()
-        if not _valid_follows_csv(csv_str):
-            return None, None
+    if not _valid_form_post_media(media_bytes[start_pos:],
+                                  detected_extension):
+        return None, None
 
     try:
         with open(filename, 'wb') as fp_media:
@@ -1537,6 +1605,172 @@ def save_media_in_form_post(media_bytes, debug: bool,
     return filename, attachment_media_type
 
 
+def _remove_received_media(filename: str) -> None:
+    """Removes a partially received or unwritable media file
+    """
+    if not filename or not os.path.isfile(filename):
+        return
+    try:
+        os.remove(filename)
+    except OSError:
+        print('EX: receive_media_in_form_post unable to delete ' + filename)
+
+
+def _write_received_media(fp_media, media_bytes, filename: str):
+    """Writes bytes of media received within a http form POST.
+    Returns the file, or None if the media could not be written
+    """
+    try:
+        fp_media.write(media_bytes)
+    except OSError:
+        print('EX: receive_media_in_form_post unable to write media ' +
+              filename)
+        fp_media.close()
+        _remove_received_media(filename)
+        return None
+    return fp_media
+
+
+def receive_media_in_form_post(rfile, length: int, boundary: str,
+                               name: str, filename_base: str,
+                               debug: bool) -> (bytes, str, str):
+    """Reads a http form POST in chunks, writing the media for the given
+    field name directly to file so that it is never held in memory.
+    Returns the bytes of the other fields, the media filename and
+    the attachment media type.
+    If the connection closes before the whole POST has been received
+    then the returned bytes are None. Errors when reading are raised
+    """
+    media_start = b'Content-Disposition: form-data; name="' + \
+        name.encode('utf8', 'ignore') + b'";'
+    media_end = b'\r\n--' + boundary.encode('utf8', 'ignore')
+    post_bytes = b''
+    buffer = b''
+    remaining = length
+    fp_media = None
+    filename = None
+    attachment_media_type = None
+    detected_extension = None
+    in_media = False
+    media_found = False
+    complete = False
+    try:
+        while True:
+            if remaining > 0:
+                chunk = rfile.read(min(remaining, FORM_POST_CHUNK_SIZE))
+                if not chunk:
+                    print('WARN: receive_media_in_form_post connection ' +
+                          'closed before the POST was received')
+                    break
+                remaining -= len(chunk)
+                buffer += chunk
+            finished = remaining <= 0
+
+            if in_media:
+                end_pos = buffer.find(media_end)
+                if end_pos == -1:
+                    # keep enough bytes to find an ending which
+                    # spans two chunks
+                    write_len = len(buffer) - len(media_end)
+                    if finished:
+                        write_len = len(buffer)
+                    if write_len > 0:
+                        if fp_media:
+                            fp_media = \
+                                _write_received_media(fp_media,
+                                                      buffer[:write_len],
+                                                      filename)
+                        buffer = buffer[write_len:]
+                    if finished:
+                        complete = True
+                        break
+                    continue
+                if fp_media:
+                    media_bytes = buffer[:end_pos]
+                    fp_media = \
+                        _write_received_media(fp_media, media_bytes,
+                                              filename)
+                    if fp_media:
+                        fp_media.close()
+                        fp_media = None
+                buffer = buffer[end_pos:]
+                in_media = False
+
+            start_pos = -1
+            if not media_found:
+                start_pos = buffer.find(media_start)
+            if start_pos == -1:
+                # the rest are text fields
+                keep_len = 0
+                if not media_found and not finished:
+                    keep_len = len(media_start)
+                if len(buffer) > keep_len:
+                    post_bytes += buffer[:len(buffer) - keep_len]
+                    buffer = buffer[len(buffer) - keep_len:]
+                if finished:
+                    complete = True
+                    break
+                continue
+
+            # the headers of the media field
+            post_bytes += buffer[:start_pos]
+            buffer = buffer[start_pos:]
+            headers_end = buffer.find(b'\r\n\r\n')
+            if headers_end == -1:
+                if finished:
+                    complete = True
+                    break
+                continue
+            media_found = True
+            in_media = True
+            media_location, _, detected_extension, attachment_media_type = \
+                _form_post_media_type(buffer[:headers_end + 2])
+            buffer = buffer[headers_end + 4:]
+            if media_location == -1 or not filename_base:
+                # no file was selected, or it isn't a known type
+                attachment_media_type = None
+                continue
+            filename = filename_base + '.' + detected_extension
+            _remove_other_media_formats(filename, detected_extension, debug)
+            try:
+                fp_media = open(filename, 'wb')
+            except OSError:
+                print('EX: receive_media_in_form_post unable to open ' +
+                      filename)
+    finally:
+        if fp_media:
+            fp_media.close()
+        if not complete:
+            # don't leave a partial upload
+            _remove_received_media(filename)
+
+    if not complete:
+        return None, None, None
+    if not media_found:
+        save_media_in_form_post(None, debug, filename_base)
+        return post_bytes, None, None
+    if not filename or not os.path.isfile(filename):
+        return post_bytes, None, None
+
+    if detected_extension in ('svg', 'csv'):
+        media_bytes = b''
+        try:
+            with open(filename, 'rb') as fp_media:
+                media_bytes = fp_media.read()
+        except OSError:
+            print('EX: receive_media_in_form_post unable to read ' +
+                  filename)
+        if not _valid_form_post_media(media_bytes, detected_extension):
+            try:
+                os.remove(filename)
+            except OSError:
+                print('EX: receive_media_in_form_post unable to delete ' +
+                      filename)
+            return post_bytes, None, None
+    print('Uploaded media file written: ' + filename)
+    return post_bytes, filename, attachment_media_type
+
+
 def combine_textarea_lines(text: str) -> str:
     """Combines separate lines
     """
@@ -103,7 +103,7 @@ def blocked_user_agent(calling_domain: str, agent_str: str,
                        user_agents_blocked: [],
                        blocked_cache_last_updated,
                        base_dir: str,
-                       blocked_cache: [],
+                       blocked_cache: {},
                        blocked_cache_update_secs: int,
                        crawlers_allowed: [],
                        known_bots: []):
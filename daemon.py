@@ -12,6 +12,7 @@ import copy
 import sys
 import json
 import time
+import threading
 import urllib.parse
 import datetime
 from socket import error as SocketError
@@ -21,6 +22,9 @@ from functools import partial
 from hashlib import sha256
 from hashlib import md5
 from shutil import copyfile
+from boxindex import box_index_add
+from boxindex import box_index_contains_text
+from boxindex import box_index_version
 from session import site_is_verified
 from session import create_session
 from session import get_session_for_domain
@@ -84,6 +88,8 @@ from person import can_remove_post
 from person import person_snooze
 from person import person_unsnooze
 from posts import get_max_profile_posts
+from posts import run_delivery_queue
+from posts import run_delivery_queue_watchdog
 from posts import set_max_profile_posts
 from posts import get_post_expiry_keep_dms
 from posts import set_post_expiry_keep_dms
@@ -123,7 +129,7 @@ from follow import get_following_feed
 from follow import send_follow_request
 from follow import unfollow_account
 from follow import create_initial_last_seen
-from skills import get_skills_from_list
+from utils import get_skills_from_list
 from skills import no_of_actor_skills
 from skills import actor_has_skill
 from skills import actor_skill_value
@@ -269,6 +275,9 @@ from languages import get_understood_languages
 from like import update_likes_collection
 from reaction import update_reaction_collection
 from utils import load_reverse_timeline
+from utils import get_timeline_page
+from utils import store_timeline_page
+from utils import clear_timeline_pages
 from utils import save_reverse_timeline
 from utils import load_min_images_for_accounts
 from utils import set_minimize_all_images
@@ -342,6 +351,7 @@ from utils import dangerous_markup
 from utils import refresh_newswire
 from utils import is_image_file
 from utils import has_group_type
+from utils import person_cache_pub_keys
 from manualapprove import manual_deny_follow_request_thread
 from manualapprove import manual_approve_follow_request_thread
 from announce import create_announce
@@ -353,11 +363,13 @@ from content import replace_emoji_from_tags
 from content import add_html_tags
 from content import extract_media_in_form_post
 from content import save_media_in_form_post
+from content import receive_media_in_form_post
 from content import extract_text_fields_in_post
 from cache import check_for_changed_actor
 from cache import store_person_in_cache
 from cache import get_person_from_cache
 from cache import get_person_pub_key
+from cache import set_person_cache_limit
 from httpsig import verify_post_headers
 from theme import reset_theme_designer_settings
 from theme import set_theme_from_designer
@@ -412,6 +424,14 @@ from webapp_likers import html_likers_of_post
 from crawlers import update_known_crawlers
 from crawlers import blocked_user_agent
 from crawlers import load_known_web_bots
+from admission import admission_post_type
+from admission import admission_client
+from admission import admission_reverse_proxies
+from admission import admit_request
+from routes import STATIC_GET_ROUTES
+from routes import static_get_route
+from routes import users_get_route
+from routes import post_route
 from qrcode import save_domain_qrcode
 from importFollowing import run_import_following_watchdog
 from maps import map_format_from_tagmaps_path
@@ -522,17 +542,11 @@ class PubServer(BaseHTTPRequestHandler):
         id_str = edited_postid.split('/')[-1]
         index_filename = \
             acct_dir(base_dir, nickname, domain) + '/' + box_name + '.index'
-        if not text_in_file(id_str, index_filename):
-            try:
-                with open(index_filename, 'r+',
-                          encoding='utf-8') as fp_index:
-                    content = fp_index.read()
-                    if id_str + '\n' not in content:
-                        fp_index.seek(0, 0)
-                        fp_index.write(id_str + '\n' + content)
-            except OSError as ex:
+        if not box_index_contains_text(index_filename, id_str):
+            if not box_index_add(self.server.box_index_cache,
+                                 index_filename, id_str):
                 print('WARN: Failed to write index after edit ' +
-                      index_filename + ' ' + str(ex))
+                      index_filename)
 
     def _convert_domains(self, calling_domain, referer_domain,
                          msg_str: str) -> str:
@@ -690,7 +704,8 @@ class PubServer(BaseHTTPRequestHandler):
                                     curr_session, proxy_type):
                 post_filename = \
                     locate_post(self.server.base_dir, nickname,
-                                self.server.domain, message_id)
+                                self.server.domain, message_id, False,
+                                self.server.recent_posts_cache)
                 if post_filename:
                     post_json_object = load_json(post_filename)
                     if post_json_object:
@@ -892,10 +907,11 @@ class PubServer(BaseHTTPRequestHandler):
             return False
 
         # verify the GET request without any digest
+        pub_key_cache = person_cache_pub_keys(self.server.person_cache)
         if verify_post_headers(self.server.http_prefix,
-                               self.server.domain_full,
                                pub_key, self.headers,
-                               self.path, True, None, '', self.server.debug):
+                               self.path, True, None, '', self.server.debug,
+                               False, pub_key_cache):
             return True
 
         if self.server.debug:
@@ -1901,7 +1917,6 @@ class PubServer(BaseHTTPRequestHandler):
             self._503()
             print('INBOX: ' +
                   'message arrived but currently restarting inbox queue')
-            self.server.postreq_busy = False
             return 2
 
         # check that the incoming message has a fully recognized
@@ -1912,7 +1927,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('INBOX: ' +
                   'message arriving at inbox queue has no valid context')
             self._400()
-            self.server.postreq_busy = False
             return 3
 
         # check for blocked domains so that they can be rejected early
@@ -1922,7 +1936,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not has_actor(message_json, self.server.debug):
             print('INBOX: message arriving at inbox queue has no actor')
             self._400()
-            self.server.postreq_busy = False
             return 3
 
         # actor should be a string
@@ -1932,7 +1945,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('INBOX: ' +
                   'actor should be a string ' + str(message_json['actor']))
             self._400()
-            self.server.postreq_busy = False
             return 3
 
         # check that some additional fields are strings
@@ -1947,7 +1959,6 @@ class PubServer(BaseHTTPRequestHandler):
                       'id, type and published fields should be strings ' +
                       check_field + ' ' + str(message_json[check_field]))
                 self._400()
-                self.server.postreq_busy = False
                 return 3
 
         # check that to/cc fields are lists
@@ -1961,7 +1972,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('INBOX: To and Cc fields should be strings ' +
                       check_field + ' ' + str(message_json[check_field]))
                 self._400()
-                self.server.postreq_busy = False
                 return 3
 
         if has_object_dict(message_json):
@@ -1979,7 +1989,6 @@ class PubServer(BaseHTTPRequestHandler):
                           check_field + ' should be a string ' +
                           str(message_json['object'][check_field]))
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
             # check that some fields are lists
             if debug:
@@ -1993,7 +2002,6 @@ class PubServer(BaseHTTPRequestHandler):
                           check_field + ' should be a list ' +
                           str(message_json['object'][check_field]))
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
             # check that the content does not contain impossibly long urls
             if message_json['object'].get('content'):
@@ -2002,7 +2010,6 @@ class PubServer(BaseHTTPRequestHandler):
                     print('INBOX: content contains urls which are too long ' +
                           message_json['actor'])
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
             # check that the summary does not contain links
             if message_json['object'].get('summary'):
@@ -2011,14 +2018,12 @@ class PubServer(BaseHTTPRequestHandler):
                           message_json['actor'] + ' ' +
                           message_json['object']['summary'])
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
                 if '://' in message_json['object']['summary']:
                     print('INBOX: summary should not contain links ' +
                           message_json['actor'] + ' ' +
                           message_json['object']['summary'])
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
 
         # actor should look like a url
@@ -2029,7 +2034,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('INBOX: POST actor does not look like a url ' +
                   message_json['actor'])
             self._400()
-            self.server.postreq_busy = False
             return 3
 
         # sent by an actor on a local network address?
@@ -2042,7 +2046,6 @@ class PubServer(BaseHTTPRequestHandler):
                     print('INBOX: POST actor contains local network address ' +
                           message_json['actor'])
                     self._400()
-                    self.server.postreq_busy = False
                     return 3
 
         message_domain, _ = \
@@ -2060,7 +2063,6 @@ class PubServer(BaseHTTPRequestHandler):
                              self.server.blocked_cache):
             print('INBOX: POST from blocked domain ' + message_domain)
             self._400()
-            self.server.postreq_busy = False
             return 3
 
         # if the inbox queue is full then return a busy code
@@ -2077,7 +2079,6 @@ class PubServer(BaseHTTPRequestHandler):
             clear_queue_items(self.server.base_dir, self.server.inbox_queue)
             if not self.server.restart_inbox_queue_in_progress:
                 self.server.restart_inbox_queue = True
-            self.server.postreq_busy = False
             return 2
 
         # Convert the headers needed for signature verification to dict
@@ -2143,11 +2144,13 @@ class PubServer(BaseHTTPRequestHandler):
                                      self.server.debug,
                                      self.server.blocked_cache,
                                      self.server.system_language,
-                                     mitm)
+                                     mitm, self.server.filters_cache)
         if queue_filename:
             # add json to the queue
             if queue_filename not in self.server.inbox_queue:
                 self.server.inbox_queue.append(queue_filename)
+            # wake up the inbox queue thread
+            self.server.inbox_queue_event.set()
             if self.server.debug:
                 time_diff = int((time.time() - begin_save_time) * 1000)
                 if time_diff > 200:
@@ -2155,10 +2158,8 @@ class PubServer(BaseHTTPRequestHandler):
                           queue_filename + ' took ' + str(time_diff) + ' mS')
             self.send_response(201)
             self.end_headers()
-            self.server.postreq_busy = False
             return 0
         self._503()
-        self.server.postreq_busy = False
         return 1
 
     def _is_authorized(self) -> bool:
@@ -2214,7 +2215,7 @@ class PubServer(BaseHTTPRequestHandler):
         if self.headers.get('Authorization'):
             if authorize(self.server.base_dir, self.path,
                          self.headers['Authorization'],
-                         self.server.debug):
+                         self.server.debug, self.server.auth_cache):
                 return True
             print('AUTH: C2S Basic auth did not authorize ' +
                   self.headers['Authorization'])
@@ -2243,7 +2244,6 @@ class PubServer(BaseHTTPRequestHandler):
         # attempts, to mitigate brute force
         if int(time.time()) - self.server.last_login_failure < 5:
             self._503()
-            self.server.postreq_busy = False
             return
 
         # get the contents of POST containing login credentials
@@ -2251,7 +2251,6 @@ class PubServer(BaseHTTPRequestHandler):
         if length > 512:
             print('Login failed - credentials too long')
             self._401('Credentials are too long')
-            self.server.postreq_busy = False
             return
 
         try:
@@ -2264,13 +2263,11 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST login read socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST login read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         login_nickname, login_password, register = \
@@ -2282,12 +2279,10 @@ class PubServer(BaseHTTPRequestHandler):
                 print('Invalid username login: ' + login_nickname +
                       ' (system account)')
                 self._clear_login_details(login_nickname, calling_domain)
-                self.server.postreq_busy = False
                 return
             self.server.last_login_time = int(time.time())
             if register:
                 if not valid_password(login_password):
-                    self.server.postreq_busy = False
                     if calling_domain.endswith('.onion') and onion_domain:
                         self._redirect_headers('http://' + onion_domain +
                                                '/login', cookie,
@@ -2305,7 +2300,6 @@ class PubServer(BaseHTTPRequestHandler):
                 if not register_account(base_dir, http_prefix, domain, port,
                                         login_nickname, login_password,
                                         self.server.manual_follower_approval):
-                    self.server.postreq_busy = False
                     if calling_domain.endswith('.onion') and onion_domain:
                         self._redirect_headers('http://' + onion_domain +
                                                '/login', cookie,
@@ -2332,7 +2326,8 @@ class PubServer(BaseHTTPRequestHandler):
                     print('Login attempt from IP: ' + str(ip_address))
             if not authorize_basic(base_dir, '/users/' +
                                    login_nickname + '/outbox',
-                                   auth_header, False):
+                                   auth_header, False,
+                                   self.server.auth_cache):
                 print('Login failed: ' + login_nickname)
                 self._clear_login_details(login_nickname, calling_domain)
                 fail_time = int(time.time())
@@ -2343,7 +2338,6 @@ class PubServer(BaseHTTPRequestHandler):
                                              self.server.login_failure_count,
                                              fail_time,
                                              self.server.log_login_failures)
-                self.server.postreq_busy = False
                 return
             else:
                 if self.server.login_failure_count.get(ip_address):
@@ -2355,7 +2349,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
                 # login success - redirect with authorization
                 print('====== Login success: ' + login_nickname +
@@ -2427,7 +2420,6 @@ class PubServer(BaseHTTPRequestHandler):
                                            login_nickname + '/' +
                                            self.server.default_timeline,
                                            cookie_str, calling_domain)
-                self.server.postreq_busy = False
                 return
         else:
             print('WARN: No login credentials presented to /login')
@@ -2455,9 +2447,7 @@ class PubServer(BaseHTTPRequestHandler):
                     login_str = login_str[:len(login_str) - 1]
                 print(login_str)
             self._401('No login credentials were posted')
-            self.server.postreq_busy = False
         self._200()
-        self.server.postreq_busy = False
 
     def _moderator_actions(self, path: str, calling_domain: str, cookie: str,
                            base_dir: str, http_prefix: str,
@@ -2470,7 +2460,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not is_moderator(self.server.base_dir, nickname):
             self._redirect_headers(actor_str + '/moderation',
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -2485,14 +2474,12 @@ class PubServer(BaseHTTPRequestHandler):
                       'rfile.read socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST moderation_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&' in moderation_params:
@@ -2564,7 +2551,8 @@ class PubServer(BaseHTTPRequestHandler):
                                               search_handle,
                                               self.server.debug,
                                               self.server.system_language,
-                                              self.server.signing_priv_key_pem)
+                                              self.server.signing_priv_key_pem,
+                                              self.server.blocked_cache)
                     else:
                         msg = \
                             html_moderation_info(self.server.translate,
@@ -2578,7 +2566,6 @@ class PubServer(BaseHTTPRequestHandler):
                         self._login_headers('text/html',
                                             msglen, calling_domain)
                         self._write(msg)
-                    self.server.postreq_busy = False
                     return
                 if moderation_str.startswith('submitBlock'):
                     moderation_button = 'block'
@@ -2682,7 +2669,8 @@ class PubServer(BaseHTTPRequestHandler):
                         # remove a post or thread
                         post_filename = \
                             locate_post(base_dir, nickname, domain,
-                                        moderation_text)
+                                        moderation_text, False,
+                                        self.server.recent_posts_cache)
                         if post_filename:
                             if can_remove_post(base_dir, domain, port,
                                                moderation_text):
@@ -2698,7 +2686,8 @@ class PubServer(BaseHTTPRequestHandler):
                             # from the news actor
                             post_filename = \
                                 locate_post(base_dir, 'news', domain,
-                                            moderation_text)
+                                            moderation_text, False,
+                                            self.server.recent_posts_cache)
                             if post_filename:
                                 if can_remove_post(base_dir, domain, port,
                                                    moderation_text):
@@ -2712,7 +2701,6 @@ class PubServer(BaseHTTPRequestHandler):
 
         self._redirect_headers(actor_str + '/moderation',
                                cookie, calling_domain)
-        self.server.postreq_busy = False
         return
 
     def _key_shortcuts(self, calling_domain: str, cookie: str,
@@ -2738,14 +2726,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST access_keys_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST access_keys_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         access_keys_params = \
             urllib.parse.unquote_plus(access_keys_params)
@@ -2763,7 +2749,6 @@ class PubServer(BaseHTTPRequestHandler):
                     'http://' + i2p_domain + users_path + \
                     '/' + default_timeline
             self._redirect_headers(origin_path_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         save_keys = False
@@ -2800,7 +2785,6 @@ class PubServer(BaseHTTPRequestHandler):
             origin_path_str = \
                 'http://' + i2p_domain + users_path + '/' + default_timeline
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
         return
 
     def _theme_designer_edit(self, calling_domain: str, cookie: str,
@@ -2829,13 +2813,11 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST theme_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST theme_params rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         theme_params = \
             urllib.parse.unquote_plus(theme_params)
@@ -2860,7 +2842,6 @@ class PubServer(BaseHTTPRequestHandler):
                     'http://' + i2p_domain + users_path + \
                     '/' + default_timeline
             self._redirect_headers(origin_path_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         fields = {}
@@ -2941,7 +2922,6 @@ class PubServer(BaseHTTPRequestHandler):
             origin_path_str = \
                 'http://' + i2p_domain + users_path + '/' + default_timeline
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
         return
 
     def _person_options(self, path: str,
@@ -2964,7 +2944,6 @@ class PubServer(BaseHTTPRequestHandler):
                 origin_path_str = 'http://' + i2p_domain + users_path
             print('WARN: unable to find nickname in ' + origin_path_str)
             self._redirect_headers(origin_path_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -2979,14 +2958,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST options_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: ' +
                   'POST options_confirm_params rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         options_confirm_params = \
             urllib.parse.unquote_plus(options_confirm_params)
@@ -3049,7 +3026,6 @@ class PubServer(BaseHTTPRequestHandler):
                 origin_path_str = 'http://' + i2p_domain + users_path
             print('WARN: unable to find nickname in ' + options_actor)
             self._redirect_headers(origin_path_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         options_domain, options_port = get_domain_from_actor(options_actor)
@@ -3067,7 +3043,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('Viewing ' + options_actor)
             self._redirect_headers(options_actor,
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, petname submit button
@@ -3085,7 +3060,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, person notes submit button
@@ -3105,7 +3079,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, on calendar checkbox
@@ -3133,7 +3106,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, minimize images checkbox
@@ -3162,7 +3134,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, allow announces checkbox
@@ -3191,7 +3162,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, on notify checkbox
@@ -3219,7 +3189,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, permission to post to newswire
@@ -3266,7 +3235,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, permission to post to featured articles
@@ -3313,7 +3281,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, permission to post to newswire
@@ -3354,7 +3321,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(users_path_str, cookie,
                                    calling_domain)
-            self.server.postreq_busy = False
             return
 
         # person options screen, block button
@@ -3372,7 +3338,6 @@ class PubServer(BaseHTTPRequestHandler):
             self._set_headers('text/html', msglen,
                               cookie, calling_domain, False)
             self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # person options screen, unblock button
@@ -3390,7 +3355,6 @@ class PubServer(BaseHTTPRequestHandler):
             self._set_headers('text/html', msglen,
                               cookie, calling_domain, False)
             self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # person options screen, follow button
@@ -3409,7 +3373,6 @@ class PubServer(BaseHTTPRequestHandler):
             self._set_headers('text/html', msglen,
                               cookie, calling_domain, False)
             self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # person options screen, unfollow button
@@ -3427,7 +3390,6 @@ class PubServer(BaseHTTPRequestHandler):
             self._set_headers('text/html', msglen,
                               cookie, calling_domain, False)
             self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # person options screen, DM button
@@ -3507,7 +3469,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers('text/html', msglen,
                                   cookie, calling_domain, False)
                 self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # person options screen, Info button
@@ -3527,14 +3488,14 @@ class PubServer(BaseHTTPRequestHandler):
                                       options_actor,
                                       self.server.debug,
                                       self.server.system_language,
-                                      signing_priv_key_pem)
+                                      signing_priv_key_pem,
+                                      self.server.blocked_cache)
                 if msg:
                     msg = msg.encode('utf-8')
                     msglen = len(msg)
                     self._set_headers('text/html', msglen,
                                       cookie, calling_domain, False)
                     self._write(msg)
-                self.server.postreq_busy = False
                 return
             self._404()
             return
@@ -3559,7 +3520,6 @@ class PubServer(BaseHTTPRequestHandler):
                     '?page=' + str(page_number)
                 self._redirect_headers(actor_path_str, cookie,
                                        calling_domain)
-                self.server.postreq_busy = False
                 return
 
         # person options screen, unsnooze button
@@ -3582,7 +3542,6 @@ class PubServer(BaseHTTPRequestHandler):
                     '?page=' + str(page_number)
                 self._redirect_headers(actor_path_str, cookie,
                                        calling_domain)
-                self.server.postreq_busy = False
                 return
 
         # person options screen, report button
@@ -3662,7 +3621,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers('text/html', msglen,
                                   cookie, calling_domain, False)
                 self._write(msg)
-            self.server.postreq_busy = False
             return
 
         # redirect back from person options screen
@@ -3671,7 +3629,6 @@ class PubServer(BaseHTTPRequestHandler):
         elif calling_domain.endswith('.i2p') and i2p_domain:
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
         return
 
     def _unfollow_confirm(self, calling_domain: str, cookie: str,
@@ -3688,7 +3645,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not follower_nickname:
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -3703,14 +3659,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST follow_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST follow_confirm_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in follow_confirm_params:
@@ -3723,7 +3677,6 @@ class PubServer(BaseHTTPRequestHandler):
             if not following_nickname:
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             following_domain, following_port = \
                 get_domain_from_actor(following_actor)
@@ -3771,7 +3724,6 @@ class PubServer(BaseHTTPRequestHandler):
         elif (calling_domain.endswith('.i2p') and i2p_domain):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _follow_confirm(self, calling_domain: str, cookie: str,
                         path: str, base_dir: str, http_prefix: str,
@@ -3787,7 +3739,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not follower_nickname:
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -3802,14 +3753,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST follow_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST follow_confirm_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitView=' in follow_confirm_params:
@@ -3819,7 +3768,6 @@ class PubServer(BaseHTTPRequestHandler):
             if '&' in following_actor:
                 following_actor = following_actor.split('&')[0]
             self._redirect_headers(following_actor, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in follow_confirm_params:
@@ -3832,7 +3780,6 @@ class PubServer(BaseHTTPRequestHandler):
             if not following_nickname:
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             following_domain, following_port = \
                 get_domain_from_actor(following_actor)
@@ -3915,7 +3862,6 @@ class PubServer(BaseHTTPRequestHandler):
                       blocking_actor)
                 self._redirect_headers(origin_path_str,
                                        cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
             blocking_domain, blocking_port = \
                 get_domain_from_actor(blocking_actor)
@@ -3943,7 +3889,6 @@ class PubServer(BaseHTTPRequestHandler):
         elif (calling_domain.endswith('.i2p') and i2p_domain):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _block_confirm(self, calling_domain: str, cookie: str,
                        path: str, base_dir: str, http_prefix: str,
@@ -3964,7 +3909,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('WARN: unable to find nickname in ' + origin_path_str)
             self._redirect_headers(origin_path_str,
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -3979,14 +3923,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST block_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST block_confirm_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in block_confirm_params:
@@ -4004,7 +3946,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('WARN: unable to find nickname in ' + blocking_actor)
                 self._redirect_headers(origin_path_str,
                                        cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
             blocking_domain, blocking_port = \
                 get_domain_from_actor(blocking_actor)
@@ -4032,7 +3973,6 @@ class PubServer(BaseHTTPRequestHandler):
         elif (calling_domain.endswith('.i2p') and i2p_domain):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str, cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _unblock_confirm(self, calling_domain: str, cookie: str,
                          path: str, base_dir: str, http_prefix: str,
@@ -4052,7 +3992,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('WARN: unable to find nickname in ' + origin_path_str)
             self._redirect_headers(origin_path_str,
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         length = int(self.headers['Content-length'])
@@ -4067,14 +4006,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST block_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST block_confirm_params rfile.read failed, ' +
                   str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in block_confirm_params:
@@ -4092,7 +4029,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('WARN: unable to find nickname in ' + blocking_actor)
                 self._redirect_headers(origin_path_str,
                                        cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
             blocking_domain, blocking_port = \
                 get_domain_from_actor(blocking_actor)
@@ -4120,7 +4056,6 @@ class PubServer(BaseHTTPRequestHandler):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _receive_search_query(self, calling_domain: str, cookie: str,
                               authorized: bool, path: str,
@@ -4156,20 +4091,17 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST search_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST search_params rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         if 'submitBack=' in search_params:
             # go back on search screen
             self._redirect_headers(actor_str + '/' +
                                    self.server.default_timeline,
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
         if 'searchtext=' in search_params:
             search_str = search_params.split('searchtext=')[1]
@@ -4189,7 +4121,6 @@ class PubServer(BaseHTTPRequestHandler):
                 if not nickname:
                     self.send_response(400)
                     self.end_headers()
-                    self.server.postreq_busy = False
                     return
 
                 # hashtag search
@@ -4236,7 +4167,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             elif (search_str.startswith('*') or
                   search_str.endswith(' skill')):
@@ -4265,7 +4195,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             elif (search_str.startswith("'") or
                   search_str.endswith(' history') or
@@ -4300,7 +4229,6 @@ class PubServer(BaseHTTPRequestHandler):
                 if not nickname:
                     self.send_response(400)
                     self.end_headers()
-                    self.server.postreq_busy = False
                     return
                 search_str = search_str.replace("'", '', 1).strip()
                 timezone = None
@@ -4347,7 +4275,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             elif (search_str.startswith('-') or
                   search_str.endswith(' in my saved items') or
@@ -4383,7 +4310,6 @@ class PubServer(BaseHTTPRequestHandler):
                 if not nickname:
                     self.send_response(400)
                     self.end_headers()
-                    self.server.postreq_busy = False
                     return
                 search_str = search_str.replace('-', '', 1).strip()
                 timezone = None
@@ -4430,7 +4356,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             elif ('@' in search_str or
                   ('://' in search_str and
@@ -4442,14 +4367,12 @@ class PubServer(BaseHTTPRequestHandler):
                         self._get_instance_url(calling_domain) + users_path
                     self._redirect_headers(actor_str + '/search',
                                            cookie, calling_domain)
-                    self.server.postreq_busy = False
                     return
                 # profile search
                 nickname = get_nickname_from_actor(actor_str)
                 if not nickname:
                     self.send_response(400)
                     self.end_headers()
-                    self.server.postreq_busy = False
                     return
                 profile_path_str = path.replace('/searchhandle', '')
 
@@ -4461,7 +4384,6 @@ class PubServer(BaseHTTPRequestHandler):
                         if not search_nickname:
                             self.send_response(400)
                             self.end_headers()
-                            self.server.postreq_busy = False
                             return
                         search_domain, search_port = \
                             get_domain_from_actor(search_str)
@@ -4487,7 +4409,6 @@ class PubServer(BaseHTTPRequestHandler):
                                                 curr_session,
                                                 curr_proxy_type)
                     if not curr_session:
-                        self.server.postreq_busy = False
                         return
 
                     # get the avatar url for the actor
@@ -4554,7 +4475,6 @@ class PubServer(BaseHTTPRequestHandler):
                                                 curr_session,
                                                 curr_proxy_type)
                     if not curr_session:
-                        self.server.postreq_busy = False
                         return
 
                     bold_reading = False
@@ -4597,20 +4517,19 @@ class PubServer(BaseHTTPRequestHandler):
                                                   self.server.i2p_domain,
                                                   bold_reading,
                                                   self.server.dogwhistles,
-                                                  min_images_for_accounts)
+                                                  min_images_for_accounts,
+                                                  self.server.blocked_cache)
                 if profile_str:
                     msg = profile_str.encode('utf-8')
                     msglen = len(msg)
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
                 actor_str = \
                     self._get_instance_url(calling_domain) + users_path
                 self._redirect_headers(actor_str + '/search',
                                        cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
             elif (search_str.startswith(':') or
                   search_str.endswith(' emoji')):
@@ -4632,7 +4551,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             elif search_str.startswith('.'):
                 # wanted items search
@@ -4657,7 +4575,6 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
             else:
                 # shared items search
@@ -4682,13 +4599,11 @@ class PubServer(BaseHTTPRequestHandler):
                     self._login_headers('text/html',
                                         msglen, calling_domain)
                     self._write(msg)
-                    self.server.postreq_busy = False
                     return
         actor_str = self._get_instance_url(calling_domain) + users_path
         self._redirect_headers(actor_str + '/' +
                                self.server.default_timeline,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _receive_vote(self, calling_domain: str, cookie: str,
                       path: str, http_prefix: str, domain_full: str,
@@ -4721,7 +4636,6 @@ class PubServer(BaseHTTPRequestHandler):
                 '?page=' + str(page_number)
             self._redirect_headers(actor_path_str,
                                    cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         # get the parameters
@@ -4736,13 +4650,11 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST question_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST question_params rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         question_params = question_params.replace('+', ' ')
@@ -4774,7 +4686,6 @@ class PubServer(BaseHTTPRequestHandler):
             '?page=' + str(page_number)
         self._redirect_headers(actor_path_str, cookie,
                                calling_domain)
-        self.server.postreq_busy = False
         return
 
     def _receive_image(self, length: int, path: str, base_dir: str,
@@ -4787,18 +4698,15 @@ class PubServer(BaseHTTPRequestHandler):
                       'post image to outbox')
             self.send_response(403)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         path_users_section = path.split('/users/')[1]
         if '/' not in path_users_section:
             self._404()
-            self.server.postreq_busy = False
             return
         self.post_from_nickname = path_users_section.split('/')[0]
         accounts_dir = acct_dir(base_dir, self.post_from_nickname, domain)
         if not os.path.isdir(accounts_dir):
             self._404()
-            self.server.postreq_busy = False
             return
 
         try:
@@ -4811,13 +4719,11 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST media_bytes socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST media_bytes rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         media_filename_base = accounts_dir + '/upload'
@@ -4833,7 +4739,6 @@ class PubServer(BaseHTTPRequestHandler):
             print('DEBUG: image saved to ' + media_filename)
         self.send_response(201)
         self.end_headers()
-        self.server.postreq_busy = False
 
     def _remove_share(self, calling_domain: str, cookie: str,
                       authorized: bool, path: str,
@@ -4857,14 +4762,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST remove_share_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST remove_share_confirm_params ' +
                   'rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in remove_share_confirm_params and authorized:
@@ -4883,7 +4786,6 @@ class PubServer(BaseHTTPRequestHandler):
             if not actor_nickname:
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             if actor == share_actor or actor == admin_actor or \
                is_moderator(base_dir, actor_nickname):
@@ -4904,7 +4806,6 @@ class PubServer(BaseHTTPRequestHandler):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str + '/tlshares',
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _remove_wanted(self, calling_domain: str, cookie: str,
                        authorized: bool, path: str,
@@ -4929,14 +4830,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST remove_share_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST remove_share_confirm_params ' +
                   'rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if '&submitYes=' in remove_share_confirm_params and authorized:
@@ -4955,7 +4854,6 @@ class PubServer(BaseHTTPRequestHandler):
             if not actor_nickname:
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             if actor == share_actor or actor == admin_actor or \
                is_moderator(base_dir, actor_nickname):
@@ -4976,7 +4874,6 @@ class PubServer(BaseHTTPRequestHandler):
             origin_path_str = 'http://' + i2p_domain + users_path
         self._redirect_headers(origin_path_str + '/tlwanted',
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _receive_remove_post(self, calling_domain: str, cookie: str,
                              path: str, base_dir: str, http_prefix: str,
@@ -5004,14 +4901,12 @@ class PubServer(BaseHTTPRequestHandler):
                 print('EX: POST remove_post_confirm_params socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST remove_post_confirm_params ' +
                   'rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         if '&submitYes=' in remove_post_confirm_params:
             remove_post_confirm_params = \
@@ -5087,7 +4982,6 @@ class PubServer(BaseHTTPRequestHandler):
                 origin_path_str + '/outbox?page=' + page_number_str
             self._redirect_headers(actor_path_str,
                                    cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _links_update(self, calling_domain: str, cookie: str,
                       path: str, base_dir: str, debug: bool,
@@ -5116,7 +5010,6 @@ class PubServer(BaseHTTPRequestHandler):
             else:
                 print('WARN: nickname is not a moderator' + actor_str)
             self._redirect_headers(actor_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if self.headers.get('Content-length'):
@@ -5126,7 +5019,6 @@ class PubServer(BaseHTTPRequestHandler):
             if length > self.server.max_post_length:
                 print('Maximum links data length exceeded ' + str(length))
                 self._redirect_headers(actor_str, cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -5141,13 +5033,11 @@ class PubServer(BaseHTTPRequestHandler):
                       'from http form POST')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: failed to read bytes for POST, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         links_filename = base_dir + '/accounts/links.txt'
@@ -5257,7 +5147,6 @@ class PubServer(BaseHTTPRequestHandler):
         # redirect back to the default timeline
         self._redirect_headers(actor_str + '/' + default_timeline,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _set_hashtag_category(self, calling_domain: str, cookie: str,
                               path: str, base_dir: str,
@@ -5304,7 +5193,6 @@ class PubServer(BaseHTTPRequestHandler):
             else:
                 print('WARN: nickname is not a moderator' + actor_str)
             self._redirect_headers(tag_screen_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if self.headers.get('Content-length'):
@@ -5314,7 +5202,6 @@ class PubServer(BaseHTTPRequestHandler):
             if length > self.server.max_post_length:
                 print('Maximum links data length exceeded ' + str(length))
                 self._redirect_headers(tag_screen_str, cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -5329,13 +5216,11 @@ class PubServer(BaseHTTPRequestHandler):
                       'from http form POST')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: failed to read bytes for POST, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if not boundary:
@@ -5366,7 +5251,6 @@ class PubServer(BaseHTTPRequestHandler):
         # redirect back to the default timeline
         self._redirect_headers(tag_screen_str,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _newswire_update(self, calling_domain: str, cookie: str,
                          path: str, base_dir: str,
@@ -5395,7 +5279,6 @@ class PubServer(BaseHTTPRequestHandler):
             else:
                 print('WARN: nickname is not a moderator' + actor_str)
             self._redirect_headers(actor_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if self.headers.get('Content-length'):
@@ -5405,7 +5288,6 @@ class PubServer(BaseHTTPRequestHandler):
             if length > self.server.max_post_length:
                 print('Maximum newswire data length exceeded ' + str(length))
                 self._redirect_headers(actor_str, cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -5420,13 +5302,11 @@ class PubServer(BaseHTTPRequestHandler):
                       'from http form POST')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: failed to read bytes for POST, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         newswire_filename = base_dir + '/accounts/newswire.txt'
@@ -5553,7 +5433,6 @@ class PubServer(BaseHTTPRequestHandler):
         # redirect back to the default timeline
         self._redirect_headers(actor_str + '/' + default_timeline,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _citations_update(self, calling_domain: str, cookie: str,
                           path: str, base_dir: str,
@@ -5566,7 +5445,6 @@ class PubServer(BaseHTTPRequestHandler):
         actor_str = self._get_instance_url(calling_domain) + users_path
         nickname = get_nickname_from_actor(actor_str)
         if not nickname:
-            self.server.postreq_busy = False
             return
 
         citations_filename = \
@@ -5591,7 +5469,6 @@ class PubServer(BaseHTTPRequestHandler):
             if length > self.server.max_post_length:
                 print('Maximum citations data length exceeded ' + str(length))
                 self._redirect_headers(actor_str, cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
             try:
@@ -5607,14 +5484,12 @@ class PubServer(BaseHTTPRequestHandler):
                           'from http form citations screen POST')
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             except ValueError as ex:
                 print('EX: failed to read bytes for ' +
                       'citations screen POST, ' + str(ex))
                 self.send_response(400)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
             # extract all of the text fields into a dict
@@ -5644,7 +5519,6 @@ class PubServer(BaseHTTPRequestHandler):
         # redirect back to the default timeline
         self._redirect_headers(actor_str + '/newblog',
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _news_post_edit(self, calling_domain: str, cookie: str,
                         path: str, base_dir: str,
@@ -5677,7 +5551,6 @@ class PubServer(BaseHTTPRequestHandler):
             else:
                 self._redirect_headers(actor_str + '/tlnews',
                                        cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if self.headers.get('Content-length'):
@@ -5692,7 +5565,6 @@ class PubServer(BaseHTTPRequestHandler):
                 else:
                     self._redirect_headers(actor_str + '/tlnews',
                                            cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -5707,13 +5579,11 @@ class PubServer(BaseHTTPRequestHandler):
                       'from http form POST')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: failed to read bytes for POST, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if not boundary:
@@ -5738,7 +5608,8 @@ class PubServer(BaseHTTPRequestHandler):
                 # load the post
                 post_filename = \
                     locate_post(base_dir, nickname, domain,
-                                news_post_url)
+                                news_post_url, False,
+                                self.server.recent_posts_cache)
                 if post_filename:
                     post_json_object = load_json(post_filename)
                     # update the content and title
@@ -5786,7 +5657,6 @@ class PubServer(BaseHTTPRequestHandler):
         else:
             self._redirect_headers(actor_str + '/tlnews',
                                    cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _profile_edit(self, calling_domain: str, cookie: str,
                       path: str, base_dir: str, http_prefix: str,
@@ -5814,7 +5684,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not nickname:
             print('WARN: nickname not found in ' + actor_str)
             self._redirect_headers(actor_str, cookie, calling_domain)
-            self.server.postreq_busy = False
             return
 
         if self.headers.get('Content-length'):
@@ -5825,7 +5694,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('Maximum profile data length exceeded ' +
                       str(length))
                 self._redirect_headers(actor_str, cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -5840,13 +5708,11 @@ class PubServer(BaseHTTPRequestHandler):
                       'from http form POST')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: failed to read bytes for POST, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         admin_nickname = get_config_param(self.server.base_dir, 'admin')
@@ -6006,7 +5872,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('submitExportTheme path=' + theme_download_path)
                 self._redirect_headers(theme_download_path,
                                        cookie, calling_domain)
-                self.server.postreq_busy = False
                 return
 
             # extract all of the text fields into a dict
@@ -7674,13 +7539,11 @@ class PubServer(BaseHTTPRequestHandler):
                                                nickname, domain)
                             self._clear_login_details(nickname,
                                                       calling_domain)
-                            self.server.postreq_busy = False
                             return
 
         # redirect back to the profile screen
         self._redirect_headers(actor_str + redirect_path,
                                cookie, calling_domain)
-        self.server.postreq_busy = False
 
     def _progressive_web_app_manifest(self, base_dir: str,
                                       calling_domain: str,
@@ -8383,7 +8246,8 @@ class PubServer(BaseHTTPRequestHandler):
                                     self.server.news_instance,
                                     authorized,
                                     access_keys, is_group,
-                                    self.server.theme_name)
+                                    self.server.theme_name,
+                                    self.server.blocked_cache)
             if msg:
                 msg = msg.encode('utf-8')
                 msglen = len(msg)
@@ -9068,7 +8932,8 @@ class PubServer(BaseHTTPRequestHandler):
             announce_filename = \
                 save_post_to_box(base_dir, http_prefix, announce_id,
                                  self.post_to_nickname, domain_full,
-                                 announce_json, 'outbox')
+                                 announce_json, 'outbox',
+                                 self.server.recent_posts_cache)
 
             # clear the icon from the cache so that it gets updated
             if self.server.iconsCache.get('repeat.png'):
@@ -9260,7 +9125,8 @@ class PubServer(BaseHTTPRequestHandler):
             if nickname:
                 if domain_full + '/users/' + nickname + '/' in announce_url:
                     post_filename = \
-                        locate_post(base_dir, nickname, domain, announce_url)
+                        locate_post(base_dir, nickname, domain, announce_url,
+                                    False, recent_posts_cache)
             if post_filename:
                 delete_post(base_dir, http_prefix,
                             nickname, domain, post_filename,
@@ -9620,7 +9486,8 @@ class PubServer(BaseHTTPRequestHandler):
         # directly like the post file
         if not liked_post_filename:
             liked_post_filename = \
-                locate_post(base_dir, self.post_to_nickname, domain, like_url)
+                locate_post(base_dir, self.post_to_nickname, domain, like_url,
+                            False, self.server.recent_posts_cache)
         if liked_post_filename:
             recent_posts_cache = self.server.recent_posts_cache
             liked_post_json = load_json(liked_post_filename, 0, 1)
@@ -9829,7 +9696,8 @@ class PubServer(BaseHTTPRequestHandler):
         # directly undo the like within the post file
         if not liked_post_filename:
             liked_post_filename = locate_post(base_dir, self.post_to_nickname,
-                                              domain, like_url)
+                                              domain, like_url, False,
+                                              self.server.recent_posts_cache)
         if liked_post_filename:
             recent_posts_cache = self.server.recent_posts_cache
             liked_post_json = load_json(liked_post_filename, 0, 1)
@@ -10044,7 +9912,8 @@ class PubServer(BaseHTTPRequestHandler):
         if not reaction_post_filename:
             reaction_post_filename = \
                 locate_post(base_dir, self.post_to_nickname, domain,
-                            reaction_url)
+                            reaction_url, False,
+                            self.server.recent_posts_cache)
         if reaction_post_filename:
             recent_posts_cache = self.server.recent_posts_cache
             reaction_post_json = load_json(reaction_post_filename, 0, 1)
@@ -10273,7 +10142,8 @@ class PubServer(BaseHTTPRequestHandler):
         if not reaction_post_filename:
             reaction_post_filename = \
                 locate_post(base_dir, self.post_to_nickname, domain,
-                            reaction_url)
+                            reaction_url, False,
+                            self.server.recent_posts_cache)
         if reaction_post_filename:
             recent_posts_cache = self.server.recent_posts_cache
             reaction_post_json = load_json(reaction_post_filename, 0, 1)
@@ -10415,7 +10285,8 @@ class PubServer(BaseHTTPRequestHandler):
         post_json_object = None
         reaction_post_filename = \
             locate_post(base_dir,
-                        self.post_to_nickname, domain, reaction_url)
+                        self.post_to_nickname, domain, reaction_url, False,
+                        self.server.recent_posts_cache)
         if reaction_post_filename:
             post_json_object = load_json(reaction_post_filename)
         if not reaction_post_filename or not post_json_object:
@@ -10550,7 +10421,8 @@ class PubServer(BaseHTTPRequestHandler):
         if self.server.iconsCache.get('bookmark.png'):
             del self.server.iconsCache['bookmark.png']
         bookmark_filename = \
-            locate_post(base_dir, self.post_to_nickname, domain, bookmark_url)
+            locate_post(base_dir, self.post_to_nickname, domain, bookmark_url,
+                        False, self.server.recent_posts_cache)
         if bookmark_filename:
             print('Regenerating html post for changed bookmark')
             bookmark_post_json = load_json(bookmark_filename, 0, 1)
@@ -10714,7 +10586,8 @@ class PubServer(BaseHTTPRequestHandler):
         #                    self.server.project_version, None,
         #                    curr_session, proxy_type)
         bookmark_filename = \
-            locate_post(base_dir, self.post_to_nickname, domain, bookmark_url)
+            locate_post(base_dir, self.post_to_nickname, domain, bookmark_url,
+                        False, self.server.recent_posts_cache)
         if bookmark_filename:
             print('Regenerating html post for changed unbookmark')
             bookmark_post_json = load_json(bookmark_filename, 0, 1)
@@ -10901,7 +10774,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers('text/html', delete_str_len,
                                   cookie, calling_domain, False)
                 self._write(delete_str.encode('utf-8'))
-                self.server.getreq_busy = False
                 return
         if calling_domain.endswith('.onion') and onion_domain:
             actor = 'http://' + onion_domain + users_path
@@ -10958,7 +10830,8 @@ class PubServer(BaseHTTPRequestHandler):
                   http_prefix, mute_url,
                   self.server.recent_posts_cache, debug)
         mute_filename = \
-            locate_post(base_dir, nickname, domain, mute_url)
+            locate_post(base_dir, nickname, domain, mute_url, False,
+                        self.server.recent_posts_cache)
         if mute_filename:
             print('mute_post: Regenerating html post for changed mute status')
             mute_post_json = load_json(mute_filename, 0, 1)
@@ -11098,7 +10971,8 @@ class PubServer(BaseHTTPRequestHandler):
                     http_prefix, mute_url,
                     self.server.recent_posts_cache, debug)
         mute_filename = \
-            locate_post(base_dir, nickname, domain, mute_url)
+            locate_post(base_dir, nickname, domain, mute_url, False,
+                        self.server.recent_posts_cache)
         if mute_filename:
             print('unmute_post: ' +
                   'Regenerating html post for changed unmute status')
@@ -11946,14 +11820,12 @@ class PubServer(BaseHTTPRequestHandler):
         """
         if not os.path.isfile(post_filename):
             self._404()
-            self.server.getreq_busy = False
             return True
 
         post_json_object = load_json(post_filename)
         if not post_json_object:
             self.send_response(429)
             self.end_headers()
-            self.server.getreq_busy = False
             return True
 
         # Only authorized viewers get to see likes on posts
@@ -11962,7 +11834,6 @@ class PubServer(BaseHTTPRequestHandler):
             pjo = post_json_object
             if not is_public_post(pjo):
                 self._404()
-                self.server.getreq_busy = False
                 return True
             remove_post_interactions(pjo, True)
         if self._request_http():
@@ -12044,7 +11915,6 @@ class PubServer(BaseHTTPRequestHandler):
                                     debug)
             else:
                 self._404()
-        self.server.getreq_busy = False
         return True
 
     def _show_individual_post(self, ssml_getreq: bool, authorized: bool,
@@ -12165,7 +12035,8 @@ class PubServer(BaseHTTPRequestHandler):
         replies = False
 
         post_filename = locate_post(base_dir, nickname, domain,
-                                    post_id, replies)
+                                    post_id, replies,
+                                    self.server.recent_posts_cache)
         if not post_filename:
             return False
 
@@ -12188,6 +12059,67 @@ class PubServer(BaseHTTPRequestHandler):
                             self.server.debug)
         return result
 
+    def _keep_timeline_page(self, nickname: str, page_key: str,
+                            version: str, content: str,
+                            timeline_json: {}) -> {}:
+        """Keeps a rendered timeline page for an account so that it can
+        be shown again without needing to be recreated
+        """
+        etag = md5(content.encode('utf-8')).hexdigest()  # nosec
+        items = []
+        if timeline_json.get('orderedItems'):
+            items = timeline_json['orderedItems']
+        store_timeline_page(self.server.recent_posts_cache, nickname,
+                            page_key, version, content, etag, items)
+        return {
+            "content": content,
+            "etag": etag
+        }
+
+    def _write_timeline_page(self, page: {}, request_http: bool,
+                             cookie: str, calling_domain: str,
+                             referer_domain: str) -> None:
+        """Sends a rendered timeline page, with an etag so that the
+        browser can check whether it has changed
+        """
+        msg_str = self._convert_domains(calling_domain, referer_domain,
+                                        page['content'])
+        msg = msg_str.encode('utf-8')
+        msglen = len(msg)
+        if request_http:
+            content_type = 'text/html'
+        else:
+            content_type = \
+                get_json_content_from_accept(self.headers['Accept'])
+        self._set_headers_base(content_type, msglen, cookie, calling_domain,
+                               False)
+        self.send_header('ETag', '"' + page['etag'] + '"')
+        self.end_headers()
+        self._write(msg)
+
+    def _show_timeline_page(self, page_key: str, version: str,
+                            request_http: bool, cookie: str,
+                            calling_domain: str,
+                            referer_domain: str) -> bool:
+        """Shows a timeline page which was previously rendered,
+        if the timeline has not changed since
+        """
+        page = get_timeline_page(self.server.recent_posts_cache, page_key,
+                                 version)
+        if not page:
+            return False
+        etag_header = 'If-None-Match'
+        if not self.headers.get(etag_header):
+            etag_header = 'if-none-match'
+        if self.headers.get(etag_header):
+            old_etag = self.headers[etag_header].replace('"', '')
+            if old_etag == page['etag']:
+                self._304()
+                return True
+        self._write_timeline_page(page, request_http, cookie,
+                                  calling_domain, referer_domain)
+        return True
+
     def _show_inbox(self, authorized: bool,
                     calling_domain: str, referer_domain: str,
                     path: str,
@@ -12210,6 +12142,28 @@ class PubServer(BaseHTTPRequestHandler):
         """
         if '/users/' in path:
             if authorized:
+                # has this page of the timeline been rendered recently?
+                request_http = self._request_http()
+                nickname = path.split('/users/')[1].split('/')[0]
+                index_filename = \
+                    acct_dir(base_dir, nickname, domain) + '/inbox.index'
+                index_version = box_index_version(index_filename)
+                if request_http:
+                    page_key = 'html ' + path + ' ' + ua_str
+                else:
+                    page_key = \
+                        'json ' + path + ' ' + str(self.headers['Accept'])
+                if self._show_timeline_page(page_key, index_version,
+                                            request_http, cookie,
+                                            calling_domain,
+                                            referer_domain):
+                    if getreq_start_time:
+                        fitness_performance(getreq_start_time,
+                                            self.server.fitness,
+                                            '_GET', '_show_inbox cached',
+                                            self.server.debug)
+                    return True
+
                 inbox_feed = \
                     person_box_json(recent_posts_cache,
                                     base_dir,
@@ -12228,7 +12182,7 @@ class PubServer(BaseHTTPRequestHandler):
                                             self.server.fitness,
                                             '_GET', '_show_inbox',
                                             self.server.debug)
-                    if self._request_http():
+                    if request_http:
                         nickname = path.replace('/users/', '')
                         nickname = nickname.replace('/inbox', '')
                         page_number = 1
@@ -12335,15 +12289,14 @@ class PubServer(BaseHTTPRequestHandler):
                                                 '_GET', '_show_inbox3',
                                                 self.server.debug)
                         if msg:
-                            msg_str = msg
-                            msg_str = self._convert_domains(calling_domain,
-                                                            referer_domain,
-                                                            msg_str)
-                            msg = msg_str.encode('utf-8')
-                            msglen = len(msg)
-                            self._set_headers('text/html', msglen,
-                                              cookie, calling_domain, False)
-                            self._write(msg)
+                            page = \
+                                self._keep_timeline_page(nickname,
+                                                         page_key,
+                                                         index_version,
+                                                         msg, inbox_feed)
+                            self._write_timeline_page(page, request_http,
+                                                      cookie, calling_domain,
+                                                      referer_domain)
 
                         if getreq_start_time:
                             fitness_performance(getreq_start_time,
@@ -12354,17 +12307,14 @@ class PubServer(BaseHTTPRequestHandler):
                         # don't need authorized fetch here because
                         # there is already the authorization check
                         msg_str = json.dumps(inbox_feed, ensure_ascii=False)
-                        msg_str = self._convert_domains(calling_domain,
-                                                        referer_domain,
-                                                        msg_str)
-                        msg = msg_str.encode('utf-8')
-                        msglen = len(msg)
-                        accept_str = self.headers['Accept']
-                        protocol_str = \
-                            get_json_content_from_accept(accept_str)
-                        self._set_headers(protocol_str, msglen,
-                                          None, calling_domain, False)
-                        self._write(msg)
+                        page = \
+                            self._keep_timeline_page(nickname,
+                                                     page_key,
+                                                     index_version,
+                                                     msg_str, inbox_feed)
+                        self._write_timeline_page(page, request_http,
+                                                  None, calling_domain,
+                                                  referer_domain)
                         fitness_performance(getreq_start_time,
                                             self.server.fitness,
                                             '_GET', '_show_inbox5',
@@ -14130,7 +14080,6 @@ class PubServer(BaseHTTPRequestHandler):
                                                 curr_session, proxy_type)
                     if not curr_session:
                         self._404()
-                        self.server.getreq_busy = False
                         return True
 
                     access_keys = self.server.access_keys
@@ -14197,7 +14146,6 @@ class PubServer(BaseHTTPRequestHandler):
                                         self.server.fitness,
                                         '_GET', '_show_shares_feed',
                                         debug)
-                    self.server.getreq_busy = False
                     return True
             else:
                 if self._secure_mode(curr_session, proxy_type):
@@ -14789,7 +14737,6 @@ class PubServer(BaseHTTPRequestHandler):
                                     curr_session, proxy_type)
         if not curr_session:
             self._404()
-            self.server.getreq_busy = False
             return True
         msg = html_blog_page(authorized,
                              curr_session,
@@ -15411,7 +15358,8 @@ class PubServer(BaseHTTPRequestHandler):
             post_json_object = None
             if in_reply_to_url:
                 reply_post_filename = \
-                    locate_post(base_dir, nickname, domain, in_reply_to_url)
+                    locate_post(base_dir, nickname, domain, in_reply_to_url,
+                                False, self.server.recent_posts_cache)
                 if reply_post_filename:
                     post_json_object = load_json(reply_post_filename)
 
@@ -15767,147 +15715,775 @@ class PubServer(BaseHTTPRequestHandler):
             return True
         return False
 
-    def do_GET(self):
-        calling_domain = self.server.domain_full
-
-        if self.headers.get('Host'):
-            calling_domain = decoded_host(self.headers['Host'])
-            if self.server.onion_domain:
-                if calling_domain not in (self.server.domain,
-                                          self.server.domain_full,
-                                          self.server.onion_domain):
-                    print('GET domain blocked: ' + calling_domain)
-                    self._400()
-                    return
-            elif self.server.i2p_domain:
-                if calling_domain not in (self.server.domain,
-                                          self.server.domain_full,
-                                          self.server.i2p_domain):
-                    print('GET domain blocked: ' + calling_domain)
-                    self._400()
-                    return
-            else:
-                if calling_domain not in (self.server.domain,
-                                          self.server.domain_full):
-                    print('GET domain blocked: ' + calling_domain)
-                    self._400()
-                    return
+    def _blocked_get_user_agent(self, calling_domain: str,
+                                ua_str: str) -> bool:
+        """Is the user agent of a GET request blocked?
+        """
+        block, self.server.blocked_cache_last_updated = \
+            blocked_user_agent(calling_domain, ua_str,
+                               self.server.news_instance,
+                               self.server.debug,
+                               self.server.user_agents_blocked,
+                               self.server.blocked_cache_last_updated,
+                               self.server.base_dir,
+                               self.server.blocked_cache,
+                               self.server.blocked_cache_update_secs,
+                               self.server.crawlers_allowed,
+                               self.server.known_bots)
+        return block
 
-        ua_str = self._get_user_agent()
+    def _get_admitted(self) -> bool:
+        """Admission control for GET requests, which helps to avoid
+        flooding. Returns False if the client has used up its budget,
+        in which case a 429 response is sent
+        """
+        client = admission_client(self.headers, self.client_address[0],
+                                  self.server.reverse_proxies)
+        curr_time_getreq = time.time()
+        queue_length = len(self.server.inbox_queue)
+        if admit_request(self.server.admission_buckets, 'get', client,
+                         curr_time_getreq, queue_length,
+                         self.server.max_queue_length):
+            return True
+        if self.server.debug:
+            print('DEBUG: GET Busy ' + client)
+        self.send_response(429)
+        self.end_headers()
+        return False
 
-        if not self._permitted_crawler_path(self.path):
-            block, self.server.blocked_cache_last_updated = \
-                blocked_user_agent(calling_domain, ua_str,
-                                   self.server.news_instance,
-                                   self.server.debug,
-                                   self.server.user_agents_blocked,
-                                   self.server.blocked_cache_last_updated,
-                                   self.server.base_dir,
-                                   self.server.blocked_cache,
-                                   self.server.blocked_cache_update_secs,
-                                   self.server.crawlers_allowed,
-                                   self.server.known_bots)
-            if block:
+    def _get_static_route(self, route_name: str, calling_domain: str,
+                          ua_str: str) -> bool:
+        """Returns a static resource using the route table.
+        Returns True if the request was handled
+        """
+        if not self._has_accept(calling_domain):
+            return False
+        route = STATIC_GET_ROUTES[route_name]
+        if route['crawlers']:
+            if self._blocked_get_user_agent(calling_domain, ua_str):
                 self._400()
-                return
-
-        referer_domain = self._get_referer_domain(ua_str)
-
-        curr_session, proxy_type = \
-            get_session_for_domains(self.server,
-                                    calling_domain, referer_domain)
+                return True
+        if route['admission']:
+            if not self._get_admitted():
+                return True
 
         getreq_start_time = time.time()
+        base_dir = self.server.base_dir
+        if route_name == 'icons':
+            self._show_icon(self.path, base_dir, getreq_start_time)
+        elif route_name == 'fonts':
+            self._get_fonts(calling_domain, self.path,
+                            base_dir, self.server.debug,
+                            getreq_start_time)
+        elif route_name == 'helpimages':
+            self._show_help_screen_image(self.path, base_dir,
+                                         getreq_start_time)
+        elif route_name == 'emoji':
+            self._show_emoji(self.path, base_dir, getreq_start_time)
+        elif route_name == 'favicons':
+            if self.server.domain_full in self.path:
+                # favicon for this instance
+                self._get_favicon(calling_domain, base_dir,
+                                  self.server.debug,
+                                  'favicon.ico')
+            else:
+                referer_domain = self._get_referer_domain(ua_str)
+                self._show_cached_favicon(referer_domain, self.path,
+                                          base_dir, getreq_start_time)
+        elif route_name == 'avatars':
+            referer_domain = self._get_referer_domain(ua_str)
+            self._show_cached_avatar(referer_domain, self.path,
+                                     base_dir, getreq_start_time)
+        elif route_name == 'media':
+            self._show_media(self.path, base_dir, getreq_start_time)
+        elif route_name == 'sharefiles':
+            if not self._show_share_image(self.path, base_dir,
+                                          getreq_start_time):
+                return False
+        else:
+            return False
 
         fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'start', self.server.debug)
-
-        if self._show_vcard(self.server.base_dir,
-                            self.path, calling_domain, referer_domain,
-                            self.server.domain):
-            return
+                            '_GET', 'static route ' + route_name,
+                            self.server.debug)
+        return True
 
-        # getting the public key for an account
-        acct_pub_key_json = \
-            self._get_account_pub_key(self.path, self.server.person_cache,
-                                      self.server.base_dir,
-                                      self.server.http_prefix,
-                                      self.server.domain,
-                                      self.server.onion_domain,
-                                      self.server.i2p_domain,
-                                      calling_domain)
-        if acct_pub_key_json:
-            msg_str = json.dumps(acct_pub_key_json, ensure_ascii=False)
-            msg = msg_str.encode('utf-8')
-            msglen = len(msg)
-            accept_str = self.headers['Accept']
-            protocol_str = \
-                get_json_content_from_accept(accept_str)
-            self._set_headers(protocol_str, msglen,
-                              None, calling_domain, False)
-            self._write(msg)
-            return
+    def _redirect_to_welcome_screen(self, calling_domain: str,
+                                    cookie: str) -> bool:
+        """Redirects to the welcome screen if it has not been completed
+        by the logged in account. Returns True if redirected
+        """
+        if '/welcome' in self.path:
+            return False
+        nickname = self.path.split('/users/')[1]
+        if '/' in nickname:
+            nickname = nickname.split('/')[0]
+        if '?' in nickname:
+            nickname = nickname.split('?')[0]
+        if nickname != self.authorized_nickname or \
+           self.path == '/users/' + nickname:
+            return False
+        if is_welcome_screen_complete(self.server.base_dir,
+                                      nickname,
+                                      self.server.domain):
+            return False
+        self._redirect_headers('/users/' + nickname + '/welcome',
+                               cookie, calling_domain)
+        return True
 
-        # Since fediverse crawlers are quite active,
-        # make returning info to them high priority
-        # get nodeinfo endpoint
-        if self._nodeinfo(ua_str, calling_domain, referer_domain,
-                          self.server.http_prefix, 5, self.server.debug):
-            return
+    def _get_route_inbox(self, authorized: bool,
+                         calling_domain: str, referer_domain: str,
+                         cookie: str, getreq_start_time,
+                         proxy_type: str, curr_session,
+                         ua_str: str) -> bool:
+        """Shows the inbox timeline of an account
+        """
+        return self._show_inbox(authorized,
+                                calling_domain, referer_domain,
+                                self.path,
+                                self.server.base_dir,
+                                self.server.http_prefix,
+                                self.server.domain,
+                                self.server.port,
+                                getreq_start_time,
+                                cookie, self.server.debug,
+                                self.server.recent_posts_cache,
+                                curr_session,
+                                self.server.default_timeline,
+                                self.server.max_recent_posts,
+                                self.server.translate,
+                                self.server.cached_webfingers,
+                                self.server.person_cache,
+                                self.server.allow_deletion,
+                                self.server.project_version,
+                                self.server.yt_replace_domain,
+                                self.server.twitter_replacement_domain,
+                                ua_str)
 
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', '_nodeinfo[calling_domain]',
-                            self.server.debug)
+    def _get_route_dm(self, authorized: bool,
+                      calling_domain: str, referer_domain: str,
+                      cookie: str, getreq_start_time,
+                      proxy_type: str, curr_session,
+                      ua_str: str) -> bool:
+        """Shows the direct messages timeline of an account
+        """
+        return self._show_dms(authorized,
+                              calling_domain, referer_domain,
+                              self.path, self.server.base_dir,
+                              self.server.http_prefix,
+                              self.server.domain, self.server.port,
+                              getreq_start_time, cookie,
+                              self.server.debug,
+                              curr_session, ua_str)
 
-        if self._security_txt(ua_str, calling_domain, referer_domain,
-                              self.server.http_prefix, 5, self.server.debug):
-            return
+    def _get_route_tlreplies(self, authorized: bool,
+                             calling_domain: str, referer_domain: str,
+                             cookie: str, getreq_start_time,
+                             proxy_type: str, curr_session,
+                             ua_str: str) -> bool:
+        """Shows the replies timeline of an account
+        """
+        return self._show_replies(authorized,
+                                  calling_domain, referer_domain,
+                                  self.path, self.server.base_dir,
+                                  self.server.http_prefix,
+                                  self.server.domain, self.server.port,
+                                  getreq_start_time, cookie,
+                                  self.server.debug,
+                                  curr_session, ua_str)
 
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', '_security_txt[calling_domain]',
-                            self.server.debug)
+    def _get_route_tlmedia(self, authorized: bool,
+                           calling_domain: str, referer_domain: str,
+                           cookie: str, getreq_start_time,
+                           proxy_type: str, curr_session,
+                           ua_str: str) -> bool:
+        """Shows the media timeline of an account
+        """
+        return self._show_media_timeline(authorized,
+                                         calling_domain, referer_domain,
+                                         self.path, self.server.base_dir,
+                                         self.server.http_prefix,
+                                         self.server.domain, self.server.port,
+                                         getreq_start_time, cookie,
+                                         self.server.debug,
+                                         curr_session, ua_str)
 
-        if self.path == '/logout':
-            if not self.server.news_instance:
-                msg = \
-                    html_login(self.server.translate,
-                               self.server.base_dir,
-                               self.server.http_prefix,
-                               self.server.domain_full,
-                               self.server.system_language,
-                               False, ua_str).encode('utf-8')
-                msglen = len(msg)
-                self._logout_headers('text/html', msglen, calling_domain)
-                self._write(msg)
-            else:
-                if calling_domain.endswith('.onion') and \
-                   self.server.onion_domain:
-                    self._logout_redirect('http://' +
-                                          self.server.onion_domain +
-                                          '/users/news', None,
-                                          calling_domain)
-                elif (calling_domain.endswith('.i2p') and
-                      self.server.i2p_domain):
-                    self._logout_redirect('http://' +
-                                          self.server.i2p_domain +
-                                          '/users/news', None,
-                                          calling_domain)
-                else:
-                    self._logout_redirect(self.server.http_prefix +
-                                          '://' +
-                                          self.server.domain_full +
-                                          '/users/news',
-                                          None, calling_domain)
-            fitness_performance(getreq_start_time, self.server.fitness,
-                                '_GET', 'logout',
-                                self.server.debug)
-            return
+    def _get_route_tlblogs(self, authorized: bool,
+                           calling_domain: str, referer_domain: str,
+                           cookie: str, getreq_start_time,
+                           proxy_type: str, curr_session,
+                           ua_str: str) -> bool:
+        """Shows the blogs timeline of an account
+        """
+        return self._show_blogs_timeline(authorized,
+                                         calling_domain, referer_domain,
+                                         self.path, self.server.base_dir,
+                                         self.server.http_prefix,
+                                         self.server.domain, self.server.port,
+                                         getreq_start_time, cookie,
+                                         self.server.debug,
+                                         curr_session, ua_str)
 
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'show logout',
-                            self.server.debug)
+    def _get_route_tlnews(self, authorized: bool,
+                          calling_domain: str, referer_domain: str,
+                          cookie: str, getreq_start_time,
+                          proxy_type: str, curr_session,
+                          ua_str: str) -> bool:
+        """Shows the news timeline of an account
+        """
+        return self._show_news_timeline(authorized,
+                                        calling_domain, referer_domain,
+                                        self.path, self.server.base_dir,
+                                        self.server.http_prefix,
+                                        self.server.domain, self.server.port,
+                                        getreq_start_time, cookie,
+                                        self.server.debug,
+                                        curr_session, ua_str)
 
-        # replace https://domain/@nick with https://domain/users/nick
+    def _get_route_tlfeatures(self, authorized: bool,
+                              calling_domain: str, referer_domain: str,
+                              cookie: str, getreq_start_time,
+                              proxy_type: str, curr_session,
+                              ua_str: str) -> bool:
+        """Shows the features timeline of an account
+        """
+        return self._show_features_timeline(authorized,
+                                            calling_domain, referer_domain,
+                                            self.path, self.server.base_dir,
+                                            self.server.http_prefix,
+                                            self.server.domain,
+                                            self.server.port,
+                                            getreq_start_time, cookie,
+                                            self.server.debug,
+                                            curr_session, ua_str)
+
+    def _get_route_tlshares(self, authorized: bool,
+                            calling_domain: str, referer_domain: str,
+                            cookie: str, getreq_start_time,
+                            proxy_type: str, curr_session,
+                            ua_str: str) -> bool:
+        """Shows the shared items timeline of an account
+        """
+        return self._show_shares_timeline(authorized,
+                                          calling_domain, self.path,
+                                          self.server.base_dir,
+                                          self.server.http_prefix,
+                                          self.server.domain, self.server.port,
+                                          getreq_start_time, cookie,
+                                          self.server.debug,
+                                          curr_session, ua_str)
+
+    def _get_route_tlwanted(self, authorized: bool,
+                            calling_domain: str, referer_domain: str,
+                            cookie: str, getreq_start_time,
+                            proxy_type: str, curr_session,
+                            ua_str: str) -> bool:
+        """Shows the wanted items timeline of an account
+        """
+        return self._show_wanted_timeline(authorized,
+                                          calling_domain, self.path,
+                                          self.server.base_dir,
+                                          self.server.http_prefix,
+                                          self.server.domain, self.server.port,
+                                          getreq_start_time, cookie,
+                                          self.server.debug,
+                                          curr_session, ua_str)
+
+    def _get_route_bookmarks(self, authorized: bool,
+                             calling_domain: str, referer_domain: str,
+                             cookie: str, getreq_start_time,
+                             proxy_type: str, curr_session,
+                             ua_str: str) -> bool:
+        """Shows the bookmarks timeline of an account
+        """
+        return self._show_bookmarks_timeline(authorized,
+                                             calling_domain, referer_domain,
+                                             self.path, self.server.base_dir,
+                                             self.server.http_prefix,
+                                             self.server.domain,
+                                             self.server.port,
+                                             getreq_start_time, cookie,
+                                             self.server.debug,
+                                             curr_session, ua_str)
+
+    def _get_route_outbox(self, authorized: bool,
+                          calling_domain: str, referer_domain: str,
+                          cookie: str, getreq_start_time,
+                          proxy_type: str, curr_session,
+                          ua_str: str) -> bool:
+        """Shows the outbox of an account
+        """
+        return self._show_outbox_timeline(authorized,
+                                          calling_domain, referer_domain,
+                                          self.path, self.server.base_dir,
+                                          self.server.http_prefix,
+                                          self.server.domain, self.server.port,
+                                          getreq_start_time, cookie,
+                                          self.server.debug,
+                                          curr_session, ua_str,
+                                          proxy_type)
+
+    def _get_route_moderation(self, authorized: bool,
+                              calling_domain: str, referer_domain: str,
+                              cookie: str, getreq_start_time,
+                              proxy_type: str, curr_session,
+                              ua_str: str) -> bool:
+        """Shows the moderation timeline
+        """
+        return self._show_mod_timeline(authorized,
+                                       calling_domain, referer_domain,
+                                       self.path, self.server.base_dir,
+                                       self.server.http_prefix,
+                                       self.server.domain, self.server.port,
+                                       getreq_start_time, cookie,
+                                       self.server.debug,
+                                       curr_session, ua_str)
+
+    def _get_route_roles(self, authorized: bool,
+                         calling_domain: str, referer_domain: str,
+                         cookie: str, getreq_start_time,
+                         proxy_type: str, curr_session,
+                         ua_str: str) -> bool:
+        """Shows the roles of an account on its profile
+        """
+        return self._show_roles(calling_domain, referer_domain,
+                                self.path,
+                                self.server.base_dir,
+                                self.server.http_prefix,
+                                self.server.domain,
+                                getreq_start_time, proxy_type,
+                                cookie, self.server.debug,
+                                curr_session)
+
+    def _get_route_skills(self, authorized: bool,
+                          calling_domain: str, referer_domain: str,
+                          cookie: str, getreq_start_time,
+                          proxy_type: str, curr_session,
+                          ua_str: str) -> bool:
+        """Shows the skills of an account on its profile
+        """
+        return self._show_skills(calling_domain, referer_domain,
+                                 self.path,
+                                 self.server.base_dir,
+                                 self.server.http_prefix,
+                                 self.server.domain,
+                                 getreq_start_time, proxy_type,
+                                 cookie, self.server.debug,
+                                 curr_session)
+
+    # Pages for accounts, indexed by the last section of paths such as
+    # /users/nickname/inbox?page=2, so that the most frequently requested
+    # pages don't need to go through every check made for other
+    # GET requests.
+    # paged: the path may end with a page number
+    # handler: shows the page, returning False if it could not be shown
+    users_get_routes = {
+        'inbox': {
+            'paged': True,
+            'handler': _get_route_inbox
+        },
+        'dm': {
+            'paged': True,
+            'handler': _get_route_dm
+        },
+        'tlreplies': {
+            'paged': True,
+            'handler': _get_route_tlreplies
+        },
+        'tlmedia': {
+            'paged': True,
+            'handler': _get_route_tlmedia
+        },
+        'tlblogs': {
+            'paged': True,
+            'handler': _get_route_tlblogs
+        },
+        'tlnews': {
+            'paged': True,
+            'handler': _get_route_tlnews
+        },
+        'tlfeatures': {
+            'paged': True,
+            'handler': _get_route_tlfeatures
+        },
+        'tlshares': {
+            'paged': True,
+            'handler': _get_route_tlshares
+        },
+        'tlwanted': {
+            'paged': True,
+            'handler': _get_route_tlwanted
+        },
+        'tlbookmarks': {
+            'paged': True,
+            'handler': _get_route_bookmarks
+        },
+        'bookmarks': {
+            'paged': True,
+            'handler': _get_route_bookmarks
+        },
+        'outbox': {
+            'paged': True,
+            'handler': _get_route_outbox
+        },
+        'moderation': {
+            'paged': True,
+            'handler': _get_route_moderation
+        },
+        'roles': {
+            'paged': False,
+            'handler': _get_route_roles
+        },
+        'skills': {
+            'paged': False,
+            'handler': _get_route_skills
+        }
+    }
+
+    def _get_users_route(self, route_name: str,
+                         calling_domain: str, referer_domain: str,
+                         getreq_start_time, proxy_type: str,
+                         curr_session) -> bool:
+        """Returns a page for an account using the route table.
+        Returns False if the request should go through the other
+        checks made for GET requests
+        """
+        if not self._has_accept(calling_domain):
+            return False
+        accept_str = self.headers['Accept']
+        if 'text/vcard' in accept_str or \
+           'application/vcard+xml' in accept_str:
+            return False
+
+        cookie = None
+        if self.headers.get('Cookie'):
+            cookie = self.headers['Cookie']
+        authorized = self._is_authorized()
+        curr_session = \
+            self._establish_session("GET", curr_session,
+                                    proxy_type)
+        if not curr_session:
+            self._404()
+            fitness_performance(getreq_start_time, self.server.fitness,
+                                '_GET', 'session fail',
+                                self.server.debug)
+            return True
+        html_getreq = self._request_http()
+
+        if html_getreq:
+            if authorized:
+                if self._redirect_to_welcome_screen(calling_domain,
+                                                    cookie):
+                    return True
+            if self._redirect_to_login_screen(calling_domain, self.path,
+                                              self.server.http_prefix,
+                                              self.server.domain_full,
+                                              self.server.onion_domain,
+                                              self.server.i2p_domain,
+                                              getreq_start_time,
+                                              authorized, self.server.debug):
+                return True
+        if not self._get_admitted():
+            return True
+
+        ua_str = self._get_user_agent()
+        handler = self.users_get_routes[route_name]['handler']
+        if not handler(self, authorized,
+                       calling_domain, referer_domain,
+                       cookie, getreq_start_time,
+                       proxy_type, curr_session, ua_str):
+            # the page could not be shown, so continue with the
+            # same checks as would follow it within do_GET
+            self._show_profile_or_json(authorized,
+                                       calling_domain, referer_domain,
+                                       getreq_start_time, proxy_type,
+                                       cookie, curr_session)
+            return True
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'users route ' + route_name,
+                            self.server.debug)
+        return True
+
+    def _show_profile_or_json(self, authorized: bool,
+                              calling_domain: str, referer_domain: str,
+                              getreq_start_time, proxy_type: str,
+                              cookie: str, curr_session) -> None:
+        """Shows the profile screen or feeds of a person, or otherwise
+        returns a json file. This is the last of the checks for GET requests
+        """
+        if self._show_shares_feed(authorized,
+                                  calling_domain, referer_domain,
+                                  self.path,
+                                  self.server.base_dir,
+                                  self.server.http_prefix,
+                                  self.server.domain,
+                                  self.server.port,
+                                  getreq_start_time,
+                                  proxy_type,
+                                  cookie, self.server.debug, 'shares',
+                                  curr_session):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'show profile 2 done',
+                            self.server.debug)
+
+        if self._show_following_feed(authorized,
+                                     calling_domain, referer_domain,
+                                     self.path,
+                                     self.server.base_dir,
+                                     self.server.http_prefix,
+                                     self.server.domain,
+                                     self.server.port,
+                                     getreq_start_time,
+                                     proxy_type,
+                                     cookie, self.server.debug,
+                                     curr_session):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'show profile 3 done',
+                            self.server.debug)
+
+        if self._show_followers_feed(authorized,
+                                     calling_domain, referer_domain,
+                                     self.path,
+                                     self.server.base_dir,
+                                     self.server.http_prefix,
+                                     self.server.domain,
+                                     self.server.port,
+                                     getreq_start_time,
+                                     proxy_type,
+                                     cookie, self.server.debug,
+                                     curr_session):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'show profile 4 done',
+                            self.server.debug)
+
+        # look up a person
+        if self._show_person_profile(authorized,
+                                     calling_domain, referer_domain,
+                                     self.path,
+                                     self.server.base_dir,
+                                     self.server.http_prefix,
+                                     self.server.domain,
+                                     self.server.onion_domain,
+                                     self.server.i2p_domain,
+                                     getreq_start_time,
+                                     proxy_type,
+                                     cookie, self.server.debug,
+                                     curr_session):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'show profile posts done',
+                            self.server.debug)
+
+        # check that a json file was requested
+        if not self.path.endswith('.json'):
+            if self.server.debug:
+                print('DEBUG: GET Not json: ' + self.path +
+                      ' ' + self.server.base_dir)
+            self._404()
+            return
+
+        if not self._secure_mode(curr_session,
+                                 proxy_type):
+            if self.server.debug:
+                print('WARN: Unauthorized GET')
+            self._404()
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'authorized fetch',
+                            self.server.debug)
+
+        # check that the file exists
+        filename = self.server.base_dir + self.path
+        if os.path.isfile(filename):
+            content = None
+            try:
+                with open(filename, 'r', encoding='utf-8') as rfile:
+                    content = rfile.read()
+            except OSError:
+                print('EX: unable to read file ' + filename)
+            if content:
+                content_json = json.loads(content)
+                msg_str = json.dumps(content_json, ensure_ascii=False)
+                msg_str = self._convert_domains(calling_domain,
+                                                referer_domain,
+                                                msg_str)
+                msg = msg_str.encode('utf-8')
+                msglen = len(msg)
+                accept_str = self.headers['Accept']
+                protocol_str = \
+                    get_json_content_from_accept(accept_str)
+                self._set_headers(protocol_str, msglen,
+                                  None, calling_domain, False)
+                self._write(msg)
+                fitness_performance(getreq_start_time, self.server.fitness,
+                                    '_GET', 'arbitrary json',
+                                    self.server.debug)
+        else:
+            if self.server.debug:
+                print('DEBUG: GET Unknown file')
+            self._404()
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'end benchmarks',
+                            self.server.debug)
+
+    def do_GET(self):
+        calling_domain = self.server.domain_full
+
+        if self.headers.get('Host'):
+            calling_domain = decoded_host(self.headers['Host'])
+            if self.server.onion_domain:
+                if calling_domain not in (self.server.domain,
+                                          self.server.domain_full,
+                                          self.server.onion_domain):
+                    print('GET domain blocked: ' + calling_domain)
+                    self._400()
+                    return
+            elif self.server.i2p_domain:
+                if calling_domain not in (self.server.domain,
+                                          self.server.domain_full,
+                                          self.server.i2p_domain):
+                    print('GET domain blocked: ' + calling_domain)
+                    self._400()
+                    return
+            else:
+                if calling_domain not in (self.server.domain,
+                                          self.server.domain_full):
+                    print('GET domain blocked: ' + calling_domain)
+                    self._400()
+                    return
+
+        ua_str = self._get_user_agent()
+
+        # static resources are found within a route table, so that
+        # they don't need to go through the checks below
+        route_name = static_get_route(self.path)
+        if route_name:
+            if self._get_static_route(route_name, calling_domain, ua_str):
+                return
+
+        if not self._permitted_crawler_path(self.path):
+            if self._blocked_get_user_agent(calling_domain, ua_str):
+                self._400()
+                return
+
+        referer_domain = self._get_referer_domain(ua_str)
+
+        curr_session, proxy_type = \
+            get_session_for_domains(self.server,
+                                    calling_domain, referer_domain)
+
+        getreq_start_time = time.time()
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'start', self.server.debug)
+
+        # frequently requested pages for accounts, such as timelines,
+        # are found within a route table so that they don't need to
+        # go through the checks below
+        route_name = users_get_route(self.path, self.users_get_routes)
+        if route_name:
+            if self._get_users_route(route_name,
+                                     calling_domain, referer_domain,
+                                     getreq_start_time, proxy_type,
+                                     curr_session):
+                return
+
+        if self._show_vcard(self.server.base_dir,
+                            self.path, calling_domain, referer_domain,
+                            self.server.domain):
+            return
+
+        # getting the public key for an account
+        acct_pub_key_json = \
+            self._get_account_pub_key(self.path, self.server.person_cache,
+                                      self.server.base_dir,
+                                      self.server.http_prefix,
+                                      self.server.domain,
+                                      self.server.onion_domain,
+                                      self.server.i2p_domain,
+                                      calling_domain)
+        if acct_pub_key_json:
+            msg_str = json.dumps(acct_pub_key_json, ensure_ascii=False)
+            msg = msg_str.encode('utf-8')
+            msglen = len(msg)
+            accept_str = self.headers['Accept']
+            protocol_str = \
+                get_json_content_from_accept(accept_str)
+            self._set_headers(protocol_str, msglen,
+                              None, calling_domain, False)
+            self._write(msg)
+            return
+
+        # Since fediverse crawlers are quite active,
+        # make returning info to them high priority
+        # get nodeinfo endpoint
+        if self._nodeinfo(ua_str, calling_domain, referer_domain,
+                          self.server.http_prefix, 5, self.server.debug):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', '_nodeinfo[calling_domain]',
+                            self.server.debug)
+
+        if self._security_txt(ua_str, calling_domain, referer_domain,
+                              self.server.http_prefix, 5, self.server.debug):
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', '_security_txt[calling_domain]',
+                            self.server.debug)
+
+        if self.path == '/logout':
+            if not self.server.news_instance:
+                msg = \
+                    html_login(self.server.translate,
+                               self.server.base_dir,
+                               self.server.http_prefix,
+                               self.server.domain_full,
+                               self.server.system_language,
+                               False, ua_str).encode('utf-8')
+                msglen = len(msg)
+                self._logout_headers('text/html', msglen, calling_domain)
+                self._write(msg)
+            else:
+                if calling_domain.endswith('.onion') and \
+                   self.server.onion_domain:
+                    self._logout_redirect('http://' +
+                                          self.server.onion_domain +
+                                          '/users/news', None,
+                                          calling_domain)
+                elif (calling_domain.endswith('.i2p') and
+                      self.server.i2p_domain):
+                    self._logout_redirect('http://' +
+                                          self.server.i2p_domain +
+                                          '/users/news', None,
+                                          calling_domain)
+                else:
+                    self._logout_redirect(self.server.http_prefix +
+                                          '://' +
+                                          self.server.domain_full +
+                                          '/users/news',
+                                          None, calling_domain)
+            fitness_performance(getreq_start_time, self.server.fitness,
+                                '_GET', 'logout',
+                                self.server.debug)
+            return
+
+        fitness_performance(getreq_start_time, self.server.fitness,
+                            '_GET', 'show logout',
+                            self.server.debug)
+
+        # replace https://domain/@nick with https://domain/users/nick
         if self.path.startswith('/@'):
             self.path = self.path.replace('/@', '/users/')
             # replace https://domain/@nick/statusnumber
@@ -15953,8 +16529,7 @@ class PubServer(BaseHTTPRequestHandler):
 
         if self.server.debug:
             print('DEBUG: GET from ' + self.server.base_dir +
-                  ' path: ' + self.path + ' busy: ' +
-                  str(self.server.getreq_busy))
+                  ' path: ' + self.path)
 
         if self.server.debug:
             print(str(self.headers))
@@ -16266,7 +16841,6 @@ class PubServer(BaseHTTPRequestHandler):
             fitness_performance(getreq_start_time, self.server.fitness,
                                 '_GET', 'session fail',
                                 self.server.debug)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -16307,22 +16881,8 @@ class PubServer(BaseHTTPRequestHandler):
                             '_GET', 'hasAccept',
                             self.server.debug)
 
-        # cached favicon images
-        # Note that this comes before the busy flag to avoid conflicts
-        if self.path.startswith('/favicons/'):
-            if self.server.domain_full in self.path:
-                # favicon for this instance
-                self._get_favicon(calling_domain, self.server.base_dir,
-                                  self.server.debug,
-                                  'favicon.ico')
-                return
-            self._show_cached_favicon(referer_domain, self.path,
-                                      self.server.base_dir,
-                                      getreq_start_time)
-            return
-
         # get css
-        # Note that this comes before the busy flag to avoid conflicts
+        # Note that this comes before admission control to avoid conflicts
         if self.path.endswith('.css'):
             if self._get_style_sheet(self.server.base_dir,
                                      calling_domain, self.path,
@@ -16518,21 +17078,9 @@ class PubServer(BaseHTTPRequestHandler):
                     return
 
         # redirect to the welcome screen
-        if html_getreq and authorized and users_in_path and \
-           '/welcome' not in self.path:
-            nickname = self.path.split('/users/')[1]
-            if '/' in nickname:
-                nickname = nickname.split('/')[0]
-            if '?' in nickname:
-                nickname = nickname.split('?')[0]
-            if nickname == self.authorized_nickname and \
-               self.path != '/users/' + nickname:
-                if not is_welcome_screen_complete(self.server.base_dir,
-                                                  nickname,
-                                                  self.server.domain):
-                    self._redirect_headers('/users/' + nickname + '/welcome',
-                                           cookie, calling_domain)
-                    return
+        if html_getreq and authorized and users_in_path:
+            if self._redirect_to_welcome_screen(calling_domain, cookie):
+                return
 
         if not html_getreq and \
            users_in_path and self.path.endswith('/pinned'):
@@ -17499,12 +18047,14 @@ class PubServer(BaseHTTPRequestHandler):
                             self.server.debug)
 
         # show media
-        # Note that this comes before the busy flag to avoid conflicts
+        # Media files are large, so they have an admission control budget
         # replace mastoson-style media path
         if '/system/media_attachments/files/' in self.path:
             self.path = self.path.replace('/system/media_attachments/files/',
                                           '/media/')
         if '/media/' in self.path:
+            if not self._get_admitted():
+                return
             self._show_media(self.path, self.server.base_dir,
                              getreq_start_time)
             return
@@ -17522,8 +18072,10 @@ class PubServer(BaseHTTPRequestHandler):
                             self.server.debug)
 
         # show shared item images
-        # Note that this comes before the busy flag to avoid conflicts
+        # These also have an admission control budget
         if '/sharefiles/' in self.path:
+            if not self._get_admitted():
+                return
             if self._show_share_image(self.path, self.server.base_dir,
                                       getreq_start_time):
                 return
@@ -17532,13 +18084,6 @@ class PubServer(BaseHTTPRequestHandler):
                             '_GET', 'share image done',
                             self.server.debug)
 
-        # icon images
-        # Note that this comes before the busy flag to avoid conflicts
-        if self.path.startswith('/icons/'):
-            self._show_icon(self.path, self.server.base_dir,
-                            getreq_start_time)
-            return
-
         # show images within https://instancedomain/activitypub
         if self.path.startswith('/activitypub-tutorial-'):
             if self.path.endswith('.png'):
@@ -17555,32 +18100,8 @@ class PubServer(BaseHTTPRequestHandler):
                                         getreq_start_time)
                 return
 
-        # help screen images
-        # Note that this comes before the busy flag to avoid conflicts
-        if self.path.startswith('/helpimages/'):
-            self._show_help_screen_image(self.path,
-                                         self.server.base_dir,
-                                         getreq_start_time)
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'help screen image done',
-                            self.server.debug)
-
-        # cached avatar images
-        # Note that this comes before the busy flag to avoid conflicts
-        if self.path.startswith('/avatars/'):
-            self._show_cached_avatar(referer_domain, self.path,
-                                     self.server.base_dir,
-                                     getreq_start_time)
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'cached avatar done',
-                            self.server.debug)
-
         # show avatar or background image
-        # Note that this comes before the busy flag to avoid conflicts
+        # Note that this comes before admission control to avoid conflicts
         if self._show_avatar_or_banner(referer_domain, self.path,
                                        self.server.base_dir,
                                        self.server.domain,
@@ -17591,21 +18112,11 @@ class PubServer(BaseHTTPRequestHandler):
                             '_GET', 'avatar or banner shown done',
                             self.server.debug)
 
-        # This busy state helps to avoid flooding
+        # Admission control helps to avoid flooding
         # Resources which are expected to be called from a web page
         # should be above this
-        curr_time_getreq = int(time.time() * 1000)
-        if self.server.getreq_busy:
-            if curr_time_getreq - self.server.last_getreq < 500:
-                if self.server.debug:
-                    print('DEBUG: GET Busy')
-                self.send_response(429)
-                self.end_headers()
-                return
-        self.server.getreq_busy = True
-        self.server.last_getreq = curr_time_getreq
-
-        # returns after this point should set getreq_busy to False
+        if not self._get_admitted():
+            return
 
         fitness_performance(getreq_start_time, self.server.fitness,
                             '_GET', 'GET busy time',
@@ -17615,7 +18126,6 @@ class PubServer(BaseHTTPRequestHandler):
             if self.server.debug:
                 print('DEBUG: GET Not permitted')
             self._404()
-            self.server.getreq_busy = False
             return
 
         # get webfinger endpoint for a person
@@ -17623,7 +18133,6 @@ class PubServer(BaseHTTPRequestHandler):
             fitness_performance(getreq_start_time, self.server.fitness,
                                 '_GET', 'webfinger called',
                                 self.server.debug)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -17648,7 +18157,6 @@ class PubServer(BaseHTTPRequestHandler):
             fitness_performance(getreq_start_time, self.server.fitness,
                                 '_GET', 'login shown',
                                 self.server.debug)
-            self.server.getreq_busy = False
             return
 
         # show the news front page
@@ -17676,7 +18184,6 @@ class PubServer(BaseHTTPRequestHandler):
             fitness_performance(getreq_start_time, self.server.fitness,
                                 '_GET', 'news front page shown',
                                 self.server.debug)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -17693,7 +18200,6 @@ class PubServer(BaseHTTPRequestHandler):
                 nickname = get_nickname_from_actor(self.path)
                 if not nickname:
                     self._404()
-                    self.server.getreq_busy = False
                     return
                 timeline_path = \
                     '/users/' + nickname + '/' + self.server.default_timeline
@@ -17725,7 +18231,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers('text/html', msglen,
                                   cookie, calling_domain, False)
                 self._write(msg)
-                self.server.getreq_busy = False
                 return
 
         if html_getreq and self.path.startswith('/users/') and \
@@ -17737,7 +18242,6 @@ class PubServer(BaseHTTPRequestHandler):
                 nickname = get_nickname_from_actor(self.path)
                 if not nickname:
                     self._404()
-                    self.server.getreq_busy = False
                     return
                 access_keys = self.server.access_keys
                 if self.server.key_shortcuts.get(nickname):
@@ -17765,7 +18269,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers('text/html', msglen, cookie, calling_domain,
                                   False)
                 self._write(msg)
-                self.server.getreq_busy = False
                 return
 
         # hashtag search
@@ -17783,7 +18286,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           self.server.i2p_domain,
                                           getreq_start_time,
                                           curr_session)
-                self.server.getreq_busy = False
                 return
             self._hashtag_search(calling_domain,
                                  self.path, cookie,
@@ -17796,7 +18298,6 @@ class PubServer(BaseHTTPRequestHandler):
                                  self.server.i2p_domain,
                                  getreq_start_time,
                                  curr_session)
-            self.server.getreq_busy = False
             return
 
         # hashtag map kml
@@ -17818,10 +18319,8 @@ class PubServer(BaseHTTPRequestHandler):
                 self._set_headers(header_type, msglen,
                                   None, calling_domain, True)
                 self._write(msg)
-                self.server.getreq_busy = False
                 return
             self._404()
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -17883,7 +18382,6 @@ class PubServer(BaseHTTPRequestHandler):
                     fitness_performance(getreq_start_time, self.server.fitness,
                                         '_GET', 'search screen shown',
                                         self.server.debug)
-                self.server.getreq_busy = False
                 return
 
         # show a hashtag category from the search screen
@@ -17901,7 +18399,6 @@ class PubServer(BaseHTTPRequestHandler):
             fitness_performance(getreq_start_time, self.server.fitness,
                                 '_GET', 'hashtag category screen shown',
                                 self.server.debug)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -17947,7 +18444,6 @@ class PubServer(BaseHTTPRequestHandler):
                                         self.server.debug)
                 else:
                     self._404()
-                self.server.getreq_busy = False
                 return
 
         # Show the icalendar for a user
@@ -17985,7 +18481,6 @@ class PubServer(BaseHTTPRequestHandler):
                 fitness_performance(getreq_start_time, self.server.fitness,
                                     '_GET', 'icalendar shown',
                                     self.server.debug)
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18006,7 +18501,6 @@ class PubServer(BaseHTTPRequestHandler):
                                               self.server.onion_domain,
                                               self.server.i2p_domain,
                                               getreq_start_time):
-                    self.server.getreq_busy = False
                     return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18028,7 +18522,6 @@ class PubServer(BaseHTTPRequestHandler):
                 fitness_performance(getreq_start_time, self.server.fitness,
                                     '_GET', 'emoji search shown',
                                     self.server.debug)
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18054,7 +18547,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   repeat_private,
                                   self.server.debug,
                                   curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18078,7 +18570,6 @@ class PubServer(BaseHTTPRequestHandler):
                                        self.server.debug,
                                        self.server.recent_posts_cache,
                                        curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18097,7 +18588,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 self.server.i2p_domain,
                                 getreq_start_time,
                                 self.server.newswire)
-            self.server.getreq_busy = False
             return
 
         # send a newswire moderation unvote from the web interface
@@ -18113,7 +18603,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   getreq_start_time,
                                   self.server.debug,
                                   self.server.newswire)
-            self.server.getreq_busy = False
             return
 
         # send a follow request approval from the web interface
@@ -18132,7 +18621,6 @@ class PubServer(BaseHTTPRequestHandler):
                                         proxy_type,
                                         self.server.debug,
                                         curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18153,7 +18641,6 @@ class PubServer(BaseHTTPRequestHandler):
                                      self.server.i2p_domain,
                                      getreq_start_time,
                                      self.server.debug)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18174,7 +18661,6 @@ class PubServer(BaseHTTPRequestHandler):
                               cookie,
                               self.server.debug,
                               curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18194,7 +18680,6 @@ class PubServer(BaseHTTPRequestHandler):
                                    proxy_type,
                                    cookie, self.server.debug,
                                    curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18217,7 +18702,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   cookie,
                                   self.server.debug,
                                   curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18239,7 +18723,6 @@ class PubServer(BaseHTTPRequestHandler):
                                        proxy_type,
                                        cookie, self.server.debug,
                                        curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18260,7 +18743,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   proxy_type,
                                   cookie, self.server.debug,
                                   curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18277,7 +18759,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   getreq_start_time,
                                   cookie, self.server.debug,
                                   curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18298,7 +18779,6 @@ class PubServer(BaseHTTPRequestHandler):
                                        proxy_type, cookie,
                                        self.server.debug,
                                        curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18317,7 +18797,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 proxy_type, cookie,
                                 self.server.debug,
                                 curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18337,7 +18816,6 @@ class PubServer(BaseHTTPRequestHandler):
                               getreq_start_time,
                               cookie, self.server.debug,
                               curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18357,7 +18835,6 @@ class PubServer(BaseHTTPRequestHandler):
                                    getreq_start_time,
                                    cookie, self.server.debug,
                                    curr_session)
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18515,7 +18992,6 @@ class PubServer(BaseHTTPRequestHandler):
                 nickname = get_nickname_from_actor(self.path.split('?')[0])
                 if not nickname:
                     self._404()
-                    self.server.getreq_busy = False
                     return
                 if nickname == actor:
                     post_url = \
@@ -18535,7 +19011,6 @@ class PubServer(BaseHTTPRequestHandler):
                         self._set_headers('text/html', msglen,
                                           cookie, calling_domain, False)
                         self._write(msg)
-                        self.server.getreq_busy = False
                         return
 
             # Edit a post
@@ -18565,11 +19040,9 @@ class PubServer(BaseHTTPRequestHandler):
                 edit_post_params['nickname'] = nickname
                 if not nickname:
                     self._404()
-                    self.server.getreq_busy = False
                     return
                 if nickname != actor:
                     self._404()
-                    self.server.getreq_busy = False
                     return
                 post_url = \
                     local_actor_url(self.server.http_prefix, nickname,
@@ -18586,7 +19059,6 @@ class PubServer(BaseHTTPRequestHandler):
             if self._show_known_crawlers(calling_domain, self.path,
                                          self.server.base_dir,
                                          self.server.known_crawlers):
-                self.server.getreq_busy = False
                 return
 
             # edit profile in web interface
@@ -18597,7 +19069,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   self.server.domain,
                                   self.server.port,
                                   cookie):
-                self.server.getreq_busy = False
                 return
 
             # edit links from the left column of the timeline in web interface
@@ -18609,7 +19080,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 self.server.port,
                                 cookie,
                                 self.server.theme_name):
-                self.server.getreq_busy = False
                 return
 
             # edit newswire from the right column of the timeline
@@ -18620,7 +19090,6 @@ class PubServer(BaseHTTPRequestHandler):
                                    self.server.domain,
                                    self.server.port,
                                    cookie):
-                self.server.getreq_busy = False
                 return
 
             # edit news post
@@ -18632,7 +19101,6 @@ class PubServer(BaseHTTPRequestHandler):
                                      self.server.port,
                                      self.server.domain_full,
                                      cookie):
-                self.server.getreq_busy = False
                 return
 
             if self._show_new_post(edit_post_params,
@@ -18650,7 +19118,6 @@ class PubServer(BaseHTTPRequestHandler):
                                    getreq_start_time,
                                    cookie, no_drop_down, conversation_id,
                                    curr_session):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18672,7 +19139,6 @@ class PubServer(BaseHTTPRequestHandler):
                                          proxy_type,
                                          cookie, self.server.debug,
                                          curr_session):
-            self.server.getreq_busy = False
             return
 
         # show the likers of a post
@@ -18685,7 +19151,6 @@ class PubServer(BaseHTTPRequestHandler):
                                      getreq_start_time,
                                      cookie, self.server.debug,
                                      curr_session):
-            self.server.getreq_busy = False
             return
 
         # show the announcers/repeaters of a post
@@ -18698,7 +19163,6 @@ class PubServer(BaseHTTPRequestHandler):
                                          getreq_start_time,
                                          cookie, self.server.debug,
                                          curr_session):
-            self.server.getreq_busy = False
             return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18719,7 +19183,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           proxy_type, cookie,
                                           self.server.debug,
                                           curr_session):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18737,7 +19200,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 proxy_type,
                                 cookie, self.server.debug,
                                 curr_session):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18755,7 +19217,6 @@ class PubServer(BaseHTTPRequestHandler):
                                  proxy_type,
                                  cookie, self.server.debug,
                                  curr_session):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18774,7 +19235,6 @@ class PubServer(BaseHTTPRequestHandler):
                                       proxy_type,
                                       cookie, self.server.debug,
                                       curr_session):
-                self.server.getreq_busy = False
                 return
 
         # get an individual post from the path
@@ -18792,7 +19252,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           proxy_type,
                                           cookie, self.server.debug,
                                           curr_session):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18822,7 +19281,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 self.server.yt_replace_domain,
                                 self.server.twitter_replacement_domain,
                                 ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18841,7 +19299,6 @@ class PubServer(BaseHTTPRequestHandler):
                               getreq_start_time,
                               cookie, self.server.debug,
                               curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18860,7 +19317,6 @@ class PubServer(BaseHTTPRequestHandler):
                                   getreq_start_time,
                                   cookie, self.server.debug,
                                   curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18879,7 +19335,6 @@ class PubServer(BaseHTTPRequestHandler):
                                          getreq_start_time,
                                          cookie, self.server.debug,
                                          curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18898,7 +19353,6 @@ class PubServer(BaseHTTPRequestHandler):
                                          getreq_start_time,
                                          cookie, self.server.debug,
                                          curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18917,7 +19371,6 @@ class PubServer(BaseHTTPRequestHandler):
                                         getreq_start_time,
                                         cookie, self.server.debug,
                                         curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         # get features (local blogs) for a given person
@@ -18933,7 +19386,6 @@ class PubServer(BaseHTTPRequestHandler):
                                             getreq_start_time,
                                             cookie, self.server.debug,
                                             curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18951,7 +19403,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           getreq_start_time,
                                           cookie, self.server.debug,
                                           curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         # get the wanted items timeline for a given person
@@ -18965,7 +19416,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           getreq_start_time,
                                           cookie, self.server.debug,
                                           curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -18981,7 +19431,6 @@ class PubServer(BaseHTTPRequestHandler):
                 nickname = nickname.split('/')[0]
             if not is_moderator(self.server.base_dir, nickname):
                 self._400()
-                self.server.getreq_busy = False
                 return
             block_domain = self.path.split('/accountinfo?blockdomain=')[1]
             search_handle = block_domain.split('?handle=')[1]
@@ -19001,14 +19450,14 @@ class PubServer(BaseHTTPRequestHandler):
                                   search_handle,
                                   self.server.debug,
                                   self.server.system_language,
-                                  self.server.signing_priv_key_pem)
+                                  self.server.signing_priv_key_pem,
+                                  self.server.blocked_cache)
             if msg:
                 msg = msg.encode('utf-8')
                 msglen = len(msg)
                 self._login_headers('text/html',
                                     msglen, calling_domain)
                 self._write(msg)
-            self.server.getreq_busy = False
             return
 
         # unblock a domain from html_account_info
@@ -19020,7 +19469,6 @@ class PubServer(BaseHTTPRequestHandler):
                 nickname = nickname.split('/')[0]
             if not is_moderator(self.server.base_dir, nickname):
                 self._400()
-                self.server.getreq_busy = False
                 return
             block_domain = self.path.split('/accountinfo?unblockdomain=')[1]
             search_handle = block_domain.split('?handle=')[1]
@@ -19038,14 +19486,14 @@ class PubServer(BaseHTTPRequestHandler):
                                   search_handle,
                                   self.server.debug,
                                   self.server.system_language,
-                                  self.server.signing_priv_key_pem)
+                                  self.server.signing_priv_key_pem,
+                                  self.server.blocked_cache)
             if msg:
                 msg = msg.encode('utf-8')
                 msglen = len(msg)
                 self._login_headers('text/html',
                                     msglen, calling_domain)
                 self._write(msg)
-            self.server.getreq_busy = False
             return
 
         # get the bookmarks timeline for a given person
@@ -19063,7 +19511,6 @@ class PubServer(BaseHTTPRequestHandler):
                                              getreq_start_time,
                                              cookie, self.server.debug,
                                              curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -19084,7 +19531,6 @@ class PubServer(BaseHTTPRequestHandler):
                                           cookie, self.server.debug,
                                           curr_session, ua_str,
                                           proxy_type):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
@@ -19104,143 +19550,16 @@ class PubServer(BaseHTTPRequestHandler):
                                        getreq_start_time,
                                        cookie, self.server.debug,
                                        curr_session, ua_str):
-                self.server.getreq_busy = False
                 return
 
         fitness_performance(getreq_start_time, self.server.fitness,
                             '_GET', 'show moderation done',
                             self.server.debug)
 
-        if self._show_shares_feed(authorized,
-                                  calling_domain, referer_domain,
-                                  self.path,
-                                  self.server.base_dir,
-                                  self.server.http_prefix,
-                                  self.server.domain,
-                                  self.server.port,
-                                  getreq_start_time,
-                                  proxy_type,
-                                  cookie, self.server.debug, 'shares',
-                                  curr_session):
-            self.server.getreq_busy = False
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'show profile 2 done',
-                            self.server.debug)
-
-        if self._show_following_feed(authorized,
-                                     calling_domain, referer_domain,
-                                     self.path,
-                                     self.server.base_dir,
-                                     self.server.http_prefix,
-                                     self.server.domain,
-                                     self.server.port,
-                                     getreq_start_time,
-                                     proxy_type,
-                                     cookie, self.server.debug,
-                                     curr_session):
-            self.server.getreq_busy = False
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'show profile 3 done',
-                            self.server.debug)
-
-        if self._show_followers_feed(authorized,
-                                     calling_domain, referer_domain,
-                                     self.path,
-                                     self.server.base_dir,
-                                     self.server.http_prefix,
-                                     self.server.domain,
-                                     self.server.port,
-                                     getreq_start_time,
-                                     proxy_type,
-                                     cookie, self.server.debug,
-                                     curr_session):
-            self.server.getreq_busy = False
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'show profile 4 done',
-                            self.server.debug)
-
-        # look up a person
-        if self._show_person_profile(authorized,
-                                     calling_domain, referer_domain,
-                                     self.path,
-                                     self.server.base_dir,
-                                     self.server.http_prefix,
-                                     self.server.domain,
-                                     self.server.onion_domain,
-                                     self.server.i2p_domain,
-                                     getreq_start_time,
-                                     proxy_type,
-                                     cookie, self.server.debug,
-                                     curr_session):
-            self.server.getreq_busy = False
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'show profile posts done',
-                            self.server.debug)
-
-        # check that a json file was requested
-        if not self.path.endswith('.json'):
-            if self.server.debug:
-                print('DEBUG: GET Not json: ' + self.path +
-                      ' ' + self.server.base_dir)
-            self._404()
-            self.server.getreq_busy = False
-            return
-
-        if not self._secure_mode(curr_session,
-                                 proxy_type):
-            if self.server.debug:
-                print('WARN: Unauthorized GET')
-            self._404()
-            self.server.getreq_busy = False
-            return
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'authorized fetch',
-                            self.server.debug)
-
-        # check that the file exists
-        filename = self.server.base_dir + self.path
-        if os.path.isfile(filename):
-            content = None
-            try:
-                with open(filename, 'r', encoding='utf-8') as rfile:
-                    content = rfile.read()
-            except OSError:
-                print('EX: unable to read file ' + filename)
-            if content:
-                content_json = json.loads(content)
-                msg_str = json.dumps(content_json, ensure_ascii=False)
-                msg_str = self._convert_domains(calling_domain,
-                                                referer_domain,
-                                                msg_str)
-                msg = msg_str.encode('utf-8')
-                msglen = len(msg)
-                accept_str = self.headers['Accept']
-                protocol_str = \
-                    get_json_content_from_accept(accept_str)
-                self._set_headers(protocol_str, msglen,
-                                  None, calling_domain, False)
-                self._write(msg)
-                fitness_performance(getreq_start_time, self.server.fitness,
-                                    '_GET', 'arbitrary json',
-                                    self.server.debug)
-        else:
-            if self.server.debug:
-                print('DEBUG: GET Unknown file')
-            self._404()
-        self.server.getreq_busy = False
-
-        fitness_performance(getreq_start_time, self.server.fitness,
-                            '_GET', 'end benchmarks',
-                            self.server.debug)
+        self._show_profile_or_json(authorized,
+                                   calling_domain, referer_domain,
+                                   getreq_start_time, proxy_type,
+                                   cookie, curr_session)
 
     def _dav_handler(self, endpoint_type: str, debug: bool):
         calling_domain = self.server.domain_full
@@ -19497,7 +19816,7 @@ class PubServer(BaseHTTPRequestHandler):
                                last_modified_time_str)
 
     def _receive_new_post_process(self, post_type: str, path: str, headers: {},
-                                  length: int, post_bytes, boundary: str,
+                                  length: int, boundary: str,
                                   calling_domain: str, cookie: str,
                                   content_license_url: str,
                                   curr_session, proxy_type: str) -> int:
@@ -19555,21 +19874,7 @@ class PubServer(BaseHTTPRequestHandler):
 
             boundary = headers['Content-Type'].split('boundary=')[1]
             if ';' in boundary:
-                boundary = boundary.split(';')[0]
-
-            # Note: we don't use cgi here because it's due to be deprecated
-            # in Python 3.8/3.10
-            # Instead we use the multipart mime parser from the email module
-            if self.server.debug:
-                print('DEBUG: extracting media from POST')
-            media_bytes, post_bytes = \
-                extract_media_in_form_post(post_bytes, boundary, 'attachpic')
-            if self.server.debug:
-                if media_bytes:
-                    print('DEBUG: media was found. ' +
-                          str(len(media_bytes)) + ' bytes')
-                else:
-                    print('DEBUG: no media was found in POST')
+                boundary = boundary.split(';')[0]
 
             # Note: a .temp extension is used here so that at no time is
             # an image with metadata publicly exposed, even for a few mS
@@ -19577,9 +19882,32 @@ class PubServer(BaseHTTPRequestHandler):
                 acct_dir(self.server.base_dir,
                          nickname, self.server.domain) + '/upload.temp'
 
-            filename, attachment_media_type = \
-                save_media_in_form_post(media_bytes, self.server.debug,
-                                        filename_base)
+            # Note: we don't use cgi here because it's due to be deprecated
+            # in Python 3.8/3.10
+            # Instead we use the multipart mime parser from the email module
+            # The POST is read in chunks, with any attached media being
+            # written directly to file rather than held in memory
+            if self.server.debug:
+                print('DEBUG: extracting media from POST')
+            try:
+                post_bytes, filename, attachment_media_type = \
+                    receive_media_in_form_post(self.rfile, length, boundary,
+                                               'attachpic', filename_base,
+                                               self.server.debug)
+            except SocketError as ex:
+                if ex.errno == errno.ECONNRESET:
+                    print('WARN: POST post_bytes ' +
+                          'connection reset by peer')
+                else:
+                    print('WARN: POST post_bytes socket error')
+                return -1
+            except ValueError as ex:
+                print('EX: POST post_bytes rfile.read failed, ' +
+                      str(ex))
+                return -1
+            if post_bytes is None:
+                # the connection closed before the POST was received
+                return -1
             if self.server.debug:
                 if filename:
                     print('DEBUG: POST media filename is ' + filename)
@@ -19909,7 +20237,8 @@ class PubServer(BaseHTTPRequestHandler):
                 post_filename = \
                     locate_post(self.server.base_dir,
                                 nickname, self.server.domain,
-                                fields['postUrl'])
+                                fields['postUrl'], False,
+                                self.server.recent_posts_cache)
                 if os.path.isfile(post_filename):
                     post_json_object = load_json(post_filename)
                     if post_json_object:
@@ -20663,27 +20992,6 @@ class PubServer(BaseHTTPRequestHandler):
                 if ';' in boundary:
                     boundary = boundary.split(';')[0]
 
-                try:
-                    post_bytes = self.rfile.read(length)
-                except SocketError as ex:
-                    if ex.errno == errno.ECONNRESET:
-                        print('WARN: POST post_bytes ' +
-                              'connection reset by peer')
-                    else:
-                        print('WARN: POST post_bytes socket error')
-                    return None
-                except ValueError as ex:
-                    print('EX: POST post_bytes rfile.read failed, ' +
-                          str(ex))
-                    return None
-
-                # second length check from the bytes received
-                # since Content-Length could be untruthful
-                length = len(post_bytes)
-                if length > self.server.max_post_length:
-                    print('POST size too large')
-                    return None
-
                 # Note sending new posts needs to be synchronous,
                 # otherwise any attachments can get mangled if
                 # other events happen during their decoding
@@ -20691,7 +20999,7 @@ class PubServer(BaseHTTPRequestHandler):
                 self._receive_new_post_process(post_type,
                                                original_path,
                                                headers, length,
-                                               post_bytes, boundary,
+                                               boundary,
                                                calling_domain, cookie,
                                                content_license_url,
                                                curr_session, proxy_type)
@@ -20861,14 +21169,426 @@ class PubServer(BaseHTTPRequestHandler):
         else:
             self._400()
 
+    def _post_route_sethashtagcategory(self, calling_domain: str, cookie: str,
+                                       authorized: bool, curr_session,
+                                       proxy_type: str) -> None:
+        """Sets the category for a hashtag
+        """
+        base_dir = self.server.base_dir
+        domain = self.server.domain
+        debug = self.server.debug
+        self._set_hashtag_category(calling_domain, cookie,
+                                   self.path, base_dir, domain, debug,
+                                   self.server.system_language)
+
+    def _post_route_profiledata(self, calling_domain: str, cookie: str,
+                                authorized: bool, curr_session,
+                                proxy_type: str) -> None:
+        """Receives an edited profile
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # update of profile/avatar from web interface,
+        # after selecting Edit button then Submit
+        self._profile_edit(calling_domain, cookie, self.path,
+                           base_dir, http_prefix,
+                           domain, domain_full,
+                           onion_domain, i2p_domain, debug,
+                           self.server.allow_local_network_access,
+                           self.server.system_language,
+                           self.server.content_license_url,
+                           curr_session,
+                           proxy_type)
+
+    def _post_route_linksdata(self, calling_domain: str, cookie: str,
+                              authorized: bool, curr_session,
+                              proxy_type: str) -> None:
+        """Receives edited links for the left column
+        """
+        base_dir = self.server.base_dir
+        debug = self.server.debug
+        self._links_update(calling_domain, cookie, self.path,
+                           base_dir, debug,
+                           self.server.default_timeline,
+                           self.server.allow_local_network_access)
+
+    def _post_route_newswiredata(self, calling_domain: str, cookie: str,
+                                 authorized: bool, curr_session,
+                                 proxy_type: str) -> None:
+        """Receives edited newswire feeds for the right column
+        """
+        base_dir = self.server.base_dir
+        domain = self.server.domain
+        debug = self.server.debug
+        self._newswire_update(calling_domain, cookie,
+                              self.path, base_dir, domain, debug,
+                              self.server.default_timeline)
+
+    def _post_route_citationsdata(self, calling_domain: str, cookie: str,
+                                  authorized: bool, curr_session,
+                                  proxy_type: str) -> None:
+        """Receives the citations for a blog post
+        """
+        base_dir = self.server.base_dir
+        domain = self.server.domain
+        debug = self.server.debug
+        self._citations_update(calling_domain, cookie,
+                               self.path, base_dir, domain, debug,
+                               self.server.newswire)
+
+    def _post_route_newseditdata(self, calling_domain: str, cookie: str,
+                                 authorized: bool, curr_session,
+                                 proxy_type: str) -> None:
+        """Receives an edited news post
+        """
+        base_dir = self.server.base_dir
+        domain = self.server.domain
+        debug = self.server.debug
+        self._news_post_edit(calling_domain, cookie, self.path,
+                             base_dir, domain, debug)
+
+    def _post_route_moderationaction(self, calling_domain: str, cookie: str,
+                                     authorized: bool, curr_session,
+                                     proxy_type: str) -> None:
+        """Receives a moderator action
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain = self.server.domain
+        port = self.server.port
+        debug = self.server.debug
+        # moderator action buttons
+        self._moderator_actions(self.path, calling_domain, cookie,
+                                base_dir, http_prefix,
+                                domain, port, debug)
+
+    def _post_route_rmshare(self, calling_domain: str, cookie: str,
+                            authorized: bool, curr_session,
+                            proxy_type: str) -> None:
+        """Receives the removal of a shared item
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        # removes a shared item
+        self._remove_share(calling_domain, cookie,
+                           authorized, self.path,
+                           base_dir, http_prefix, domain_full,
+                           onion_domain, i2p_domain)
+
+    def _post_route_rmwanted(self, calling_domain: str, cookie: str,
+                             authorized: bool, curr_session,
+                             proxy_type: str) -> None:
+        """Receives the removal of a wanted item
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        # removes a wanted item
+        self._remove_wanted(calling_domain, cookie,
+                            authorized, self.path,
+                            base_dir, http_prefix, domain_full,
+                            onion_domain, i2p_domain)
+
+    def _post_route_rmpost(self, calling_domain: str, cookie: str,
+                           authorized: bool, curr_session,
+                           proxy_type: str) -> None:
+        """Receives the removal of a post
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        # removes a post
+        self._receive_remove_post(calling_domain, cookie,
+                                  self.path, base_dir, http_prefix,
+                                  domain, domain_full,
+                                  onion_domain, i2p_domain,
+                                  curr_session, proxy_type)
+
+    def _post_route_followconfirm(self, calling_domain: str, cookie: str,
+                                  authorized: bool, curr_session,
+                                  proxy_type: str) -> None:
+        """Receives a confirmed follow
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        port = self.server.port
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # decision to follow in the web interface is confirmed
+        self._follow_confirm(calling_domain, cookie,
+                             self.path, base_dir, http_prefix,
+                             domain, domain_full, port,
+                             onion_domain, i2p_domain, debug,
+                             curr_session, proxy_type)
+
+    def _post_route_unfollowconfirm(self, calling_domain: str, cookie: str,
+                                    authorized: bool, curr_session,
+                                    proxy_type: str) -> None:
+        """Receives a confirmed unfollow
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        port = self.server.port
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # decision to unfollow in the web interface is confirmed
+        self._unfollow_confirm(calling_domain, cookie,
+                               self.path, base_dir, http_prefix,
+                               domain, domain_full, port,
+                               onion_domain, i2p_domain, debug,
+                               curr_session, proxy_type)
+
+    def _post_route_unblockconfirm(self, calling_domain: str, cookie: str,
+                                   authorized: bool, curr_session,
+                                   proxy_type: str) -> None:
+        """Receives a confirmed unblock
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        port = self.server.port
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # decision to unblock in the web interface is confirmed
+        self._unblock_confirm(calling_domain, cookie,
+                              self.path, base_dir, http_prefix,
+                              domain, domain_full, port,
+                              onion_domain, i2p_domain, debug)
+
+    def _post_route_blockconfirm(self, calling_domain: str, cookie: str,
+                                 authorized: bool, curr_session,
+                                 proxy_type: str) -> None:
+        """Receives a confirmed block
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        port = self.server.port
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # decision to block in the web interface is confirmed
+        self._block_confirm(calling_domain, cookie,
+                            self.path, base_dir, http_prefix,
+                            domain, domain_full, port,
+                            onion_domain, i2p_domain, debug,
+                            curr_session, proxy_type)
+
+    def _post_route_personoptions(self, calling_domain: str, cookie: str,
+                                  authorized: bool, curr_session,
+                                  proxy_type: str) -> None:
+        """Receives an option chosen from the person options screen
+        """
+        base_dir = self.server.base_dir
+        http_prefix = self.server.http_prefix
+        domain_full = self.server.domain_full
+        domain = self.server.domain
+        port = self.server.port
+        onion_domain = self.server.onion_domain
+        i2p_domain = self.server.i2p_domain
+        debug = self.server.debug
+        # an option was chosen from person options screen
+        # view/follow/block/report
+        self._person_options(self.path,
+                             calling_domain, cookie,
+                             base_dir, http_prefix,
+                             domain, domain_full, port,
+                             onion_domain, i2p_domain, debug,
+                             curr_session)
+
+    def _nickname_access_keys(self) -> ({}, str):
+        """Returns the access keys for the account within the path
+        """
+        nickname = self.path.split('/users/')[1]
+        if '/' in nickname:
+            nickname = nickname.split('/')[0]
+
+        if not self.server.key_shortcuts.get(nickname):
+            access_keys = self.server.access_keys
+            self.server.key_shortcuts[nickname] = access_keys.copy()
+        return self.server.key_shortcuts[nickname], nickname
+
+    def _post_route_access_keys(self, calling_domain: str, cookie: str,
+                                authorized: bool, curr_session,
+                                proxy_type: str) -> None:
+        """Changes the key shortcuts
+        """
+        access_keys, nickname = self._nickname_access_keys()
+        self._key_shortcuts(calling_domain, cookie,
+                            self.server.base_dir, self.server.http_prefix,
+                            nickname,
+                            self.server.domain, self.server.domain_full,
+                            self.server.onion_domain, self.server.i2p_domain,
+                            access_keys,
+                            self.server.default_timeline)
+
+    def _post_route_theme_settings(self, calling_domain: str, cookie: str,
+                                   authorized: bool, curr_session,
+                                   proxy_type: str) -> None:
+        """Theme designer submit/cancel button
+        """
+        _, nickname = self._nickname_access_keys()
+        allow_local_network_access = \
+            self.server.allow_local_network_access
+        self._theme_designer_edit(calling_domain, cookie,
+                                  self.server.base_dir,
+                                  self.server.http_prefix, nickname,
+                                  self.server.domain,
+                                  self.server.domain_full,
+                                  self.server.onion_domain,
+                                  self.server.i2p_domain,
+                                  self.server.default_timeline,
+                                  self.server.theme_name,
+                                  allow_local_network_access,
+                                  self.server.system_language,
+                                  self.server.dyslexic_font)
+
+    # Forms submitted from the web interface by a logged in user,
+    # indexed by the last section of the path, so that they don't
+    # need to go through every check made for other POST requests.
+    # users: the path must contain /users/
+    # timeline: the form changes how timelines of the account appear,
+    #           so any rendered timeline pages are removed
+    # handler: receives the form
+    post_routes = {
+        'sethashtagcategory': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_sethashtagcategory
+        },
+        'profiledata': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_profiledata
+        },
+        'linksdata': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_linksdata
+        },
+        'newswiredata': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_newswiredata
+        },
+        'citationsdata': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_citationsdata
+        },
+        'newseditdata': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_newseditdata
+        },
+        'moderationaction': {
+            'users': True,
+            'timeline': True,
+            'handler': _post_route_moderationaction
+        },
+        'rmshare': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_rmshare
+        },
+        'rmwanted': {
+            'users': False,
+            'timeline': False,
+            'handler': _post_route_rmwanted
+        },
+        'rmpost': {
+            'users': True,
+            'timeline': True,
+            'handler': _post_route_rmpost
+        },
+        'followconfirm': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_followconfirm
+        },
+        'unfollowconfirm': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_unfollowconfirm
+        },
+        'unblockconfirm': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_unblockconfirm
+        },
+        'blockconfirm': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_blockconfirm
+        },
+        'personoptions': {
+            'users': False,
+            'timeline': True,
+            'handler': _post_route_personoptions
+        },
+        'changeAccessKeys': {
+            'users': True,
+            'timeline': True,
+            'handler': _post_route_access_keys
+        },
+        'changeThemeSettings': {
+            'users': True,
+            'timeline': True,
+            'handler': _post_route_theme_settings
+        }
+    }
+
+    def _post_form_route(self, route_name: str,
+                         calling_domain: str, cookie: str,
+                         postreq_start_time, curr_session,
+                         proxy_type: str) -> None:
+        """Receives a form submitted from the web interface using
+        the route table
+        """
+        route = self.post_routes[route_name]
+        if route['timeline'] and '/users/' in self.path:
+            # the browser is redirected back to the timeline after
+            # the form is received, so remove rendered pages first
+            nickname = get_nickname_from_actor(self.path)
+            if nickname:
+                clear_timeline_pages(self.server.recent_posts_cache,
+                                     nickname)
+        handler = route['handler']
+        handler(self, calling_domain, cookie, True,
+                curr_session, proxy_type)
+        fitness_performance(postreq_start_time, self.server.fitness,
+                            '_POST', 'post route ' + route_name,
+                            self.server.debug)
+
     def do_POST(self):
         proxy_type = self.server.proxy_type
         postreq_start_time = time.time()
 
         if self.server.debug:
             print('DEBUG: POST to ' + self.server.base_dir +
-                  ' path: ' + self.path + ' busy: ' +
-                  str(self.server.postreq_busy))
+                  ' path: ' + self.path)
 
         calling_domain = self.server.domain_full
         if self.headers.get('Host'):
@@ -20894,14 +21614,21 @@ class PubServer(BaseHTTPRequestHandler):
                     self._400()
                     return
 
-        curr_time_postreq = int(time.time() * 1000)
-        if self.server.postreq_busy:
-            if curr_time_postreq - self.server.last_postreq < 500:
-                self.send_response(429)
-                self.end_headers()
-                return
-        self.server.postreq_busy = True
-        self.server.last_postreq = curr_time_postreq
+        # Admission control helps to avoid flooding, with separate
+        # budgets for inbox deliveries, web interface and c2s
+        client = admission_client(self.headers, self.client_address[0],
+                                  self.server.reverse_proxies)
+        post_type = admission_post_type(self.headers)
+        curr_time_postreq = time.time()
+        queue_length = len(self.server.inbox_queue)
+        if not admit_request(self.server.admission_buckets, post_type,
+                             client, curr_time_postreq, queue_length,
+                             self.server.max_queue_length):
+            if self.server.debug:
+                print('DEBUG: POST Busy ' + post_type + ' ' + client)
+            self.send_response(429)
+            self.end_headers()
+            return
 
         ua_str = self._get_user_agent()
 
@@ -20918,13 +21645,11 @@ class PubServer(BaseHTTPRequestHandler):
                                self.server.known_bots)
         if block:
             self._400()
-            self.server.postreq_busy = False
             return
 
         if not self.headers.get('Content-type'):
             print('Content-type header missing')
             self._400()
-            self.server.postreq_busy = False
             return
 
         curr_session, proxy_type = \
@@ -20938,11 +21663,8 @@ class PubServer(BaseHTTPRequestHandler):
                                 '_POST', 'create_session',
                                 self.server.debug)
             self._404()
-            self.server.postreq_busy = False
             return
 
-        # returns after this point should set postreq_busy to False
-
         # remove any trailing slashes from the path
         if not self.path.endswith('confirm'):
             self.path = self.path.replace('/outbox/', '/outbox')
@@ -20955,7 +21677,6 @@ class PubServer(BaseHTTPRequestHandler):
         if self.path == '/inbox':
             if not self.server.enable_shared_inbox:
                 self._503()
-                self.server.postreq_busy = False
                 return
 
         cookie = None
@@ -20971,7 +21692,6 @@ class PubServer(BaseHTTPRequestHandler):
         if self.path.startswith('/api/v1/crypto/'):
             self._crypto_api(self.path, authorized,
                              calling_domain, calling_domain)
-            self.server.postreq_busy = False
             return
 
         # if this is a POST to the outbox then check authentication
@@ -20993,99 +21713,28 @@ class PubServer(BaseHTTPRequestHandler):
                                     self.server.onion_domain,
                                     self.server.i2p_domain,
                                     ua_str, self.server.debug)
-            self.server.postreq_busy = False
             return
 
         fitness_performance(postreq_start_time, self.server.fitness,
                             '_POST', '_login_screen',
                             self.server.debug)
 
-        if authorized and self.path.endswith('/sethashtagcategory'):
-            self._set_hashtag_category(calling_domain, cookie,
-                                       self.path,
-                                       self.server.base_dir,
-                                       self.server.domain,
-                                       self.server.debug,
-                                       self.server.system_language)
-            self.server.postreq_busy = False
-            return
-
-        # update of profile/avatar from web interface,
-        # after selecting Edit button then Submit
-        if authorized and self.path.endswith('/profiledata'):
-            self._profile_edit(calling_domain, cookie, self.path,
-                               self.server.base_dir, self.server.http_prefix,
-                               self.server.domain,
-                               self.server.domain_full,
-                               self.server.onion_domain,
-                               self.server.i2p_domain, self.server.debug,
-                               self.server.allow_local_network_access,
-                               self.server.system_language,
-                               self.server.content_license_url,
-                               curr_session,
-                               proxy_type)
-            self.server.postreq_busy = False
-            return
-
-        if authorized and self.path.endswith('/linksdata'):
-            self._links_update(calling_domain, cookie, self.path,
-                               self.server.base_dir, self.server.debug,
-                               self.server.default_timeline,
-                               self.server.allow_local_network_access)
-            self.server.postreq_busy = False
-            return
-
-        if authorized and self.path.endswith('/newswiredata'):
-            self._newswire_update(calling_domain, cookie,
-                                  self.path,
-                                  self.server.base_dir,
-                                  self.server.domain, self.server.debug,
-                                  self.server.default_timeline)
-            self.server.postreq_busy = False
-            return
-
-        if authorized and self.path.endswith('/citationsdata'):
-            self._citations_update(calling_domain, cookie,
-                                   self.path,
-                                   self.server.base_dir,
-                                   self.server.domain,
-                                   self.server.debug,
-                                   self.server.newswire)
-            self.server.postreq_busy = False
-            return
-
-        if authorized and self.path.endswith('/newseditdata'):
-            self._news_post_edit(calling_domain, cookie, self.path,
-                                 self.server.base_dir,
-                                 self.server.domain,
-                                 self.server.debug)
-            self.server.postreq_busy = False
-            return
-
-        fitness_performance(postreq_start_time, self.server.fitness,
-                            '_POST', '_news_post_edit',
-                            self.server.debug)
+        # forms submitted from the web interface are found within
+        # a route table so that they don't need to go through
+        # the checks below
+        if authorized:
+            route_name = post_route(self.path, self.post_routes)
+            if route_name:
+                self._post_form_route(route_name,
+                                      calling_domain, cookie,
+                                      postreq_start_time,
+                                      curr_session, proxy_type)
+                return
 
         users_in_path = False
         if '/users/' in self.path:
             users_in_path = True
 
-        # moderator action buttons
-        if authorized and users_in_path and \
-           self.path.endswith('/moderationaction'):
-            self._moderator_actions(self.path, calling_domain, cookie,
-                                    self.server.base_dir,
-                                    self.server.http_prefix,
-                                    self.server.domain,
-                                    self.server.port,
-                                    self.server.debug)
-            self.server.postreq_busy = False
-            return
-
-        fitness_performance(postreq_start_time, self.server.fitness,
-                            '_POST', '_moderator_actions',
-                            self.server.debug)
-
         search_for_emoji = False
         if self.path.endswith('/searchhandleemoji'):
             search_for_emoji = True
@@ -21117,7 +21766,6 @@ class PubServer(BaseHTTPRequestHandler):
                                        self.server.debug,
                                        curr_session,
                                        proxy_type)
-            self.server.postreq_busy = False
             return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21129,7 +21777,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('ERROR: attempt to remove post was not authorized. ' +
                       self.path)
                 self._400()
-                self.server.postreq_busy = False
                 return
         else:
             # a vote/question/poll is posted
@@ -21143,214 +21790,15 @@ class PubServer(BaseHTTPRequestHandler):
                                    self.server.i2p_domain,
                                    curr_session,
                                    proxy_type)
-                self.server.postreq_busy = False
-                return
-
-            # removes a shared item
-            if self.path.endswith('/rmshare'):
-                self._remove_share(calling_domain, cookie,
-                                   authorized, self.path,
-                                   self.server.base_dir,
-                                   self.server.http_prefix,
-                                   self.server.domain_full,
-                                   self.server.onion_domain,
-                                   self.server.i2p_domain)
-                self.server.postreq_busy = False
-                return
-
-            # removes a wanted item
-            if self.path.endswith('/rmwanted'):
-                self._remove_wanted(calling_domain, cookie,
-                                    authorized, self.path,
-                                    self.server.base_dir,
-                                    self.server.http_prefix,
-                                    self.server.domain_full,
-                                    self.server.onion_domain,
-                                    self.server.i2p_domain)
-                self.server.postreq_busy = False
                 return
 
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_remove_wanted',
-                                self.server.debug)
-
             # removes a post
             if self.path.endswith('/rmpost'):
                 if '/users/' not in self.path:
                     print('ERROR: attempt to remove post ' +
                           'was not authorized. ' + self.path)
                     self._400()
-                    self.server.postreq_busy = False
                     return
-            if self.path.endswith('/rmpost'):
-                self._receive_remove_post(calling_domain, cookie,
-                                          self.path,
-                                          self.server.base_dir,
-                                          self.server.http_prefix,
-                                          self.server.domain,
-                                          self.server.domain_full,
-                                          self.server.onion_domain,
-                                          self.server.i2p_domain,
-                                          curr_session, proxy_type)
-                self.server.postreq_busy = False
-                return
-
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_remove_post',
-                                self.server.debug)
-
-            # decision to follow in the web interface is confirmed
-            if self.path.endswith('/followconfirm'):
-                self._follow_confirm(calling_domain, cookie,
-                                     self.path,
-                                     self.server.base_dir,
-                                     self.server.http_prefix,
-                                     self.server.domain,
-                                     self.server.domain_full,
-                                     self.server.port,
-                                     self.server.onion_domain,
-                                     self.server.i2p_domain,
-                                     self.server.debug,
-                                     curr_session,
-                                     proxy_type)
-                self.server.postreq_busy = False
-                return
-
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_follow_confirm',
-                                self.server.debug)
-
-            # decision to unfollow in the web interface is confirmed
-            if self.path.endswith('/unfollowconfirm'):
-                self._unfollow_confirm(calling_domain, cookie,
-                                       self.path,
-                                       self.server.base_dir,
-                                       self.server.http_prefix,
-                                       self.server.domain,
-                                       self.server.domain_full,
-                                       self.server.port,
-                                       self.server.onion_domain,
-                                       self.server.i2p_domain,
-                                       self.server.debug,
-                                       curr_session, proxy_type)
-                self.server.postreq_busy = False
-                return
-
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_unfollow_confirm',
-                                self.server.debug)
-
-            # decision to unblock in the web interface is confirmed
-            if self.path.endswith('/unblockconfirm'):
-                self._unblock_confirm(calling_domain, cookie,
-                                      self.path,
-                                      self.server.base_dir,
-                                      self.server.http_prefix,
-                                      self.server.domain,
-                                      self.server.domain_full,
-                                      self.server.port,
-                                      self.server.onion_domain,
-                                      self.server.i2p_domain,
-                                      self.server.debug)
-                self.server.postreq_busy = False
-                return
-
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_unblock_confirm',
-                                self.server.debug)
-
-            # decision to block in the web interface is confirmed
-            if self.path.endswith('/blockconfirm'):
-                self._block_confirm(calling_domain, cookie,
-                                    self.path,
-                                    self.server.base_dir,
-                                    self.server.http_prefix,
-                                    self.server.domain,
-                                    self.server.domain_full,
-                                    self.server.port,
-                                    self.server.onion_domain,
-                                    self.server.i2p_domain,
-                                    self.server.debug,
-                                    curr_session,
-                                    proxy_type)
-                self.server.postreq_busy = False
-                return
-
-            fitness_performance(postreq_start_time, self.server.fitness,
-                                '_POST', '_block_confirm',
-                                self.server.debug)
-
-            # an option was chosen from person options screen
-            # view/follow/block/report
-            if self.path.endswith('/personoptions'):
-                self._person_options(self.path,
-                                     calling_domain, cookie,
-                                     self.server.base_dir,
-                                     self.server.http_prefix,
-                                     self.server.domain,
-                                     self.server.domain_full,
-                                     self.server.port,
-                                     self.server.onion_domain,
-                                     self.server.i2p_domain,
-                                     self.server.debug,
-                                     curr_session)
-                self.server.postreq_busy = False
-                return
-
-            # Change the key shortcuts
-            if users_in_path and \
-               self.path.endswith('/changeAccessKeys'):
-                nickname = self.path.split('/users/')[1]
-                if '/' in nickname:
-                    nickname = nickname.split('/')[0]
-
-                if not self.server.key_shortcuts.get(nickname):
-                    access_keys = self.server.access_keys
-                    self.server.key_shortcuts[nickname] = access_keys.copy()
-                access_keys = self.server.key_shortcuts[nickname]
-
-                self._key_shortcuts(calling_domain, cookie,
-                                    self.server.base_dir,
-                                    self.server.http_prefix,
-                                    nickname,
-                                    self.server.domain,
-                                    self.server.domain_full,
-                                    self.server.onion_domain,
-                                    self.server.i2p_domain,
-                                    access_keys,
-                                    self.server.default_timeline)
-                self.server.postreq_busy = False
-                return
-
-            # theme designer submit/cancel button
-            if users_in_path and \
-               self.path.endswith('/changeThemeSettings'):
-                nickname = self.path.split('/users/')[1]
-                if '/' in nickname:
-                    nickname = nickname.split('/')[0]
-
-                if not self.server.key_shortcuts.get(nickname):
-                    access_keys = self.server.access_keys
-                    self.server.key_shortcuts[nickname] = access_keys.copy()
-                access_keys = self.server.key_shortcuts[nickname]
-                allow_local_network_access = \
-                    self.server.allow_local_network_access
-
-                self._theme_designer_edit(calling_domain, cookie,
-                                          self.server.base_dir,
-                                          self.server.http_prefix,
-                                          nickname,
-                                          self.server.domain,
-                                          self.server.domain_full,
-                                          self.server.onion_domain,
-                                          self.server.i2p_domain,
-                                          self.server.default_timeline,
-                                          self.server.theme_name,
-                                          allow_local_network_access,
-                                          self.server.system_language,
-                                          self.server.dyslexic_font)
-                self.server.postreq_busy = False
-                return
 
         # update the shared item federation token for the calling domain
         # if it is within the permitted federation
@@ -21453,7 +21901,6 @@ class PubServer(BaseHTTPRequestHandler):
                         '/' + post_redirect + '?page=' + str(page_number)
                     self._redirect_headers(actor_path_str, cookie,
                                            calling_domain)
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21471,7 +21918,6 @@ class PubServer(BaseHTTPRequestHandler):
             if not self.outbox_authenticated:
                 self.send_response(405)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21487,7 +21933,6 @@ class PubServer(BaseHTTPRequestHandler):
                 self.path == '/sharedInbox'):
             print('Attempt to POST to invalid path ' + self.path)
             self._400()
-            self.server.postreq_busy = False
             return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21508,7 +21953,6 @@ class PubServer(BaseHTTPRequestHandler):
                 max_content_size = len(str(self.server.maxMediaSize))
             if len(self.headers['Content-length']) > max_content_size:
                 self._400()
-                self.server.postreq_busy = False
                 return
 
         # read the message and convert it into a python dictionary
@@ -21519,13 +21963,11 @@ class PubServer(BaseHTTPRequestHandler):
             if length > self.server.maxMessageLength:
                 print('Maximum message length exceeded ' + str(length))
                 self._400()
-                self.server.postreq_busy = False
                 return
         else:
             if length > self.server.maxMediaSize:
                 print('Maximum media size exceeded ' + str(length))
                 self._400()
-                self.server.postreq_busy = False
                 return
 
         # receive images to the outbox
@@ -21535,7 +21977,6 @@ class PubServer(BaseHTTPRequestHandler):
                                 self.server.base_dir,
                                 self.server.domain,
                                 self.server.debug)
-            self.server.postreq_busy = False
             return
 
         # refuse to receive non-json content
@@ -21558,18 +21999,15 @@ class PubServer(BaseHTTPRequestHandler):
                             print('EX: POST unknown_post socket error')
                         self.send_response(400)
                         self.end_headers()
-                        self.server.postreq_busy = False
                         return
                     except ValueError as ex:
                         print('EX: POST unknown_post rfile.read failed, ' +
                               str(ex))
                         self.send_response(400)
                         self.end_headers()
-                        self.server.postreq_busy = False
                         return
                     print(str(unknown_post))
             self._400()
-            self.server.postreq_busy = False
             return
 
         if self.server.debug:
@@ -21592,7 +22030,6 @@ class PubServer(BaseHTTPRequestHandler):
                 print('WARN: post to shared inbox is too long ' +
                       str(length) + ' bytes')
                 self._400()
-                self.server.postreq_busy = False
                 return
 
         try:
@@ -21605,13 +22042,11 @@ class PubServer(BaseHTTPRequestHandler):
                 print('WARN: POST message_bytes socket error')
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         except ValueError as ex:
             print('EX: POST message_bytes rfile.read failed, ' + str(ex))
             self.send_response(400)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         # check content length after reading bytes
@@ -21621,12 +22056,10 @@ class PubServer(BaseHTTPRequestHandler):
                 print('WARN: post to shared inbox is too long ' +
                       str(len_message) + ' bytes')
                 self._400()
-                self.server.postreq_busy = False
                 return
 
         if contains_invalid_chars(message_bytes.decode("utf-8")):
             self._400()
-            self.server.postreq_busy = False
             return
 
         # convert the raw bytes to json
@@ -21646,14 +22079,12 @@ class PubServer(BaseHTTPRequestHandler):
                     self.headers['Location'] = locn_str
                 self.send_response(201)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
             else:
                 if self.server.debug:
                     print('Failed to post to outbox')
                 self.send_response(403)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21667,7 +22098,6 @@ class PubServer(BaseHTTPRequestHandler):
         if not message_json:
             self.send_response(403)
             self.end_headers()
-            self.server.postreq_busy = False
             return
 
         if self.path.endswith('/inbox') or \
@@ -21678,7 +22108,6 @@ class PubServer(BaseHTTPRequestHandler):
                           "required parameters")
                 self.send_response(403)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21694,7 +22123,6 @@ class PubServer(BaseHTTPRequestHandler):
                           'header signature parameter')
                 self.send_response(403)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21710,7 +22138,6 @@ class PubServer(BaseHTTPRequestHandler):
                     print('DEBUG: Ah Ah Ah')
                 self.send_response(403)
                 self.end_headers()
-                self.server.postreq_busy = False
                 return
 
         fitness_performance(postreq_start_time, self.server.fitness,
@@ -21732,7 +22159,6 @@ class PubServer(BaseHTTPRequestHandler):
                                                  message_json, message_bytes,
                                                  self.server.debug)
                     if queue_status in range(0, 4):
-                        self.server.postreq_busy = False
                         return
                     if self.server.debug:
                         print('INBOX: _update_inbox_queue exited ' +
@@ -21742,7 +22168,6 @@ class PubServer(BaseHTTPRequestHandler):
                         print('INBOX: self.post_to_nickname is None')
             self.send_response(403)
             self.end_headers()
-            self.server.postreq_busy = False
             return
         if self.path in ('/sharedInbox', '/inbox'):
             if self.server.debug:
@@ -21752,10 +22177,8 @@ class PubServer(BaseHTTPRequestHandler):
                                          message_bytes,
                                          self.server.debug)
             if queue_status in range(0, 4):
-                self.server.postreq_busy = False
                 return
         self._200()
-        self.server.postreq_busy = False
 
 
 class PubServerUnitTest(PubServer):
@@ -21852,7 +22275,10 @@ def load_tokens(base_dir: str, tokens_dict: {}, tokens_lookup: {}) -> None:
         break
 
 
-def run_daemon(max_hashtags: int,
+def run_daemon(delivery_max_age_hrs: int,
+               max_person_cache: int,
+               inbox_queue_workers: int,
+               max_hashtags: int,
                map_format: str,
                clacks: str,
                preferred_podcast_formats: [],
@@ -22245,18 +22671,24 @@ def run_daemon(max_hashtags: int,
     httpd.base_dir = base_dir
     httpd.instance_id = instance_id
     httpd.person_cache = {}
+    set_person_cache_limit(httpd.person_cache, max_person_cache)
     httpd.cached_webfingers = {}
     httpd.favicons_cache = {}
     httpd.proxy_type = proxy_type
     httpd.session = None
     httpd.session_onion = None
     httpd.session_i2p = None
-    httpd.last_getreq = 0
-    httpd.last_postreq = 0
-    httpd.getreq_busy = False
-    httpd.postreq_busy = False
+    # token buckets used for admission control of requests
+    httpd.admission_buckets = {}
+    # reverse proxies whose forwarded for headers are trusted
+    reverse_proxies_str = get_config_param(base_dir, 'reverseProxies')
+    httpd.reverse_proxies = admission_reverse_proxies(reverse_proxies_str)
     httpd.received_message = False
     httpd.inbox_queue = []
+    # results of checking whether instances are active
+    httpd.sites_liveness = {}
+    # signalled whenever a new item is added to the inbox queue
+    httpd.inbox_queue_event = threading.Event()
     httpd.send_threads = send_threads
     httpd.postLog = []
     httpd.max_queue_length = 64
@@ -22264,6 +22696,8 @@ def run_daemon(max_hashtags: int,
     httpd.last_login_time = 0
     httpd.last_login_failure = 0
     httpd.login_failure_count = {}
+    # stored passwords and recently verified basic auth credentials
+    httpd.auth_cache = {}
     httpd.log_login_failures = log_login_failures
     httpd.max_replies = max_replies
     httpd.tokens = {}
@@ -22275,7 +22709,7 @@ def run_daemon(max_hashtags: int,
 
     # create a cache of blocked domains in memory.
     # This limits the amount of slow disk reads which need to be done
-    httpd.blocked_cache = []
+    httpd.blocked_cache = {}
     httpd.blocked_cache_last_updated = 0
     httpd.blocked_cache_update_secs = 120
     httpd.blocked_cache_last_updated = \
@@ -22314,6 +22748,9 @@ def run_daemon(max_hashtags: int,
         httpd.lists_enabled = get_config_param(base_dir, "listsEnabled")
     httpd.cw_lists = load_cw_lists(base_dir, True)
 
+    # compiled word filters, rebuilt when the filter files change
+    httpd.filters_cache = {}
+
     # set the avatar for the news account
     httpd.theme_name = get_config_param(base_dir, 'theme')
     if not httpd.theme_name:
@@ -22365,6 +22802,9 @@ def run_daemon(max_hashtags: int,
 
     httpd.recent_posts_cache = {}
 
+    # sets of entries within timeline logs, used to detect duplicates
+    httpd.box_index_cache = {}
+
     print('THREAD: Creating cache expiry thread')
     httpd.thrCache = \
         thread_with_trace(target=expire_cache,
@@ -22408,6 +22848,22 @@ def run_daemon(max_hashtags: int,
         begin_thread(httpd.thrSharesExpire,
                      'run_daemon thrSharesExpireWatchdog 2')
 
+    print('THREAD: Creating delivery queue thread')
+    httpd.delivery_max_age_hrs = delivery_max_age_hrs
+    httpd.thrDeliveryQueue = \
+        thread_with_trace(target=run_delivery_queue,
+                          args=(base_dir, httpd), daemon=True)
+    if not unit_test:
+        print('THREAD: run_delivery_queue_watchdog')
+        httpd.thrDeliveryQueueWatchdog = \
+            thread_with_trace(target=run_delivery_queue_watchdog,
+                              args=(project_version, httpd), daemon=True)
+        begin_thread(httpd.thrDeliveryQueueWatchdog,
+                     'run_daemon thrDeliveryQueueWatchdog')
+    else:
+        begin_thread(httpd.thrDeliveryQueue,
+                     'run_daemon thrDeliveryQueueWatchdog 2')
+
     httpd.max_recent_posts = max_recent_posts
     httpd.iconsCache = {}
     httpd.fontsCache = {}
@@ -22432,6 +22888,9 @@ def run_daemon(max_hashtags: int,
     httpd.max_emoji = max_emoji
     httpd.max_hashtags = max_hashtags
 
+    # number of threads used to process the inbox queue
+    httpd.inbox_queue_workers = inbox_queue_workers
+
     print('THREAD: Creating inbox queue')
     httpd.thrInboxQueue = \
         thread_with_trace(target=run_inbox_queue,
@@ -22463,7 +22922,8 @@ def run_daemon(max_hashtags: int,
                                 httpd.signing_priv_key_pem,
                                 httpd.default_reply_interval_hrs,
                                 httpd.cw_lists,
-                                httpd.max_hashtags), daemon=True)
+                                httpd.max_hashtags,
+                                httpd.inbox_queue_workers), daemon=True)
 
     print('THREAD: Creating scheduled post thread')
     httpd.thrPostSchedule = \
@@ -7,7 +7,6 @@ __email__ = "bob@libreserver.org"
 __status__ = "Production"
 __module_group__ = "ActivityPub"
 
-import os
 from datetime import datetime
 from utils import has_object_string
 from utils import remove_domain_port
@@ -20,6 +19,7 @@ from utils import locate_post
 from utils import delete_post
 from utils import remove_moderation_post_from_index
 from utils import local_actor_url
+from hashtagindex import remove_old_hashtag_indexes
 from session import post_json
 from webfinger import webfinger_handle
 from auth import create_basic_auth_header
@@ -181,27 +181,4 @@ def remove_old_hashtags(base_dir: str, max_months: int) -> str:
     max_months = min(max_months, 11)
     max_days_since_epoch = \
         (datetime.utcnow() - datetime(1970, 1 + max_months, 1)).days
-    remove_hashtags = []
-
-    for _, _, files in os.walk(base_dir + '/tags'):
-        for fname in files:
-            tags_filename = os.path.join(base_dir + '/tags', fname)
-            if not os.path.isfile(tags_filename):
-                continue
-            # get last modified datetime
-            mod_time_since_epoc = os.path.getmtime(tags_filename)
-            last_modified_date = datetime.fromtimestamp(mod_time_since_epoc)
-            file_days_since_epoch = \
-                (last_modified_date - datetime(1970, 1, 1)).days
-
-            # check of the file is too old
-            if file_days_since_epoch < max_days_since_epoch:
-                remove_hashtags.append(tags_filename)
-        break
-
-    for remove_filename in remove_hashtags:
-        try:
-            os.remove(remove_filename)
-        except OSError:
-            print('EX: remove_old_hashtags unable to delete ' +
-                  remove_filename)
+    remove_old_hashtag_indexes(base_dir, max_days_since_epoch)
@@ -107,6 +107,7 @@ from theme import set_theme
 from announce import send_announce_via_server
 from socnet import instances_graph
 from migrate import migrate_accounts
+from boxindex import migrate_box_indexes
 from desktop_client import run_desktop_client
 from happening import dav_month_via_server
 from happening import dav_day_via_server
@@ -165,6 +166,11 @@ def _command_options() -> None:
                         default=None,
                         help='List of permitted web crawler user agents, ' +
                         'separated by commas')
+    parser.add_argument('--reverseProxies', type=str,
+                        default=None,
+                        help='List of reverse proxy addresses whose ' +
+                        'X-Forwarded-For headers are trusted, ' +
+                        'separated by commas')
     parser.add_argument('--libretranslate', dest='libretranslateUrl', type=str,
                         default=None,
                         help='URL for LibreTranslate service')
@@ -560,6 +566,9 @@ def _command_options() -> None:
     parser.add_argument("--migrations", type=str2bool, nargs='?',
                         const=True, default=False,
                         help="Migrate moved accounts")
+    parser.add_argument("--migrateindexes", type=str2bool, nargs='?',
+                        const=True, default=False,
+                        help="Convert timeline indexes to append only logs")
     parser.add_argument("--tests", type=str2bool, nargs='?',
                         const=True, default=False,
                         help="Run unit tests")
@@ -598,6 +607,18 @@ def _command_options() -> None:
     parser.add_argument('--max_hashtags', dest='max_hashtags', type=int,
                         default=20,
                         help='Maximum number of hashtags on a post')
+    parser.add_argument('--inbox_queue_workers', dest='inbox_queue_workers',
+                        type=int, default=1,
+                        help='Number of threads used to process the ' +
+                        'inbox queue. Activities from the same actor ' +
+                        'or about the same post remain in order')
+    parser.add_argument('--delivery_max_age_hrs',
+                        dest='delivery_max_age_hrs', type=int, default=48,
+                        help='Hours for which failed deliveries are ' +
+                        'retried before they are abandoned')
+    parser.add_argument('--max_person_cache', dest='max_person_cache',
+                        type=int, default=4096,
+                        help='Maximum number of actors held in memory')
     parser.add_argument('--votingtime', dest='votingtime', type=int,
                         default=1440,
                         help='Time to vote on newswire items in minutes')
@@ -1287,7 +1308,7 @@ def _command_options() -> None:
         test_rss = get_rss(base_dir, domain, session, argb.rss,
                            False, False, 1000, 1000, 1000, 1000, debug,
                            preferred_podcast_formats, timeout_sec,
-                           argb.language)
+                           argb.language, None)
         pprint(test_rss)
         sys.exit()
 
@@ -2434,6 +2455,11 @@ def _command_options() -> None:
     if argb.i2p:
         http_prefix = 'http'
 
+    if argb.migrateindexes:
+        ctr = migrate_box_indexes(base_dir)
+        print(str(ctr) + ' timeline indexes were migrated')
+        sys.exit()
+
     if argb.migrations:
         cached_webfingers = {}
         if argb.http or domain.endswith('.onion'):
@@ -3487,6 +3513,21 @@ def _command_options() -> None:
     if max_followers is not None:
         argb.max_followers = int(max_followers)
 
+    inbox_queue_workers = \
+        get_config_param(base_dir, 'inboxQueueWorkers')
+    if inbox_queue_workers is not None:
+        argb.inbox_queue_workers = int(inbox_queue_workers)
+
+    delivery_max_age_hrs = \
+        get_config_param(base_dir, 'deliveryMaxAgeHours')
+    if delivery_max_age_hrs is not None:
+        argb.delivery_max_age_hrs = int(delivery_max_age_hrs)
+
+    max_person_cache = \
+        get_config_param(base_dir, 'maxPersonCache')
+    if max_person_cache is not None:
+        argb.max_person_cache = int(max_person_cache)
+
     max_feed_item_size_kb = \
         get_config_param(base_dir, 'maxFeedItemSizeKb')
     if max_feed_item_size_kb is not None:
@@ -3595,6 +3636,9 @@ def _command_options() -> None:
         for crawlers_allowed_str2 in crawlers_allowed_list:
             crawlers_allowed.append(crawlers_allowed_str2.strip())
 
+    if argb.reverseProxies:
+        set_config_param(base_dir, 'reverseProxies', argb.reverseProxies)
+
     lists_enabled = ''
     if argb.lists_enabled:
         lists_enabled = argb.lists_enabled
@@ -3679,7 +3723,10 @@ def _command_options() -> None:
 if __name__ == "__main__":
     argb2, opt2 = _command_options()
     print('allowdeletion: ' + str(argb2.allowdeletion))
-    run_daemon(argb2.max_hashtags,
+    run_daemon(argb2.delivery_max_age_hrs,
+               argb2.max_person_cache,
+               argb2.inbox_queue_workers,
+               argb2.max_hashtags,
                argb2.mapFormat,
                argb2.clacks,
                opt2['preferred_podcast_formats'],
@@ -14,6 +14,9 @@ from utils import remove_eol
 from utils import standardize_text
 from utils import remove_inverted_text
 from utils import remove_square_capitals
+from matcher import build_matcher
+from matcher import matcher_contains
+from matcher import matcher_find
 
 
 def add_filter(base_dir: str, nickname: str, domain: str, words: str) -> bool:
@@ -117,20 +120,26 @@ def _is_twitter_post(content: str) -> bool:
     return False
 
 
-def _is_filtered_base(filename: str, content: str,
-                      system_language: str) -> bool:
-    """Uses the given file containing filtered words to check
-    the given content
+def _compiled_filters(filename: str, filters_cache: {}) -> {}:
+    """Returns matchers for the given file containing filtered words.
+    These are rebuilt only if the file has changed
     """
     if not os.path.isfile(filename):
-        return False
-
-    content = remove_inverted_text(content, system_language)
-    content = remove_square_capitals(content, system_language)
-
-    # convert any fancy characters to ordinary ones
-    content = standardize_text(content)
+        return None
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        return None
+    if filters_cache is not None:
+        compiled = filters_cache.get(filename)
+        if compiled:
+            if compiled['modified'] == file_stat.st_mtime and \
+               compiled['size'] == file_stat.st_size:
+                return compiled
 
+    terms = []
+    rules = []
+    rule_words = []
     try:
         with open(filename, 'r', encoding='utf-8') as fp_filt:
             for line in fp_filt:
@@ -140,36 +149,83 @@ def _is_filtered_base(filename: str, content: str,
                 if len(filter_str) < 2:
                     continue
                 if '+' not in filter_str:
-                    if filter_str in content:
-                        return True
-                else:
-                    filter_words = filter_str.replace('"', '').split('+')
-                    for word in filter_words:
-                        if word not in content:
-                            return False
-                    return True
+                    terms.append(filter_str)
+                    continue
+                # all of these words must be present
+                filter_words = []
+                for word in filter_str.replace('"', '').split('+'):
+                    if word and word not in filter_words:
+                        filter_words.append(word)
+                if not filter_words:
+                    continue
+                rules.append(filter_words)
+                rule_words += filter_words
     except OSError as ex:
-        print('EX: _is_filtered_base ' + filename + ' ' + str(ex))
+        print('EX: _compiled_filters ' + filename + ' ' + str(ex))
+        return None
+
+    compiled = {
+        "modified": file_stat.st_mtime,
+        "size": file_stat.st_size,
+        "terms": build_matcher(terms),
+        "rules": rules,
+        "ruleWords": build_matcher(rule_words)
+    }
+    if filters_cache is not None:
+        filters_cache[filename] = compiled
+    return compiled
+
+
+def _is_filtered_base(filename: str, content: str,
+                      system_language: str, filters_cache: {}) -> bool:
+    """Uses the given file containing filtered words to check
+    the given content
+    """
+    compiled = _compiled_filters(filename, filters_cache)
+    if not compiled:
+        return False
+
+    content = remove_inverted_text(content, system_language)
+    content = remove_square_capitals(content, system_language)
+
+    # convert any fancy characters to ordinary ones
+    content = standardize_text(content)
+
+    if matcher_contains(compiled['terms'], content):
+        return True
+    if not compiled['rules']:
+        return False
+    words_found = matcher_find(compiled['ruleWords'], content)
+    for filter_words in compiled['rules']:
+        matched = True
+        for word in filter_words:
+            if word not in words_found:
+                matched = False
+                break
+        if matched:
+            return True
     return False
 
 
 def is_filtered_globally(base_dir: str, content: str,
-                         system_language: str) -> bool:
+                         system_language: str,
+                         filters_cache: {} = None) -> bool:
     """Is the given content globally filtered?
     """
     global_filters_filename = base_dir + '/accounts/filters.txt'
     if _is_filtered_base(global_filters_filename, content,
-                         system_language):
+                         system_language, filters_cache):
         return True
     return False
 
 
 def is_filtered_bio(base_dir: str,
                     nickname: str, domain: str, bio: str,
-                    system_language: str) -> bool:
+                    system_language: str,
+                    filters_cache: {} = None) -> bool:
     """Should the given actor bio be filtered out?
     """
-    if is_filtered_globally(base_dir, bio, system_language):
+    if is_filtered_globally(base_dir, bio, system_language, filters_cache):
         return True
 
     if not nickname or not domain:
@@ -177,17 +233,20 @@ def is_filtered_bio(base_dir: str,
 
     account_filters_filename = \
         acct_dir(base_dir, nickname, domain) + '/filters_bio.txt'
-    return _is_filtered_base(account_filters_filename, bio, system_language)
+    return _is_filtered_base(account_filters_filename, bio, system_language,
+                             filters_cache)
 
 
 def is_filtered(base_dir: str, nickname: str, domain: str,
-                content: str, system_language: str) -> bool:
+                content: str, system_language: str,
+                filters_cache: {} = None) -> bool:
     """Should the given content be filtered out?
     This is a simple type of filter which just matches words, not a regex
     You can add individual words or use word1+word2 to indicate that two
     words must be present although not necessarily adjacent
     """
-    if is_filtered_globally(base_dir, content, system_language):
+    if is_filtered_globally(base_dir, content, system_language,
+                            filters_cache):
         return True
 
     if not nickname or not domain:
@@ -202,4 +261,4 @@ def is_filtered(base_dir: str, nickname: str, domain: str,
     account_filters_filename = \
         acct_dir(base_dir, nickname, domain) + '/filters.txt'
     return _is_filtered_base(account_filters_filename, content,
-                             system_language)
+                             system_language, filters_cache)
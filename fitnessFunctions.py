@@ -49,6 +49,55 @@ def fitness_performance(startTime, fitness_state: {},
               watch_point + '/' + str(total * 1000 / ctr))
 
 
+def fitness_queue(fitness_state: {}, fitness_id: str,
+                  queue: [], items_processed: int,
+                  workers: []) -> None:
+    """Log the depth and throughput of a queue
+    """
+    if fitness_state is None:
+        return
+    queue_depth = len(queue)
+    if 'queues' not in fitness_state:
+        fitness_state['queues'] = {}
+    curr_time = int(time.time())
+    if fitness_id not in fitness_state['queues']:
+        fitness_state['queues'][fitness_id] = {
+            "depth": 0,
+            "maxDepth": 0,
+            "workers": 0,
+            "processed": 0,
+            "perMinute": 0,
+            "minuteStart": curr_time,
+            "minuteProcessed": 0
+        }
+    queue_state = fitness_state['queues'][fitness_id]
+    queue_state['depth'] = queue_depth
+    if queue_depth > queue_state['maxDepth']:
+        queue_state['maxDepth'] = queue_depth
+    queue_state['workers'] = len(workers)
+    queue_state['processed'] += items_processed
+    queue_state['minuteProcessed'] += items_processed
+
+    # items processed per minute
+    elapsed_secs = curr_time - queue_state['minuteStart']
+    if elapsed_secs >= 60:
+        queue_state['perMinute'] = \
+            int(queue_state['minuteProcessed'] * 60 / elapsed_secs)
+        queue_state['minuteStart'] = curr_time
+        queue_state['minuteProcessed'] = 0
+
+
+def fitness_cache(fitness_state: {}, fitness_id: str,
+                  cache_stats: {}) -> None:
+    """Log the hit and miss counters of a cache
+    """
+    if fitness_state is None:
+        return
+    if 'caches' not in fitness_state:
+        fitness_state['caches'] = {}
+    fitness_state['caches'][fitness_id] = cache_stats
+
+
 def sorted_watch_points(fitness: {}, fitness_id: str) -> []:
     """Returns a sorted list of watchpoints
     times are in mS
@@ -791,7 +791,8 @@ def followed_account_accepts(session, base_dir: str, http_prefix: str,
                             send_threads, post_log, cached_webfingers,
                             person_cache, debug, project_version, None,
                             group_account, signing_priv_key_pem,
-                            7856837, curr_domain, onion_domain, i2p_domain)
+                            7856837, curr_domain, onion_domain, i2p_domain,
+                            None)
 
 
 def followed_account_rejects(session, session_onion, session_i2p,
@@ -867,7 +868,7 @@ def followed_account_rejects(session, session_onion, session_i2p,
                             person_cache, debug, project_version, None,
                             group_account, signing_priv_key_pem,
                             6393063,
-                            domain, onion_domain, i2p_domain)
+                            domain, onion_domain, i2p_domain, None)
 
 
 def send_follow_request(session, base_dir: str,
@@ -965,7 +966,7 @@ def send_follow_request(session, base_dir: str,
                      send_threads, post_log, cached_webfingers, person_cache,
                      debug, project_version, None, group_account,
                      signing_priv_key_pem, 8234389,
-                     curr_domain, onion_domain, i2p_domain)
+                     curr_domain, onion_domain, i2p_domain, None)
 
     return new_follow_json
 
@@ -30,6 +30,7 @@ from filters import is_filtered
 from context import get_individual_post_context
 from session import get_method
 from auth import create_basic_auth_header
+from indexlock import index_lock
 
 
 def _dav_date_from_string(timestamp: str) -> str:
@@ -86,11 +87,13 @@ def _remove_event_from_timeline(event_id: str,
 
 
 def save_event_post(base_dir: str, handle: str, post_id: str,
-                    event_json: {}) -> bool:
+                    event_json: {}, post_json_object: {}) -> bool:
     """Saves an event to the calendar and/or the events timeline
     If an event has extra fields, as per Mobilizon,
     Then it is saved as a separate entity and added to the
     events timeline
+    If the post containing the event is given then it is added
+    to the calendar index
     See https://framagit.org/framasoft/mobilizon/-/blob/
     master/lib/federation/activity_stream/converter/event.ex
     """
@@ -136,26 +139,27 @@ def save_event_post(base_dir: str, handle: str, post_id: str,
         # save to the events timeline
         tl_events_filename = base_dir + '/accounts/' + handle + '/events.txt'
 
-        if os.path.isfile(tl_events_filename):
-            _remove_event_from_timeline(event_id, tl_events_filename)
-            try:
-                with open(tl_events_filename, 'r+',
-                          encoding='utf-8') as tl_events_file:
-                    content = tl_events_file.read()
-                    if event_id + '\n' not in content:
-                        tl_events_file.seek(0, 0)
-                        tl_events_file.write(event_id + '\n' + content)
-            except OSError as ex:
-                print('EX: Failed to write entry to events file ' +
-                      tl_events_filename + ' ' + str(ex))
-                return False
-        else:
-            try:
-                with open(tl_events_filename, 'w+',
-                          encoding='utf-8') as tl_events_file:
-                    tl_events_file.write(event_id + '\n')
-            except OSError:
-                print('EX: unable to write ' + tl_events_filename)
+        with index_lock(tl_events_filename):
+            if os.path.isfile(tl_events_filename):
+                _remove_event_from_timeline(event_id, tl_events_filename)
+                try:
+                    with open(tl_events_filename, 'r+',
+                              encoding='utf-8') as tl_events_file:
+                        content = tl_events_file.read()
+                        if event_id + '\n' not in content:
+                            tl_events_file.seek(0, 0)
+                            tl_events_file.write(event_id + '\n' + content)
+                except OSError as ex:
+                    print('EX: Failed to write entry to events file ' +
+                          tl_events_filename + ' ' + str(ex))
+                    return False
+            else:
+                try:
+                    with open(tl_events_filename, 'w+',
+                              encoding='utf-8') as tl_events_file:
+                        tl_events_file.write(event_id + '\n')
+                except OSError:
+                    print('EX: unable to write ' + tl_events_filename)
 
     # create a directory for the calendar year
     if not os.path.isdir(calendar_path + '/' + str(event_year)):
@@ -165,18 +169,36 @@ def save_event_post(base_dir: str, handle: str, post_id: str,
     calendar_filename = calendar_path + '/' + str(event_year) + \
         '/' + str(event_month_number) + '.txt'
 
-    # Does this event post already exist within the calendar month?
-    if os.path.isfile(calendar_filename):
-        if text_in_file(post_id, calendar_filename):
-            # Event post already exists
-            return False
+    with index_lock(calendar_filename):
+        # Does this event post already exist within the calendar month?
+        if os.path.isfile(calendar_filename):
+            if text_in_file(post_id, calendar_filename):
+                # Event post already exists
+                return False
 
-    # append the post Id to the file for the calendar month
-    try:
-        with open(calendar_filename, 'a+', encoding='utf-8') as calendar_file:
-            calendar_file.write(post_id + '\n')
-    except OSError:
-        print('EX: unable to append ' + calendar_filename)
+        # append the post Id to the file for the calendar month
+        try:
+            with open(calendar_filename, 'a+',
+                      encoding='utf-8') as calendar_file:
+                calendar_file.write(post_id + '\n')
+        except OSError:
+            print('EX: unable to append ' + calendar_filename)
+
+        if post_json_object:
+            nickname = handle.split('@')[0]
+            domain = handle.split('@')[1]
+            post_filename = locate_post(base_dir, nickname, domain, post_id)
+            if post_filename:
+                index_filename = _calendar_index_filename(calendar_filename)
+                calendar_index = {}
+                if os.path.isfile(index_filename):
+                    calendar_index = load_json(index_filename)
+                    if not calendar_index:
+                        calendar_index = {}
+                calendar_index[post_id] = \
+                    _calendar_index_entry(post_filename,
+                                          post_json_object)
+                save_json(calendar_index, index_filename)
 
     # create a file which will trigger a notification that
     # a new event has been added
@@ -215,6 +237,120 @@ def _is_happening_post(post_json_object: {}) -> bool:
     return True
 
 
+def _calendar_index_filename(calendar_filename: str) -> str:
+    """Returns the filename of the event index for a calendar month
+    """
+    return calendar_filename.replace('.txt', '.json')
+
+
+def _calendar_index_entry(post_filename: str, post_json_object: {}) -> {}:
+    """Returns the calendar index entry for the given event post.
+    This contains the Event and Place tags, together with the post
+    fields needed to show the calendar without loading the post
+    """
+    modified = 0
+    try:
+        modified = os.path.getmtime(post_filename)
+    except OSError:
+        print('EX: _calendar_index_entry unable to get modified time ' +
+              post_filename)
+    entry = {
+        "modified": modified,
+        "public": False,
+        "published": None,
+        "content": None,
+        "contentMap": None,
+        "tags": []
+    }
+    if not _is_happening_post(post_json_object):
+        return entry
+    entry['public'] = is_public_post(post_json_object)
+    if isinstance(post_json_object['object'].get('published'), str):
+        entry['published'] = post_json_object['object']['published']
+    if post_json_object['object'].get('content'):
+        entry['content'] = post_json_object['object']['content']
+    if post_json_object['object'].get('contentMap'):
+        entry['contentMap'] = post_json_object['object']['contentMap']
+    if not isinstance(post_json_object['object']['tag'], list):
+        return entry
+    for tag in post_json_object['object']['tag']:
+        if not isinstance(tag, dict):
+            continue
+        if not _is_happening_event(tag):
+            continue
+        entry['tags'].append(tag)
+    return entry
+
+
+def _calendar_month_events(base_dir: str, nickname: str, domain: str,
+                           year: int, month_number: int) -> []:
+    """Returns a list of post ids and calendar index entries for the
+    given month. Posts are only loaded if they are not within the index
+    or have changed since they were indexed. If some posts have been
+    deleted then the calendar file is regenerated
+    """
+    calendar_filename = \
+        acct_dir(base_dir, nickname, domain) + \
+        '/calendar/' + str(year) + '/' + str(month_number) + '.txt'
+    if not os.path.isfile(calendar_filename):
+        return []
+
+    with index_lock(calendar_filename):
+        index_filename = _calendar_index_filename(calendar_filename)
+        calendar_index = {}
+        if os.path.isfile(index_filename):
+            calendar_index = load_json(index_filename)
+            if not calendar_index:
+                calendar_index = {}
+
+        month_events = []
+        calendar_post_ids = []
+        recreate_events_file = False
+        index_changed = False
+        with open(calendar_filename, 'r', encoding='utf-8') as events_file:
+            for post_id in events_file:
+                post_id = remove_eol(post_id)
+                post_filename = \
+                    locate_post(base_dir, nickname, domain, post_id)
+                if not post_filename:
+                    recreate_events_file = True
+                    continue
+                calendar_post_ids.append(post_id)
+
+                modified = 0
+                try:
+                    modified = os.path.getmtime(post_filename)
+                except OSError:
+                    print('EX: _calendar_month_events ' +
+                          'unable to get modified time ' + post_filename)
+                entry = calendar_index.get(post_id)
+                if not entry or entry.get('modified') != modified:
+                    post_json_object = load_json(post_filename)
+                    entry = _calendar_index_entry(post_filename,
+                                                  post_json_object)
+                    calendar_index[post_id] = entry
+                    index_changed = True
+                month_events.append([post_id, entry])
+
+        # if some posts have been deleted then regenerate the calendar file
+        if recreate_events_file:
+            try:
+                with open(calendar_filename, 'w+',
+                          encoding='utf-8') as calendar_file:
+                    for post_id in calendar_post_ids:
+                        calendar_file.write(post_id + '\n')
+            except OSError:
+                print('EX: unable to write ' + calendar_filename)
+            for post_id in list(calendar_index.keys()):
+                if post_id not in calendar_post_ids:
+                    del calendar_index[post_id]
+                    index_changed = True
+
+        if index_changed:
+            save_json(calendar_index, index_filename)
+    return month_events
+
+
 def _event_text_match(content: str, text_match: str) -> bool:
     """Returns true of the content matches the search text
     """
@@ -252,87 +388,58 @@ def get_todays_events(base_dir: str, nickname: str, domain: str,
     else:
         day_number = curr_day_of_month
 
-    calendar_filename = \
-        acct_dir(base_dir, nickname, domain) + \
-        '/calendar/' + str(year) + '/' + str(month_number) + '.txt'
     events = {}
-    if not os.path.isfile(calendar_filename):
-        return events
+    month_events = \
+        _calendar_month_events(base_dir, nickname, domain,
+                               year, month_number)
+    for post_id, entry in month_events:
+        if not entry['tags']:
+            continue
 
-    calendar_post_ids = []
-    recreate_events_file = False
-    with open(calendar_filename, 'r', encoding='utf-8') as events_file:
-        for post_id in events_file:
-            post_id = remove_eol(post_id)
-            post_filename = locate_post(base_dir, nickname, domain, post_id)
-            if not post_filename:
-                recreate_events_file = True
+        content = None
+        if entry.get('contentMap'):
+            if entry['contentMap'].get(system_language):
+                content = entry['contentMap'][system_language]
+        if not content:
+            content = entry.get('content')
+        if content:
+            if not _event_text_match(content, text_match):
                 continue
 
-            post_json_object = load_json(post_filename)
-            if not _is_happening_post(post_json_object):
-                continue
+        public_event = entry['public']
 
-            if post_json_object.get('object'):
-                content = None
-                if post_json_object['object'].get('contentMap'):
-                    sys_lang = system_language
-                    if post_json_object['object']['contentMap'].get(sys_lang):
-                        content = \
-                            post_json_object['object']['contentMap'][sys_lang]
-                if not content:
-                    if post_json_object['object'].get('content'):
-                        content = post_json_object['object']['content']
-                if content:
-                    if not _event_text_match(content, text_match):
-                        continue
-
-            public_event = is_public_post(post_json_object)
-
-            post_event = []
-            day_of_month = None
-            for tag in post_json_object['object']['tag']:
-                if not _is_happening_event(tag):
+        post_event = []
+        day_of_month = None
+        for tag in entry['tags']:
+            # this tag is an event or a place
+            if tag['type'] == 'Event':
+                # tag is an event
+                if not tag.get('startTime'):
                     continue
-                # this tag is an event or a place
-                if tag['type'] == 'Event':
-                    # tag is an event
-                    if not tag.get('startTime'):
-                        continue
-                    event_time = \
-                        datetime.strptime(tag['startTime'],
-                                          "%Y-%m-%dT%H:%M:%S%z")
-                    if int(event_time.strftime("%Y")) == year and \
-                       int(event_time.strftime("%m")) == month_number and \
-                       int(event_time.strftime("%d")) == day_number:
-                        day_of_month = str(int(event_time.strftime("%d")))
-                        if '#statuses#' in post_id:
-                            # link to the id so that the event can be
-                            # easily deleted
-                            tag['post_id'] = post_id.split('#statuses#')[1]
-                            tag['id'] = post_id.replace('#', '/')
-                            tag['sender'] = post_id.split('#statuses#')[0]
-                            tag['sender'] = tag['sender'].replace('#', '/')
-                            tag['public'] = public_event
-                        post_event.append(tag)
-                else:
-                    # tag is a place
+                event_time = \
+                    datetime.strptime(tag['startTime'],
+                                      "%Y-%m-%dT%H:%M:%S%z")
+                if int(event_time.strftime("%Y")) == year and \
+                   int(event_time.strftime("%m")) == month_number and \
+                   int(event_time.strftime("%d")) == day_number:
+                    day_of_month = str(int(event_time.strftime("%d")))
+                    if '#statuses#' in post_id:
+                        # link to the id so that the event can be
+                        # easily deleted
+                        tag['post_id'] = post_id.split('#statuses#')[1]
+                        tag['id'] = post_id.replace('#', '/')
+                        tag['sender'] = post_id.split('#statuses#')[0]
+                        tag['sender'] = tag['sender'].replace('#', '/')
+                        tag['public'] = public_event
+                        tag['published'] = entry['published']
                     post_event.append(tag)
-            if post_event and day_of_month:
-                calendar_post_ids.append(post_id)
-                if not events.get(day_of_month):
-                    events[day_of_month] = []
-                events[day_of_month].append(post_event)
-
-    # if some posts have been deleted then regenerate the calendar file
-    if recreate_events_file:
-        try:
-            with open(calendar_filename, 'w+',
-                      encoding='utf-8') as calendar_file:
-                for post_id in calendar_post_ids:
-                    calendar_file.write(post_id + '\n')
-        except OSError:
-            print('EX: unable to write ' + calendar_filename)
+            else:
+                # tag is a place
+                post_event.append(tag)
+        if post_event and day_of_month:
+            if not events.get(day_of_month):
+                events[day_of_month] = []
+            events[day_of_month].append(post_event)
 
     return events
 
@@ -368,6 +475,7 @@ def _icalendar_day(base_dir: str, nickname: str, domain: str,
         event_is_public = False
         event_start = None
         event_end = None
+        published = None
 
         for evnt in event_post:
             if evnt['type'] == 'Event':
@@ -384,6 +492,9 @@ def _icalendar_day(base_dir: str, nickname: str, domain: str,
                 if 'public' in evnt:
                     if evnt['public'] is True:
                         event_is_public = True
+                if isinstance(evnt.get('published'), str):
+                    # published date from the calendar index
+                    published = evnt['published']
                 if evnt.get('sender'):
                     # get display name from sending actor
                     if evnt.get('sender'):
@@ -409,26 +520,27 @@ def _icalendar_day(base_dir: str, nickname: str, domain: str,
            not event_description or not sender_actor:
             continue
 
-        # find the corresponding post
-        post_filename = locate_post(base_dir, nickname, domain, post_id)
-        if not post_filename:
-            continue
+        if not published:
+            # find the corresponding post
+            post_filename = locate_post(base_dir, nickname, domain, post_id)
+            if not post_filename:
+                continue
 
-        post_json_object = load_json(post_filename)
-        if not post_json_object:
-            continue
+            post_json_object = load_json(post_filename)
+            if not post_json_object:
+                continue
 
-        # get the published date from the post
-        if not post_json_object.get('object'):
-            continue
-        if not isinstance(post_json_object['object'], dict):
-            continue
-        if not post_json_object['object'].get('published'):
-            continue
-        if not isinstance(post_json_object['object']['published'], str):
-            continue
-        published = \
-            _ical_date_string(post_json_object['object']['published'])
+            # get the published date from the post
+            if not post_json_object.get('object'):
+                continue
+            if not isinstance(post_json_object['object'], dict):
+                continue
+            if not post_json_object['object'].get('published'):
+                continue
+            if not isinstance(post_json_object['object']['published'], str):
+                continue
+            published = post_json_object['object']['published']
+        published = _ical_date_string(published)
 
         event_start = \
             _ical_date_string(event_start.strftime("%Y-%m-%dT%H:%M:%SZ"))
@@ -548,46 +660,29 @@ def day_events_check(base_dir: str, nickname: str, domain: str,
     month_number = curr_date.month
     day_number = curr_date.day
 
-    calendar_filename = \
-        acct_dir(base_dir, nickname, domain) + \
-        '/calendar/' + str(year) + '/' + str(month_number) + '.txt'
-    if not os.path.isfile(calendar_filename):
-        return False
-
-    events_exist = False
-    with open(calendar_filename, 'r', encoding='utf-8') as events_file:
-        for post_id in events_file:
-            post_id = remove_eol(post_id)
-            post_filename = locate_post(base_dir, nickname, domain, post_id)
-            if not post_filename:
+    month_events = \
+        _calendar_month_events(base_dir, nickname, domain,
+                               year, month_number)
+    for _, entry in month_events:
+        for tag in entry['tags']:
+            # this tag is an event or a place
+            if tag['type'] != 'Event':
                 continue
-
-            post_json_object = load_json(post_filename)
-            if not _is_happening_post(post_json_object):
+            # tag is an event
+            if not tag.get('startTime'):
                 continue
+            event_time = \
+                datetime.strptime(tag['startTime'],
+                                  "%Y-%m-%dT%H:%M:%S%z")
+            if int(event_time.strftime("%d")) != day_number:
+                continue
+            if int(event_time.strftime("%m")) != month_number:
+                continue
+            if int(event_time.strftime("%Y")) != year:
+                continue
+            return True
 
-            for tag in post_json_object['object']['tag']:
-                if not _is_happening_event(tag):
-                    continue
-                # this tag is an event or a place
-                if tag['type'] != 'Event':
-                    continue
-                # tag is an event
-                if not tag.get('startTime'):
-                    continue
-                event_time = \
-                    datetime.strptime(tag['startTime'],
-                                      "%Y-%m-%dT%H:%M:%S%z")
-                if int(event_time.strftime("%d")) != day_number:
-                    continue
-                if int(event_time.strftime("%m")) != month_number:
-                    continue
-                if int(event_time.strftime("%Y")) != year:
-                    continue
-                events_exist = True
-                break
-
-    return events_exist
+    return False
 
 
 def get_this_weeks_events(base_dir: str, nickname: str, domain: str) -> {}:
@@ -601,62 +696,32 @@ def get_this_weeks_events(base_dir: str, nickname: str, domain: str) -> {}:
     year = now.year
     month_number = now.month
 
-    calendar_filename = \
-        acct_dir(base_dir, nickname, domain) + \
-        '/calendar/' + str(year) + '/' + str(month_number) + '.txt'
-
     events = {}
-    if not os.path.isfile(calendar_filename):
-        return events
-
-    calendar_post_ids = []
-    recreate_events_file = False
-    with open(calendar_filename, 'r', encoding='utf-8') as events_file:
-        for post_id in events_file:
-            post_id = remove_eol(post_id)
-            post_filename = locate_post(base_dir, nickname, domain, post_id)
-            if not post_filename:
-                recreate_events_file = True
-                continue
-
-            post_json_object = load_json(post_filename)
-            if not _is_happening_post(post_json_object):
-                continue
-
-            post_event = []
-            week_day_index = None
-            for tag in post_json_object['object']['tag']:
-                if not _is_happening_event(tag):
+    month_events = \
+        _calendar_month_events(base_dir, nickname, domain,
+                               year, month_number)
+    for _, entry in month_events:
+        post_event = []
+        week_day_index = None
+        for tag in entry['tags']:
+            # this tag is an event or a place
+            if tag['type'] == 'Event':
+                # tag is an event
+                if not tag.get('startTime'):
                     continue
-                # this tag is an event or a place
-                if tag['type'] == 'Event':
-                    # tag is an event
-                    if not tag.get('startTime'):
-                        continue
-                    event_time = \
-                        datetime.strptime(tag['startTime'],
-                                          "%Y-%m-%dT%H:%M:%S%z")
-                    if now <= event_time <= end_of_week:
-                        week_day_index = (event_time - now).days()
-                        post_event.append(tag)
-                else:
-                    # tag is a place
+                event_time = \
+                    datetime.strptime(tag['startTime'],
+                                      "%Y-%m-%dT%H:%M:%S%z")
+                if now <= event_time <= end_of_week:
+                    week_day_index = (event_time - now).days()
                     post_event.append(tag)
-            if post_event and week_day_index:
-                calendar_post_ids.append(post_id)
-                if not events.get(week_day_index):
-                    events[week_day_index] = []
-                events[week_day_index].append(post_event)
-
-    # if some posts have been deleted then regenerate the calendar file
-    if recreate_events_file:
-        try:
-            with open(calendar_filename, 'w+',
-                      encoding='utf-8') as calendar_file:
-                for post_id in calendar_post_ids:
-                    calendar_file.write(post_id + '\n')
-        except OSError:
-            print('EX: unable to write ' + calendar_filename)
+            else:
+                # tag is a place
+                post_event.append(tag)
+        if post_event and week_day_index:
+            if not events.get(week_day_index):
+                events[week_day_index] = []
+            events[week_day_index].append(post_event)
 
     return events
 
@@ -668,77 +733,47 @@ def get_calendar_events(base_dir: str, nickname: str, domain: str,
     Returns a dictionary indexed by day number of lists containing
     Event and Place activities
     """
-    calendar_filename = \
-        acct_dir(base_dir, nickname, domain) + \
-        '/calendar/' + str(year) + '/' + str(month_number) + '.txt'
-
     events = {}
-    if not os.path.isfile(calendar_filename):
-        return events
+    month_events = \
+        _calendar_month_events(base_dir, nickname, domain,
+                               year, month_number)
+    for post_id, entry in month_events:
+        if not entry['tags']:
+            continue
 
-    calendar_post_ids = []
-    recreate_events_file = False
-    with open(calendar_filename, 'r', encoding='utf-8') as events_file:
-        for post_id in events_file:
-            post_id = remove_eol(post_id)
-            post_filename = locate_post(base_dir, nickname, domain, post_id)
-            if not post_filename:
-                recreate_events_file = True
+        if entry.get('content'):
+            if not _event_text_match(entry['content'], text_match):
                 continue
 
-            post_json_object = load_json(post_filename)
-            if not post_json_object:
-                continue
-            if not _is_happening_post(post_json_object):
-                continue
-
-            if post_json_object.get('object'):
-                if post_json_object['object'].get('content'):
-                    content = post_json_object['object']['content']
-                    if not _event_text_match(content, text_match):
-                        continue
-
-            post_event = []
-            day_of_month = None
-            for tag in post_json_object['object']['tag']:
-                if not _is_happening_event(tag):
+        post_event = []
+        day_of_month = None
+        for tag in entry['tags']:
+            # this tag is an event or a place
+            if tag['type'] == 'Event':
+                # tag is an event
+                if not tag.get('startTime'):
                     continue
-                # this tag is an event or a place
-                if tag['type'] == 'Event':
-                    # tag is an event
-                    if not tag.get('startTime'):
-                        continue
-                    event_time = \
-                        datetime.strptime(tag['startTime'],
-                                          "%Y-%m-%dT%H:%M:%S%z")
-                    if int(event_time.strftime("%Y")) == year and \
-                       int(event_time.strftime("%m")) == month_number:
-                        day_of_month = str(int(event_time.strftime("%d")))
-                        if '#statuses#' in post_id:
-                            tag['post_id'] = post_id.split('#statuses#')[1]
-                            tag['id'] = post_id.replace('#', '/')
-                            tag['sender'] = post_id.split('#statuses#')[0]
-                            tag['sender'] = tag['sender'].replace('#', '/')
-                        post_event.append(tag)
-                else:
-                    # tag is a place
+                event_time = \
+                    datetime.strptime(tag['startTime'],
+                                      "%Y-%m-%dT%H:%M:%S%z")
+                if int(event_time.strftime("%Y")) == year and \
+                   int(event_time.strftime("%m")) == month_number:
+                    day_of_month = str(int(event_time.strftime("%d")))
+                    if '#statuses#' in post_id:
+                        tag['post_id'] = post_id.split('#statuses#')[1]
+                        tag['id'] = post_id.replace('#', '/')
+                        tag['sender'] = post_id.split('#statuses#')[0]
+                        tag['sender'] = tag['sender'].replace('#', '/')
+                        tag['published'] = entry['published']
                     post_event.append(tag)
+            else:
+                # tag is a place
+                post_event.append(tag)
 
-            if post_event and day_of_month:
-                calendar_post_ids.append(post_id)
-                if not events.get(day_of_month):
-                    events[day_of_month] = []
-                events[day_of_month].append(post_event)
-
-    # if some posts have been deleted then regenerate the calendar file
-    if recreate_events_file:
-        try:
-            with open(calendar_filename, 'w+',
-                      encoding='utf-8') as calendar_file:
-                for post_id in calendar_post_ids:
-                    calendar_file.write(post_id + '\n')
-        except OSError:
-            print('EX: unable to write ' + calendar_filename)
+        if post_event and day_of_month:
+            if not events.get(day_of_month):
+                events[day_of_month] = []
+            events[day_of_month].append(post_event)
 
     return events
 
@@ -755,20 +790,32 @@ def remove_calendar_event(base_dir: str, nickname: str, domain: str,
         return
     if '/' in message_id:
         message_id = message_id.replace('/', '#')
-    if not text_in_file(message_id, calendar_filename):
-        return
-    lines = None
-    with open(calendar_filename, 'r', encoding='utf-8') as fp_cal:
-        lines = fp_cal.readlines()
-    if not lines:
-        return
-    try:
-        with open(calendar_filename, 'w+', encoding='utf-8') as fp_cal:
-            for line in lines:
-                if message_id not in line:
-                    fp_cal.write(line)
-    except OSError:
-        print('EX: unable to write ' + calendar_filename)
+    with index_lock(calendar_filename):
+        if not text_in_file(message_id, calendar_filename):
+            return
+        lines = None
+        with open(calendar_filename, 'r', encoding='utf-8') as fp_cal:
+            lines = fp_cal.readlines()
+        if not lines:
+            return
+        try:
+            with open(calendar_filename, 'w+', encoding='utf-8') as fp_cal:
+                for line in lines:
+                    if message_id not in line:
+                        fp_cal.write(line)
+        except OSError:
+            print('EX: unable to write ' + calendar_filename)
+
+        index_filename = _calendar_index_filename(calendar_filename)
+        if not os.path.isfile(index_filename):
+            return
+        calendar_index = load_json(index_filename)
+        if not calendar_index:
+            return
+        for post_id in list(calendar_index.keys()):
+            if message_id in post_id:
+                del calendar_index[post_id]
+        save_json(calendar_index, index_filename)
 
 
 def _dav_decode_token(token: str) -> (int, int, str):
@@ -829,6 +876,7 @@ def _dav_store_event(base_dir: str, nickname: str, domain: str,
     start_time = None
     end_time = None
     description = None
+    location = None
     for line in event_list:
         if line.startswith('DTSTAMP:'):
             timestamp = line.split(':', 1)[1]
@@ -951,7 +999,9 @@ def _dav_store_event(base_dir: str, nickname: str, domain: str,
         return False
     filename = outbox_dir + '/' + post_id.replace('/', '#') + '.json'
     save_json(event_json, filename)
-    save_event_post(base_dir, handle, post_id, event_json)
+    calendar_post_id = post_id.replace('/', '#')
+    save_event_post(base_dir, handle, calendar_post_id,
+                    event_json['object']['tag'][1], event_json)
 
     return True
 
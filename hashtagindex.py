@@ -0,0 +1,252 @@
+__filename__ = "hashtagindex.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Core"
+
+import os
+import shutil
+import datetime
+import threading
+import tempfile
+from boxindex import timeline_log_lines
+from boxindex import timeline_log_line_count
+from boxindex import timeline_log_convert
+from boxindex import timeline_log_add
+
+# Each hashtag has a file within the tags directory listing the posts
+# which contain it. This is an append only log, oldest first, with an
+# offsets file so that any page of posts can be read newest first
+# without reading the whole list.
+# Every time that a hashtag is used it is also appended to a file for
+# the day, so that recently used hashtags can be found without
+# looking at every hashtag file.
+
+# the maximum number of hashtag logs for which the posts are held in
+# memory, so that duplicates can be detected without reading the log
+MAX_CACHED_HASHTAG_LOGS = 256
+
+# posts within recently used hashtag logs
+_hashtag_logs_cache = {}
+
+# hashtags are added by both inbox queue workers and the web interface
+_hashtag_index_lock = threading.Lock()
+
+
+def _hashtag_days_dir(base_dir: str) -> str:
+    """Returns the directory containing the hashtags used on each day
+    """
+    return base_dir + '/tags/days'
+
+
+def _days_since_epoch() -> int:
+    """Returns the current number of days since the epoch
+    """
+    days_diff = datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
+    return days_diff.days
+
+
+def _convert_hashtag_logs(base_dir: str) -> None:
+    """Converts hashtag files from the older newest first format
+    into append only logs. This only happens once
+    """
+    tags_dir = base_dir + '/tags'
+    converted_filename = tags_dir + '/.timelines'
+    if os.path.isfile(converted_filename):
+        return
+    with _hashtag_index_lock:
+        if os.path.isfile(converted_filename):
+            return
+        for fname in os.listdir(tags_dir):
+            if fname.endswith('.txt'):
+                timeline_log_convert(tags_dir + '/' + fname)
+        try:
+            with open(converted_filename, 'w+',
+                      encoding='utf-8') as fp_converted:
+                fp_converted.write('\n')
+        except OSError:
+            print('EX: _convert_hashtag_logs unable to write ' +
+                  converted_filename)
+
+
+def _create_hashtag_days(base_dir: str) -> None:
+    """Creates the daily hashtag files from the existing hashtag files.
+    This only happens once, after which the daily files are
+    appended to as hashtags are used
+    """
+    days_dir = _hashtag_days_dir(base_dir)
+    if os.path.isdir(days_dir):
+        return
+    tags_dir = base_dir + '/tags'
+    days = {}
+    for fname in os.listdir(tags_dir):
+        if not fname.endswith('.txt'):
+            continue
+        tag_name = fname.split('.')[0]
+        tags_filename = tags_dir + '/' + fname
+        try:
+            with open(tags_filename, 'r', encoding='utf-8') as fp_tags:
+                for line in fp_tags:
+                    day_str = line.split('  ')[0]
+                    if not day_str.isdigit():
+                        continue
+                    if not days.get(day_str):
+                        days[day_str] = ''
+                    days[day_str] += tag_name + '\n'
+        except OSError:
+            print('EX: _create_hashtag_days unable to read ' + tags_filename)
+
+    # the daily files are written to a temporary directory first,
+    # in case hashtags are being stored by more than one thread
+    new_days_dir = \
+        tempfile.mkdtemp(prefix=os.path.basename(days_dir) + '.new',
+                         dir=os.path.dirname(days_dir))
+    for day_str, tags_str in days.items():
+        day_filename = new_days_dir + '/' + day_str + '.txt'
+        try:
+            with open(day_filename, 'w+', encoding='utf-8') as fp_day:
+                fp_day.write(tags_str)
+        except OSError:
+            print('EX: _create_hashtag_days unable to write ' + day_filename)
+    try:
+        os.rename(new_days_dir, days_dir)
+    except OSError:
+        shutil.rmtree(new_days_dir, ignore_errors=False, onerror=None)
+
+
+def hashtag_index_add(base_dir: str, tag_name: str,
+                      nickname: str, post_url: str) -> bool:
+    """Adds a post to the list for a hashtag, and counts the hashtag
+    as being used today. Returns True if the post was added
+    """
+    tags_dir = base_dir + '/tags'
+    if not os.path.isdir(tags_dir):
+        os.mkdir(tags_dir)
+    _convert_hashtag_logs(base_dir)
+    _create_hashtag_days(base_dir)
+
+    days_since_epoch = _days_since_epoch()
+    tags_filename = tags_dir + '/' + tag_name + '.txt'
+    tag_line = str(days_since_epoch) + '  ' + nickname + '  ' + post_url
+    with _hashtag_index_lock:
+        if not _hashtag_logs_cache.get(tags_filename):
+            if len(_hashtag_logs_cache) >= MAX_CACHED_HASHTAG_LOGS:
+                del _hashtag_logs_cache[next(iter(_hashtag_logs_cache))]
+        if not timeline_log_add(_hashtag_logs_cache, tags_filename,
+                                tag_line):
+            return False
+
+    day_filename = \
+        _hashtag_days_dir(base_dir) + '/' + str(days_since_epoch) + '.txt'
+    try:
+        with open(day_filename, 'a+', encoding='utf-8') as fp_day:
+            fp_day.write(tag_name + '\n')
+    except OSError:
+        print('EX: hashtag_index_add unable to append to ' + day_filename)
+    return True
+
+
+def hashtag_index_lines(base_dir: str, tag_name: str,
+                        start_line: int, no_of_lines: int) -> []:
+    """Returns a number of lines from the list of posts for a hashtag,
+    newest first
+    """
+    if not os.path.isdir(base_dir + '/tags'):
+        return []
+    _convert_hashtag_logs(base_dir)
+    tags_filename = base_dir + '/tags/' + tag_name + '.txt'
+    return timeline_log_lines(tags_filename, start_line, no_of_lines)
+
+
+def hashtag_index_count(base_dir: str, tag_name: str) -> int:
+    """Returns the number of posts containing a hashtag
+    """
+    if not os.path.isdir(base_dir + '/tags'):
+        return 0
+    _convert_hashtag_logs(base_dir)
+    tags_filename = base_dir + '/tags/' + tag_name + '.txt'
+    return timeline_log_line_count(tags_filename)
+
+
+def hashtag_day_counts(base_dir: str, since_days_since_epoch: int) -> {}:
+    """Returns the number of times that each hashtag has been used
+    since the given day
+    """
+    tag_counts = {}
+    if not os.path.isdir(base_dir + '/tags'):
+        return tag_counts
+    _create_hashtag_days(base_dir)
+    days_dir = _hashtag_days_dir(base_dir)
+    for day in range(since_days_since_epoch, _days_since_epoch() + 1):
+        day_filename = days_dir + '/' + str(day) + '.txt'
+        if not os.path.isfile(day_filename):
+            continue
+        try:
+            with open(day_filename, 'r', encoding='utf-8') as fp_day:
+                for tag_name in fp_day:
+                    tag_name = tag_name.strip()
+                    if not tag_name:
+                        continue
+                    if tag_counts.get(tag_name):
+                        tag_counts[tag_name] += 1
+                    else:
+                        tag_counts[tag_name] = 1
+        except OSError:
+            print('EX: hashtag_day_counts unable to read ' + day_filename)
+    return tag_counts
+
+
+def remove_old_hashtag_indexes(base_dir: str,
+                               since_days_since_epoch: int) -> int:
+    """Removes hashtags which have not been used since the given day,
+    together with the daily files before it.
+    Returns the number of hashtags removed
+    """
+    if not os.path.isdir(base_dir + '/tags'):
+        return 0
+    _create_hashtag_days(base_dir)
+    days_dir = _hashtag_days_dir(base_dir)
+    old_day_filenames = []
+    for fname in os.listdir(days_dir):
+        day_str = fname.split('.')[0]
+        if not day_str.isdigit():
+            continue
+        if int(day_str) < since_days_since_epoch:
+            old_day_filenames.append(days_dir + '/' + fname)
+    if not old_day_filenames:
+        return 0
+
+    recent_tags = hashtag_day_counts(base_dir, since_days_since_epoch)
+    removed_tags = {}
+    for day_filename in old_day_filenames:
+        try:
+            with open(day_filename, 'r', encoding='utf-8') as fp_day:
+                for tag_name in fp_day:
+                    tag_name = tag_name.strip()
+                    if tag_name and not recent_tags.get(tag_name):
+                        removed_tags[tag_name] = True
+        except OSError:
+            print('EX: remove_old_hashtag_indexes unable to read ' +
+                  day_filename)
+            continue
+        try:
+            os.remove(day_filename)
+        except OSError:
+            print('EX: remove_old_hashtag_indexes unable to delete ' +
+                  day_filename)
+
+    for tag_name in removed_tags:
+        tags_filename = base_dir + '/tags/' + tag_name + '.txt'
+        for filename in (tags_filename, tags_filename + '.offsets',
+                         base_dir + '/tags/' + tag_name + '.category'):
+            if not os.path.isfile(filename):
+                continue
+            try:
+                os.remove(filename)
+            except OSError:
+                print('EX: remove_old_hashtag_indexes unable to delete ' +
+                      filename)
+    return len(removed_tags)
@@ -20,6 +20,7 @@ from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import utils as hazutils
 import base64
+import time
 from time import gmtime, strftime
 import datetime
 from utils import get_full_domain
@@ -27,6 +28,11 @@ from utils import get_sha_256
 from utils import get_sha_512
 from utils import local_actor_url
 
+# time in seconds for which parsed public keys are cached
+PUBLIC_KEY_CACHE_SECS = 60 * 60
+# maximum number of parsed public keys held in memory
+MAX_PUBLIC_KEY_CACHE_ENTRIES = 4096
+
 
 def message_content_digest(message_body_json_str: str,
                            digest_algorithm: str) -> str:
@@ -319,12 +325,56 @@ def _verify_recent_signature(signed_date_str: str) -> bool:
     return True
 
 
+def get_public_key_from_cache(public_key_pem: str, key_id: str,
+                              pub_key_cache: {}):
+    """Returns the parsed public key for the given keyId.
+    Parsing the PEM is relatively expensive, so parsed keys are cached
+    """
+    if pub_key_cache is None or not key_id:
+        return load_pem_public_key(public_key_pem.encode('utf-8'),
+                                   backend=default_backend())
+    curr_time = int(time.time())
+    cached = pub_key_cache.get(key_id)
+    if cached:
+        # if the key has changed then it will be parsed again
+        if cached['pem'] == public_key_pem and \
+           curr_time - cached['timestamp'] < PUBLIC_KEY_CACHE_SECS:
+            return cached['key']
+    pubkey = load_pem_public_key(public_key_pem.encode('utf-8'),
+                                 backend=default_backend())
+    # the most recently parsed keys are at the end
+    pub_key_cache.pop(key_id, None)
+    pub_key_cache[key_id] = {
+        "pem": public_key_pem,
+        "key": pubkey,
+        "timestamp": curr_time
+    }
+    while len(pub_key_cache) > MAX_PUBLIC_KEY_CACHE_ENTRIES:
+        try:
+            oldest_key_id = next(iter(pub_key_cache))
+        except (StopIteration, RuntimeError):
+            break
+        pub_key_cache.pop(oldest_key_id, None)
+    return pubkey
+
+
+def remove_public_keys_from_cache(pub_key_cache: {},
+                                  person_url: str) -> None:
+    """Removes parsed public keys for the given actor from the cache
+    """
+    if not pub_key_cache:
+        return
+    for key_suffix in ('', '#main-key', '/main-key', '#/publicKey'):
+        pub_key_cache.pop(person_url + key_suffix, None)
+
+
 def verify_post_headers(http_prefix: str,
                         public_key_pem: str, headers: dict,
                         path: str, get_method: bool,
                         message_body_digest: str,
                         message_body_json_str: str, debug: bool,
-                        no_recency_check: bool = False) -> bool:
+                        no_recency_check: bool = False,
+                        pub_key_cache: {} = None) -> bool:
     """Returns true or false depending on if the key that we plugged in here
     validates against the headers, method, and path.
     public_key_pem - the public key from an rsa key pair
@@ -332,6 +382,7 @@ def verify_post_headers(http_prefix: str,
     path - the relative url that was requested from this site
     get_method - GET or POST
     message_body_json_str - the received request body (used for digest)
+    pub_key_cache - parsed public keys indexed by keyId
     """
 
     if get_method:
@@ -346,8 +397,6 @@ def verify_post_headers(http_prefix: str,
         print('verify_post_headers message_body_json_str: ' +
               str(message_body_json_str))
 
-    pubkey = load_pem_public_key(public_key_pem.encode('utf-8'),
-                                 backend=default_backend())
     # Build a dictionary of the signature values
     if headers.get('Signature-Input') or headers.get('signature-input'):
         if headers.get('Signature-Input'):
@@ -384,6 +433,11 @@ def verify_post_headers(http_prefix: str,
     if debug:
         print('signature_dict: ' + str(signature_dict))
 
+    key_id = None
+    if signature_dict.get('keyId'):
+        key_id = signature_dict['keyId']
+    pubkey = get_public_key_from_cache(public_key_pem, key_id, pub_key_cache)
+
     # Unpack the signed headers and set values based on current headers and
     # body (if a digest was included)
     signed_header_list = []
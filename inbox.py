@@ -14,12 +14,15 @@ import time
 import random
 from shutil import copyfile
 from linked_data_sig import verify_json_signature
+from boxindex import box_index_add
+from hashtagindex import hashtag_index_add
 from languages import understood_post_language
 from like import update_likes_collection
 from reaction import update_reaction_collection
 from reaction import valid_emoji_content
 from utils import remove_eol
 from utils import text_in_file
+from utils import recent_posts_cache_summary
 from utils import get_media_descriptions_from_post
 from utils import get_summary_from_post
 from utils import delete_cached_html
@@ -59,6 +62,7 @@ from utils import get_status_number
 from utils import get_domain_from_actor
 from utils import get_nickname_from_actor
 from utils import locate_post
+from utils import update_post_location
 from utils import delete_post
 from utils import remove_moderation_post_from_index
 from utils import load_json
@@ -69,6 +73,8 @@ from utils import has_group_type
 from utils import local_actor_url
 from utils import has_object_string_type
 from utils import valid_hash_tag
+from utils import get_cached_actor
+from utils import person_cache_pub_keys
 from categories import get_hashtag_categories
 from categories import set_hashtag_category
 from httpsig import get_digest_algorithm_from_headers
@@ -88,6 +94,7 @@ from follow import follow_approval_required
 from pprint import pprint
 from cache import store_person_in_cache
 from cache import get_person_pub_key
+from cache import person_cache_stats
 from acceptreject import receive_accept_reject
 from bookmarks import update_bookmarks_collection
 from bookmarks import undo_bookmarks_collection_entry
@@ -132,16 +139,21 @@ from conversation import update_conversation
 from webapp_hashtagswarm import html_hash_tag_swarm
 from person import valid_sending_actor
 from fitnessFunctions import fitness_performance
+from fitnessFunctions import fitness_queue
+from fitnessFunctions import fitness_cache
 from content import reject_twitter_summary
-from content import load_dogwhistles
 from content import valid_url_lengths
 from content import remove_script
+from threads import thread_with_trace
 from threads import begin_thread
 from maps import get_map_links_from_post_content
 from maps import get_location_from_tags
 from maps import add_tag_map_links
 from maps import geocoords_from_map_link
 
+# maximum time in seconds which the inbox queue waits when idle
+INBOX_QUEUE_IDLE_SECS = 10
+
 
 def cache_svg_images(session, base_dir: str, http_prefix: str,
                      nickname: str, domain: str, domain_full: str,
@@ -371,39 +383,11 @@ def store_hash_tags(base_dir: str, nickname: str, domain: str,
         tag_name = tag['name'].replace('#', '').strip()
         if not valid_hash_tag(tag_name):
             continue
-        tags_filename = tags_dir + '/' + tag_name + '.txt'
-        days_diff = datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
-        days_since_epoch = days_diff.days
-        tag_line = \
-            str(days_since_epoch) + '  ' + nickname + '  ' + post_url + '\n'
         if map_links and published:
             add_tag_map_links(tag_maps_dir, tag_name, map_links,
                               published, post_url)
-        hashtag_added = False
-        if not os.path.isfile(tags_filename):
-            try:
-                with open(tags_filename, 'w+', encoding='utf-8') as tags_file:
-                    tags_file.write(tag_line)
-                    hashtag_added = True
-            except OSError:
-                print('EX: unable to write ' + tags_filename)
-        else:
-            content = ''
-            try:
-                with open(tags_filename, 'r', encoding='utf-8') as tags_file:
-                    content = tags_file.read()
-            except OSError:
-                pass
-            if post_url not in content:
-                content = tag_line + content
-                try:
-                    with open(tags_filename, 'w+',
-                              encoding='utf-8') as tags_file2:
-                        tags_file2.write(content)
-                        hashtag_added = True
-                except OSError as ex:
-                    print('EX: Failed to write entry to tags file ' +
-                          tags_filename + ' ' + str(ex))
+        hashtag_added = \
+            hashtag_index_add(base_dir, tag_name, nickname, post_url)
 
         if hashtag_added:
             hashtags_ctr += 1
@@ -613,8 +597,8 @@ def save_post_to_inbox_queue(base_dir: str, http_prefix: str,
                              message_bytes: str,
                              http_headers: {},
                              post_path: str, debug: bool,
-                             blocked_cache: [], system_language: str,
-                             mitm: bool) -> str:
+                             blocked_cache: {}, system_language: str,
+                             mitm: bool, filters_cache: {}) -> str:
     """Saves the given json to the inbox queue for the person
     key_id specifies the actor sending the post
     """
@@ -691,7 +675,7 @@ def save_post_to_inbox_queue(base_dir: str, http_prefix: str,
         content_all = \
             summary_str + ' ' + content_str + ' ' + media_descriptions
         if is_filtered(base_dir, nickname, domain, content_all,
-                       system_language):
+                       system_language, filters_cache):
             if debug:
                 print('WARN: post was filtered out due to content')
             return None
@@ -1063,9 +1047,9 @@ def _person_receive_update(base_dir: str,
         person_json['id'].replace('/', '#') + '.json'
     # check that the public keys match.
     # If they don't then this may be a nefarious attempt to hack an account
-    idx = person_json['id']
-    if person_cache.get(idx):
-        if person_cache[idx]['actor']['publicKey']['publicKeyPem'] != \
+    cached = get_cached_actor(person_cache, person_json['id'])
+    if cached:
+        if cached['actor']['publicKey']['publicKeyPem'] != \
            person_json['publicKey']['publicKeyPem']:
             if debug:
                 print('WARN: Public key does not match when updating actor')
@@ -1109,7 +1093,8 @@ def _receive_update_to_question(recent_posts_cache: {}, message_json: {},
     if '#' in message_id:
         message_id = message_id.split('#', 1)[0]
     # find the question post
-    post_filename = locate_post(base_dir, nickname, domain, message_id)
+    post_filename = locate_post(base_dir, nickname, domain, message_id, False,
+                                recent_posts_cache)
     if not post_filename:
         return
     # load the json for the question
@@ -1174,7 +1159,8 @@ def receive_edit_to_post(recent_posts_cache: {}, message_json: {},
     if '#' in message_id:
         message_id = message_id.split('#', 1)[0]
     # find the post which was edited
-    post_filename = locate_post(base_dir, nickname, domain, message_id)
+    post_filename = locate_post(base_dir, nickname, domain, message_id, False,
+                                recent_posts_cache)
     if not post_filename:
         print('EDITPOST: ' + message_id + ' has already expired')
         return False
@@ -1183,7 +1169,7 @@ def receive_edit_to_post(recent_posts_cache: {}, message_json: {},
                                allow_local_network_access, debug,
                                system_language, http_prefix,
                                domain_full, person_cache,
-                               max_hashtags):
+                               max_hashtags, None):
         print('EDITPOST: contains invalid content' + str(message_json))
         return False
 
@@ -1430,7 +1416,8 @@ def _receive_like(recent_posts_cache: {},
     handle_dom = handle.split('@')[1]
     post_liked_id = message_json['object']
     post_filename = \
-        locate_post(base_dir, handle_name, handle_dom, post_liked_id)
+        locate_post(base_dir, handle_name, handle_dom, post_liked_id, False,
+                    recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: post not found in inbox or outbox')
@@ -1461,7 +1448,8 @@ def _receive_like(recent_posts_cache: {},
                     announce_like_url = liked_post_json['object']
                     announce_liked_filename = \
                         locate_post(base_dir, handle_name,
-                                    domain, announce_like_url)
+                                    domain, announce_like_url, False,
+                                    recent_posts_cache)
                     if announce_liked_filename:
                         post_liked_id = announce_like_url
                         post_filename = announce_liked_filename
@@ -1564,7 +1552,8 @@ def _receive_undo_like(recent_posts_cache: {},
     handle_dom = handle.split('@')[1]
     post_filename = \
         locate_post(base_dir, handle_name, handle_dom,
-                    message_json['object']['object'])
+                    message_json['object']['object'], False,
+                    recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: unliked post not found in inbox or outbox')
@@ -1586,7 +1575,8 @@ def _receive_undo_like(recent_posts_cache: {},
                     announce_like_url = liked_post_json['object']
                     announce_liked_filename = \
                         locate_post(base_dir, handle_name,
-                                    domain, announce_like_url)
+                                    domain, announce_like_url, False,
+                                    recent_posts_cache)
                     if announce_liked_filename:
                         post_liked_id = announce_like_url
                         post_filename = announce_liked_filename
@@ -1708,7 +1698,7 @@ def _receive_reaction(recent_posts_cache: {},
             print('DEBUG: emoji reaction has no content')
         return True
     post_filename = locate_post(base_dir, handle_name, handle_dom,
-                                post_reaction_id)
+                                post_reaction_id, False, recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: emoji reaction post not found in inbox or outbox')
@@ -1740,7 +1730,8 @@ def _receive_reaction(recent_posts_cache: {},
                     announce_reaction_url = reaction_post_json['object']
                     announce_reaction_filename = \
                         locate_post(base_dir, handle_name,
-                                    domain, announce_reaction_url)
+                                    domain, announce_reaction_url, False,
+                                    recent_posts_cache)
                     if announce_reaction_filename:
                         post_reaction_id = announce_reaction_url
                         post_filename = announce_reaction_filename
@@ -1888,7 +1879,7 @@ def _receive_zot_reaction(recent_posts_cache: {},
             print('DEBUG: zot emoji reaction has no content')
         return True
     post_filename = locate_post(base_dir, handle_name, handle_dom,
-                                post_reaction_id)
+                                post_reaction_id, False, recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: ' +
@@ -1921,7 +1912,8 @@ def _receive_zot_reaction(recent_posts_cache: {},
                     announce_reaction_url = reaction_post_json['object']
                     announce_reaction_filename = \
                         locate_post(base_dir, handle_name,
-                                    domain, announce_reaction_url)
+                                    domain, announce_reaction_url, False,
+                                    recent_posts_cache)
                     if announce_reaction_filename:
                         post_reaction_id = announce_reaction_url
                         post_filename = announce_reaction_filename
@@ -2036,7 +2028,8 @@ def _receive_undo_reaction(recent_posts_cache: {},
     handle_dom = handle.split('@')[1]
     post_filename = \
         locate_post(base_dir, handle_name, handle_dom,
-                    message_json['object']['object'])
+                    message_json['object']['object'], False,
+                    recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: unreaction post not found in inbox or outbox')
@@ -2064,7 +2057,8 @@ def _receive_undo_reaction(recent_posts_cache: {},
                     announce_reaction_url = reaction_post_json['object']
                     announce_reaction_filename = \
                         locate_post(base_dir, handle_name,
-                                    domain, announce_reaction_url)
+                                    domain, announce_reaction_url, False,
+                                    recent_posts_cache)
                     if announce_reaction_filename:
                         post_reaction_id = announce_reaction_url
                         post_filename = announce_reaction_filename
@@ -2187,7 +2181,8 @@ def _receive_bookmark(recent_posts_cache: {},
 
     message_url = remove_id_ending(message_json['object']['url'])
     domain = remove_domain_port(domain)
-    post_filename = locate_post(base_dir, nickname, domain, message_url)
+    post_filename = locate_post(base_dir, nickname, domain, message_url, False,
+                                recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: c2s inbox like post not found in inbox or outbox')
@@ -2311,7 +2306,8 @@ def _receive_undo_bookmark(recent_posts_cache: {},
 
     message_url = remove_id_ending(message_json['object']['url'])
     domain = remove_domain_port(domain)
-    post_filename = locate_post(base_dir, nickname, domain, message_url)
+    post_filename = locate_post(base_dir, nickname, domain, message_url, False,
+                                recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: c2s inbox like post not found in inbox or outbox')
@@ -2417,7 +2413,8 @@ def _receive_delete(session, handle: str, is_group: bool, base_dir: str,
     handle_nickname = handle.split('@')[0]
     handle_domain = handle.split('@')[1]
     post_filename = locate_post(base_dir, handle_nickname,
-                                handle_domain, message_id)
+                                handle_domain, message_id, False,
+                                recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: delete post not found in inbox or outbox')
@@ -2432,7 +2429,8 @@ def _receive_delete(session, handle: str, is_group: bool, base_dir: str,
     # also delete any local blogs saved to the news actor
     if handle_nickname != 'news' and handle_domain == domain_full:
         post_filename = locate_post(base_dir, 'news',
-                                    handle_domain, message_id)
+                                    handle_domain, message_id, False,
+                                    recent_posts_cache)
         if post_filename:
             delete_post(base_dir, http_prefix, 'news',
                         handle_domain, post_filename, debug,
@@ -2461,7 +2459,8 @@ def _receive_announce(recent_posts_cache: {},
                       max_like_count: int, cw_lists: {},
                       lists_enabled: str, bold_reading: bool,
                       dogwhistles: {}, mitm: bool,
-                      min_images_for_accounts: []) -> bool:
+                      min_images_for_accounts: [],
+                      blocked_cache: {}) -> bool:
     """Receives an announce activity within the POST section of HTTPServer
     """
     if message_json['type'] != 'Announce':
@@ -2497,7 +2496,6 @@ def _receive_announce(recent_posts_cache: {},
                   message_json['type'])
         return False
 
-    blocked_cache = {}
     prefixes = get_protocol_prefixes()
     # is the domain of the announce actor blocked?
     object_domain = message_json['object']
@@ -2505,7 +2503,7 @@ def _receive_announce(recent_posts_cache: {},
         object_domain = object_domain.replace(prefix, '')
     if '/' in object_domain:
         object_domain = object_domain.split('/')[0]
-    if is_blocked_domain(base_dir, object_domain):
+    if is_blocked_domain(base_dir, object_domain, blocked_cache):
         if debug:
             print('DEBUG: announced domain is blocked')
         return False
@@ -2519,7 +2517,8 @@ def _receive_announce(recent_posts_cache: {},
         print('WARN: _receive_announce no actor_nickname')
         return False
     actor_domain, _ = get_domain_from_actor(message_json['actor'])
-    if is_blocked(base_dir, nickname, domain, actor_nickname, actor_domain):
+    if is_blocked(base_dir, nickname, domain, actor_nickname, actor_domain,
+                  blocked_cache):
         print('Receive announce blocked for actor: ' +
               actor_nickname + '@' + actor_domain)
         return False
@@ -2538,14 +2537,16 @@ def _receive_announce(recent_posts_cache: {},
         return False
     announced_actor_domain, _ = get_domain_from_actor(message_json['object'])
     if is_blocked(base_dir, nickname, domain,
-                  announced_actor_nickname, announced_actor_domain):
+                  announced_actor_nickname, announced_actor_domain,
+                  blocked_cache):
         print('Receive announce object blocked for actor: ' +
               announced_actor_nickname + '@' + announced_actor_domain)
         return False
 
     # is this post in the outbox of the person?
     post_filename = locate_post(base_dir, nickname, domain,
-                                message_json['object'])
+                                message_json['object'], False,
+                                recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: announce post not found in inbox or outbox')
@@ -2736,7 +2737,8 @@ def _receive_undo_announce(recent_posts_cache: {},
     handle_name = handle.split('@')[0]
     handle_dom = handle.split('@')[1]
     post_filename = locate_post(base_dir, handle_name, handle_dom,
-                                message_json['object']['object'])
+                                message_json['object']['object'], False,
+                                recent_posts_cache)
     if not post_filename:
         if debug:
             print('DEBUG: undo announce post not found in inbox or outbox')
@@ -2885,7 +2887,7 @@ def _valid_post_content(base_dir: str, nickname: str, domain: str,
                         system_language: str,
                         http_prefix: str, domain_full: str,
                         person_cache: {},
-                        max_hashtags: int) -> bool:
+                        max_hashtags: int, filters_cache: {}) -> bool:
     """Is the content of a received post valid?
     Check for bad html
     Check for hellthreads
@@ -3008,7 +3010,7 @@ def _valid_post_content(base_dir: str, nickname: str, domain: str,
     if summary:
         content_all = summary + ' ' + content_str + ' ' + media_descriptions
     if is_filtered(base_dir, nickname, domain, content_all,
-                   system_language):
+                   system_language, filters_cache):
         print('REJECT: content filtered')
         return False
     if message_json['object'].get('inReplyTo'):
@@ -3404,7 +3406,8 @@ def _send_to_group_members(server, session, session_onion, session_i2p,
     # save to the group outbox so that replies will be to the group
     # rather than the original sender
     save_post_to_box(base_dir, http_prefix, None,
-                     nickname, domain, post_json_object, 'outbox')
+                     nickname, domain, post_json_object, 'outbox',
+                     server.recent_posts_cache)
 
     post_id = remove_id_ending(post_json_object['object']['id'])
     if debug:
@@ -3468,13 +3471,15 @@ def _inbox_update_calendar(base_dir: str, handle: str,
             continue
         if not tag_dict.get('startTime'):
             continue
-        save_event_post(base_dir, handle, post_id, tag_dict)
+        save_event_post(base_dir, handle, post_id, tag_dict,
+                        post_json_object)
 
 
 def inbox_update_index(boxname: str, base_dir: str, handle: str,
-                       destination_filename: str, debug: bool) -> bool:
+                       destination_filename: str, debug: bool,
+                       box_index_cache: {}) -> bool:
     """Updates the index of received posts
-    The new entry is added to the top of the file
+    The new entry is appended to the end of the timeline log
     """
     index_filename = \
         base_dir + '/accounts/' + handle + '/' + boxname + '.index'
@@ -3489,27 +3494,8 @@ def inbox_update_index(boxname: str, base_dir: str, handle: str,
     if '/' in destination_filename:
         destination_filename = destination_filename.split('/')[-1]
 
-    written = False
-    if os.path.isfile(index_filename):
-        try:
-            with open(index_filename, 'r+', encoding='utf-8') as index_file:
-                content = index_file.read()
-                if destination_filename + '\n' not in content:
-                    index_file.seek(0, 0)
-                    index_file.write(destination_filename + '\n' + content)
-                written = True
-                return True
-        except OSError as ex:
-            print('EX: Failed to write entry to index ' + str(ex))
-    else:
-        try:
-            with open(index_filename, 'w+', encoding='utf-8') as index_file:
-                index_file.write(destination_filename + '\n')
-                written = True
-        except OSError as ex:
-            print('EX: Failed to write initial entry to index ' + str(ex))
-
-    return written
+    return box_index_add(box_index_cache, index_filename,
+                         destination_filename)
 
 
 def _update_last_seen(base_dir: str, handle: str, actor: str) -> None:
@@ -3635,7 +3621,7 @@ def _bounce_dm(sender_post_id: str, session, http_prefix: str,
                      send_threads, post_log, cached_webfingers,
                      person_cache, debug, __version__, None, group_account,
                      signing_priv_key_pem, 7238634,
-                     curr_domain, onion_domain, i2p_domain)
+                     curr_domain, onion_domain, i2p_domain, None)
     return True
 
 
@@ -3830,7 +3816,8 @@ def _receive_question_vote(server, base_dir: str, nickname: str, domain: str,
 
     # add id to inbox index
     inbox_update_index('inbox', base_dir, handle,
-                       question_post_filename, debug)
+                       question_post_filename, debug,
+                       server.box_index_cache)
 
     # Is this a question created by this instance?
     id_prefix = http_prefix + '://' + domain
@@ -4248,7 +4235,8 @@ def _inbox_after_initial(server, inbox_start_time,
                          peertube_instances,
                          max_like_count, cw_lists, lists_enabled,
                          bold_reading, dogwhistles, mitm,
-                         server.min_images_for_accounts):
+                         server.min_images_for_accounts,
+                         server.blocked_cache):
         if debug:
             print('DEBUG: Announce accepted from ' + actor)
         fitness_performance(inbox_start_time, server.fitness,
@@ -4313,7 +4301,7 @@ def _inbox_after_initial(server, inbox_start_time,
                            allow_local_network_access, debug,
                            system_language, http_prefix,
                            domain_full, person_cache,
-                           max_hashtags):
+                           max_hashtags, server.filters_cache):
         fitness_performance(inbox_start_time, server.fitness,
                             'INBOX', '_valid_post_content',
                             debug)
@@ -4491,6 +4479,8 @@ def _inbox_after_initial(server, inbox_start_time,
                                 'INBOX', 'save_json',
                                 debug)
             inbox_start_time = time.time()
+            update_post_location(recent_posts_cache, base_dir,
+                                 nickname, domain, destination_filename)
             if mitm:
                 # write a file to indicate that this post was delivered
                 # via a third party
@@ -4580,7 +4570,8 @@ def _inbox_after_initial(server, inbox_start_time,
                                     debug)
                 inbox_start_time = time.time()
                 if not inbox_update_index(boxname, base_dir, handle,
-                                          destination_filename, debug):
+                                          destination_filename, debug,
+                                          server.box_index_cache):
                     fitness_performance(inbox_start_time,
                                         server.fitness,
                                         'INBOX', 'inbox_update_index',
@@ -4813,7 +4804,7 @@ def _inbox_quota_exceeded(queue: {}, queue_filename: str,
                     except OSError:
                         print('EX: _inbox_quota_exceeded unable to delete 1 ' +
                               str(queue_filename))
-                    queue.pop(0)
+                    _remove_queue_item(queue, queue_filename)
                 return True
             quotas_daily['domains'][post_domain] += 1
         else:
@@ -4835,7 +4826,7 @@ def _inbox_quota_exceeded(queue: {}, queue_filename: str,
                     except OSError:
                         print('EX: _inbox_quota_exceeded unable to delete 2 ' +
                               str(queue_filename))
-                    queue.pop(0)
+                    _remove_queue_item(queue, queue_filename)
                 return True
             quotas_per_min['domains'][post_domain] += 1
         else:
@@ -4856,7 +4847,7 @@ def _inbox_quota_exceeded(queue: {}, queue_filename: str,
                     except OSError:
                         print('EX: _inbox_quota_exceeded unable to delete 3 ' +
                               str(queue_filename))
-                    queue.pop(0)
+                    _remove_queue_item(queue, queue_filename)
                 return True
             quotas_daily['accounts'][post_handle] += 1
         else:
@@ -4878,7 +4869,7 @@ def _inbox_quota_exceeded(queue: {}, queue_filename: str,
                     except OSError:
                         print('EX: _inbox_quota_exceeded unable to delete 4 ' +
                               str(queue_filename))
-                    queue.pop(0)
+                    _remove_queue_item(queue, queue_filename)
                 return True
             quotas_per_min['accounts'][post_handle] += 1
         else:
@@ -5217,6 +5208,528 @@ def _receive_follow_request(session, session_onion, session_i2p,
                                     this_domain, onion_domain, i2p_domain)
 
 
+def _remove_queue_item(queue: [], queue_filename: str) -> None:
+    """Removes an item from the inbox queue
+    """
+    if queue_filename in queue:
+        queue.remove(queue_filename)
+
+
+def _inbox_queue_item_keys(queue_json: {}) -> []:
+    """Returns the actor and any posts which a queue item refers to.
+    Items with any of these in common are processed in order
+    """
+    item_keys = []
+    if not queue_json:
+        return item_keys
+    if isinstance(queue_json.get('actor'), str):
+        item_keys.append(queue_json['actor'])
+    post_json_object = queue_json.get('post')
+    if not isinstance(post_json_object, dict):
+        return item_keys
+    object_json = post_json_object.get('object')
+    if isinstance(object_json, str):
+        item_keys.append(remove_id_ending(object_json))
+    elif isinstance(object_json, dict):
+        for field_name in ('id', 'object', 'inReplyTo'):
+            if isinstance(object_json.get(field_name), str):
+                item_keys.append(remove_id_ending(object_json[field_name]))
+    return item_keys
+
+
+def inbox_queue_ready_items(queue: [], queue_keys: {},
+                            inbox_workers: [], max_items: int) -> []:
+    """Returns the oldest queue items which can be processed concurrently.
+    Items from the same actor or about the same post as an earlier
+    item which is still waiting or being processed are held back
+    """
+    ready_items = []
+    if max_items <= 0:
+        return ready_items
+    busy_keys = set()
+    busy_filenames = set()
+    for worker in inbox_workers:
+        busy_keys.update(worker['keys'])
+        busy_filenames.add(worker['filename'])
+    # oldest items first
+    for queue_filename in sorted(queue)[:max_items * 16]:
+        if queue_filename in busy_filenames:
+            continue
+        if queue_keys.get(queue_filename) is None:
+            queue_keys[queue_filename] = \
+                _inbox_queue_item_keys(load_json(queue_filename, 1))
+        item_keys = queue_keys[queue_filename]
+        held_back = False
+        for key in item_keys:
+            if key in busy_keys:
+                held_back = True
+                break
+        busy_keys.update(item_keys)
+        if held_back:
+            continue
+        ready_items.append(queue_filename)
+        if len(ready_items) >= max_items:
+            break
+    return ready_items
+
+
+def _reap_inbox_queue_workers(inbox_workers: [], queue: [],
+                              debug: bool) -> int:
+    """Removes any finished inbox queue worker threads
+    Returns the number of queue items which were processed
+    """
+    finished_workers = []
+    for worker in inbox_workers:
+        if not worker['thread'].is_alive():
+            finished_workers.append(worker)
+    for worker in finished_workers:
+        inbox_workers.remove(worker)
+        if worker['filename'] in queue:
+            # the worker thread failed before the item was removed,
+            # so don't keep trying to process it
+            print('WARN: inbox queue worker did not complete ' +
+                  worker['filename'])
+            _remove_queue_item(queue, worker['filename'])
+        elif debug:
+            print('DEBUG: inbox queue worker completed ' +
+                  worker['filename'])
+    return len(finished_workers)
+
+
+def _process_inbox_queue_item(server, inbox_start_time,
+                              queue: [], queue_filename: str,
+                              queue_json: {},
+                              session, session_onion, session_i2p,
+                              proxy_type: str,
+                              recent_posts_cache: {}, max_recent_posts: int,
+                              project_version: str,
+                              base_dir: str, http_prefix: str,
+                              send_threads: [], post_log: [],
+                              cached_webfingers: {}, person_cache: {},
+                              domain: str,
+                              onion_domain: str, i2p_domain: str,
+                              port: int, federation_list: [],
+                              max_replies: int, allow_deletion: bool,
+                              debug: bool, max_mentions: int,
+                              max_emoji: int, translate: {}, unit_test: bool,
+                              yt_replace_domain: str,
+                              twitter_replacement_domain: str,
+                              show_published_date_only: bool,
+                              max_followers: int,
+                              allow_local_network_access: bool,
+                              peertube_instances: [],
+                              verify_all_signatures: bool,
+                              theme_name: str, system_language: str,
+                              max_like_count: int, signing_priv_key_pem: str,
+                              default_reply_interval_hrs: int,
+                              cw_lists: {}, max_hashtags: int,
+                              last_bounce_message: []) -> None:
+    """Processes a single item from the inbox queue.
+    This may run within a worker thread
+    """
+    inbox_handle = 'inbox@' + domain
+
+    curr_session = session
+    if queue_json.get('actor'):
+        if isinstance(queue_json['actor'], str):
+            sender_domain, _ = get_domain_from_actor(queue_json['actor'])
+            if sender_domain.endswith('.onion') and \
+               session_onion and proxy_type != 'tor':
+                curr_session = session_onion
+            elif (sender_domain.endswith('.i2p') and
+                  session_i2p and proxy_type != 'i2p'):
+                curr_session = session_i2p
+
+    if debug and queue_json.get('actor'):
+        print('Obtaining public key for actor ' + queue_json['actor'])
+
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', 'start_get_pubkey', debug)
+    inbox_start_time = time.time()
+    # Try a few times to obtain the public key
+    pub_key = None
+    key_id = None
+    for tries in range(8):
+        key_id = None
+        signature_params = \
+            queue_json['httpHeaders']['signature'].split(',')
+        for signature_item in signature_params:
+            if signature_item.startswith('keyId='):
+                if '"' in signature_item:
+                    key_id = signature_item.split('"')[1]
+                    break
+        if not key_id:
+            print('Queue: No keyId in signature: ' +
+                  queue_json['httpHeaders']['signature'])
+            pub_key = None
+            break
+
+        pub_key = \
+            get_person_pub_key(base_dir, curr_session, key_id,
+                               person_cache, debug,
+                               project_version, http_prefix,
+                               domain, onion_domain, i2p_domain,
+                               signing_priv_key_pem)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', 'get_person_pub_key', debug)
+        inbox_start_time = time.time()
+        if pub_key:
+            if debug:
+                print('DEBUG: public key: ' + str(pub_key))
+            break
+
+        if debug:
+            print('DEBUG: Retry ' + str(tries+1) +
+                  ' obtaining public key for ' + key_id)
+        time.sleep(1)
+
+    if not pub_key:
+        if debug:
+            print('Queue: public key could not be obtained from ' + key_id)
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 2 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        return
+
+    # check the http header signature
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', 'begin_check_signature', debug)
+    inbox_start_time = time.time()
+    if debug:
+        print('DEBUG: checking http header signature')
+        pprint(queue_json['httpHeaders'])
+    post_str = json.dumps(queue_json['post'])
+    http_signature_failed = False
+    pub_key_cache = person_cache_pub_keys(person_cache)
+    if not verify_post_headers(http_prefix, pub_key,
+                               queue_json['httpHeaders'],
+                               queue_json['path'], False,
+                               queue_json['digest'],
+                               post_str, debug, False,
+                               pub_key_cache):
+        http_signature_failed = True
+        print('Queue: Header signature check failed')
+        pprint(queue_json['httpHeaders'])
+    else:
+        if debug:
+            print('DEBUG: http header signature check success')
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', 'verify_post_headers', debug)
+    inbox_start_time = time.time()
+
+    # check if a json signature exists on this post
+    has_json_signature, jwebsig_type = \
+        _check_json_signature(base_dir, queue_json)
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', '_check_json_signature', debug)
+    inbox_start_time = time.time()
+
+    # strict enforcement of json signatures
+    if not has_json_signature:
+        if http_signature_failed:
+            if jwebsig_type:
+                print('Queue: Header signature check failed and does ' +
+                      'not have a recognised jsonld signature type ' +
+                      jwebsig_type)
+            else:
+                print('Queue: Header signature check failed and ' +
+                      'does not have jsonld signature')
+            if debug:
+                pprint(queue_json['httpHeaders'])
+
+        if verify_all_signatures:
+            original_json = queue_json['original']
+            print('Queue: inbox post does not have a jsonld signature ' +
+                  key_id + ' ' + str(original_json))
+
+        if http_signature_failed or verify_all_signatures:
+            if os.path.isfile(queue_filename):
+                try:
+                    os.remove(queue_filename)
+                except OSError:
+                    print('EX: run_inbox_queue 3 unable to delete ' +
+                          str(queue_filename))
+            _remove_queue_item(queue, queue_filename)
+            return
+    else:
+        if http_signature_failed or verify_all_signatures:
+            # use the original json message received, not one which
+            # may have been modified along the way
+            original_json = queue_json['original']
+            if not verify_json_signature(original_json, pub_key):
+                if debug:
+                    print('WARN: jsonld inbox signature check failed ' +
+                          key_id + ' ' + pub_key + ' ' +
+                          str(original_json))
+                else:
+                    print('WARN: jsonld inbox signature check failed ' +
+                          key_id)
+                if os.path.isfile(queue_filename):
+                    try:
+                        os.remove(queue_filename)
+                    except OSError:
+                        print('EX: run_inbox_queue 4 unable to delete ' +
+                              str(queue_filename))
+                _remove_queue_item(queue, queue_filename)
+                fitness_performance(inbox_start_time, server.fitness,
+                                    'INBOX', 'not_verify_signature',
+                                    debug)
+                inbox_start_time = time.time()
+                return
+
+            if http_signature_failed:
+                print('jsonld inbox signature check success ' +
+                      'via relay ' + key_id)
+            else:
+                print('jsonld inbox signature check success ' + key_id)
+            fitness_performance(inbox_start_time, server.fitness,
+                                'INBOX', 'verify_signature_success',
+                                debug)
+            inbox_start_time = time.time()
+
+    # the same dogwhistles as the web interface, so that they are
+    # only compiled again when changed by the admin
+    dogwhistles = server.dogwhistles
+
+    # set the id to the same as the post filename
+    # This makes the filename and the id consistent
+    # if queue_json['post'].get('id'):
+    #     queue_json['post']['id'] = queue_json['id']
+
+    if _receive_undo(base_dir, queue_json['post'],
+                     debug, domain, onion_domain, i2p_domain):
+        print('Queue: Undo accepted from ' + key_id)
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 5 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', '_receive_undo',
+                            debug)
+        inbox_start_time = time.time()
+        return
+
+    if debug:
+        print('DEBUG: checking for follow requests')
+    if _receive_follow_request(curr_session, session_onion, session_i2p,
+                               base_dir, http_prefix, port,
+                               send_threads, post_log,
+                               cached_webfingers,
+                               person_cache,
+                               queue_json['post'],
+                               federation_list,
+                               debug, project_version,
+                               max_followers, domain,
+                               onion_domain, i2p_domain,
+                               signing_priv_key_pem, unit_test,
+                               system_language):
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 6 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        print('Queue: Follow activity for ' + key_id +
+              ' removed from queue')
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', '_receive_follow_request',
+                            debug)
+        inbox_start_time = time.time()
+        return
+
+    if debug:
+        print('DEBUG: No follow requests')
+
+    if receive_accept_reject(base_dir, domain, queue_json['post'],
+                             federation_list, debug,
+                             domain, onion_domain, i2p_domain):
+        print('Queue: Accept/Reject received from ' + key_id)
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 7 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', 'receive_accept_reject',
+                            debug)
+        inbox_start_time = time.time()
+        return
+
+    if _receive_update_activity(recent_posts_cache, curr_session,
+                                base_dir, http_prefix,
+                                domain, port,
+                                cached_webfingers,
+                                person_cache,
+                                queue_json['post'],
+                                queue_json['postNickname'],
+                                debug,
+                                max_mentions, max_emoji,
+                                allow_local_network_access,
+                                system_language,
+                                signing_priv_key_pem,
+                                max_recent_posts, translate,
+                                allow_deletion,
+                                yt_replace_domain,
+                                twitter_replacement_domain,
+                                show_published_date_only,
+                                peertube_instances,
+                                theme_name, max_like_count,
+                                cw_lists, dogwhistles,
+                                server.min_images_for_accounts,
+                                max_hashtags):
+        if debug:
+            print('Queue: Update accepted from ' + key_id)
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 8 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', '_receive_update_activity',
+                            debug)
+        inbox_start_time = time.time()
+        return
+
+    # get recipients list
+    recipients_dict, recipients_dict_followers = \
+        _inbox_post_recipients(base_dir, queue_json['post'],
+                               http_prefix, domain, port, debug,
+                               onion_domain, i2p_domain)
+    if len(recipients_dict.items()) == 0 and \
+       len(recipients_dict_followers.items()) == 0:
+        if debug:
+            print('Queue: no recipients were resolved ' +
+                  'for post arriving in inbox')
+        if os.path.isfile(queue_filename):
+            try:
+                os.remove(queue_filename)
+            except OSError:
+                print('EX: run_inbox_queue 9 unable to delete ' +
+                      str(queue_filename))
+        _remove_queue_item(queue, queue_filename)
+        return
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', '_post_recipients',
+                        debug)
+    inbox_start_time = time.time()
+
+    # if there are only a small number of followers then
+    # process them as if they were specifically
+    # addresses to particular accounts
+    no_of_follow_items = len(recipients_dict_followers.items())
+    if no_of_follow_items > 0:
+        # always deliver to individual inboxes
+        if no_of_follow_items < 999999:
+            if debug:
+                print('DEBUG: moving ' + str(no_of_follow_items) +
+                      ' inbox posts addressed to followers')
+            for handle, post_item in recipients_dict_followers.items():
+                recipients_dict[handle] = post_item
+            recipients_dict_followers = {}
+#            recipients_list = [recipients_dict, recipients_dict_followers]
+
+    if debug:
+        print('*************************************')
+        print('Resolved recipients list:')
+        pprint(recipients_dict)
+        print('Resolved followers list:')
+        pprint(recipients_dict_followers)
+        print('*************************************')
+
+    # Copy any posts addressed to followers into the shared inbox
+    # this avoid copying file multiple times to potentially many
+    # individual inboxes
+    if len(recipients_dict_followers) > 0:
+        shared_inbox_post_filename = \
+            queue_json['destination'].replace(inbox_handle, inbox_handle)
+        if not os.path.isfile(shared_inbox_post_filename):
+            save_json(queue_json['post'], shared_inbox_post_filename)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', 'shared_inbox_save',
+                            debug)
+        inbox_start_time = time.time()
+
+    lists_enabled = get_config_param(base_dir, "listsEnabled")
+    content_license_url = get_config_param(base_dir, "contentLicenseUrl")
+
+    fitness_performance(inbox_start_time, server.fitness,
+                        'INBOX', 'distribute_post',
+                        debug)
+    inbox_start_time = time.time()
+
+    # for posts addressed to specific accounts
+    for handle, _ in recipients_dict.items():
+        destination = \
+            queue_json['destination'].replace(inbox_handle, handle)
+        languages_understood = []
+        mitm = False
+        if queue_json.get('mitm'):
+            mitm = True
+        bold_reading = False
+        bold_reading_filename = \
+            base_dir + '/accounts/' + handle + '/.boldReading'
+        if os.path.isfile(bold_reading_filename):
+            bold_reading = True
+        _inbox_after_initial(server, inbox_start_time,
+                             recent_posts_cache,
+                             max_recent_posts,
+                             session, session_onion, session_i2p,
+                             key_id, handle,
+                             queue_json['post'],
+                             base_dir, http_prefix,
+                             send_threads, post_log,
+                             cached_webfingers,
+                             person_cache, domain,
+                             onion_domain, i2p_domain,
+                             port, federation_list,
+                             debug,
+                             queue_filename, destination,
+                             max_replies, allow_deletion,
+                             max_mentions, max_emoji,
+                             translate, unit_test,
+                             yt_replace_domain,
+                             twitter_replacement_domain,
+                             show_published_date_only,
+                             allow_local_network_access,
+                             peertube_instances,
+                             last_bounce_message,
+                             theme_name, system_language,
+                             max_like_count,
+                             signing_priv_key_pem,
+                             default_reply_interval_hrs,
+                             cw_lists, lists_enabled,
+                             content_license_url,
+                             languages_understood, mitm,
+                             bold_reading, dogwhistles,
+                             max_hashtags)
+        fitness_performance(inbox_start_time, server.fitness,
+                            'INBOX', 'handle_after_initial',
+                            debug)
+        inbox_start_time = time.time()
+        if debug:
+            pprint(queue_json['post'])
+            print('Queue: Queue post accepted')
+    if os.path.isfile(queue_filename):
+        try:
+            os.remove(queue_filename)
+        except OSError:
+            print('EX: run_inbox_queue 10 unable to delete ' +
+                  str(queue_filename))
+    _remove_queue_item(queue, queue_filename)
+
+
 def run_inbox_queue(server,
                     recent_posts_cache: {}, max_recent_posts: int,
                     project_version: str,
@@ -5241,7 +5754,8 @@ def run_inbox_queue(server,
                     theme_name: str, system_language: str,
                     max_like_count: int, signing_priv_key_pem: str,
                     default_reply_interval_hrs: int,
-                    cw_lists: {}, max_hashtags: int) -> None:
+                    cw_lists: {}, max_hashtags: int,
+                    inbox_queue_workers: int) -> None:
     """Processes received items and moves them to the appropriate
     directories
     """
@@ -5274,7 +5788,6 @@ def run_inbox_queue(server,
         if session_i2p:
             session_i2p = curr_session_time
 
-    inbox_handle = 'inbox@' + domain
     if debug:
         print('DEBUG: Inbox queue running')
 
@@ -5297,8 +5810,13 @@ def run_inbox_queue(server,
         'accounts': {}
     }
 
-    heart_beat_ctr = 0
-    queue_restore_ctr = 0
+    last_heart_beat = time.time()
+    last_queue_restore = time.time()
+
+    # set when items are added to the queue
+    inbox_queue_event = server.inbox_queue_event
+    # whether any queue items were handled on the previous pass
+    queue_progress = True
 
     # time when the last DM bounce message was sent
     # This is in a list so that it can be changed by reference
@@ -5308,19 +5826,40 @@ def run_inbox_queue(server,
     # how long it takes for broch mode to lapse
     broch_lapse_days = random.randrange(7, 14)
 
+    # queue items currently being processed by worker threads
+    inbox_workers = []
+    # the actors and posts which each queue item refers to
+    queue_keys = {}
+
     fitness_performance(inbox_start_time, server.fitness,
                         'INBOX', 'while_loop_start', debug)
     inbox_start_time = time.time()
     while True:
-        time.sleep(1)
+        # Rather than polling, wait until something is added to the queue.
+        # The timeout ensures that the heartbeat and queue restore happen
+        if not queue:
+            inbox_queue_event.wait(INBOX_QUEUE_IDLE_SECS)
+        elif not queue_progress:
+            if inbox_workers:
+                # wait for worker threads to finish
+                inbox_queue_event.wait(0.1)
+            else:
+                # items could not be handled, so retry shortly
+                inbox_queue_event.wait(1)
+        inbox_queue_event.clear()
+        queue_progress = False
         inbox_start_time = time.time()
         fitness_performance(inbox_start_time, server.fitness,
                             'INBOX', 'while_loop_itteration', debug)
         inbox_start_time = time.time()
 
+        items_processed = 0
+        if inbox_queue_workers > 1:
+            items_processed = \
+                _reap_inbox_queue_workers(inbox_workers, queue, debug)
+
         # heartbeat to monitor whether the inbox queue is running
-        heart_beat_ctr += 1
-        if heart_beat_ctr >= 10:
+        if inbox_start_time - last_heart_beat >= 10:
             # turn off broch mode after it has timed out
             if broch_modeLapses(base_dir, broch_lapse_days):
                 broch_lapse_days = random.randrange(7, 14)
@@ -5329,520 +5868,215 @@ def run_inbox_queue(server,
             inbox_start_time = time.time()
             print('>>> Heartbeat Q:' + str(len(queue)) + ' ' +
                   '{:%F %T}'.format(datetime.datetime.now()))
-            heart_beat_ctr = 0
+            fitness_cache(server.fitness, 'person',
+                          person_cache_stats(person_cache))
+            fitness_cache(server.fitness, 'recentPosts',
+                          recent_posts_cache_summary(recent_posts_cache))
+            last_heart_beat = inbox_start_time
 
         if len(queue) == 0:
+            fitness_queue(server.fitness, 'INBOX', queue, items_processed,
+                          inbox_workers)
             # restore any remaining queue items
-            queue_restore_ctr += 1
-            if queue_restore_ctr >= 30:
-                queue_restore_ctr = 0
+            if inbox_start_time - last_queue_restore >= 30:
+                last_queue_restore = inbox_start_time
                 _restore_queue_items(base_dir, queue)
             fitness_performance(inbox_start_time, server.fitness,
                                 'INBOX', 'restore_queue', debug)
             inbox_start_time = time.time()
             continue
 
-        # oldest item first
-        queue.sort()
-        queue_filename = queue[0]
-        if not os.path.isfile(queue_filename):
-            print("Queue: queue item rejected because it has no file: " +
-                  queue_filename)
-            if len(queue) > 0:
-                queue.pop(0)
-            continue
-
-        if debug:
-            print('Loading queue item ' + queue_filename)
-
-        # Load the queue json
-        queue_json = load_json(queue_filename, 1)
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'load_queue_json', debug)
-        inbox_start_time = time.time()
-        if not queue_json:
-            print('Queue: run_inbox_queue failed to load inbox queue item ' +
-                  queue_filename)
-            # Assume that the file is probably corrupt/unreadable
-            if len(queue) > 0:
-                queue.pop(0)
-            # delete the queue file
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 1 unable to delete ' +
-                          str(queue_filename))
-            continue
-
-        curr_time = int(time.time())
-
-        # clear the daily quotas for maximum numbers of received posts
-        if curr_time - quotas_last_update_daily > 60 * 60 * 24:
-            quotas_daily = {
-                'domains': {},
-                'accounts': {}
-            }
-            quotas_last_update_daily = curr_time
-
-        if curr_time - quotas_last_update_per_min > 60:
-            # clear the per minute quotas for maximum numbers of received posts
-            quotas_per_min = {
-                'domains': {},
-                'accounts': {}
-            }
-            # also check if the json signature enforcement has changed
-            verify_all_sigs = get_config_param(base_dir, "verifyAllSignatures")
-            if verify_all_sigs is not None:
-                verify_all_signatures = verify_all_sigs
-            # change the last time that this was done
-            quotas_last_update_per_min = curr_time
-
-        if _inbox_quota_exceeded(queue, queue_filename,
-                                 queue_json, quotas_daily, quotas_per_min,
-                                 domain_max_posts_per_day,
-                                 account_max_posts_per_day, debug):
-            continue
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', '_inbox_quota_exceeded', debug)
-        inbox_start_time = time.time()
-
-        # recreate the session periodically
-        if not session or curr_time - session_last_update > 21600:
-            print('Regenerating inbox queue session at 6hr interval')
-            session = create_session(proxy_type)
-            if session:
-                session_last_update = curr_time
-            else:
-                print('WARN: inbox session not created')
+        if inbox_queue_workers > 1:
+            # items from different actors can be processed concurrently
+            queue_items = \
+                inbox_queue_ready_items(queue, queue_keys, inbox_workers,
+                                        inbox_queue_workers -
+                                        len(inbox_workers))
+        else:
+            # oldest item first
+            queue.sort()
+            queue_items = [queue[0]]
+
+        for queue_filename in queue_items:
+            item_keys = []
+            if queue_keys.get(queue_filename):
+                item_keys = queue_keys[queue_filename]
+                del queue_keys[queue_filename]
+
+            if not os.path.isfile(queue_filename):
+                print("Queue: queue item rejected because it has no file: " +
+                      queue_filename)
+                _remove_queue_item(queue, queue_filename)
+                items_processed += 1
                 continue
-        if onion_domain:
-            if not session_onion or \
-               curr_time - session_last_update_onion > 21600:
-                print('Regenerating inbox queue onion session at 6hr interval')
-                session_onion = create_session('tor')
-                if session_onion:
-                    session_last_update_onion = curr_time
-                else:
-                    print('WARN: inbox onion session not created')
-                    continue
-        if i2p_domain:
-            if not session_i2p or curr_time - session_last_update_i2p > 21600:
-                print('Regenerating inbox queue i2p session at 6hr interval')
-                session_i2p = create_session('i2p')
-                if session_i2p:
-                    session_last_update_i2p = curr_time
-                else:
-                    print('WARN: inbox i2p session not created')
-                    continue
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'recreate_session', debug)
-        inbox_start_time = time.time()
 
-        curr_session = session
-        if queue_json.get('actor'):
-            if isinstance(queue_json['actor'], str):
-                sender_domain, _ = get_domain_from_actor(queue_json['actor'])
-                if sender_domain.endswith('.onion') and \
-                   session_onion and proxy_type != 'tor':
-                    curr_session = session_onion
-                elif (sender_domain.endswith('.i2p') and
-                      session_i2p and proxy_type != 'i2p'):
-                    curr_session = session_i2p
-
-        if debug and queue_json.get('actor'):
-            print('Obtaining public key for actor ' + queue_json['actor'])
-
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'start_get_pubkey', debug)
-        inbox_start_time = time.time()
-        # Try a few times to obtain the public key
-        pub_key = None
-        key_id = None
-        for tries in range(8):
-            key_id = None
-            signature_params = \
-                queue_json['httpHeaders']['signature'].split(',')
-            for signature_item in signature_params:
-                if signature_item.startswith('keyId='):
-                    if '"' in signature_item:
-                        key_id = signature_item.split('"')[1]
-                        break
-            if not key_id:
-                print('Queue: No keyId in signature: ' +
-                      queue_json['httpHeaders']['signature'])
-                pub_key = None
-                break
+            if debug:
+                print('Loading queue item ' + queue_filename)
 
-            pub_key = \
-                get_person_pub_key(base_dir, curr_session, key_id,
-                                   person_cache, debug,
-                                   project_version, http_prefix,
-                                   domain, onion_domain, i2p_domain,
-                                   signing_priv_key_pem)
+            # Load the queue json
+            queue_json = load_json(queue_filename, 1)
             fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', 'get_person_pub_key', debug)
+                                'INBOX', 'load_queue_json', debug)
             inbox_start_time = time.time()
-            if pub_key:
-                if debug:
-                    print('DEBUG: public key: ' + str(pub_key))
-                break
-
-            if debug:
-                print('DEBUG: Retry ' + str(tries+1) +
-                      ' obtaining public key for ' + key_id)
-            time.sleep(1)
-
-        if not pub_key:
-            if debug:
-                print('Queue: public key could not be obtained from ' + key_id)
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 2 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
-            continue
-
-        # check the http header signature
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'begin_check_signature', debug)
-        inbox_start_time = time.time()
-        if debug:
-            print('DEBUG: checking http header signature')
-            pprint(queue_json['httpHeaders'])
-        post_str = json.dumps(queue_json['post'])
-        http_signature_failed = False
-        if not verify_post_headers(http_prefix, pub_key,
-                                   queue_json['httpHeaders'],
-                                   queue_json['path'], False,
-                                   queue_json['digest'],
-                                   post_str, debug):
-            http_signature_failed = True
-            print('Queue: Header signature check failed')
-            pprint(queue_json['httpHeaders'])
-        else:
-            if debug:
-                print('DEBUG: http header signature check success')
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'verify_post_headers', debug)
-        inbox_start_time = time.time()
-
-        # check if a json signature exists on this post
-        has_json_signature, jwebsig_type = \
-            _check_json_signature(base_dir, queue_json)
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', '_check_json_signature', debug)
-        inbox_start_time = time.time()
-
-        # strict enforcement of json signatures
-        if not has_json_signature:
-            if http_signature_failed:
-                if jwebsig_type:
-                    print('Queue: Header signature check failed and does ' +
-                          'not have a recognised jsonld signature type ' +
-                          jwebsig_type)
-                else:
-                    print('Queue: Header signature check failed and ' +
-                          'does not have jsonld signature')
-                if debug:
-                    pprint(queue_json['httpHeaders'])
-
-            if verify_all_signatures:
-                original_json = queue_json['original']
-                print('Queue: inbox post does not have a jsonld signature ' +
-                      key_id + ' ' + str(original_json))
-
-            if http_signature_failed or verify_all_signatures:
+            if not queue_json:
+                print('Queue: run_inbox_queue failed to load ' +
+                      'inbox queue item ' + queue_filename)
+                # Assume that the file is probably corrupt/unreadable
+                _remove_queue_item(queue, queue_filename)
+                # delete the queue file
                 if os.path.isfile(queue_filename):
                     try:
                         os.remove(queue_filename)
                     except OSError:
-                        print('EX: run_inbox_queue 3 unable to delete ' +
+                        print('EX: run_inbox_queue 1 unable to delete ' +
                               str(queue_filename))
-                if len(queue) > 0:
-                    queue.pop(0)
+                items_processed += 1
                 continue
-        else:
-            if http_signature_failed or verify_all_signatures:
-                # use the original json message received, not one which
-                # may have been modified along the way
-                original_json = queue_json['original']
-                if not verify_json_signature(original_json, pub_key):
-                    if debug:
-                        print('WARN: jsonld inbox signature check failed ' +
-                              key_id + ' ' + pub_key + ' ' +
-                              str(original_json))
-                    else:
-                        print('WARN: jsonld inbox signature check failed ' +
-                              key_id)
-                    if os.path.isfile(queue_filename):
-                        try:
-                            os.remove(queue_filename)
-                        except OSError:
-                            print('EX: run_inbox_queue 4 unable to delete ' +
-                                  str(queue_filename))
-                    if len(queue) > 0:
-                        queue.pop(0)
-                    fitness_performance(inbox_start_time, server.fitness,
-                                        'INBOX', 'not_verify_signature',
-                                        debug)
-                    inbox_start_time = time.time()
-                    continue
-
-                if http_signature_failed:
-                    print('jsonld inbox signature check success ' +
-                          'via relay ' + key_id)
-                else:
-                    print('jsonld inbox signature check success ' + key_id)
-                fitness_performance(inbox_start_time, server.fitness,
-                                    'INBOX', 'verify_signature_success',
-                                    debug)
-                inbox_start_time = time.time()
-
-        dogwhistles_filename = base_dir + '/accounts/dogwhistles.txt'
-        if not os.path.isfile(dogwhistles_filename):
-            dogwhistles_filename = base_dir + '/default_dogwhistles.txt'
-        dogwhistles = load_dogwhistles(dogwhistles_filename)
-
-        # set the id to the same as the post filename
-        # This makes the filename and the id consistent
-        # if queue_json['post'].get('id'):
-        #     queue_json['post']['id'] = queue_json['id']
-
-        if _receive_undo(base_dir, queue_json['post'],
-                         debug, domain, onion_domain, i2p_domain):
-            print('Queue: Undo accepted from ' + key_id)
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 5 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
-            fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', '_receive_undo',
-                                debug)
-            inbox_start_time = time.time()
-            continue
-
-        if debug:
-            print('DEBUG: checking for follow requests')
-        if _receive_follow_request(curr_session, session_onion, session_i2p,
-                                   base_dir, http_prefix, port,
-                                   send_threads, post_log,
-                                   cached_webfingers,
-                                   person_cache,
-                                   queue_json['post'],
-                                   federation_list,
-                                   debug, project_version,
-                                   max_followers, domain,
-                                   onion_domain, i2p_domain,
-                                   signing_priv_key_pem, unit_test,
-                                   system_language):
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 6 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
-            print('Queue: Follow activity for ' + key_id +
-                  ' removed from queue')
-            fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', '_receive_follow_request',
-                                debug)
-            inbox_start_time = time.time()
-            continue
 
-        if debug:
-            print('DEBUG: No follow requests')
-
-        if receive_accept_reject(base_dir, domain, queue_json['post'],
-                                 federation_list, debug,
-                                 domain, onion_domain, i2p_domain):
-            print('Queue: Accept/Reject received from ' + key_id)
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 7 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
+            curr_time = int(time.time())
+
+            # clear the daily quotas for maximum numbers of received posts
+            if curr_time - quotas_last_update_daily > 60 * 60 * 24:
+                quotas_daily = {
+                    'domains': {},
+                    'accounts': {}
+                }
+                quotas_last_update_daily = curr_time
+
+            if curr_time - quotas_last_update_per_min > 60:
+                # clear the per minute quotas for maximum numbers
+                # of received posts
+                quotas_per_min = {
+                    'domains': {},
+                    'accounts': {}
+                }
+                # also check if the json signature enforcement has changed
+                verify_all_sigs = \
+                    get_config_param(base_dir, "verifyAllSignatures")
+                if verify_all_sigs is not None:
+                    verify_all_signatures = verify_all_sigs
+                # change the last time that this was done
+                quotas_last_update_per_min = curr_time
+
+            if _inbox_quota_exceeded(queue, queue_filename,
+                                     queue_json, quotas_daily, quotas_per_min,
+                                     domain_max_posts_per_day,
+                                     account_max_posts_per_day, debug):
+                items_processed += 1
+                continue
             fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', 'receive_accept_reject',
-                                debug)
+                                'INBOX', '_inbox_quota_exceeded', debug)
             inbox_start_time = time.time()
-            continue
 
-        if _receive_update_activity(recent_posts_cache, curr_session,
-                                    base_dir, http_prefix,
-                                    domain, port,
-                                    cached_webfingers,
-                                    person_cache,
-                                    queue_json['post'],
-                                    queue_json['postNickname'],
-                                    debug,
-                                    max_mentions, max_emoji,
-                                    allow_local_network_access,
-                                    system_language,
-                                    signing_priv_key_pem,
-                                    max_recent_posts, translate,
-                                    allow_deletion,
-                                    yt_replace_domain,
-                                    twitter_replacement_domain,
-                                    show_published_date_only,
-                                    peertube_instances,
-                                    theme_name, max_like_count,
-                                    cw_lists, dogwhistles,
-                                    server.min_images_for_accounts,
-                                    max_hashtags):
-            if debug:
-                print('Queue: Update accepted from ' + key_id)
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 8 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
+            # recreate the session periodically
+            if not session or curr_time - session_last_update > 21600:
+                print('Regenerating inbox queue session at 6hr interval')
+                session = create_session(proxy_type)
+                if session:
+                    session_last_update = curr_time
+                else:
+                    print('WARN: inbox session not created')
+                    continue
+            if onion_domain:
+                if not session_onion or \
+                   curr_time - session_last_update_onion > 21600:
+                    print('Regenerating inbox queue onion session ' +
+                          'at 6hr interval')
+                    session_onion = create_session('tor')
+                    if session_onion:
+                        session_last_update_onion = curr_time
+                    else:
+                        print('WARN: inbox onion session not created')
+                        continue
+            if i2p_domain:
+                if not session_i2p or \
+                   curr_time - session_last_update_i2p > 21600:
+                    print('Regenerating inbox queue i2p session ' +
+                          'at 6hr interval')
+                    session_i2p = create_session('i2p')
+                    if session_i2p:
+                        session_last_update_i2p = curr_time
+                    else:
+                        print('WARN: inbox i2p session not created')
+                        continue
             fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', '_receive_update_activity',
-                                debug)
+                                'INBOX', 'recreate_session', debug)
             inbox_start_time = time.time()
-            continue
-
-        # get recipients list
-        recipients_dict, recipients_dict_followers = \
-            _inbox_post_recipients(base_dir, queue_json['post'],
-                                   http_prefix, domain, port, debug,
-                                   onion_domain, i2p_domain)
-        if len(recipients_dict.items()) == 0 and \
-           len(recipients_dict_followers.items()) == 0:
-            if debug:
-                print('Queue: no recipients were resolved ' +
-                      'for post arriving in inbox')
-            if os.path.isfile(queue_filename):
-                try:
-                    os.remove(queue_filename)
-                except OSError:
-                    print('EX: run_inbox_queue 9 unable to delete ' +
-                          str(queue_filename))
-            if len(queue) > 0:
-                queue.pop(0)
-            continue
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', '_post_recipients',
-                            debug)
-        inbox_start_time = time.time()
 
-        # if there are only a small number of followers then
-        # process them as if they were specifically
-        # addresses to particular accounts
-        no_of_follow_items = len(recipients_dict_followers.items())
-        if no_of_follow_items > 0:
-            # always deliver to individual inboxes
-            if no_of_follow_items < 999999:
-                if debug:
-                    print('DEBUG: moving ' + str(no_of_follow_items) +
-                          ' inbox posts addressed to followers')
-                for handle, post_item in recipients_dict_followers.items():
-                    recipients_dict[handle] = post_item
-                recipients_dict_followers = {}
-#            recipients_list = [recipients_dict, recipients_dict_followers]
+            if inbox_queue_workers > 1:
+                # process the item within a worker thread
+                worker_thread = \
+                    thread_with_trace(target=_process_inbox_queue_item,
+                                      args=(server, inbox_start_time,
+                                            queue, queue_filename, queue_json,
+                                            session, session_onion,
+                                            session_i2p, proxy_type,
+                                            recent_posts_cache,
+                                            max_recent_posts,
+                                            project_version,
+                                            base_dir, http_prefix,
+                                            send_threads, post_log,
+                                            cached_webfingers, person_cache,
+                                            domain, onion_domain, i2p_domain,
+                                            port, federation_list,
+                                            max_replies, allow_deletion,
+                                            debug, max_mentions, max_emoji,
+                                            translate, unit_test,
+                                            yt_replace_domain,
+                                            twitter_replacement_domain,
+                                            show_published_date_only,
+                                            max_followers,
+                                            allow_local_network_access,
+                                            peertube_instances,
+                                            verify_all_signatures,
+                                            theme_name, system_language,
+                                            max_like_count,
+                                            signing_priv_key_pem,
+                                            default_reply_interval_hrs,
+                                            cw_lists, max_hashtags,
+                                            last_bounce_message), daemon=True)
+                inbox_workers.append({
+                    'thread': worker_thread,
+                    'filename': queue_filename,
+                    'keys': item_keys
+                })
+                begin_thread(worker_thread, 'run_inbox_queue')
+                queue_progress = True
+                inbox_start_time = time.time()
+                continue
 
-        if debug:
-            print('*************************************')
-            print('Resolved recipients list:')
-            pprint(recipients_dict)
-            print('Resolved followers list:')
-            pprint(recipients_dict_followers)
-            print('*************************************')
-
-        # Copy any posts addressed to followers into the shared inbox
-        # this avoid copying file multiple times to potentially many
-        # individual inboxes
-        if len(recipients_dict_followers) > 0:
-            shared_inbox_post_filename = \
-                queue_json['destination'].replace(inbox_handle, inbox_handle)
-            if not os.path.isfile(shared_inbox_post_filename):
-                save_json(queue_json['post'], shared_inbox_post_filename)
-            fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', 'shared_inbox_save',
-                                debug)
+            _process_inbox_queue_item(server, inbox_start_time,
+                                      queue, queue_filename, queue_json,
+                                      session, session_onion,
+                                      session_i2p, proxy_type,
+                                      recent_posts_cache,
+                                      max_recent_posts,
+                                      project_version,
+                                      base_dir, http_prefix,
+                                      send_threads, post_log,
+                                      cached_webfingers, person_cache,
+                                      domain, onion_domain, i2p_domain,
+                                      port, federation_list,
+                                      max_replies, allow_deletion,
+                                      debug, max_mentions, max_emoji,
+                                      translate, unit_test,
+                                      yt_replace_domain,
+                                      twitter_replacement_domain,
+                                      show_published_date_only,
+                                      max_followers,
+                                      allow_local_network_access,
+                                      peertube_instances,
+                                      verify_all_signatures,
+                                      theme_name, system_language,
+                                      max_like_count,
+                                      signing_priv_key_pem,
+                                      default_reply_interval_hrs,
+                                      cw_lists, max_hashtags,
+                                      last_bounce_message)
+            items_processed += 1
             inbox_start_time = time.time()
 
-        lists_enabled = get_config_param(base_dir, "listsEnabled")
-        content_license_url = get_config_param(base_dir, "contentLicenseUrl")
-
-        fitness_performance(inbox_start_time, server.fitness,
-                            'INBOX', 'distribute_post',
-                            debug)
-        inbox_start_time = time.time()
-
-        # for posts addressed to specific accounts
-        for handle, _ in recipients_dict.items():
-            destination = \
-                queue_json['destination'].replace(inbox_handle, handle)
-            languages_understood = []
-            mitm = False
-            if queue_json.get('mitm'):
-                mitm = True
-            bold_reading = False
-            bold_reading_filename = \
-                base_dir + '/accounts/' + handle + '/.boldReading'
-            if os.path.isfile(bold_reading_filename):
-                bold_reading = True
-            _inbox_after_initial(server, inbox_start_time,
-                                 recent_posts_cache,
-                                 max_recent_posts,
-                                 session, session_onion, session_i2p,
-                                 key_id, handle,
-                                 queue_json['post'],
-                                 base_dir, http_prefix,
-                                 send_threads, post_log,
-                                 cached_webfingers,
-                                 person_cache, domain,
-                                 onion_domain, i2p_domain,
-                                 port, federation_list,
-                                 debug,
-                                 queue_filename, destination,
-                                 max_replies, allow_deletion,
-                                 max_mentions, max_emoji,
-                                 translate, unit_test,
-                                 yt_replace_domain,
-                                 twitter_replacement_domain,
-                                 show_published_date_only,
-                                 allow_local_network_access,
-                                 peertube_instances,
-                                 last_bounce_message,
-                                 theme_name, system_language,
-                                 max_like_count,
-                                 signing_priv_key_pem,
-                                 default_reply_interval_hrs,
-                                 cw_lists, lists_enabled,
-                                 content_license_url,
-                                 languages_understood, mitm,
-                                 bold_reading, dogwhistles,
-                                 max_hashtags)
-            fitness_performance(inbox_start_time, server.fitness,
-                                'INBOX', 'handle_after_initial',
-                                debug)
-            inbox_start_time = time.time()
-            if debug:
-                pprint(queue_json['post'])
-                print('Queue: Queue post accepted')
-        if os.path.isfile(queue_filename):
-            try:
-                os.remove(queue_filename)
-            except OSError:
-                print('EX: run_inbox_queue 10 unable to delete ' +
-                      str(queue_filename))
-        if len(queue) > 0:
-            queue.pop(0)
+        if items_processed > 0:
+            queue_progress = True
+        fitness_queue(server.fitness, 'INBOX', queue, items_processed,
+                      inbox_workers)
@@ -0,0 +1,31 @@
+__filename__ = "indexlock.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Core"
+
+import threading
+
+# Locks for index files which are changed by more than one thread,
+# such as inbox queue workers and the web interface. Each lock is held
+# while an index file is read and then appended to or rewritten, so
+# that changes made by other threads are not lost.
+# Locks are reentrant, so that a function holding the lock for an
+# index can call others which also take it.
+
+_index_locks = {}
+_index_locks_lock = threading.Lock()
+
+
+def index_lock(filename: str) -> threading.RLock:
+    """Returns the lock for changing the given index file
+    """
+    with _index_locks_lock:
+        lock = _index_locks.get(filename)
+        if lock is None:
+            lock = threading.RLock()
+            _index_locks[filename] = lock
+    return lock
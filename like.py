@@ -144,7 +144,7 @@ def _create_like(recent_posts_cache: {},
                          person_cache,
                          debug, project_version, None, group_account,
                          signing_priv_key_pem, 7367374,
-                         curr_domain, onion_domain, i2p_domain)
+                         curr_domain, onion_domain, i2p_domain, None)
 
     return new_like_json
 
@@ -636,6 +636,63 @@ def map_format_from_tagmaps_path(base_dir: str, path: str,
     return None
 
 
+def _hashtag_map_period_counts(base_dir: str, tag_name: str,
+                               time_period: {},
+                               nickname: str, domain: str) -> {}:
+    """Returns the number of map locations for a hashtag within each
+    time period, reading the hashtag map file only once
+    """
+    period_counts = {}
+    for period_str in time_period:
+        period_counts[period_str] = 0
+    tag_map_filename = base_dir + '/tagmaps/' + tag_name + '.txt'
+    map_links = []
+    try:
+        with open(tag_map_filename, 'r', encoding='utf-8') as fp_tag:
+            map_links = fp_tag.read().split('\n')
+    except OSError:
+        print('EX: unable to read tag map links ' + tag_map_filename)
+    if not map_links:
+        return period_counts
+
+    osm_domain = 'openstreetmap.org'
+    secs_since_epoch = \
+        int((datetime.datetime.utcnow() -
+             datetime.datetime(1970, 1, 1)).total_seconds())
+    curr_hours_since_epoch = int(secs_since_epoch / (60 * 60))
+    end_secs_since_epoch = int((curr_hours_since_epoch + 2) * 60 * 60)
+    start_secs = {}
+    for period_str, hours in time_period.items():
+        start_secs[period_str] = \
+            int((curr_hours_since_epoch - abs(hours)) * 60 * 60)
+    earliest_secs_since_epoch = min(start_secs.values())
+
+    for link_line in map_links:
+        link_line = link_line.strip().split(' ')
+        if len(link_line) < 3:
+            continue
+        # is this geocoordinate within the longest time range?
+        link_secs_since_epoch = int(link_line[0])
+        if link_secs_since_epoch < earliest_secs_since_epoch or \
+           link_secs_since_epoch > end_secs_since_epoch:
+            continue
+        zoom, latitude, longitude = \
+            geocoords_from_map_link(link_line[1], osm_domain)
+        if not zoom or not latitude or not longitude:
+            continue
+        # exclude the geolocation if the post is muted
+        if nickname:
+            post_filename = \
+                locate_post(base_dir, nickname, domain, link_line[2])
+            if post_filename:
+                if os.path.isfile(post_filename + '.muted'):
+                    continue
+        for period_str, start_secs_since_epoch in start_secs.items():
+            if link_secs_since_epoch >= start_secs_since_epoch:
+                period_counts[period_str] += 1
+    return period_counts
+
+
 def html_hashtag_maps(base_dir: str, tag_name: str,
                       translate: {}, map_format: str,
                       nickname: str, domain: str) -> str:
@@ -647,17 +704,19 @@ def html_hashtag_maps(base_dir: str, tag_name: str,
 
     time_period = _get_tagmaps_time_periods()
 
+    period_counts = \
+        _hashtag_map_period_counts(base_dir, tag_name, time_period,
+                                   nickname, domain)
+
     html_str = ''
-    map_str = None
-    for period_str, hours in time_period.items():
-        new_map_str = \
-            _hashtag_map_within_hours(base_dir, tag_name, hours,
-                                      map_format, nickname, domain)
-        if not new_map_str:
-            continue
-        if new_map_str == map_str:
+    prev_count = 0
+    for period_str in time_period:
+        # time periods are nested, so the same number of locations
+        # means that the map is the same as for the previous period
+        count = period_counts[period_str]
+        if count == 0 or count == prev_count:
             continue
-        map_str = new_map_str
+        prev_count = count
         period_str2 = period_str.replace('Last ', '').lower()
         endpoint_str = \
             '/tagmaps/' + tag_name + '-' + period_str2.replace(' ', '_')
@@ -0,0 +1,90 @@
+__filename__ = "matcher.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Moderation"
+
+# Matching of many words or phrases within some text in a single pass.
+# This is the Aho-Corasick algorithm, with the automaton held as lists
+# so that it can be stored within the caches used for filtering.
+# https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+
+
+def build_matcher(terms: []) -> {}:
+    """Returns a matcher for the given list of terms
+    """
+    goto = [{}]
+    fail = [0]
+    output = [[]]
+    for term in terms:
+        if not term:
+            continue
+        state = 0
+        for char in term:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][char] = next_state
+            state = next_state
+        if term not in output[state]:
+            output[state].append(term)
+
+    # breadth first calculation of the failure transitions
+    queue = list(goto[0].values())
+    index = 0
+    while index < len(queue):
+        state = queue[index]
+        index += 1
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fail_state = fail[state]
+            while fail_state and char not in goto[fail_state]:
+                fail_state = fail[fail_state]
+            fail[next_state] = goto[fail_state].get(char, 0)
+            if output[fail[next_state]]:
+                output[next_state] = \
+                    output[next_state] + output[fail[next_state]]
+    return {
+        "goto": goto,
+        "fail": fail,
+        "output": output
+    }
+
+
+def matcher_contains(matcher: {}, text: str) -> bool:
+    """Does the given text contain any of the matcher terms?
+    """
+    goto = matcher['goto']
+    fail = matcher['fail']
+    output = matcher['output']
+    state = 0
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if output[state]:
+            return True
+    return False
+
+
+def matcher_find(matcher: {}, text: str) -> []:
+    """Returns the matcher terms found within the given text
+    """
+    goto = matcher['goto']
+    fail = matcher['fail']
+    output = matcher['output']
+    found = {}
+    state = 0
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for term in output[state]:
+            found[term] = True
+    return list(found.keys())
@@ -34,37 +34,22 @@ from utils import get_status_number
 from utils import clear_from_post_caches
 from utils import dangerous_markup
 from utils import local_actor_url
-from utils import text_in_file
+from boxindex import box_index_add
 from inbox import store_hash_tags
 from session import create_session
 from threads import begin_thread
 
 
 def _update_feeds_outbox_index(base_dir: str, domain: str,
-                               post_id: str) -> None:
+                               post_id: str, box_index_cache: {}) -> None:
     """Updates the index used for imported RSS feeds
     """
     base_path = base_dir + '/accounts/news@' + domain
     index_filename = base_path + '/outbox.index'
 
-    if os.path.isfile(index_filename):
-        if not text_in_file(post_id, index_filename):
-            try:
-                with open(index_filename, 'r+') as feeds_file:
-                    content = feeds_file.read()
-                    if post_id + '\n' not in content:
-                        feeds_file.seek(0, 0)
-                        feeds_file.write(post_id + '\n' + content)
-                        print('DEBUG: feeds post added to index')
-            except OSError as ex:
-                print('EX: Failed to write entry to feeds posts index ' +
-                      index_filename + ' ' + str(ex))
-    else:
-        try:
-            with open(index_filename, 'w+', encoding='utf-8') as feeds_file:
-                feeds_file.write(post_id + '\n')
-        except OSError:
-            print('EX: unable to write ' + index_filename)
+    if not box_index_add(box_index_cache, index_filename, post_id):
+        print('EX: Failed to write entry to feeds posts index ' +
+              index_filename)
 
 
 def _save_arrived_time(post_filename: str, arrived: str) -> None:
@@ -547,7 +532,8 @@ def _convert_rss_to_activitypub(base_dir: str, http_prefix: str,
                                 allow_local_network_access: bool,
                                 system_language: str,
                                 low_bandwidth: bool,
-                                content_license_url: str) -> None:
+                                content_license_url: str,
+                                box_index_cache: {}) -> None:
     """Converts rss items in a newswire into posts
     """
     if not newswire:
@@ -734,7 +720,8 @@ def _convert_rss_to_activitypub(base_dir: str, http_prefix: str,
 
             clear_from_post_caches(base_dir, recent_posts_cache, post_id)
             if save_json(blog, filename):
-                _update_feeds_outbox_index(base_dir, domain, post_id + '.json')
+                _update_feeds_outbox_index(base_dir, domain, post_id + '.json',
+                                           box_index_cache)
 
                 # Save a file containing the time when the post arrived
                 # this can then later be used to construct the news timeline
@@ -834,7 +821,8 @@ def run_newswire_daemon(base_dir: str, httpd,
                                     httpd.allow_local_network_access,
                                     httpd.system_language,
                                     httpd.low_bandwidth,
-                                    httpd.content_license_url)
+                                    httpd.content_license_url,
+                                    httpd.box_index_cache)
         print('Newswire feed converted to ActivityPub')
 
         if httpd.max_news_posts > 0:
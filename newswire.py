@@ -18,6 +18,8 @@ from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 from collections import OrderedDict
+from boxindex import box_index_lines
+from boxindex import box_index_exists
 from utils import valid_post_date
 from categories import set_hashtag_category
 from utils import remove_eol
@@ -42,6 +44,22 @@ from blocking import is_blocked_domain
 from blocking import is_blocked_hashtag
 from filters import is_filtered
 from session import download_image_any_mime_type
+from threads import thread_with_trace
+from threads import begin_thread
+
+# number of feeds which may be fetched at the same time
+MAX_NEWSWIRE_FETCH_WORKERS = 8
+
+# delay between requests for feeds on the same host
+NEWSWIRE_HOST_DELAY_SECS = 4
+
+# number of bytes read from a feed at a time
+FEED_CHUNK_SIZE = 8192
+
+# characters from the end of the previously read feed text which are
+# searched together with each new chunk. This should be longer than
+# any tag which is searched for
+FEED_READER_OVERLAP = 64
 
 
 def _remove_cdata(text: str) -> str:
@@ -268,6 +286,29 @@ def _add_newswire_dict_entry(base_dir: str, domain: str,
     ]
 
 
+def _refilter_newswire_items(base_dir: str, items: {},
+                             system_language: str) -> {}:
+    """Returns the items from a previous fetch of a feed which are
+    not filtered and which don't have blocked hashtags, since filters
+    may have been added after the items were first parsed
+    """
+    if not items:
+        return items
+    allowed_items = {}
+    for date_str, item in items.items():
+        all_text = item[0] + ' ' + item[4]
+        if is_filtered(base_dir, None, None, all_text, system_language):
+            continue
+        blocked = False
+        for tag in item[6]:
+            if is_blocked_hashtag(base_dir, tag):
+                blocked = True
+                break
+        if not blocked:
+            allowed_items[date_str] = item
+    return allowed_items
+
+
 def _valid_feed_date(pub_date: str, debug: bool = False) -> bool:
     # convert from YY-MM-DD HH:MM:SS+00:00 to
     # YY-MM-DDTHH:MM:SSZ
@@ -719,7 +760,142 @@ def get_link_from_rss_item(rss_item: str,
     return link, mime_type
 
 
-def _xml2str_to_dict(base_dir: str, domain: str, xml_str: str,
+def _new_feed_reader(chunks, max_size_kb: int) -> {}:
+    """Returns a reader which incrementally consumes the text of a feed
+    from the given chunks, so that items can be parsed as they arrive
+    and the download stopped once enough have been read
+    """
+    return {
+        "chunks": iter(chunks),
+        "text": '',
+        "pending": [],
+        "recent": '',
+        "header": None,
+        "size": 0,
+        "maxSize": max_size_kb * 1024,
+        "finished": False,
+        "ended": False,
+        "invalid": False,
+        "tooLarge": False
+    }
+
+
+def _feed_reader_read(feed_reader: {}) -> bool:
+    """Reads the next chunk of the feed. Chunks are kept in a list
+    until the text is needed, rather than copying the text each time.
+    Returns False if there is nothing more to read
+    """
+    if feed_reader['finished']:
+        return False
+    try:
+        chunk = next(feed_reader['chunks'])
+    except StopIteration:
+        feed_reader['finished'] = True
+        return False
+    if not chunk:
+        return True
+    remaining = feed_reader['maxSize'] - feed_reader['size']
+    if len(chunk) >= remaining:
+        # keep whatever arrived within the size limit
+        chunk = chunk[:remaining]
+        feed_reader['finished'] = True
+        feed_reader['tooLarge'] = True
+    feed_reader['size'] += len(chunk)
+    # invalid characters or tags may straddle the boundary
+    # between chunks, so the end of the previous text is included
+    recent = feed_reader['recent'][-FEED_READER_OVERLAP:] + chunk
+    if contains_invalid_chars(recent):
+        feed_reader['finished'] = True
+        feed_reader['invalid'] = True
+        return False
+    feed_reader['recent'] = recent
+    feed_reader['pending'].append(chunk)
+    return not feed_reader['finished']
+
+
+def _feed_reader_text(feed_reader: {}) -> str:
+    """Returns the unconsumed text of the feed which has been read
+    """
+    if feed_reader['pending']:
+        feed_reader['text'] += ''.join(feed_reader['pending'])
+        feed_reader['pending'] = []
+    return feed_reader['text']
+
+
+def _feed_reader_peek(feed_reader: {}, end_tags: []) -> bool:
+    """Reads the feed until the end of its first item,
+    so that the type of feed can be determined.
+    Returns True if any of the given tags have been read
+    """
+    text = _feed_reader_text(feed_reader)
+    while True:
+        for tag in end_tags:
+            if tag in text:
+                return True
+        if not _feed_reader_read(feed_reader):
+            break
+        # only the newly read text needs to be searched
+        text = feed_reader['recent']
+    return False
+
+
+def _feed_reader_read_all(feed_reader: {}) -> str:
+    """Reads the remainder of the feed and returns the unconsumed text
+    """
+    while _feed_reader_read(feed_reader):
+        pass
+    return _feed_reader_text(feed_reader)
+
+
+def _feed_reader_find(feed_reader: {}, tag: str) -> int:
+    """Reads the feed until the given tag is found.
+    Returns its position within the unconsumed text, or -1
+    """
+    text = _feed_reader_text(feed_reader)
+    tag_pos = text.find(tag)
+    while tag_pos < 0:
+        if not _feed_reader_read(feed_reader):
+            break
+        # only the newly read text needs to be searched
+        if tag not in feed_reader['recent']:
+            continue
+        text = _feed_reader_text(feed_reader)
+        search_start = max(0, len(text) - len(feed_reader['recent']))
+        tag_pos = text.find(tag, search_start)
+    return tag_pos
+
+
+def _feed_reader_next_item(feed_reader: {}, item_tag: str) -> str:
+    """Returns the text of the next item within the feed, from after
+    the given tag up to the following one, or None if there are no more.
+    Anything before the first item is stored as the feed header
+    """
+    if feed_reader['ended']:
+        return None
+    if feed_reader['header'] is None:
+        tag_pos = _feed_reader_find(feed_reader, item_tag)
+        if tag_pos < 0:
+            feed_reader['ended'] = True
+            return None
+        text = feed_reader['text']
+        feed_reader['header'] = text[:tag_pos]
+        feed_reader['text'] = text[tag_pos + len(item_tag):]
+    tag_pos = _feed_reader_find(feed_reader, item_tag)
+    if tag_pos >= 0:
+        text = feed_reader['text']
+        item_str = text[:tag_pos]
+        feed_reader['text'] = text[tag_pos + len(item_tag):]
+        return item_str
+    feed_reader['ended'] = True
+    if feed_reader['tooLarge'] or feed_reader['invalid']:
+        # don't parse an item which was truncated
+        return None
+    item_str = _feed_reader_text(feed_reader)
+    feed_reader['text'] = ''
+    return item_str
+
+
+def _xml2str_to_dict(base_dir: str, domain: str, feed_reader: {},
                      moderated: bool, mirrored: bool,
                      max_posts_per_source: int,
                      max_feed_item_size_kb: int,
@@ -729,24 +905,25 @@ def _xml2str_to_dict(base_dir: str, domain: str, xml_str: str,
                      system_language: str) -> {}:
     """Converts an xml RSS 2.0 string to a dictionary
     """
-    if '<item>' not in xml_str:
+    if not _feed_reader_peek(feed_reader, ['<item>']):
         return {}
     result = {}
 
     # is this an rss feed containing hashtag categories?
-    if '<title>#categories</title>' in xml_str:
+    if '<title>#categories</title>' in _feed_reader_text(feed_reader):
+        xml_str = _feed_reader_read_all(feed_reader)
+        if feed_reader['tooLarge'] or feed_reader['invalid']:
+            return {}
         _xml2str_to_hashtag_categories(base_dir, xml_str,
                                        max_categories_feed_item_size_kb)
         return {}
 
-    rss_items = xml_str.split('<item>')
     post_ctr = 0
     max_bytes = max_feed_item_size_kb * 1024
-    first_item = True
-    for rss_item in rss_items:
-        if first_item:
-            first_item = False
-            continue
+    while True:
+        rss_item = _feed_reader_next_item(feed_reader, '<item>')
+        if rss_item is None:
+            break
         if not rss_item:
             continue
         if len(rss_item) > max_bytes:
@@ -806,7 +983,8 @@ def _xml2str_to_dict(base_dir: str, domain: str, xml_str: str,
                 post_filename = ''
                 votes_status = []
                 podcast_properties = \
-                    xml_podcast_to_dict(base_dir, rss_item, xml_str)
+                    xml_podcast_to_dict(base_dir, rss_item,
+                                        feed_reader['header'])
                 if podcast_properties:
                     podcast_properties['linkMimeType'] = link_mime_type
                 _add_newswire_dict_entry(base_dir, domain,
@@ -824,7 +1002,7 @@ def _xml2str_to_dict(base_dir: str, domain: str, xml_str: str,
     return result
 
 
-def _xml1str_to_dict(base_dir: str, domain: str, xml_str: str,
+def _xml1str_to_dict(base_dir: str, domain: str, feed_reader: {},
                      moderated: bool, mirrored: bool,
                      max_posts_per_source: int,
                      max_feed_item_size_kb: int,
@@ -836,24 +1014,25 @@ def _xml1str_to_dict(base_dir: str, domain: str, xml_str: str,
     https://validator.w3.org/feed/docs/rss1.html
     """
     item_str = '<item'
-    if item_str not in xml_str:
+    if not _feed_reader_peek(feed_reader, [item_str]):
         return {}
     result = {}
 
     # is this an rss feed containing hashtag categories?
-    if '<title>#categories</title>' in xml_str:
+    if '<title>#categories</title>' in _feed_reader_text(feed_reader):
+        xml_str = _feed_reader_read_all(feed_reader)
+        if feed_reader['tooLarge'] or feed_reader['invalid']:
+            return {}
         _xml2str_to_hashtag_categories(base_dir, xml_str,
                                        max_categories_feed_item_size_kb)
         return {}
 
-    rss_items = xml_str.split(item_str)
     post_ctr = 0
     max_bytes = max_feed_item_size_kb * 1024
-    first_item = True
-    for rss_item in rss_items:
-        if first_item:
-            first_item = False
-            continue
+    while True:
+        rss_item = _feed_reader_next_item(feed_reader, item_str)
+        if rss_item is None:
+            break
         if not rss_item:
             continue
         if len(rss_item) > max_bytes:
@@ -913,7 +1092,8 @@ def _xml1str_to_dict(base_dir: str, domain: str, xml_str: str,
                 post_filename = ''
                 votes_status = []
                 podcast_properties = \
-                    xml_podcast_to_dict(base_dir, rss_item, xml_str)
+                    xml_podcast_to_dict(base_dir, rss_item,
+                                        feed_reader['header'])
                 if podcast_properties:
                     podcast_properties['linkMimeType'] = link_mime_type
                 _add_newswire_dict_entry(base_dir, domain,
@@ -931,7 +1111,7 @@ def _xml1str_to_dict(base_dir: str, domain: str, xml_str: str,
     return result
 
 
-def _atom_feed_to_dict(base_dir: str, domain: str, xml_str: str,
+def _atom_feed_to_dict(base_dir: str, domain: str, feed_reader: {},
                        moderated: bool, mirrored: bool,
                        max_posts_per_source: int,
                        max_feed_item_size_kb: int,
@@ -940,17 +1120,15 @@ def _atom_feed_to_dict(base_dir: str, domain: str, xml_str: str,
                        system_language: str) -> {}:
     """Converts an atom feed string to a dictionary
     """
-    if '<entry>' not in xml_str:
+    if not _feed_reader_peek(feed_reader, ['<entry>']):
         return {}
     result = {}
-    atom_items = xml_str.split('<entry>')
     post_ctr = 0
     max_bytes = max_feed_item_size_kb * 1024
-    first_item = True
-    for atom_item in atom_items:
-        if first_item:
-            first_item = False
-            continue
+    while True:
+        atom_item = _feed_reader_next_item(feed_reader, '<entry>')
+        if atom_item is None:
+            break
         if not atom_item:
             continue
         if len(atom_item) > max_bytes:
@@ -1008,7 +1186,8 @@ def _atom_feed_to_dict(base_dir: str, domain: str, xml_str: str,
                 post_filename = ''
                 votes_status = []
                 podcast_properties = \
-                    xml_podcast_to_dict(base_dir, atom_item, xml_str)
+                    xml_podcast_to_dict(base_dir, atom_item,
+                                        feed_reader['header'])
                 if podcast_properties:
                     podcast_properties['linkMimeType'] = link_mime_type
                 _add_newswire_dict_entry(base_dir, domain,
@@ -1141,7 +1320,7 @@ def _json_feed_v1to_dict(base_dir: str, domain: str, xml_str: str,
     return result
 
 
-def _atom_feed_yt_to_dict(base_dir: str, domain: str, xml_str: str,
+def _atom_feed_yt_to_dict(base_dir: str, domain: str, feed_reader: {},
                           moderated: bool, mirrored: bool,
                           max_posts_per_source: int,
                           max_feed_item_size_kb: int,
@@ -1149,19 +1328,17 @@ def _atom_feed_yt_to_dict(base_dir: str, domain: str, xml_str: str,
                           system_language: str) -> {}:
     """Converts an atom-style YouTube feed string to a dictionary
     """
-    if '<entry>' not in xml_str:
+    if not _feed_reader_peek(feed_reader, ['<entry>']):
         return {}
     if is_blocked_domain(base_dir, 'www.youtube.com'):
         return {}
     result = {}
-    atom_items = xml_str.split('<entry>')
     post_ctr = 0
     max_bytes = max_feed_item_size_kb * 1024
-    first_entry = True
-    for atom_item in atom_items:
-        if first_entry:
-            first_entry = False
-            continue
+    while True:
+        atom_item = _feed_reader_next_item(feed_reader, '<entry>')
+        if atom_item is None:
+            break
         if not atom_item:
             continue
         if not atom_item.strip():
@@ -1212,7 +1389,8 @@ def _atom_feed_yt_to_dict(base_dir: str, domain: str, xml_str: str,
                 post_filename = ''
                 votes_status = []
                 podcast_properties = \
-                    xml_podcast_to_dict(base_dir, atom_item, xml_str)
+                    xml_podcast_to_dict(base_dir, atom_item,
+                                        feed_reader['header'])
                 if podcast_properties:
                     podcast_properties['linkMimeType'] = 'video/youtube'
                 _add_newswire_dict_entry(base_dir, domain,
@@ -1230,7 +1408,7 @@ def _atom_feed_yt_to_dict(base_dir: str, domain: str, xml_str: str,
     return result
 
 
-def _xml_str_to_dict(base_dir: str, domain: str, xml_str: str,
+def _xml_str_to_dict(base_dir: str, domain: str, feed_reader: {},
                      moderated: bool, mirrored: bool,
                      max_posts_per_source: int,
                      max_feed_item_size_kb: int,
@@ -1238,19 +1416,21 @@ def _xml_str_to_dict(base_dir: str, domain: str, xml_str: str,
                      session, debug: bool,
                      preferred_podcast_formats: [],
                      system_language: str) -> {}:
-    """Converts an xml string to a dictionary
+    """Converts an xml feed to a dictionary
     """
+    _feed_reader_peek(feed_reader, ['</item>', '</entry>'])
+    xml_str = _feed_reader_text(feed_reader)
     if '<yt:videoId>' in xml_str and '<yt:channelId>' in xml_str:
         print('YouTube feed: reading')
         return _atom_feed_yt_to_dict(base_dir, domain,
-                                     xml_str, moderated, mirrored,
+                                     feed_reader, moderated, mirrored,
                                      max_posts_per_source,
                                      max_feed_item_size_kb,
                                      session, debug,
                                      system_language)
     if 'rss version="2.0"' in xml_str:
         return _xml2str_to_dict(base_dir, domain,
-                                xml_str, moderated, mirrored,
+                                feed_reader, moderated, mirrored,
                                 max_posts_per_source, max_feed_item_size_kb,
                                 max_categories_feed_item_size_kb,
                                 session, debug,
@@ -1258,18 +1438,21 @@ def _xml_str_to_dict(base_dir: str, domain: str, xml_str: str,
                                 system_language)
     if '<?xml version="1.0"' in xml_str:
         return _xml1str_to_dict(base_dir, domain,
-                                xml_str, moderated, mirrored,
+                                feed_reader, moderated, mirrored,
                                 max_posts_per_source, max_feed_item_size_kb,
                                 max_categories_feed_item_size_kb,
                                 session, debug, preferred_podcast_formats,
                                 system_language)
     if 'xmlns="http://www.w3.org/2005/Atom"' in xml_str:
         return _atom_feed_to_dict(base_dir, domain,
-                                  xml_str, moderated, mirrored,
+                                  feed_reader, moderated, mirrored,
                                   max_posts_per_source, max_feed_item_size_kb,
                                   session, debug, preferred_podcast_formats,
                                   system_language)
     if 'https://jsonfeed.org/version/1' in xml_str:
+        xml_str = _feed_reader_read_all(feed_reader)
+        if feed_reader['tooLarge'] or feed_reader['invalid']:
+            return {}
         return _json_feed_v1to_dict(base_dir, domain,
                                     xml_str, moderated, mirrored,
                                     max_posts_per_source,
@@ -1296,8 +1479,11 @@ def get_rss(base_dir: str, domain: str, session, url: str,
             max_feed_item_size_kb: int,
             max_categories_feed_item_size_kb: int, debug: bool,
             preferred_podcast_formats: [],
-            timeout_sec: int, system_language: str) -> {}:
-    """Returns an RSS url as a dict
+            timeout_sec: int, system_language: str,
+            feed_state: {}) -> {}:
+    """Returns an RSS url as a dict.
+    If feed_state is given then it is used to make a conditional request,
+    and the previous result is returned if the feed has not changed
     """
     if not isinstance(url, str):
         print('url: ' + str(url))
@@ -1318,27 +1504,60 @@ def get_rss(base_dir: str, domain: str, session, url: str,
     if not session:
         print('WARN: no session specified for get_rss')
     url = _yt_channel_to_atom_feed(url)
+    if feed_state is not None:
+        if feed_state.get('etag'):
+            session_headers['If-None-Match'] = feed_state['etag']
+        if feed_state.get('lastModified'):
+            session_headers['If-Modified-Since'] = feed_state['lastModified']
+    result = None
     try:
         result = \
             session.get(url, headers=session_headers,
                         params=session_params,
                         timeout=timeout_sec,
-                        allow_redirects=False)
+                        allow_redirects=False,
+                        stream=True)
+        if result is not None and result.status_code == 304 and \
+           feed_state is not None:
+            # the feed has not changed, so it doesn't need to be parsed
+            if debug:
+                print('Feed not modified ' + url)
+            prev_items = feed_state.get('items')
+            return _refilter_newswire_items(base_dir, prev_items,
+                                            system_language)
         if result:
-            if int(len(result.text) / 1024) < max_feed_size_kb and \
-               not contains_invalid_chars(result.text):
-                return _xml_str_to_dict(base_dir, domain, result.text,
-                                        moderated, mirrored,
-                                        max_posts_per_source,
-                                        max_feed_item_size_kb,
-                                        max_categories_feed_item_size_kb,
-                                        session, debug,
-                                        preferred_podcast_formats,
-                                        system_language)
-            print('WARN: feed is too large, ' +
-                  'or contains invalid characters: ' + url)
-        else:
-            print('WARN: no result returned for feed ' + url)
+            if not result.encoding:
+                result.encoding = 'utf-8'
+            # the feed is parsed as it arrives, so that the download
+            # can stop once enough items have been read
+            feed_reader = \
+                _new_feed_reader(result.iter_content(FEED_CHUNK_SIZE, True),
+                                 max_feed_size_kb)
+            items = \
+                _xml_str_to_dict(base_dir, domain, feed_reader,
+                                 moderated, mirrored,
+                                 max_posts_per_source,
+                                 max_feed_item_size_kb,
+                                 max_categories_feed_item_size_kb,
+                                 session, debug,
+                                 preferred_podcast_formats,
+                                 system_language)
+            if feed_reader['invalid']:
+                print('WARN: feed contains invalid characters: ' + url)
+                return None
+            if feed_reader['tooLarge']:
+                if not items:
+                    print('WARN: feed is too large: ' + url)
+                    return None
+                print('WARN: feed is too large, only the first ' +
+                      str(len(items)) + ' items were read: ' + url)
+            if feed_state is not None:
+                feed_state['etag'] = result.headers.get('ETag')
+                feed_state['lastModified'] = \
+                    result.headers.get('Last-Modified')
+                feed_state['items'] = items
+            return items
+        print('WARN: no result returned for feed ' + url)
     except requests.exceptions.RequestException as ex:
         print('WARN: get_rss failed\nurl: ' + str(url) + ', ' +
               'headers: ' + str(session_headers) + ', ' +
@@ -1352,6 +1571,10 @@ def get_rss(base_dir: str, domain: str, session, url: str,
             print('WARN: connection was reset during get_rss ' + str(ex))
         else:
             print('WARN: get_rss, ' + str(ex))
+    finally:
+        # release the connection if the feed was not read to the end
+        if result is not None:
+            result.close()
     return None
 
 
@@ -1448,7 +1671,7 @@ def _add_account_blogs_to_newswire(base_dir: str, nickname: str, domain: str,
                                    session, debug: bool) -> None:
     """Adds blogs for the given account to the newswire
     """
-    if not os.path.isfile(index_filename):
+    if not box_index_exists(index_filename):
         return
     # local blog entries are unmoderated by default
     moderated = False
@@ -1459,63 +1682,52 @@ def _add_account_blogs_to_newswire(base_dir: str, nickname: str, domain: str,
     if os.path.isfile(moderated_filename):
         moderated = True
 
-    with open(index_filename, 'r', encoding='utf-8') as index_file:
-        post_filename = 'start'
-        ctr = 0
-        while post_filename:
-            post_filename = index_file.readline()
-            if post_filename:
-                # if this is a full path then remove the directories
-                if '/' in post_filename:
-                    post_filename = post_filename.split('/')[-1]
-
-                # filename of the post without any extension or path
-                # This should also correspond to any index entry in
-                # the posts cache
-                post_url = remove_eol(post_filename)
-                post_url = post_url.replace('.json', '').strip()
-
-                # read the post from file
-                full_post_filename = \
-                    locate_post(base_dir, nickname,
-                                domain, post_url, False)
-                if not full_post_filename:
-                    print('Unable to locate post for newswire ' + post_url)
-                    ctr += 1
-                    if ctr >= max_blogs_per_account:
-                        break
-                    continue
-
-                post_json_object = None
-                if full_post_filename:
-                    post_json_object = load_json(full_post_filename)
-                if _is_newswire_blog_post(post_json_object):
-                    published = post_json_object['object']['published']
-                    published = published.replace('T', ' ')
-                    published = published.replace('Z', '+00:00')
-                    votes = []
-                    if os.path.isfile(full_post_filename + '.votes'):
-                        votes = load_json(full_post_filename + '.votes')
-                    content = \
-                        get_base_content_from_post(post_json_object,
-                                                   system_language)
-                    description = first_paragraph_from_string(content)
-                    description = remove_html(description)
-                    tags_from_post = _get_hashtags_from_post(post_json_object)
-                    summary = post_json_object['object']['summary']
-                    _add_newswire_dict_entry(base_dir, domain,
-                                             newswire, published,
-                                             summary,
-                                             post_json_object['object']['url'],
-                                             votes, full_post_filename,
-                                             description, moderated, False,
-                                             tags_from_post,
-                                             max_tags, session, debug,
-                                             None, system_language)
-
-            ctr += 1
-            if ctr >= max_blogs_per_account:
-                break
+    index_lines = box_index_lines(index_filename, 0, max_blogs_per_account)
+    for post_filename in index_lines:
+        # if this is a full path then remove the directories
+        if '/' in post_filename:
+            post_filename = post_filename.split('/')[-1]
+
+        # filename of the post without any extension or path
+        # This should also correspond to any index entry in
+        # the posts cache
+        post_url = remove_eol(post_filename)
+        post_url = post_url.replace('.json', '').strip()
+
+        # read the post from file
+        full_post_filename = \
+            locate_post(base_dir, nickname,
+                        domain, post_url, False)
+        if not full_post_filename:
+            print('Unable to locate post for newswire ' + post_url)
+            continue
+
+        post_json_object = None
+        if full_post_filename:
+            post_json_object = load_json(full_post_filename)
+        if _is_newswire_blog_post(post_json_object):
+            published = post_json_object['object']['published']
+            published = published.replace('T', ' ')
+            published = published.replace('Z', '+00:00')
+            votes = []
+            if os.path.isfile(full_post_filename + '.votes'):
+                votes = load_json(full_post_filename + '.votes')
+            content = \
+                get_base_content_from_post(post_json_object,
+                                           system_language)
+            description = first_paragraph_from_string(content)
+            description = remove_html(description)
+            tags_from_post = _get_hashtags_from_post(post_json_object)
+            summary = post_json_object['object']['summary']
+            _add_newswire_dict_entry(base_dir, domain,
+                                     newswire, published,
+                                     summary,
+                                     post_json_object['object']['url'],
+                                     votes, full_post_filename,
+                                     description, moderated, False,
+                                     tags_from_post,
+                                     max_tags, session, debug,
+                                     None, system_language)
 
 
 def _add_blogs_to_newswire(base_dir: str, domain: str, newswire: {},
@@ -1545,7 +1757,7 @@ def _add_blogs_to_newswire(base_dir: str, domain: str, newswire: {},
             # is there a blogs timeline for this account?
             account_dir = os.path.join(base_dir + '/accounts', handle)
             blogs_index = account_dir + '/tlblogs.index'
-            if os.path.isfile(blogs_index):
+            if box_index_exists(blogs_index):
                 domain = handle.split('@')[1]
                 _add_account_blogs_to_newswire(base_dir, nickname, domain,
                                                newswire, max_blogs_per_account,
@@ -1572,6 +1784,45 @@ def _add_blogs_to_newswire(base_dir: str, domain: str, newswire: {},
                       str(newswire_moderation_filename))
 
 
+def _get_feeds_worker(session, base_dir: str, domain: str,
+                      max_posts_per_source: int, max_feed_size_kb: int,
+                      max_feed_item_size_kb: int,
+                      max_categories_feed_item_size_kb: int,
+                      debug: bool, preferred_podcast_formats: [],
+                      timeout_sec: int, system_language: str,
+                      pending: [], feeds_state: {}, result: {}) -> None:
+    """Fetches feeds for hosts taken from the pending list until there
+    are none left. Several of these may run at once
+    """
+    while pending:
+        try:
+            host_feeds = pending.pop()
+        except IndexError:
+            break
+        ctr = 0
+        for url, moderated, mirrored in host_feeds:
+            if ctr > 0:
+                # don't make requests to the same host too quickly
+                time.sleep(NEWSWIRE_HOST_DELAY_SECS)
+            ctr += 1
+            fetch_start_time = time.time()
+            items_list = get_rss(base_dir, domain, session, url,
+                                 moderated, mirrored,
+                                 max_posts_per_source, max_feed_size_kb,
+                                 max_feed_item_size_kb,
+                                 max_categories_feed_item_size_kb, debug,
+                                 preferred_podcast_formats,
+                                 timeout_sec, system_language,
+                                 feeds_state[url])
+            if items_list:
+                for date_str, item in items_list.items():
+                    result[date_str] = item
+            elif time.time() - fetch_start_time >= timeout_sec:
+                # this host is slow, so skip its remaining feeds
+                print('WARN: newswire host timed out ' + url)
+                break
+
+
 def get_dict_from_newswire(session, base_dir: str, domain: str,
                            max_posts_per_source: int, max_feed_size_kb: int,
                            max_tags: int, max_feed_item_size_kb: int,
@@ -1592,7 +1843,19 @@ def get_dict_from_newswire(session, base_dir: str, domain: str,
     rss_feed = []
     with open(subscriptions_filename, 'r', encoding='utf-8') as fp_sub:
         rss_feed = fp_sub.readlines()
-    result = {}
+
+    # previous etags and results for each feed
+    feeds_state_filename = base_dir + '/accounts/.newswirefeeds.json'
+    feeds_state = {}
+    if os.path.isfile(feeds_state_filename):
+        feeds_state = load_json(feeds_state_filename)
+        if not feeds_state:
+            feeds_state = {}
+
+    # group the feeds by host, so that each host is only
+    # sent one request at a time
+    feeds_by_host = {}
+    feed_urls = {}
     for url in rss_feed:
         url = url.strip()
 
@@ -1616,17 +1879,50 @@ def get_dict_from_newswire(session, base_dir: str, domain: str,
             mirrored = True
             url = url.replace('!', '').strip()
 
-        items_list = get_rss(base_dir, domain, session, url,
-                             moderated, mirrored,
-                             max_posts_per_source, max_feed_size_kb,
-                             max_feed_item_size_kb,
-                             max_categories_feed_item_size_kb, debug,
-                             preferred_podcast_formats,
-                             timeout_sec, system_language)
-        if items_list:
-            for date_str, item in items_list.items():
-                result[date_str] = item
-        time.sleep(4)
+        if url in feed_urls:
+            continue
+        feed_urls[url] = True
+        feed_host = url.split('://')[1].split('/')[0]
+        if not feeds_by_host.get(feed_host):
+            feeds_by_host[feed_host] = []
+        feeds_by_host[feed_host].append([url, moderated, mirrored])
+        if not feeds_state.get(url):
+            feeds_state[url] = {}
+
+    # fetch the feeds using a limited number of workers
+    pending = list(feeds_by_host.values())
+    random.shuffle(pending)
+    no_of_workers = len(pending)
+    if no_of_workers > MAX_NEWSWIRE_FETCH_WORKERS:
+        no_of_workers = MAX_NEWSWIRE_FETCH_WORKERS
+    workers = []
+    for _ in range(no_of_workers):
+        # each worker has its own results, so that
+        # they don't need to be locked
+        worker_result = {}
+        worker_thread = \
+            thread_with_trace(target=_get_feeds_worker,
+                              args=(session, base_dir, domain,
+                                    max_posts_per_source, max_feed_size_kb,
+                                    max_feed_item_size_kb,
+                                    max_categories_feed_item_size_kb,
+                                    debug, preferred_podcast_formats,
+                                    timeout_sec, system_language,
+                                    pending, feeds_state,
+                                    worker_result), daemon=True)
+        if begin_thread(worker_thread, 'get_dict_from_newswire'):
+            workers.append([worker_thread, worker_result])
+    result = {}
+    for worker in workers:
+        worker[0].join()
+        for date_str, item in worker[1].items():
+            result[date_str] = item
+
+    # remember the state of currently subscribed feeds
+    for url in list(feeds_state.keys()):
+        if url not in feed_urls:
+            del feeds_state[url]
+    save_json(feeds_state, feeds_state_filename)
 
     # add blogs from each user account
     _add_blogs_to_newswire(base_dir, domain, result,
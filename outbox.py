@@ -439,7 +439,8 @@ def post_message_to_outbox(session, translate: {},
                          http_prefix,
                          post_id,
                          post_to_nickname, domain_full,
-                         message_json, outbox_name)
+                         message_json, outbox_name,
+                         recent_posts_cache)
     if not saved_filename:
         print('WARN: post not saved to outbox ' + outbox_name)
         return False
@@ -463,7 +464,8 @@ def post_message_to_outbox(session, translate: {},
                 copyfile(saved_filename, blogs_dir + '/' + saved_post_id)
                 inbox_update_index('tlblogs', base_dir,
                                    'news@' + domain,
-                                   saved_filename, debug)
+                                   saved_filename, debug,
+                                   server.box_index_cache)
 
             # clear the citations file if it exists
             citations_filename = \
@@ -504,7 +506,8 @@ def post_message_to_outbox(session, translate: {},
                                   bold_reading):
                     inbox_update_index('tlmedia', base_dir,
                                        post_to_nickname + '@' + domain,
-                                       saved_filename, debug)
+                                       saved_filename, debug,
+                                       server.box_index_cache)
 
             if box_name_index == 'inbox' and outbox_name == 'tlblogs':
                 continue
@@ -516,7 +519,8 @@ def post_message_to_outbox(session, translate: {},
                 # as is the typical convention
                 inbox_update_index(box_name_index, base_dir,
                                    post_to_nickname + '@' + domain,
-                                   saved_filename, debug)
+                                   saved_filename, debug,
+                                   server.box_index_cache)
 
                 # regenerate the html
                 use_cache_only = False
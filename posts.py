@@ -15,6 +15,7 @@ import shutil
 import sys
 import time
 import random
+from hashlib import sha256
 from time import gmtime, strftime
 from collections import OrderedDict
 from threads import thread_with_trace
@@ -24,17 +25,27 @@ from cache import get_person_from_cache
 from cache import expire_person_cache
 from pprint import pprint
 from session import create_session
+from session import get_session_for_domain
+from session import set_session_for_sender
 from session import get_json
 from session import post_json
 from session import post_json_string
 from session import post_image
 from webfinger import webfinger_handle
+from indexlock import index_lock
 from httpsig import create_signed_header
-from siteactive import site_is_active
+from siteactive import site_is_active_cached
 from languages import understood_post_language
 from utils import is_dm
+from boxindex import box_index_lines
+from boxindex import box_index_exists
+from boxindex import box_index_create
+from boxindex import box_index_truncate
+from searchindex import search_index_add
+from hashtagindex import hashtag_index_add
 from utils import remove_eol
 from utils import text_in_file
+from utils import recent_posts_cache_stats
 from utils import get_media_descriptions_from_post
 from utils import valid_hash_tag
 from utils import get_audio_extensions
@@ -66,6 +77,8 @@ from utils import get_domain_from_actor
 from utils import delete_post
 from utils import valid_nickname
 from utils import locate_post
+from utils import update_post_location
+from utils import remove_post_location
 from utils import load_json
 from utils import save_json
 from utils import get_config_param
@@ -76,6 +89,8 @@ from utils import remove_html
 from utils import dangerous_markup
 from utils import acct_dir
 from utils import local_actor_url
+from utils import is_timeline_post_str
+from utils import copy_json_object
 from media import get_music_metadata
 from media import attach_media
 from media import replace_you_tube
@@ -100,6 +115,17 @@ from video import convert_video_to_note
 from context import get_individual_post_context
 from maps import geocoords_from_map_link
 
+# maximum number of instances which a post to followers
+# is sent to at the same time
+MAX_FOLLOWER_DELIVERY_WORKERS = 8
+# seconds between checks of the delivery queue
+DELIVERY_QUEUE_INTERVAL_SECS = 30
+# seconds before a destination which failed is tried again.
+# This doubles after each failure
+DELIVERY_BACKOFF_SECS = 60
+# maximum seconds before a destination which failed is tried again
+DELIVERY_MAX_BACKOFF_SECS = 60 * 60 * 6
+
 
 def is_moderator(base_dir: str, nickname: str) -> bool:
     """Returns true if the given nickname is a moderator
@@ -917,7 +943,7 @@ def delete_all_posts(base_dir: str,
 
 def save_post_to_box(base_dir: str, http_prefix: str, post_id: str,
                      nickname: str, domain: str, post_json_object: {},
-                     boxname: str) -> str:
+                     boxname: str, recent_posts_cache: {}) -> str:
     """Saves the give json to the give box
     Returns the filename
     """
@@ -940,6 +966,10 @@ def save_post_to_box(base_dir: str, http_prefix: str, post_id: str,
     filename = box_dir + '/' + post_id.replace('/', '#') + '.json'
 
     save_json(post_json_object, filename)
+    update_post_location(recent_posts_cache, base_dir, nickname, domain,
+                         filename)
+    account_dir = acct_dir(base_dir, nickname, domain)
+    search_index_add(account_dir, boxname, filename, post_json_object)
     return filename
 
 
@@ -951,46 +981,8 @@ def _update_hashtags_index(base_dir: str, tag: {}, new_post_id: str,
     if tag['type'] != 'Hashtag':
         return
 
-    # create hashtags directory
-    tags_dir = base_dir + '/tags'
-    if not os.path.isdir(tags_dir):
-        os.mkdir(tags_dir)
-    tag_name = tag['name']
-    tags_filename = tags_dir + '/' + tag_name[1:] + '.txt'
-
     new_post_id = new_post_id.replace('/', '#')
-
-    if not os.path.isfile(tags_filename):
-        days_diff = datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
-        days_since_epoch = days_diff.days
-        tag_line = \
-            str(days_since_epoch) + '  ' + nickname + '  ' + \
-            new_post_id + '\n'
-        # create a new tags index file
-        try:
-            with open(tags_filename, 'w+', encoding='utf-8') as tags_file:
-                tags_file.write(tag_line)
-        except OSError:
-            print('EX: _update_hashtags_index unable to write tags file ' +
-                  tags_filename)
-    else:
-        # prepend to tags index file
-        if not text_in_file(new_post_id, tags_filename):
-            days_diff = \
-                datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
-            days_since_epoch = days_diff.days
-            tag_line = \
-                str(days_since_epoch) + '  ' + nickname + '  ' + \
-                new_post_id + '\n'
-            try:
-                with open(tags_filename, 'r+', encoding='utf-8') as tags_file:
-                    content = tags_file.read()
-                    if tag_line not in content:
-                        tags_file.seek(0, 0)
-                        tags_file.write(tag_line + content)
-            except OSError as ex:
-                print('EX: Failed to write entry to tags file ' +
-                      tags_filename + ' ' + str(ex))
+    hashtag_index_add(base_dir, tag['name'][1:], nickname, new_post_id)
 
 
 def _add_schedule_post(base_dir: str, nickname: str, domain: str,
@@ -1629,7 +1621,8 @@ def _create_post_base(base_dir: str,
             _add_schedule_post(base_dir, nickname, domain,
                                event_date_str, new_post_id)
             save_post_to_box(base_dir, http_prefix, new_post_id,
-                             nickname, domain, new_post, 'scheduled')
+                             nickname, domain, new_post, 'scheduled',
+                             None)
         else:
             print('Unable to create scheduled post without ' +
                   'date and time values')
@@ -1637,10 +1630,12 @@ def _create_post_base(base_dir: str,
     elif save_to_file:
         if is_article:
             save_post_to_box(base_dir, http_prefix, new_post_id,
-                             nickname, domain, new_post, 'tlblogs')
+                             nickname, domain, new_post, 'tlblogs',
+                             None)
         else:
             save_post_to_box(base_dir, http_prefix, new_post_id,
-                             nickname, domain, new_post, 'outbox')
+                             nickname, domain, new_post, 'outbox',
+                             None)
     return new_post
 
 
@@ -1816,7 +1811,7 @@ def regenerate_index_for_box(base_dir: str,
 
     if not os.path.isdir(box_dir):
         return
-    if os.path.isfile(box_index_filename):
+    if box_index_exists(box_index_filename):
         return
 
     index_lines = []
@@ -1827,17 +1822,13 @@ def regenerate_index_for_box(base_dir: str,
             index_lines.append(fname)
         break
 
-    index_lines.sort(reverse=True)
+    # the timeline log is in chronological order
+    index_lines.sort()
 
-    result = ''
-    try:
-        with open(box_index_filename, 'w+', encoding='utf-8') as fp_box:
-            for line in index_lines:
-                result += line + '\n'
-                fp_box.write(line + '\n')
-    except OSError:
-        print('EX: unable to generate index for ' + box_name + ' ' + result)
-    print('Index generated for ' + box_name + '\n' + result)
+    if not box_index_create(box_index_filename, index_lines):
+        print('EX: unable to generate index for ' + box_name)
+        return
+    print('Index generated for ' + box_name + '\n' + '\n'.join(index_lines))
 
 
 def create_public_post(base_dir: str,
@@ -2201,7 +2192,8 @@ def create_direct_message_post(base_dir: str,
     if schedule_post:
         post_id = remove_id_ending(message_json['object']['id'])
         save_post_to_box(base_dir, http_prefix, post_id,
-                         nickname, domain, message_json, 'scheduled')
+                         nickname, domain, message_json, 'scheduled',
+                         None)
     return message_json
 
 
@@ -2311,19 +2303,384 @@ def create_report_post(base_dir: str,
     return post_json_object
 
 
-def thread_send_post(session, post_json_str: str, federation_list: [],
-                     inbox_url: str, base_dir: str,
-                     signature_header_json: {},
-                     signature_header_json_ld: {},
-                     post_log: [], debug: bool,
-                     http_prefix: str, domain_full: str) -> None:
-    """Sends a with retries
+def _delivery_queue_dir(base_dir: str) -> str:
+    """Returns the directory containing posts waiting to be delivered
+    """
+    return base_dir + '/accounts/delivery'
+
+
+def queue_delivery(base_dir: str, inbox_url: str,
+                   delivery_item: {}) -> str:
+    """Adds a post which could not be sent to the delivery queue, so
+    that sending it can be retried later, even after a restart.
+    If inbox_url is None then the inbox is looked up from the handle
+    within the delivery item when the post is sent.
+    Returns the queue filename
+    """
+    delivery_dir = _delivery_queue_dir(base_dir)
+    if not os.path.isdir(delivery_dir):
+        try:
+            os.mkdir(delivery_dir)
+        except OSError:
+            print('EX: queue_delivery unable to create ' + delivery_dir)
+            return None
+    # the filename begins with the destination, so that everything
+    # going to the same inbox can be sent together.
+    # The same post to the same inbox is only queued once
+    destination_id = _delivery_destination_id(inbox_url, delivery_item)
+    post_str = delivery_item['post']
+    if not inbox_url:
+        post_str = delivery_item['handle'] + ' ' + post_str
+    post_id = sha256(post_str.encode('utf-8')).hexdigest()
+    queue_filename = \
+        delivery_dir + '/' + destination_id + '_' + post_id + '.json'
+    if os.path.isfile(queue_filename):
+        return queue_filename
+    queue_json = delivery_item.copy()
+    if inbox_url:
+        queue_json['inbox'] = inbox_url
+    queue_json['queued'] = int(time.time())
+    if not save_json(queue_json, queue_filename):
+        print('EX: queue_delivery unable to save ' + queue_filename)
+        return None
+    if inbox_url:
+        print('Delivery to ' + inbox_url + ' queued for retry')
+    else:
+        print('Delivery to ' + delivery_item['handle'] +
+              ' queued for retry')
+    return queue_filename
+
+
+def _delivery_destination_id(inbox_url: str, delivery_item: {}) -> str:
+    """Returns the identifier used to group queued deliveries.
+    If the inbox isn't known then deliveries are grouped by site
+    """
+    destination_url = inbox_url
+    if not destination_url:
+        destination_url = \
+            delivery_item['httpPrefix'] + '://' + delivery_item['toDomain']
+    return sha256(destination_url.encode('utf-8')).hexdigest()
+
+
+def _queued_delivery_destination(queue_json: {}) -> str:
+    """Returns a description of where a queued delivery is going.
+    Deliveries for inactive domains don't have an inbox until it
+    has been looked up
+    """
+    if queue_json.get('inbox'):
+        return queue_json['inbox']
+    if queue_json.get('handle'):
+        return queue_json['handle']
+    return str(queue_json.get('nickname')) + '@' + \
+        str(queue_json.get('domain'))
+
+
+def _load_delivery_destinations(destinations_filename: str) -> {}:
+    """Returns the destinations which are waiting to be retried
+    """
+    destinations = {}
+    if os.path.isfile(destinations_filename):
+        destinations = load_json(destinations_filename)
+        if not destinations:
+            destinations = {}
+    return destinations
+
+
+def _postpone_delivery(base_dir: str, destination_id: str,
+                       destination_url: str) -> None:
+    """Records that a destination is unavailable, so that the
+    deliveries queued for it wait until after a backoff time
+    """
+    destinations_filename = \
+        _delivery_queue_dir(base_dir) + '/destinations.json'
+    curr_time = int(time.time())
+    with index_lock(destinations_filename):
+        destinations = _load_delivery_destinations(destinations_filename)
+        failures = 1
+        destination = destinations.get(destination_id)
+        if destination:
+            if curr_time < destination['nextAttempt']:
+                # already waiting
+                return
+            failures = destination['failures'] + 1
+        destinations[destination_id] = {
+            "inbox": destination_url,
+            "failures": failures,
+            "nextAttempt": _delivery_retry_time(curr_time, failures)
+        }
+        save_json(destinations, destinations_filename)
+
+
+def _delivery_retry_time(curr_time: int, failures: int) -> int:
+    """Returns the time when a destination which has failed
+    should be tried again
+    """
+    backoff_secs = DELIVERY_BACKOFF_SECS
+    for _ in range(failures - 1):
+        backoff_secs *= 2
+        if backoff_secs >= DELIVERY_MAX_BACKOFF_SECS:
+            backoff_secs = DELIVERY_MAX_BACKOFF_SECS
+            break
+    return curr_time + backoff_secs
+
+
+def _dead_letter_delivery(base_dir: str, queue_filename: str) -> None:
+    """Moves a queued delivery which can't be sent to the dead letters
+    """
+    dead_letter_dir = _delivery_queue_dir(base_dir) + '/deadletter'
+    if not os.path.isdir(dead_letter_dir):
+        try:
+            os.mkdir(dead_letter_dir)
+        except OSError:
+            print('EX: _dead_letter_delivery unable to create ' +
+                  dead_letter_dir)
+    dead_letter_filename = \
+        dead_letter_dir + '/' + os.path.basename(queue_filename)
+    try:
+        os.rename(queue_filename, dead_letter_filename)
+    except OSError:
+        print('EX: _dead_letter_delivery unable to move ' +
+              queue_filename)
+
+
+def _resolve_queued_inbox(base_dir: str, httpd, session,
+                          queue_json: {}) -> bool:
+    """Looks up the inbox for a delivery which was queued while
+    its destination was inactive
+    """
+    wf_request = \
+        webfinger_handle(session, queue_json['handle'],
+                         queue_json['httpPrefix'], httpd.cached_webfingers,
+                         queue_json['domain'], httpd.project_version,
+                         httpd.debug, queue_json['groupAccount'],
+                         httpd.signing_priv_key_pem)
+    if not isinstance(wf_request, dict):
+        return False
+    (inbox_url, _, _, _, shared_inbox_url, _,
+     _, _) = get_person_box(httpd.signing_priv_key_pem,
+                            queue_json['domain'],
+                            base_dir, session, wf_request,
+                            httpd.person_cache,
+                            httpd.project_version, queue_json['httpPrefix'],
+                            queue_json['nickname'], queue_json['domain'],
+                            'inbox', 72534)
+    if inbox_url:
+        if inbox_url.endswith('/actor/inbox') or \
+           inbox_url.endswith('/instance.actor/inbox'):
+            inbox_url = shared_inbox_url
+    if not inbox_url:
+        return False
+    if queue_json['toDomain'] not in inbox_url:
+        return False
+    queue_json['inbox'] = inbox_url
+    queue_json['path'] = inbox_url.split(queue_json['toDomain'], 1)[1]
+    return True
+
+
+def _send_queued_delivery(base_dir: str, httpd, queue_json: {}) -> str:
+    """Signs and sends a queued delivery
+    Returns sent, failed or rejected
+    """
+    curr_session, proxy_type = \
+        get_session_for_domain(httpd, queue_json['toDomain'])
+    if not curr_session:
+        curr_session = create_session(proxy_type)
+        if not curr_session:
+            return 'failed'
+        set_session_for_sender(httpd, proxy_type, curr_session)
+
+    if not queue_json.get('inbox'):
+        if not _resolve_queued_inbox(base_dir, httpd, curr_session,
+                                     queue_json):
+            return 'failed'
+
+    # the signature date needs to be recent, so sign it again
+    private_key_pem = \
+        _get_person_key(queue_json['nickname'], queue_json['accountDomain'],
+                        base_dir, 'private', httpd.debug)
+    if not private_key_pem:
+        return 'rejected'
+    domain_full = get_full_domain(queue_json['domain'], queue_json['port'])
+    for content_type in ('application/activity+json', 'application/ld+json'):
+        signature_header_json = \
+            create_signed_header(None, private_key_pem,
+                                 queue_json['nickname'],
+                                 queue_json['domain'], queue_json['port'],
+                                 queue_json['toDomain'], queue_json['toPort'],
+                                 queue_json['path'], queue_json['httpPrefix'],
+                                 True, queue_json['post'], content_type)
+        if queue_json.get('sharesToken'):
+            signature_header_json['Origin'] = domain_full
+            signature_header_json['SharesCatalog'] = queue_json['sharesToken']
+        post_result, unauthorized, _ = \
+            post_json_string(curr_session, queue_json['post'],
+                             httpd.federation_list, queue_json['inbox'],
+                             signature_header_json, httpd.debug,
+                             queue_json['httpPrefix'], domain_full)
+        if post_result:
+            return 'sent'
+        if not unauthorized:
+            return 'failed'
+    return 'rejected'
+
+
+def process_delivery_queue(base_dir: str, httpd,
+                           max_age_hrs: int) -> int:
+    """Tries to send the queued deliveries which are due
+    Returns the number sent
+    """
+    delivery_dir = _delivery_queue_dir(base_dir)
+    if not os.path.isdir(delivery_dir):
+        return 0
+    destinations_filename = delivery_dir + '/destinations.json'
+    with index_lock(destinations_filename):
+        destinations = _load_delivery_destinations(destinations_filename)
+    # destinations whose retry state has changed
+    changed = {}
+
+    # group the queued deliveries by destination
+    pending = {}
+    with os.scandir(delivery_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if '_' not in entry.name or not entry.name.endswith('.json'):
+                continue
+            destination_id = entry.name.split('_')[0]
+            if not pending.get(destination_id):
+                pending[destination_id] = []
+            pending[destination_id].append(entry.path)
+
+    curr_time = int(time.time())
+    max_age_secs = max_age_hrs * 60 * 60
+    sent_ctr = 0
+    for destination_id, queue_filenames in pending.items():
+        destination = destinations.get(destination_id)
+        waiting = False
+        if destination:
+            if curr_time < destination['nextAttempt']:
+                waiting = True
+        queue_items = []
+        for queue_filename in queue_filenames:
+            queue_json = load_json(queue_filename)
+            if not queue_json:
+                _dead_letter_delivery(base_dir, queue_filename)
+                continue
+            if curr_time - queue_json['queued'] > max_age_secs:
+                print('Delivery to ' +
+                      _queued_delivery_destination(queue_json) +
+                      ' expired after ' + str(max_age_hrs) + ' hours')
+                _dead_letter_delivery(base_dir, queue_filename)
+                continue
+            queue_items.append([queue_json['queued'],
+                                queue_filename, queue_json])
+        if waiting or not queue_items:
+            continue
+
+        # send the oldest first
+        queue_items.sort()
+        for item in queue_items:
+            queue_filename = item[1]
+            queue_json = item[2]
+            result = _send_queued_delivery(base_dir, httpd, queue_json)
+            if result == 'failed':
+                # try this destination again later
+                failures = 1
+                if destination:
+                    failures = destination['failures'] + 1
+                changed[destination_id] = {
+                    "failures": failures,
+                    "nextAttempt": _delivery_retry_time(curr_time, failures)
+                }
+                if queue_json.get('inbox'):
+                    changed[destination_id]['inbox'] = queue_json['inbox']
+                waiting = True
+                break
+            if result == 'sent':
+                sent_ctr += 1
+                try:
+                    os.remove(queue_filename)
+                except OSError:
+                    print('EX: process_delivery_queue unable to delete ' +
+                          queue_filename)
+            else:
+                print('Delivery to ' +
+                      _queued_delivery_destination(queue_json) +
+                      ' rejected')
+                _dead_letter_delivery(base_dir, queue_filename)
+        if not waiting:
+            if destinations.get(destination_id):
+                changed[destination_id] = None
+
+    # destinations may have been postponed by other threads
+    # while sending, so load them again before saving
+    with index_lock(destinations_filename):
+        curr_destinations = \
+            _load_delivery_destinations(destinations_filename)
+        for destination_id, destination in changed.items():
+            if destination:
+                curr_destinations[destination_id] = destination
+            elif curr_destinations.get(destination_id):
+                del curr_destinations[destination_id]
+        # forget destinations which no longer have anything queued
+        for destination_id in list(curr_destinations.keys()):
+            if destination_id not in pending and \
+               destinations.get(destination_id):
+                del curr_destinations[destination_id]
+        save_json(curr_destinations, destinations_filename)
+    return sent_ctr
+
+
+def run_delivery_queue(base_dir: str, httpd) -> None:
+    """Thread which retries deliveries that previously failed
+    """
+    while True:
+        time.sleep(DELIVERY_QUEUE_INTERVAL_SECS)
+        sent_ctr = \
+            process_delivery_queue(base_dir, httpd,
+                                   httpd.delivery_max_age_hrs)
+        if sent_ctr > 0:
+            print(str(sent_ctr) + ' queued deliveries sent')
+
+
+def run_delivery_queue_watchdog(project_version: str, httpd) -> None:
+    """Keeps the delivery queue thread running
+    """
+    print('THREAD: Starting delivery queue watchdog ' + project_version)
+    delivery_queue_original = \
+        httpd.thrDeliveryQueue.clone(run_delivery_queue)
+    begin_thread(httpd.thrDeliveryQueue, 'run_delivery_queue_watchdog')
+    while True:
+        time.sleep(50)
+        if httpd.thrDeliveryQueue.is_alive():
+            continue
+        httpd.thrDeliveryQueue.kill()
+        print('THREAD: restarting delivery queue watchdog')
+        httpd.thrDeliveryQueue = \
+            delivery_queue_original.clone(run_delivery_queue)
+        begin_thread(httpd.thrDeliveryQueue,
+                     'run_delivery_queue_watchdog 2')
+        print('Restarting delivery queue...')
+
+
+def _post_with_retries(session, post_json_str: str, federation_list: [],
+                       inbox_url: str, base_dir: str,
+                       signature_header_json: {},
+                       signature_header_json_ld: {},
+                       post_log: [], debug: bool,
+                       http_prefix: str, domain_full: str,
+                       delivery_item: {}) -> bool:
+    """Sends a post with retries
+    If delivery_item is given then after a failed try the post is added
+    to the delivery queue rather than waiting to retry it
+    Returns True if the post was delivered
     """
     tries = 0
     send_interval_sec = 30
     for _ in range(20):
         post_result = None
         unauthorized = False
+        server_error = False
         if debug:
             print('Getting post_json_string for ' + inbox_url)
         try:
@@ -2335,13 +2692,18 @@ def thread_send_post(session, post_json_str: str, federation_list: [],
                 # if an instance is returning a code which indicates that
                 # it might have a runtime error, like 503, then don't
                 # continue to post to it
-                break
+                server_error = True
             if debug:
                 print('Obtained post_json_string for ' + inbox_url +
                       ' unauthorized: ' + str(unauthorized))
         except Exception as ex:
             print('ERROR: post_json_string failed ' + str(ex))
 
+        if server_error:
+            if delivery_item:
+                queue_delivery(base_dir, inbox_url, delivery_item)
+            break
+
         if unauthorized:
             # try again with application/ld+json header
             post_result = None
@@ -2357,6 +2719,8 @@ def thread_send_post(session, post_json_str: str, federation_list: [],
                     # if an instance is returning a code which indicates that
                     # it might have a runtime error, like 503, then don't
                     # continue to post to it
+                    if delivery_item:
+                        queue_delivery(base_dir, inbox_url, delivery_item)
                     break
                 if debug:
                     print('Obtained ld post_json_string for ' + inbox_url +
@@ -2393,6 +2757,11 @@ def thread_send_post(session, post_json_str: str, federation_list: [],
             if debug:
                 print('DEBUG: successful json post to ' + inbox_url)
             # our work here is done
+            return True
+        if delivery_item:
+            # retry later from the delivery queue, with backoff,
+            # rather than holding up this thread
+            queue_delivery(base_dir, inbox_url, delivery_item)
             break
         if debug:
             print(post_json_str)
@@ -2401,6 +2770,25 @@ def thread_send_post(session, post_json_str: str, federation_list: [],
                   str(send_interval_sec) + ' seconds.')
         time.sleep(send_interval_sec)
         tries += 1
+    return False
+
+
+def thread_send_post(session, post_json_str: str, federation_list: [],
+                     inbox_url: str, base_dir: str,
+                     signature_header_json: {},
+                     signature_header_json_ld: {},
+                     post_log: [], debug: bool,
+                     http_prefix: str, domain_full: str,
+                     delivery_item: {}) -> None:
+    """Sends a with retries
+    If delivery_item is given then after a failed try the post is added
+    to the delivery queue rather than this thread waiting to retry it
+    """
+    _post_with_retries(session, post_json_str, federation_list,
+                       inbox_url, base_dir,
+                       signature_header_json, signature_header_json_ld,
+                       post_log, debug, http_prefix, domain_full,
+                       delivery_item)
 
 
 def send_post(signing_priv_key_pem: str, project_version: str,
@@ -2546,7 +2934,7 @@ def send_post(signing_priv_key_pem: str, project_version: str,
         print('signature_header_json: ' + str(signature_header_json))
 
     # Keep the number of threads being used small
-    while len(send_threads) > 1000:
+    while send_threads and len(send_threads) > 1000:
         print('WARN: Maximum threads reached - killing send thread')
         send_threads[0].kill()
         send_threads.pop(0)
@@ -2561,7 +2949,7 @@ def send_post(signing_priv_key_pem: str, project_version: str,
                                 signature_header_json.copy(),
                                 signature_header_json_ld.copy(),
                                 post_log, debug, http_prefix,
-                                domain_full), daemon=True)
+                                domain_full, None), daemon=True)
     send_threads.append(thr)
     begin_thread(thr, 'send_post')
     return 0
@@ -2773,6 +3161,108 @@ def _add_followers_to_public_post(post_json_object: {}) -> None:
             post_json_object['actor'] + '/followers'
 
 
+def _json_ld_sign_post(post_json_object: {}, private_key_pem: str) -> {}:
+    """Returns a JSON-LD signed copy of the given post
+    """
+    signed_post_json_object = post_json_object.copy()
+    try:
+        generate_json_signature(signed_post_json_object, private_key_pem)
+    except BaseException as ex:
+        print('WARN: failed to JSON-LD sign post, ' + str(ex))
+        pprint(signed_post_json_object)
+        return post_json_object
+    return signed_post_json_object
+
+
+def _sender_account_domain(domain: str, curr_domain: str,
+                           onion_domain: str, i2p_domain: str) -> str:
+    """Returns the domain of the account which is sending from
+    the given domain, which may be an onion or i2p domain
+    """
+    account_domain = domain
+    if onion_domain:
+        if account_domain == onion_domain:
+            account_domain = curr_domain
+    if i2p_domain:
+        if account_domain == i2p_domain:
+            account_domain = curr_domain
+    return account_domain
+
+
+def _signed_post_json_str(post_json_object: {}, private_key_pem: str,
+                          domain: str, curr_domain: str,
+                          debug: bool) -> str:
+    """Returns the string for a post which is to be sent
+    """
+    _add_followers_to_public_post(post_json_object)
+
+    if not post_json_object.get('signature'):
+        post_json_object = \
+            _json_ld_sign_post(post_json_object, private_key_pem)
+
+    # convert json to string so that there are no
+    # subsequent conversions after creating message body digest
+    post_json_str = json.dumps(post_json_object)
+
+    # if the sender domain has changed from clearnet to onion or i2p
+    # then change the content of the post accordingly
+    if debug:
+        print('Checking for changed origin domain: ' +
+              domain + ' ' + curr_domain)
+    if domain != curr_domain:
+        if not curr_domain.endswith('.onion') and \
+           not curr_domain.endswith('.i2p'):
+            if debug:
+                print('Changing post content sender domain from ' +
+                      curr_domain + ' to ' + domain)
+            post_json_str = \
+                post_json_str.replace(curr_domain, domain)
+    return post_json_str
+
+
+def _queue_inactive_delivery(base_dir: str, post_json_object: {},
+                             nickname: str, domain: str, port: int,
+                             handle: str, to_domain: str, to_port: int,
+                             http_prefix: str, shared_items_token: str,
+                             group_account: bool, curr_domain: str,
+                             onion_domain: str, i2p_domain: str,
+                             debug: bool) -> str:
+    """Adds a post for a domain which is inactive to the delivery queue.
+    The domain can't be asked for the inbox, so that is looked up when
+    the post is sent. Returns the queue filename
+    """
+    account_domain = \
+        _sender_account_domain(domain, curr_domain,
+                               onion_domain, i2p_domain)
+    private_key_pem = \
+        _get_person_key(nickname, account_domain, base_dir, 'private', debug)
+    if not private_key_pem:
+        return None
+    post_json_str = \
+        _signed_post_json_str(post_json_object, private_key_pem,
+                              domain, curr_domain, debug)
+    delivery_item = {
+        "nickname": nickname,
+        "domain": domain,
+        "port": port,
+        "accountDomain": account_domain,
+        "handle": handle,
+        "groupAccount": group_account,
+        "toDomain": to_domain,
+        "toPort": to_port,
+        "httpPrefix": http_prefix,
+        "sharesToken": shared_items_token,
+        "post": post_json_str
+    }
+    queue_filename = queue_delivery(base_dir, None, delivery_item)
+    if queue_filename:
+        # don't try again until the domain may be active
+        _postpone_delivery(base_dir,
+                           _delivery_destination_id(None, delivery_item),
+                           http_prefix + '://' + to_domain)
+    return queue_filename
+
+
 def send_signed_json(post_json_object: {}, session, base_dir: str,
                      nickname: str, domain: str, port: int,
                      to_nickname: str, to_domain: str,
@@ -2783,8 +3273,11 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
                      shared_items_token: str, group_account: bool,
                      signing_priv_key_pem: str,
                      source_id: int, curr_domain: str,
-                     onion_domain: str, i2p_domain: str) -> int:
+                     onion_domain: str, i2p_domain: str,
+                     sites_liveness: {}) -> int:
     """Sends a signed json object to an inbox/outbox
+    If send_threads is None then the post is sent by the calling thread
+    rather than by a new thread
     """
     if debug:
         print('DEBUG: send_signed_json start')
@@ -2803,10 +3296,6 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
     to_domain = get_full_domain(to_domain, to_port)
 
     to_domain_url = http_prefix + '://' + to_domain
-    if not site_is_active(to_domain_url, 10):
-        print('Domain is inactive: ' + to_domain_url)
-        return 9
-    print('Domain is active: ' + to_domain_url)
     handle_base = to_domain_url + '/@'
     if to_nickname:
         handle = handle_base + to_nickname
@@ -2814,6 +3303,19 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
         single_user_instance_nickname = 'dev'
         handle = handle_base + single_user_instance_nickname
 
+    if not site_is_active_cached(to_domain_url, 10, sites_liveness):
+        print('Domain is inactive: ' + to_domain_url)
+        if not client_to_server:
+            # send it later, when the domain may be active again
+            _queue_inactive_delivery(base_dir, post_json_object,
+                                     nickname, domain, port, handle,
+                                     to_domain, to_port, http_prefix,
+                                     shared_items_token, group_account,
+                                     curr_domain, onion_domain, i2p_domain,
+                                     debug)
+        return 9
+    print('Domain is active: ' + to_domain_url)
+
     if debug:
         print('DEBUG: handle - ' + handle + ' to_port ' + str(to_port))
 
@@ -2886,13 +3388,9 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
     # shared_inbox is optional
 
     # get the senders private key
-    account_domain = origin_domain
-    if onion_domain:
-        if account_domain == onion_domain:
-            account_domain = curr_domain
-    if i2p_domain:
-        if account_domain == i2p_domain:
-            account_domain = curr_domain
+    account_domain = \
+        _sender_account_domain(origin_domain, curr_domain,
+                               onion_domain, i2p_domain)
     private_key_pem = \
         _get_person_key(nickname, account_domain, base_dir, 'private', debug)
     if len(private_key_pem) == 0:
@@ -2908,35 +3406,9 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
         return 7
     post_path = inbox_url.split(to_domain, 1)[1]
 
-    _add_followers_to_public_post(post_json_object)
-
-    if not post_json_object.get('signature'):
-        try:
-            signed_post_json_object = post_json_object.copy()
-            generate_json_signature(signed_post_json_object, private_key_pem)
-            post_json_object = signed_post_json_object
-        except BaseException as ex:
-            print('WARN: send_signed_json failed to JSON-LD sign post, ' +
-                  str(ex))
-            pprint(signed_post_json_object)
-
-    # convert json to string so that there are no
-    # subsequent conversions after creating message body digest
-    post_json_str = json.dumps(post_json_object)
-
-    # if the sender domain has changed from clearnet to onion or i2p
-    # then change the content of the post accordingly
-    if debug:
-        print('Checking for changed origin domain: ' +
-              domain + ' ' + curr_domain)
-    if domain != curr_domain:
-        if not curr_domain.endswith('.onion') and \
-           not curr_domain.endswith('.i2p'):
-            if debug:
-                print('Changing post content sender domain from ' +
-                      curr_domain + ' to ' + domain)
-            post_json_str = \
-                post_json_str.replace(curr_domain, domain)
+    post_json_str = \
+        _signed_post_json_str(post_json_object, private_key_pem,
+                              domain, curr_domain, debug)
 
     # construct the http header, including the message body digest
     signature_header_json = \
@@ -2960,7 +3432,7 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
         print('Not sending shared items federation token')
 
     # Keep the number of threads being used small
-    while len(send_threads) > 1000:
+    while send_threads and len(send_threads) > 1000:
         print('WARN: Maximum threads reached - killing send thread')
         send_threads[0].kill()
         send_threads.pop(0)
@@ -2970,6 +3442,30 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
         print('DEBUG: starting thread to send post')
         pprint(post_json_object)
     domain_full = get_full_domain(domain, port)
+
+    # what is needed to sign and send this again if it fails
+    delivery_item = {
+        "nickname": nickname,
+        "domain": domain,
+        "port": port,
+        "accountDomain": account_domain,
+        "toDomain": to_domain,
+        "toPort": to_port,
+        "path": post_path,
+        "httpPrefix": http_prefix,
+        "sharesToken": shared_items_token,
+        "post": post_json_str
+    }
+    if send_threads is None:
+        if not _post_with_retries(session, post_json_str, federation_list,
+                                  inbox_url, base_dir,
+                                  signature_header_json,
+                                  signature_header_json_ld,
+                                  post_log, debug,
+                                  http_prefix, domain_full,
+                                  delivery_item):
+            return 10
+        return 0
     print('THREAD: thread_send_post 2')
     thr = \
         thread_with_trace(target=thread_send_post,
@@ -2980,7 +3476,8 @@ def send_signed_json(post_json_object: {}, session, base_dir: str,
                                 signature_header_json.copy(),
                                 signature_header_json_ld.copy(),
                                 post_log, debug,
-                                http_prefix, domain_full), daemon=True)
+                                http_prefix, domain_full,
+                                delivery_item), daemon=True)
     send_threads.append(thr)
     # begin_thread(thr, 'send_signed_json')
     return 0
@@ -3091,6 +3588,9 @@ def _send_to_named_addresses(server, session, session_onion, session_i2p,
         return
     if not post_json_object.get('object'):
         return
+    sites_liveness = None
+    if server:
+        sites_liveness = server.sites_liveness
     is_profile_update = False
     if has_object_dict(post_json_object):
         if _is_profile_update(post_json_object):
@@ -3254,7 +3754,7 @@ def _send_to_named_addresses(server, session, session_onion, session_i2p,
                          person_cache, debug, project_version,
                          shared_items_token, group_account,
                          signing_priv_key_pem, 34436782,
-                         domain, onion_domain, i2p_domain)
+                         domain, onion_domain, i2p_domain, sites_liveness)
 
 
 def send_to_named_addresses_thread(server, session, session_onion, session_i2p,
@@ -3328,6 +3828,272 @@ def _sending_profile_update(post_json_object: {}) -> bool:
     return False
 
 
+def _send_to_follower_domain(server, session, session_onion, session_i2p,
+                             base_dir: str, nickname: str, domain: str,
+                             onion_domain: str, i2p_domain: str, port: int,
+                             http_prefix: str, federation_list: [],
+                             send_threads: [], post_log: [],
+                             cached_webfingers: {}, person_cache: {},
+                             post_json_object: {}, debug: bool,
+                             project_version: str,
+                             shared_items_federated_domains: [],
+                             shared_item_federation_tokens: {},
+                             signing_priv_key_pem: str,
+                             follower_domain: str, follower_handles: [],
+                             sites_liveness: {}) -> str:
+    """Sends a post to the followers on the given domain
+    Returns the outcome: sent, failed, blocked or inactive
+    """
+    # this is after the message has arrived at the server
+    client_to_server = False
+
+    curr_proxy_type = None
+    if domain.endswith('.onion'):
+        curr_proxy_type = 'tor'
+    elif domain.endswith('.i2p'):
+        curr_proxy_type = 'i2p'
+
+    if debug:
+        pprint(follower_handles)
+
+    # don't send to blocked instances
+    blocked_cache = None
+    if server:
+        blocked_cache = server.blocked_cache
+    if is_blocked_domain(base_dir, remove_domain_port(follower_domain),
+                         blocked_cache):
+        print('Sending post to followers domain is blocked: ' +
+              follower_domain)
+        return 'blocked'
+
+    # if the followers domain is within the shared items
+    # federation list then send the token for this domain
+    # so that it can request a catalog
+    shared_items_token = None
+    if follower_domain in shared_items_federated_domains:
+        domain_full = get_full_domain(domain, port)
+        if shared_item_federation_tokens.get(domain_full):
+            shared_items_token = shared_item_federation_tokens[domain_full]
+
+    # check that the follower's domain is active.
+    # If it isn't then the post is queued for each follower
+    # and sent when the domain may be active again
+    follower_domain_url = http_prefix + '://' + follower_domain
+    domain_active = \
+        site_is_active_cached(follower_domain_url, 10, sites_liveness)
+    if domain_active:
+        print('Sending post to followers domain is active: ' +
+              follower_domain_url)
+    else:
+        print('Sending post to followers domain is inactive: ' +
+              follower_domain_url)
+
+    # select the appropriate session
+    curr_session = session
+    curr_http_prefix = http_prefix
+    if onion_domain:
+        if follower_domain.endswith('.onion'):
+            curr_session = session_onion
+            curr_http_prefix = 'http'
+    if i2p_domain:
+        if follower_domain.endswith('.i2p'):
+            curr_session = session_i2p
+            curr_http_prefix = 'http'
+
+    # get the domain showin by the user agent
+    ua_domain = domain
+    if follower_domain.endswith('.onion'):
+        ua_domain = onion_domain
+    elif follower_domain.endswith('.i2p'):
+        ua_domain = i2p_domain
+
+    with_shared_inbox = False
+    if domain_active:
+        with_shared_inbox = \
+            _has_shared_inbox(curr_session, curr_http_prefix,
+                              follower_domain, debug,
+                              signing_priv_key_pem, ua_domain)
+    if debug:
+        if with_shared_inbox:
+            print(follower_domain + ' has shared inbox')
+    if domain_active and not with_shared_inbox:
+        print('Sending post to followers, ' + follower_domain +
+              ' does not have a shared inbox')
+
+    to_port = port
+    index = 0
+    to_domain = follower_handles[index].split('@')[1]
+    if ':' in to_domain:
+        to_port = get_port_from_domain(to_domain)
+        to_domain = remove_domain_port(to_domain)
+
+    # if we are sending to an onion domain and we
+    # have an alt onion domain then use the alt
+    from_domain = domain
+    from_http_prefix = http_prefix
+    session_type = 'default'
+    if onion_domain:
+        if to_domain.endswith('.onion'):
+            from_domain = onion_domain
+            from_http_prefix = 'http'
+            port = 80
+            to_port = 80
+            curr_proxy_type = 'tor'
+            session_type = 'tor'
+    if i2p_domain:
+        if to_domain.endswith('.i2p'):
+            from_domain = i2p_domain
+            from_http_prefix = 'http'
+            port = 80
+            to_port = 80
+            curr_proxy_type = 'i2p'
+            session_type = 'i2p'
+
+    if not curr_session:
+        curr_session = create_session(curr_proxy_type)
+        if server:
+            if session_type == 'tor':
+                server.session_onion = curr_session
+            elif session_type == 'i2p':
+                server.session_i2p = curr_session
+            else:
+                server.session = curr_session
+
+    outcome = 'sent'
+    if with_shared_inbox:
+        to_nickname = follower_handles[index].split('@')[0]
+
+        group_account = False
+        if to_nickname.startswith('!'):
+            group_account = True
+            to_nickname = to_nickname[1:]
+
+        # if there are more than one followers on the domain
+        # then send the post to the shared inbox
+        if len(follower_handles) > 1:
+            to_nickname = 'inbox'
+
+        if to_nickname != 'inbox' and post_json_object.get('type'):
+            if _sending_profile_update(post_json_object):
+                print('Sending post to followers ' +
+                      'shared inbox of ' + to_domain)
+                to_nickname = 'inbox'
+
+        print('Sending post to followers from ' +
+              nickname + '@' + domain +
+              ' to ' + to_nickname + '@' + to_domain)
+
+        if send_signed_json(post_json_object, curr_session, base_dir,
+                            nickname, from_domain, port,
+                            to_nickname, to_domain, to_port,
+                            from_http_prefix,
+                            client_to_server, federation_list,
+                            send_threads, post_log, cached_webfingers,
+                            person_cache, debug, project_version,
+                            shared_items_token, group_account,
+                            signing_priv_key_pem, 639342,
+                            domain, onion_domain, i2p_domain,
+                            sites_liveness) != 0:
+            outcome = 'failed'
+    else:
+        # randomize the order of handles, so that we are not
+        # favoring any particular account in terms of its delivery time
+        random.shuffle(follower_handles)
+        # send to individual followers without using a shared inbox
+        for handle in follower_handles:
+            print('Sending post to followers ' + handle)
+            to_nickname = handle.split('@')[0]
+
+            group_account = False
+            if to_nickname.startswith('!'):
+                group_account = True
+                to_nickname = to_nickname[1:]
+
+            if post_json_object['type'] != 'Update':
+                print('Sending post to followers from ' +
+                      nickname + '@' + domain + ' to ' +
+                      to_nickname + '@' + to_domain)
+            else:
+                print('Sending post to followers profile update from ' +
+                      nickname + '@' + domain + ' to ' +
+                      to_nickname + '@' + to_domain)
+
+            if send_signed_json(post_json_object, curr_session, base_dir,
+                                nickname, from_domain, port,
+                                to_nickname, to_domain, to_port,
+                                from_http_prefix,
+                                client_to_server, federation_list,
+                                send_threads, post_log, cached_webfingers,
+                                person_cache, debug, project_version,
+                                shared_items_token, group_account,
+                                signing_priv_key_pem, 634219,
+                                domain, onion_domain, i2p_domain,
+                                sites_liveness) != 0:
+                outcome = 'failed'
+    if not domain_active:
+        outcome = 'inactive'
+    return outcome
+
+
+def _send_to_followers_worker(server, session, session_onion, session_i2p,
+                              base_dir: str, nickname: str, domain: str,
+                              onion_domain: str, i2p_domain: str, port: int,
+                              http_prefix: str, federation_list: [],
+                              post_log: [],
+                              cached_webfingers: {}, person_cache: {},
+                              post_json_object: {}, debug: bool,
+                              project_version: str,
+                              shared_items_federated_domains: [],
+                              shared_item_federation_tokens: {},
+                              signing_priv_key_pem: str,
+                              pending: [], total_domains: int,
+                              outcomes: {}, sites_liveness: {}) -> None:
+    """Sends a post to follower domains taken from the pending list
+    until there are none left. Several of these may run at once.
+    Posts are sent by the worker itself rather than by send threads,
+    so the number of workers limits the number of concurrent sends
+    """
+    while pending:
+        try:
+            group_send = pending.pop()
+        except IndexError:
+            break
+        follower_domain = group_send[0]
+        follower_handles = group_send[1]
+        print('Sending post to followers progress ' +
+              str(int((total_domains - len(pending)) * 100 /
+                      total_domains)) + '% ' + follower_domain)
+        outcome = \
+            _send_to_follower_domain(server, session, session_onion,
+                                     session_i2p, base_dir, nickname, domain,
+                                     onion_domain, i2p_domain, port,
+                                     http_prefix, federation_list,
+                                     None, post_log,
+                                     cached_webfingers, person_cache,
+                                     post_json_object, debug,
+                                     project_version,
+                                     shared_items_federated_domains,
+                                     shared_item_federation_tokens,
+                                     signing_priv_key_pem,
+                                     follower_domain, follower_handles,
+                                     sites_liveness)
+        outcomes[outcome] += 1
+
+
+def _delivery_metrics(fitness_state: {}, totals: {}) -> None:
+    """Adds the outcomes of sending a post to followers to the
+    running totals within the fitness state
+    """
+    if fitness_state is None:
+        return
+    if 'delivery' not in fitness_state:
+        fitness_state['delivery'] = {}
+    for outcome, count in totals.items():
+        if outcome not in fitness_state['delivery']:
+            fitness_state['delivery'][outcome] = 0
+        fitness_state['delivery'][outcome] += count
+
+
 def send_to_followers(server, session, session_onion, session_i2p,
                       base_dir: str, nickname: str, domain: str,
                       onion_domain: str, i2p_domain: str, port: int,
@@ -3358,192 +4124,78 @@ def send_to_followers(server, session, session_onion, session_i2p,
     print('Post to followers resolved domains')
     # print(str(grouped))
 
-    # this is after the message has arrived at the server
-    client_to_server = False
-
-    curr_proxy_type = None
-    if domain.endswith('.onion'):
-        curr_proxy_type = 'tor'
-    elif domain.endswith('.i2p'):
-        curr_proxy_type = 'i2p'
-
     sending_start_time = datetime.datetime.utcnow()
     print('Sending post to followers begins ' +
           sending_start_time.strftime("%Y-%m-%dT%H:%M:%SZ"))
-    sending_ctr = 0
 
     # randomize the order of sending to instances
     randomized_instances = []
     for follower_domain, follower_handles in grouped.items():
         randomized_instances.append([follower_domain, follower_handles])
     random.shuffle(randomized_instances)
+    total_domains = len(randomized_instances)
 
-    # send out to each instance
-    for group_send in randomized_instances:
-        follower_domain = group_send[0]
-        follower_handles = group_send[1]
-        print('Sending post to followers progress ' +
-              str(int(sending_ctr * 100 / len(grouped.items()))) + '% ' +
-              follower_domain)
-        sending_ctr += 1
-
-        if debug:
-            pprint(follower_handles)
-
-        # if the followers domain is within the shared items
-        # federation list then send the token for this domain
-        # so that it can request a catalog
-        shared_items_token = None
-        if follower_domain in shared_items_federated_domains:
-            domain_full = get_full_domain(domain, port)
-            if shared_item_federation_tokens.get(domain_full):
-                shared_items_token = shared_item_federation_tokens[domain_full]
-
-        # check that the follower's domain is active
-        follower_domain_url = http_prefix + '://' + follower_domain
-        if not site_is_active(follower_domain_url, 10):
-            print('Sending post to followers domain is inactive: ' +
-                  follower_domain_url)
-            continue
-        print('Sending post to followers domain is active: ' +
-              follower_domain_url)
-
-        # select the appropriate session
-        curr_session = session
-        curr_http_prefix = http_prefix
-        if onion_domain:
-            if follower_domain.endswith('.onion'):
-                curr_session = session_onion
-                curr_http_prefix = 'http'
-        if i2p_domain:
-            if follower_domain.endswith('.i2p'):
-                curr_session = session_i2p
-                curr_http_prefix = 'http'
-
-        # get the domain showin by the user agent
-        ua_domain = domain
-        if follower_domain.endswith('.onion'):
-            ua_domain = onion_domain
-        elif follower_domain.endswith('.i2p'):
-            ua_domain = i2p_domain
-
-        with_shared_inbox = \
-            _has_shared_inbox(curr_session, curr_http_prefix, follower_domain,
-                              debug, signing_priv_key_pem, ua_domain)
-        if debug:
-            if with_shared_inbox:
-                print(follower_domain + ' has shared inbox')
-        if not with_shared_inbox:
-            print('Sending post to followers, ' + follower_domain +
-                  ' does not have a shared inbox')
-
-        to_port = port
-        index = 0
-        to_domain = follower_handles[index].split('@')[1]
-        if ':' in to_domain:
-            to_port = get_port_from_domain(to_domain)
-            to_domain = remove_domain_port(to_domain)
-
-        # if we are sending to an onion domain and we
-        # have an alt onion domain then use the alt
-        from_domain = domain
-        from_http_prefix = http_prefix
-        session_type = 'default'
-        if onion_domain:
-            if to_domain.endswith('.onion'):
-                from_domain = onion_domain
-                from_http_prefix = 'http'
-                port = 80
-                to_port = 80
-                curr_proxy_type = 'tor'
-                session_type = 'tor'
-        if i2p_domain:
-            if to_domain.endswith('.i2p'):
-                from_domain = i2p_domain
-                from_http_prefix = 'http'
-                port = 80
-                to_port = 80
-                curr_proxy_type = 'i2p'
-                session_type = 'i2p'
-
-        if not curr_session:
-            curr_session = create_session(curr_proxy_type)
-            if server:
-                if session_type == 'tor':
-                    server.session_onion = curr_session
-                elif session_type == 'i2p':
-                    server.session_i2p = curr_session
-                else:
-                    server.session = curr_session
-
-        if with_shared_inbox:
-            to_nickname = follower_handles[index].split('@')[0]
-
-            group_account = False
-            if to_nickname.startswith('!'):
-                group_account = True
-                to_nickname = to_nickname[1:]
-
-            # if there are more than one followers on the domain
-            # then send the post to the shared inbox
-            if len(follower_handles) > 1:
-                to_nickname = 'inbox'
-
-            if to_nickname != 'inbox' and post_json_object.get('type'):
-                if _sending_profile_update(post_json_object):
-                    print('Sending post to followers ' +
-                          'shared inbox of ' + to_domain)
-                    to_nickname = 'inbox'
-
-            print('Sending post to followers from ' +
-                  nickname + '@' + domain +
-                  ' to ' + to_nickname + '@' + to_domain)
-
-            send_signed_json(post_json_object, curr_session, base_dir,
-                             nickname, from_domain, port,
-                             to_nickname, to_domain, to_port,
-                             from_http_prefix,
-                             client_to_server, federation_list,
-                             send_threads, post_log, cached_webfingers,
-                             person_cache, debug, project_version,
-                             shared_items_token, group_account,
-                             signing_priv_key_pem, 639342,
-                             domain, onion_domain, i2p_domain)
-        else:
-            # randomize the order of handles, so that we are not
-            # favoring any particular account in terms of its delivery time
-            random.shuffle(follower_handles)
-            # send to individual followers without using a shared inbox
-            for handle in follower_handles:
-                print('Sending post to followers ' + handle)
-                to_nickname = handle.split('@')[0]
-
-                group_account = False
-                if to_nickname.startswith('!'):
-                    group_account = True
-                    to_nickname = to_nickname[1:]
-
-                if post_json_object['type'] != 'Update':
-                    print('Sending post to followers from ' +
-                          nickname + '@' + domain + ' to ' +
-                          to_nickname + '@' + to_domain)
-                else:
-                    print('Sending post to followers profile update from ' +
-                          nickname + '@' + domain + ' to ' +
-                          to_nickname + '@' + to_domain)
-
-                send_signed_json(post_json_object, curr_session, base_dir,
-                                 nickname, from_domain, port,
-                                 to_nickname, to_domain, to_port,
-                                 from_http_prefix,
-                                 client_to_server, federation_list,
-                                 send_threads, post_log, cached_webfingers,
-                                 person_cache, debug, project_version,
-                                 shared_items_token, group_account,
-                                 signing_priv_key_pem, 634219,
-                                 domain, onion_domain, i2p_domain)
-
-        time.sleep(4)
+    # The post is the same for every instance, so complete it before
+    # sending rather than each worker changing it
+    _add_followers_to_public_post(post_json_object)
+    if not post_json_object.get('signature'):
+        private_key_pem = \
+            _get_person_key(nickname, domain, base_dir, 'private', debug)
+        if private_key_pem:
+            post_json_object = \
+                _json_ld_sign_post(post_json_object, private_key_pem)
+
+    sites_liveness = None
+    if server:
+        sites_liveness = server.sites_liveness
+
+    # send out to the instances using a limited number of workers
+    no_of_workers = total_domains
+    if no_of_workers > MAX_FOLLOWER_DELIVERY_WORKERS:
+        no_of_workers = MAX_FOLLOWER_DELIVERY_WORKERS
+    workers = []
+    for _ in range(no_of_workers):
+        # each worker keeps its own tally, so that
+        # they don't need to be locked
+        outcomes = {
+            'sent': 0,
+            'failed': 0,
+            'blocked': 0,
+            'inactive': 0
+        }
+        worker_thread = \
+            thread_with_trace(target=_send_to_followers_worker,
+                              args=(server, session, session_onion,
+                                    session_i2p, base_dir, nickname, domain,
+                                    onion_domain, i2p_domain, port,
+                                    http_prefix, federation_list,
+                                    post_log,
+                                    cached_webfingers, person_cache,
+                                    post_json_object, debug,
+                                    project_version,
+                                    shared_items_federated_domains,
+                                    shared_item_federation_tokens,
+                                    signing_priv_key_pem,
+                                    randomized_instances, total_domains,
+                                    outcomes, sites_liveness), daemon=True)
+        if begin_thread(worker_thread, 'send_to_followers'):
+            workers.append([worker_thread, outcomes])
+    for worker in workers:
+        worker[0].join()
+
+    # how did it go?
+    totals = {
+        'domains': total_domains,
+        'sent': 0,
+        'failed': 0,
+        'blocked': 0,
+        'inactive': 0
+    }
+    for worker in workers:
+        for outcome, count in worker[1].items():
+            totals[outcome] += count
+    if server:
+        _delivery_metrics(server.fitness, totals)
 
     if debug:
         print('DEBUG: End of send_to_followers')
@@ -3551,7 +4203,8 @@ def send_to_followers(server, session, session_onion, session_i2p,
     sending_end_time = datetime.datetime.utcnow()
     sending_mins = \
         int((sending_end_time - sending_start_time).total_seconds() / 60)
-    print('Sending post to followers ends ' + str(sending_mins) + ' mins')
+    print('Sending post to followers ends ' + str(sending_mins) + ' mins ' +
+          str(totals))
 
 
 def send_to_followers_thread(server, session, session_onion, session_i2p,
@@ -3765,7 +4418,6 @@ def is_image_media(session, base_dir: str, http_prefix: str,
     """Returns true if the given post has attached image media
     """
     if post_json_object['type'] == 'Announce':
-        blocked_cache = {}
         post_json_announce = \
             download_announce(session, base_dir, http_prefix,
                               nickname, domain, post_json_object,
@@ -3777,7 +4429,7 @@ def is_image_media(session, base_dir: str, http_prefix: str,
                               system_language,
                               domain_full, person_cache,
                               signing_priv_key_pem,
-                              blocked_cache, bold_reading)
+                              None, bold_reading)
         if post_json_announce:
             post_json_object = post_json_announce
     if post_json_object['type'] != 'Create':
@@ -3805,43 +4457,46 @@ def is_image_media(session, base_dir: str, http_prefix: str,
     return False
 
 
+def _json_contains_str(json_object, text: str) -> bool:
+    """Does the given text appear within a parsed json object?
+    """
+    if isinstance(json_object, str):
+        return text in json_object
+    if isinstance(json_object, dict):
+        for key, value in json_object.items():
+            if text in key or _json_contains_str(value, text):
+                return True
+    elif isinstance(json_object, list):
+        for item in json_object:
+            if _json_contains_str(item, text):
+                return True
+    return False
+
+
+def _is_recent_timeline_post(recent_posts_cache: {}, post_url: str,
+                             boxname: str, box_actor: str) -> bool:
+    """ is this post within the recent posts cache a valid timeline post?
+    """
+    boxes = recent_posts_cache['boxes'].get(post_url)
+    if not boxes or not recent_posts_cache['posts'].get(post_url):
+        return False
+    if not boxes.get(boxname, boxes['inbox']):
+        return False
+    if boxname == 'tlreplies':
+        return _json_contains_str(recent_posts_cache['posts'][post_url],
+                                  box_actor)
+    return True
+
+
 def _add_post_string_to_timeline(post_str: str, boxname: str,
                                  posts_in_box: [], box_actor: str) -> bool:
     """ is this a valid timeline post?
     """
-    # must be a recognized ActivityPub type
-    if ('"Note"' in post_str or
-        '"EncryptedMessage"' in post_str or
-        '"ChatMessage"' in post_str or
-        '"Event"' in post_str or
-        '"Article"' in post_str or
-        '"Patch"' in post_str or
-        '"Announce"' in post_str or
-        ('"Question"' in post_str and
-         ('"Create"' in post_str or '"Update"' in post_str))):
-
-        if boxname == 'dm':
-            if '#Public' in post_str or '/followers' in post_str:
-                return False
-        elif boxname == 'tlreplies':
-            if box_actor not in post_str:
-                return False
-        elif boxname in ('tlblogs', 'tlnews', 'tlfeatures'):
-            if '"Create"' not in post_str:
-                return False
-            if '"Article"' not in post_str:
-                return False
-        elif boxname == 'tlmedia':
-            if '"Create"' in post_str:
-                if ('mediaType' not in post_str or
-                    ('image/' not in post_str and
-                     'video/' not in post_str and
-                     'audio/' not in post_str)):
-                    return False
-        # add the post to the dictionary
-        posts_in_box.append(post_str)
-        return True
-    return False
+    if not is_timeline_post_str(post_str, boxname, box_actor):
+        return False
+    # add the post to the dictionary
+    posts_in_box.append(post_str)
+    return True
 
 
 def _add_post_to_timeline(file_path: str, boxname: str,
@@ -3972,123 +4627,143 @@ def _create_box_items(base_dir: str,
                       recent_posts_cache: {},
                       boxname: str,
                       posts_in_box: [],
-                      box_actor: str) -> (int, int):
+                      box_actor: str, authorized: bool) -> (int, int):
     """Creates the list of posts within a timeline
     """
+    recent_stats = recent_posts_cache_stats(recent_posts_cache)
     index_filename = \
         acct_dir(base_dir, timeline_nickname, original_domain) + \
         '/' + index_box_name + '.index'
     total_posts_count = 0
     posts_added_to_timeline = 0
-    if not os.path.isfile(index_filename):
+    if not box_index_exists(index_filename):
         return total_posts_count, posts_added_to_timeline
 
     if first_post_id:
         first_post_id = first_post_id.replace('--', '#')
         first_post_id = first_post_id.replace('/', '#')
 
-    with open(index_filename, 'r', encoding='utf-8') as index_file:
-        posts_added_to_timeline = 0
-        while posts_added_to_timeline < items_per_page:
-            post_filename = index_file.readline()
+    # If there is no newswire voting then the index can be read
+    # directly from the start of the page. Otherwise the preceding
+    # posts need to be checked to see if they passed voting
+    index_line_number = 0
+    if not first_post_id and newswire_votes_threshold <= 0:
+        index_line_number = int((page_number - 1) * items_per_page)
+        total_posts_count = index_line_number
 
-            if not post_filename:
+    index_lines = []
+    posts_added_to_timeline = 0
+    while posts_added_to_timeline < items_per_page:
+        if not index_lines:
+            index_lines = \
+                box_index_lines(index_filename, index_line_number,
+                                items_per_page)
+            if not index_lines:
                 break
+            index_line_number += len(index_lines)
+        post_filename = index_lines.pop(0)
+        if not post_filename:
+            continue
 
-            if first_post_id and total_posts_count == 0:
-                if first_post_id not in post_filename:
-                    continue
-                total_posts_count = \
-                    int((page_number - 1) * items_per_page)
-
-            # Has this post passed through the newswire voting stage?
-            if not _passed_newswire_voting(newswire_votes_threshold,
-                                           base_dir, domain,
-                                           post_filename,
-                                           positive_voting,
-                                           voting_time_mins):
+        if first_post_id and total_posts_count == 0:
+            if first_post_id not in post_filename:
                 continue
+            total_posts_count = \
+                int((page_number - 1) * items_per_page)
+
+        # Has this post passed through the newswire voting stage?
+        if not _passed_newswire_voting(newswire_votes_threshold,
+                                       base_dir, domain,
+                                       post_filename,
+                                       positive_voting,
+                                       voting_time_mins):
+            continue
 
-            # Skip through any posts previous to the current page
-            if not first_post_id:
-                if total_posts_count < \
-                   int((page_number - 1) * items_per_page):
-                    total_posts_count += 1
-                    continue
-
-            # if this is a full path then remove the directories
-            if '/' in post_filename:
-                post_filename = post_filename.split('/')[-1]
+        # Skip through any posts previous to the current page
+        if not first_post_id:
+            if total_posts_count < \
+               int((page_number - 1) * items_per_page):
+                total_posts_count += 1
+                continue
 
-            # filename of the post without any extension or path
-            # This should also correspond to any index entry in
-            # the posts cache
-            post_url = remove_eol(post_filename)
-            post_url = post_url.replace('.json', '').strip()
+        # if this is a full path then remove the directories
+        if '/' in post_filename:
+            post_filename = post_filename.split('/')[-1]
 
-            if post_url in post_urls_in_box:
-                continue
+        # filename of the post without any extension or path
+        # This should also correspond to any index entry in
+        # the posts cache
+        post_url = remove_eol(post_filename)
+        post_url = post_url.replace('.json', '').strip()
 
-            # is the post cached in memory?
-            if recent_posts_cache.get('index'):
-                if post_url in recent_posts_cache['index']:
-                    if recent_posts_cache['json'].get(post_url):
-                        url = recent_posts_cache['json'][post_url]
-                        if _add_post_string_to_timeline(url,
-                                                        boxname,
-                                                        posts_in_box,
-                                                        box_actor):
-                            total_posts_count += 1
-                            posts_added_to_timeline += 1
-                            post_urls_in_box.append(post_url)
-                            continue
-                        print('Post not added to timeline')
-
-            # read the post from file
-            full_post_filename = \
-                locate_post(base_dir, nickname,
-                            original_domain, post_url, False)
-            if full_post_filename:
-                # has the post been rejected?
-                if os.path.isfile(full_post_filename + '.reject'):
-                    continue
+        if post_url in post_urls_in_box:
+            continue
 
-                if _add_post_to_timeline(full_post_filename, boxname,
-                                         posts_in_box, box_actor):
-                    posts_added_to_timeline += 1
+        # is the post cached in memory?
+        if recent_posts_cache.get('index'):
+            if post_url in recent_posts_cache['index']:
+                recent_stats['hits'] += 1
+                if _is_recent_timeline_post(recent_posts_cache, post_url,
+                                            boxname, box_actor):
+                    # a copy is used, since the post may be changed
+                    # while rendering the timeline
+                    posts_in_box.append(
+                        copy_json_object(
+                            recent_posts_cache['posts'][post_url]))
                     total_posts_count += 1
+                    posts_added_to_timeline += 1
                     post_urls_in_box.append(post_url)
-                else:
-                    print('WARN: Unable to add post ' + post_url +
-                          ' nickname ' + nickname +
-                          ' timeline ' + boxname)
+                    continue
+                print('Post not added to timeline')
             else:
-                if timeline_nickname != nickname:
-                    # if this is the features timeline
-                    full_post_filename = \
-                        locate_post(base_dir, timeline_nickname,
-                                    original_domain, post_url, False)
-                    if full_post_filename:
-                        if _add_post_to_timeline(full_post_filename,
-                                                 boxname,
-                                                 posts_in_box, box_actor):
-                            posts_added_to_timeline += 1
-                            total_posts_count += 1
-                            post_urls_in_box.append(post_url)
-                        else:
-                            print('WARN: Unable to add features post ' +
-                                  post_url + ' nickname ' + nickname +
-                                  ' timeline ' + boxname)
+                recent_stats['misses'] += 1
+
+        # read the post from file
+        full_post_filename = \
+            locate_post(base_dir, nickname,
+                        original_domain, post_url, False, recent_posts_cache)
+        if full_post_filename:
+            # has the post been rejected?
+            if os.path.isfile(full_post_filename + '.reject'):
+                continue
+
+            if _add_post_to_timeline(full_post_filename, boxname,
+                                     posts_in_box, box_actor):
+                posts_added_to_timeline += 1
+                total_posts_count += 1
+                post_urls_in_box.append(post_url)
+            else:
+                print('WARN: Unable to add post ' + post_url +
+                      ' nickname ' + nickname +
+                      ' timeline ' + boxname)
+        else:
+            if timeline_nickname != nickname:
+                # if this is the features timeline
+                full_post_filename = \
+                    locate_post(base_dir, timeline_nickname,
+                                original_domain, post_url, False,
+                                recent_posts_cache)
+                if full_post_filename:
+                    if _add_post_to_timeline(full_post_filename,
+                                             boxname,
+                                             posts_in_box, box_actor):
+                        posts_added_to_timeline += 1
+                        total_posts_count += 1
+                        post_urls_in_box.append(post_url)
                     else:
-                        print('WARN: features timeline. ' +
-                              'Unable to locate post ' + post_url)
+                        print('WARN: Unable to add features post ' +
+                              post_url + ' nickname ' + nickname +
+                              ' timeline ' + boxname)
                 else:
-                    if timeline_nickname == 'news':
-                        print('WARN: Unable to locate news post ' +
-                              post_url + ' nickname ' + nickname)
-                    else:
-                        print('WARN: Unable to locate post ' + post_url +
-                              ' nickname ' + nickname)
+                    print('WARN: features timeline. ' +
+                          'Unable to locate post ' + post_url)
+            else:
+                if timeline_nickname == 'news':
+                    print('WARN: Unable to locate news post ' +
+                          post_url + ' nickname ' + nickname)
+                else:
+                    print('WARN: Unable to locate post ' + post_url +
+                          ' nickname ' + nickname)
     return total_posts_count, posts_added_to_timeline
 
 
@@ -4174,7 +4849,8 @@ def _create_box_indexed(recent_posts_cache: {},
                           recent_posts_cache,
                           boxname,
                           posts_in_box,
-                          box_actor)
+                          box_actor,
+                          authorized)
     if first_post_id and posts_added_to_timeline == 0:
         # no first post was found within the index, so just use the page number
         first_post_id = ''
@@ -4194,7 +4870,8 @@ def _create_box_indexed(recent_posts_cache: {},
                               recent_posts_cache,
                               boxname,
                               posts_in_box,
-                              box_actor)
+                              box_actor,
+                              authorized)
 
     if total_posts_count < 3:
         print('Posts added to json timeline ' + boxname + ': ' +
@@ -4226,6 +4903,15 @@ def _create_box_indexed(recent_posts_cache: {},
     for post_str in posts_in_box:
         # Check if the post has replies
         has_replies = False
+        if isinstance(post_str, dict):
+            # parsed post from the recent posts cache
+            post_str['hasReplies'] = has_replies
+            post_str['mitm'] = False
+            if not authorized:
+                if not remove_post_interactions(post_str, False):
+                    continue
+            box_items['orderedItems'].append(post_str)
+            continue
         if post_str.endswith('<hasReplies>'):
             has_replies = True
             # remove the replies identifier
@@ -4555,20 +5241,7 @@ def archive_posts_for_person(http_prefix: str, nickname: str, domain: str,
     handle = nickname + '@' + domain
     index_filename = \
         base_dir + '/accounts/' + handle + '/' + boxname + '.index'
-    if os.path.isfile(index_filename):
-        index_ctr = 0
-        # get the existing index entries as a string
-        new_index = ''
-        with open(index_filename, 'r', encoding='utf-8') as index_file:
-            for post_id in index_file:
-                new_index += post_id
-                index_ctr += 1
-                if index_ctr >= max_posts_in_box:
-                    break
-        # save the new index file
-        if len(new_index) > 0:
-            with open(index_filename, 'w+', encoding='utf-8') as index_file:
-                index_file.write(new_index)
+    box_index_truncate(index_filename, max_posts_in_box)
 
     posts_in_box_dict = {}
     posts_ctr = 0
@@ -4615,6 +5288,8 @@ def archive_posts_for_person(http_prefix: str, nickname: str, domain: str,
         if archive_dir:
             archive_path = os.path.join(archive_dir, post_filename)
             os.rename(file_path, archive_path)
+            remove_post_location(recent_posts_cache, base_dir,
+                                 nickname, domain, file_path)
 
             extensions = ('replies', 'votes', 'arrived', 'muted')
             for ext in extensions:
@@ -5380,6 +6055,8 @@ def download_announce(session, base_dir: str, http_prefix: str,
         replace_twitter(post_json_object, twitter_replacement_domain,
                         system_language)
         if save_json(post_json_object, announce_filename):
+            update_post_location(recent_posts_cache, base_dir,
+                                 nickname, domain, announce_filename)
             return post_json_object
     return None
 
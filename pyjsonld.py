@@ -834,6 +834,26 @@ class JsonLdProcessor(object):
             else:
                 input_['expandContext'] = {'@context': expand_context}
 
+        # the same top level @context is used by most documents from a
+        # given server, so the active context for it can be reused
+        # without retrieving and processing its contexts again
+        initial_ctx = self._get_initial_context(options)
+        top_ctx = None
+        cached_ctx = None
+        if (_cache.get('topCtx') is not None and
+                options['documentLoader'] is load_document and
+                remote_doc['contextUrl'] is None and
+                'expandContext' not in input_ and
+                _is_object(input_['document']) and
+                '@context' in input_['document']):
+            top_ctx = input_['document']['@context']
+            cached_ctx = _cache['topCtx'].get(initial_ctx, top_ctx)
+            if cached_ctx:
+                del input_['document']['@context']
+            else:
+                # the context is replaced when its urls are retrieved
+                top_ctx = copy.deepcopy(top_ctx)
+
         try:
             self._retrieve_context_urls(
                 input_, {}, options['documentLoader'], options['base'])
@@ -842,10 +862,18 @@ class JsonLdProcessor(object):
                 'Could not perform JSON-LD expansion.',
                 'jsonld.ExpandError', cause=cause)
 
-        active_ctx = self._get_initial_context(options)
+        active_ctx = initial_ctx
         document = input_['document']
         remote_context = input_['remoteContext']['@context']
 
+        if cached_ctx:
+            active_ctx = cached_ctx
+        elif top_ctx is not None:
+            active_ctx = self._process_context(
+                active_ctx, document['@context'], options)
+            _cache['topCtx'].set(initial_ctx, top_ctx, active_ctx)
+            del document['@context']
+
         # process optional expandContext
         if 'expandContext' in input_:
             active_ctx = self.process_context(
@@ -4951,5 +4979,6 @@ for path in _possible_trust_root_certificates:
 
 # Shared in-memory caches.
 _cache = {
-    'activeCtx': ActiveContextCache()
+    'activeCtx': ActiveContextCache(),
+    'topCtx': ActiveContextCache()
 }
@@ -0,0 +1,117 @@
+__filename__ = "routes.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Core"
+
+# Routes for static resources, indexed by the first section of the path,
+# so that they can be found with a single lookup rather than going
+# through every check made for other GET requests.
+# crawlers: blocked user agents and crawlers are checked
+# admission: requests use the admission control budget for GET,
+#            for large files which could be used for flooding
+STATIC_GET_ROUTES = {
+    'icons': {
+        'crawlers': False,
+        'admission': False
+    },
+    'fonts': {
+        'crawlers': False,
+        'admission': False
+    },
+    'helpimages': {
+        'crawlers': False,
+        'admission': False
+    },
+    'emoji': {
+        'crawlers': True,
+        'admission': False
+    },
+    'favicons': {
+        'crawlers': True,
+        'admission': False
+    },
+    'avatars': {
+        'crawlers': True,
+        'admission': False
+    },
+    'media': {
+        'crawlers': True,
+        'admission': True
+    },
+    'sharefiles': {
+        'crawlers': True,
+        'admission': True
+    }
+}
+
+
+def static_get_route(path: str) -> str:
+    """Returns the name of the static resource route for the given
+    path, or None if it isn't a static resource
+    """
+    if not path.startswith('/'):
+        return None
+    path_sections = path.split('/', 2)
+    if len(path_sections) < 3:
+        return None
+    if not STATIC_GET_ROUTES.get(path_sections[1]):
+        return None
+    return path_sections[1]
+
+
+# characters which are not permitted within nicknames
+NICKNAME_FORBIDDEN_CHARS = ('.', ' ', ':', ';', '@', '#', '!', '%')
+
+
+def users_get_route(path: str, users_get_routes: {}) -> str:
+    """Returns the name of the route within the given table for a page
+    of an account, such as /users/nickname/inbox?page=2, or None if
+    the path isn't for one of the routes
+    """
+    if not path.startswith('/users/'):
+        return None
+    path_sections = path.split('/')
+    if len(path_sections) != 4:
+        return None
+    nickname = path_sections[2]
+    if not nickname or '?' in nickname:
+        return None
+    for char in NICKNAME_FORBIDDEN_CHARS:
+        if char in nickname:
+            return None
+    route_name = path_sections[3]
+    page_str = None
+    if '?' in route_name:
+        route_name, page_str = route_name.split('?', 1)
+    route = users_get_routes.get(route_name)
+    if not route:
+        return None
+    if page_str is not None:
+        # only a page number is permitted, so that the other
+        # parameters are handled by the checks for GET requests
+        if not route['paged'] or not page_str.startswith('page='):
+            return None
+        page_str = page_str.split('=', 1)[1]
+        if page_str and not page_str.isalnum():
+            return None
+    return route_name
+
+
+def post_route(path: str, post_routes: {}) -> str:
+    """Returns the name of the route within the given table for a form
+    submitted to the given path, or None if the path isn't for one
+    of the routes
+    """
+    if '/' not in path:
+        return None
+    route_name = path.rsplit('/', 1)[1]
+    route = post_routes.get(route_name)
+    if not route:
+        return None
+    if route['users'] and '/users/' not in path:
+        return None
+    return route_name
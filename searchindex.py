@@ -0,0 +1,450 @@
+__filename__ = "searchindex.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Core"
+
+import os
+import json
+import shutil
+from indexlock import index_lock
+
+# An inverted index of the words within posts, so that searching
+# your post history doesn't need to read every post.
+# Every ending of each word is indexed, up to a maximum length, so that
+# any part of a word can be found by matching the beginnings of the
+# indexed endings. Longer search terms only use their beginning within
+# the index, and the posts which are found are then checked.
+# The posts file lists the published date and filename of each indexed
+# post, and within the rest of the index a post is identified by the
+# position of its line within the posts file.
+# Index files are named after the first two characters of the word
+# endings which they contain. Each line contains the position of a post
+# followed by the remainder of each of its word endings. New lines are
+# appended as posts are saved.
+
+# boxes which have a search index
+SEARCH_INDEX_BOXES = ('outbox', 'bookmarks')
+
+# words shorter than this are not indexed
+MIN_SEARCH_WORD_LENGTH = 2
+
+# longer word endings are truncated to this length within the index
+MAX_SEARCH_WORD_LENGTH = 8
+
+
+def _search_index_dir(account_dir: str, box_name: str) -> str:
+    """Returns the directory containing the search index for a box
+    """
+    return account_dir + '/searchindex/' + box_name
+
+
+def _search_index_posts_dir(account_dir: str, box_name: str) -> str:
+    """Returns the directory containing the posts for a box.
+    Bookmarks are an index on the inbox
+    """
+    if box_name == 'bookmarks':
+        return account_dir + '/inbox'
+    return account_dir + '/' + box_name
+
+
+def _search_index_filename(index_dir: str, word: str) -> str:
+    """Returns the index file containing the given word
+    """
+    return index_dir + '/' + word[:2] + '.txt'
+
+
+def _search_index_posts_filename(index_dir: str) -> str:
+    """Returns the file listing the posts within the index
+    """
+    return index_dir + '/posts.txt'
+
+
+def search_index_words(text: str) -> []:
+    """Returns the distinct words within the given text, ignoring markup
+    """
+    words = {}
+    word = ''
+    in_markup = False
+    for char in text.lower() + ' ':
+        if in_markup:
+            if char == '>':
+                in_markup = False
+            continue
+        if char.isalnum():
+            word += char
+            continue
+        if char == '<':
+            in_markup = True
+        if len(word) >= MIN_SEARCH_WORD_LENGTH:
+            words[word] = True
+        word = ''
+    return list(words.keys())
+
+
+def search_index_endings(words: []) -> []:
+    """Returns the distinct endings of the given words which are indexed.
+    A search term is part of a word if it is the beginning of one of
+    these endings
+    """
+    endings = {}
+    for word in words:
+        for start in range(len(word) - MIN_SEARCH_WORD_LENGTH + 1):
+            endings[word[start:start + MAX_SEARCH_WORD_LENGTH]] = True
+    return list(endings.keys())
+
+
+def _post_search_text(post_json_object: {}) -> str:
+    """Returns the text of a post which is indexed.
+    This is the summary, content and media descriptions
+    """
+    post_obj = post_json_object
+    if isinstance(post_json_object.get('object'), dict):
+        post_obj = post_json_object['object']
+    text = ''
+    for field_name in ('summary', 'content'):
+        if isinstance(post_obj.get(field_name), str):
+            text += post_obj[field_name] + ' '
+    if isinstance(post_obj.get('attachment'), list):
+        for attach in post_obj['attachment']:
+            if not isinstance(attach, dict):
+                continue
+            if isinstance(attach.get('name'), str):
+                text += attach['name'] + ' '
+    return text
+
+
+def _post_published(post_json_object: {}) -> str:
+    """Returns the published date of a post, used to rank search results
+    """
+    if isinstance(post_json_object.get('object'), dict):
+        if isinstance(post_json_object['object'].get('published'), str):
+            return post_json_object['object']['published']
+    if isinstance(post_json_object.get('published'), str):
+        return post_json_object['published']
+    return ''
+
+
+def _search_index_post_line(post_filename: str,
+                            post_json_object: {}) -> str:
+    """Returns the line for a post within the posts file
+    """
+    post_name = post_filename.split('/')[-1]
+    published = _post_published(post_json_object).replace(' ', '')
+    return published + '  ' + post_name + '\n'
+
+
+def _search_index_lines(post_number: int, post_json_object: {}) -> {}:
+    """Returns the index lines for a post, indexed by the first
+    two characters of each word ending
+    """
+    endings = {}
+    words = search_index_words(_post_search_text(post_json_object))
+    for word in search_index_endings(words):
+        index_key = word[:2]
+        if not endings.get(index_key):
+            endings[index_key] = []
+        endings[index_key].append(word[2:])
+    index_lines = {}
+    for index_key, key_endings in endings.items():
+        key_endings.sort()
+        index_lines[index_key] = \
+            str(post_number) + ' ' + ' '.join(key_endings) + '\n'
+    return index_lines
+
+
+def _build_search_index(account_dir: str, box_name: str) -> bool:
+    """Creates the search index for a box from its existing posts
+    """
+    posts_dir = _search_index_posts_dir(account_dir, box_name)
+    if not os.path.isdir(posts_dir):
+        return False
+    post_names = []
+    if box_name == 'bookmarks':
+        bookmarks_index_filename = account_dir + '/bookmarks.index'
+        if os.path.isfile(bookmarks_index_filename):
+            try:
+                with open(bookmarks_index_filename, 'r',
+                          encoding='utf-8') as fp_index:
+                    for post_name in fp_index:
+                        post_name = post_name.strip()
+                        if post_name.endswith('.json'):
+                            post_names.append(post_name)
+            except OSError:
+                print('EX: _build_search_index unable to read ' +
+                      bookmarks_index_filename)
+                return False
+    else:
+        for post_name in os.listdir(posts_dir):
+            if post_name.endswith('.json'):
+                post_names.append(post_name)
+
+    index_lines = {}
+    posts_lines = []
+    post_number = 0
+    for post_name in post_names:
+        post_filename = posts_dir + '/' + post_name
+        try:
+            with open(post_filename, 'r', encoding='utf-8') as fp_post:
+                post_json_object = json.loads(fp_post.read())
+        except (OSError, ValueError):
+            continue
+        if not isinstance(post_json_object, dict):
+            continue
+        post_line = _search_index_post_line(post_filename, post_json_object)
+        posts_lines.append(post_line)
+        post_lines = _search_index_lines(post_number, post_json_object)
+        post_number += len(post_line.encode('utf-8'))
+        for index_key, lines_str in post_lines.items():
+            if not index_lines.get(index_key):
+                index_lines[index_key] = []
+            index_lines[index_key].append(lines_str)
+
+    # the index is written to a temporary directory first, so that
+    # a partially built index is never searched
+    index_dir = _search_index_dir(account_dir, box_name)
+    new_index_dir = index_dir + '.new'
+    if os.path.isdir(new_index_dir):
+        shutil.rmtree(new_index_dir, ignore_errors=False, onerror=None)
+    os.makedirs(new_index_dir)
+    posts_filename = _search_index_posts_filename(new_index_dir)
+    try:
+        with open(posts_filename, 'w+', encoding='utf-8') as fp_posts:
+            fp_posts.write(''.join(posts_lines))
+    except OSError:
+        print('EX: _build_search_index unable to write ' + posts_filename)
+        return False
+    for index_key, lines_list in index_lines.items():
+        index_filename = _search_index_filename(new_index_dir, index_key)
+        try:
+            with open(index_filename, 'w+', encoding='utf-8') as fp_index:
+                fp_index.write(''.join(lines_list))
+        except OSError:
+            print('EX: _build_search_index unable to write ' +
+                  index_filename)
+            return False
+    try:
+        os.rename(new_index_dir, index_dir)
+    except OSError:
+        print('EX: _build_search_index unable to rename ' + new_index_dir)
+        return False
+    return True
+
+
+def search_index_add(account_dir: str, box_name: str,
+                     post_filename: str, post_json_object: {}) -> None:
+    """Adds a post to the search index for a box.
+    If the index has not been built yet then it will be when the box
+    is first searched
+    """
+    if box_name not in SEARCH_INDEX_BOXES:
+        return
+    index_dir = _search_index_dir(account_dir, box_name)
+    # the lock is taken before checking for the index, so that posts
+    # saved while the index is being built are not missed
+    with index_lock(index_dir):
+        posts_filename = _search_index_posts_filename(index_dir)
+        if not os.path.isfile(posts_filename):
+            return
+        post_number = os.path.getsize(posts_filename)
+        try:
+            with open(posts_filename, 'a+', encoding='utf-8') as fp_posts:
+                fp_posts.write(_search_index_post_line(post_filename,
+                                                       post_json_object))
+        except OSError:
+            print('EX: search_index_add unable to append ' + posts_filename)
+            return
+        index_lines = _search_index_lines(post_number, post_json_object)
+        for index_key, lines_str in index_lines.items():
+            index_filename = _search_index_filename(index_dir, index_key)
+            try:
+                with open(index_filename, 'a+', encoding='utf-8') as fp_index:
+                    fp_index.write(lines_str)
+            except OSError:
+                print('EX: search_index_add unable to append ' +
+                      index_filename)
+
+
+def _search_index_post_numbers(index_dir: str, post_name: str) -> []:
+    """Returns the positions of a post within the posts file
+    """
+    post_numbers = []
+    posts_filename = _search_index_posts_filename(index_dir)
+    if not os.path.isfile(posts_filename):
+        return post_numbers
+    post_ending = ('  ' + post_name + '\n').encode('utf-8')
+    post_number = 0
+    try:
+        with open(posts_filename, 'rb') as fp_posts:
+            for line in fp_posts:
+                if line.endswith(post_ending):
+                    post_numbers.append(str(post_number))
+                post_number += len(line)
+    except OSError:
+        print('EX: _search_index_post_numbers unable to read ' +
+              posts_filename)
+    return post_numbers
+
+
+def search_index_remove(account_dir: str, box_name: str,
+                        post_filename: str, post_json_object: {}) -> None:
+    """Removes a post from the search index for a box.
+    The post remains within the posts file, but is no longer
+    referenced by the rest of the index
+    """
+    if box_name not in SEARCH_INDEX_BOXES:
+        return
+    index_dir = _search_index_dir(account_dir, box_name)
+    with index_lock(index_dir):
+        if not os.path.isdir(index_dir):
+            return
+        post_numbers = \
+            _search_index_post_numbers(index_dir,
+                                       post_filename.split('/')[-1])
+        if not post_numbers:
+            return
+        line_starts = []
+        for post_number in post_numbers:
+            line_starts.append(post_number + ' ')
+        line_starts = tuple(line_starts)
+        for index_key in _search_index_lines(0, post_json_object):
+            index_filename = _search_index_filename(index_dir, index_key)
+            if not os.path.isfile(index_filename):
+                continue
+            new_lines = []
+            removed = False
+            try:
+                with open(index_filename, 'r', encoding='utf-8') as fp_index:
+                    for line in fp_index:
+                        if line.startswith(line_starts):
+                            removed = True
+                            continue
+                        new_lines.append(line)
+            except OSError:
+                print('EX: search_index_remove unable to read ' +
+                      index_filename)
+                continue
+            if not removed:
+                continue
+            try:
+                with open(index_filename, 'w+', encoding='utf-8') as fp_index:
+                    fp_index.write(''.join(new_lines))
+            except OSError:
+                print('EX: search_index_remove unable to write ' +
+                      index_filename)
+
+
+def _search_index_postings(index_dir: str, word: str) -> {}:
+    """Returns the positions within the posts file of posts containing
+    words which contain the beginning of the given word
+    """
+    word = word[:MAX_SEARCH_WORD_LENGTH]
+    word_ending = word[2:]
+    postings = {}
+    index_filename = _search_index_filename(index_dir, word)
+    if not os.path.isfile(index_filename):
+        return postings
+    try:
+        with open(index_filename, 'r', encoding='utf-8') as fp_index:
+            for line in fp_index:
+                fields = line.rstrip('\n').split(' ')
+                for ending in fields[1:]:
+                    if ending.startswith(word_ending):
+                        postings[fields[0]] = True
+                        break
+    except OSError:
+        print('EX: _search_index_postings unable to read ' + index_filename)
+    return postings
+
+
+def _search_index_posts(index_dir: str, post_numbers: {}) -> {}:
+    """Returns the published dates of the posts at the given positions
+    within the posts file, indexed by post filename
+    """
+    posts = {}
+    posts_filename = _search_index_posts_filename(index_dir)
+    try:
+        with open(posts_filename, 'rb') as fp_posts:
+            for post_number in post_numbers:
+                fp_posts.seek(int(post_number))
+                fields = fp_posts.readline().decode('utf-8').split('  ')
+                if len(fields) == 2 and fields[1].endswith('\n'):
+                    posts[fields[1].rstrip('\n')] = fields[0]
+    except (OSError, ValueError):
+        print('EX: _search_index_posts unable to read ' + posts_filename)
+    return posts
+
+
+def search_index_find(account_dir: str, box_name: str,
+                      search_words: [], max_results: int) -> []:
+    """Returns the filenames of posts within a box which contain all of
+    the given search words or phrases, most recent first.
+    Returns None if the index can't be used for this search
+    """
+    if box_name not in SEARCH_INDEX_BOXES:
+        return None
+    words = []
+    for search_word in search_words:
+        phrase_words = search_index_words(search_word)
+        if not phrase_words:
+            return None
+        for word in phrase_words:
+            if word not in words:
+                words.append(word)
+
+    index_dir = _search_index_dir(account_dir, box_name)
+    with index_lock(index_dir):
+        if os.path.isdir(index_dir):
+            # indexes without a posts file have an older format
+            if not os.path.isfile(_search_index_posts_filename(index_dir)):
+                shutil.rmtree(index_dir, ignore_errors=False, onerror=None)
+        if not os.path.isdir(index_dir):
+            if not _build_search_index(account_dir, box_name):
+                return None
+
+    # intersect the posts containing each word
+    candidates = None
+    for word in words:
+        postings = _search_index_postings(index_dir, word)
+        if candidates is None:
+            candidates = postings
+        else:
+            matched = {}
+            for post_number in candidates:
+                if post_number in postings:
+                    matched[post_number] = True
+            candidates = matched
+        if not candidates:
+            return []
+
+    ranked = []
+    for post_name, published in \
+            _search_index_posts(index_dir, candidates).items():
+        ranked.append((published, post_name))
+    ranked.sort(reverse=True)
+
+    # the index may be out of date if posts have been edited,
+    # so check that the search text is still within each post
+    res = []
+    posts_dir = _search_index_posts_dir(account_dir, box_name)
+    for _, post_name in ranked:
+        post_filename = posts_dir + '/' + post_name
+        try:
+            with open(post_filename, 'r', encoding='utf-8') as fp_post:
+                data = fp_post.read().lower()
+        except OSError:
+            continue
+        not_found = False
+        for keyword in search_words:
+            if keyword not in data:
+                not_found = True
+                break
+        if not_found:
+            continue
+        res.append(post_filename)
+        if len(res) >= max_results:
+            break
+    return res
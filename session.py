@@ -19,6 +19,12 @@ from socket import error as SocketError
 import errno
 from http.client import HTTPConnection
 
+# number of hosts for which connections are kept open, so that they
+# can be reused when sending to the same instances again
+SESSION_POOL_HOSTS = 256
+# maximum number of open connections kept for each host
+SESSION_POOL_CONNECTIONS_PER_HOST = 4
+
 
 def create_session(proxy_type: str):
     session = None
@@ -39,6 +45,12 @@ def create_session(proxy_type: str):
         return None
     if not session:
         return None
+    pool_maxsize = SESSION_POOL_CONNECTIONS_PER_HOST
+    adapter = \
+        requests.adapters.HTTPAdapter(pool_connections=SESSION_POOL_HOSTS,
+                                      pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     if proxy_type == 'tor':
         session.proxies = {}
         session.proxies['http'] = 'socks5h://localhost:9050'
@@ -46,6 +46,9 @@ from siteactive import site_is_active
 from content import get_price_from_string
 from blocking import is_blocked
 from threads import begin_thread
+from sharesindex import shares_index_update
+from sharesindex import shares_index_expired
+from sharesindex import shares_index_price_range
 
 
 def _load_dfc_ids(base_dir: str, system_language: str,
@@ -154,6 +157,8 @@ def remove_shared_item(base_dir: str, nickname: str, domain: str,
         # remove the item itself
         del shares_json[item_id]
         save_json(shares_json, shares_filename)
+        handle = nickname + '@' + domain
+        shares_index_update(base_dir, shares_file_type, handle, shares_json)
     else:
         print('ERROR: share index "' + item_id +
               '" does not exist in ' + shares_filename)
@@ -393,6 +398,8 @@ def add_share(base_dir: str,
     }
 
     save_json(shares_json, shares_filename)
+    handle = nickname + '@' + domain
+    shares_index_update(base_dir, shares_file_type, handle, shares_json)
 
     _indicate_new_share_available(base_dir, http_prefix,
                                   nickname, domain, domain_full,
@@ -402,16 +409,15 @@ def add_share(base_dir: str,
 def expire_shares(base_dir: str) -> None:
     """Removes expired items from shares
     """
-    for _, dirs, _ in os.walk(base_dir + '/accounts'):
-        for account in dirs:
-            if not is_account_dir(account):
-                continue
-            nickname = account.split('@')[0]
-            domain = account.split('@')[1]
-            for shares_file_type in get_shares_files_list():
-                _expire_shares_for_account(base_dir, nickname, domain,
-                                           shares_file_type)
-        break
+    curr_time = int(time.time())
+    for shares_file_type in get_shares_files_list():
+        # only accounts with expired items need to be checked
+        handles = shares_index_expired(base_dir, shares_file_type, curr_time)
+        for handle in handles:
+            nickname = handle.split('@')[0]
+            domain = handle.split('@')[1]
+            _expire_shares_for_account(base_dir, nickname, domain,
+                                       shares_file_type)
 
 
 def _expire_shares_for_account(base_dir: str, nickname: str, domain: str,
@@ -433,6 +439,8 @@ def _expire_shares_for_account(base_dir: str, nickname: str, domain: str,
         if curr_time > item['expire']:
             delete_item_id.append(item_id)
     if not delete_item_id:
+        # the index was out of date
+        shares_index_update(base_dir, shares_file_type, handle, shares_json)
         return
     for item_id in delete_item_id:
         del shares_json[item_id]
@@ -447,6 +455,7 @@ def _expire_shares_for_account(base_dir: str, nickname: str, domain: str,
                     print('EX: _expire_shares_for_account unable to delete ' +
                           item_idfile + '.' + ext)
     save_json(shares_json, shares_filename)
+    shares_index_update(base_dir, shares_file_type, handle, shares_json)
 
 
 def get_shares_feed_for_person(base_dir: str,
@@ -1128,11 +1137,12 @@ def outbox_undo_share_upload(base_dir: str, nickname: str, domain: str,
 
 
 def _shares_catalog_params(path: str) -> (bool, float, float, str):
-    """Returns parameters when accessing the shares catalog
+    """Returns parameters when accessing the shares catalog.
+    Prices are None if no price range was given
     """
     today = False
-    min_price = 0
-    max_price = 9999999
+    min_price = None
+    max_price = None
     match_pattern = None
     if '?' not in path:
         return today, min_price, max_price, match_pattern
@@ -1279,65 +1289,69 @@ def shares_catalog_endpoint(base_dir: str, http_prefix: str,
     curr_date = datetime.datetime.utcnow()
     curr_date_str = curr_date.strftime("%Y-%m-%d")
 
-    for _, dirs, _ in os.walk(base_dir + '/accounts'):
-        for acct in dirs:
-            if not is_account_dir(acct):
+    if min_price is None and max_price is None:
+        # all items are included
+        accounts = {}
+        for _, dirs, _ in os.walk(base_dir + '/accounts'):
+            for acct in dirs:
+                if is_account_dir(acct):
+                    accounts[acct] = None
+            break
+    else:
+        # only the items within the price range need to be loaded
+        accounts = \
+            shares_index_price_range(base_dir, shares_file_type,
+                                     min_price, max_price)
+    for acct, item_ids in accounts.items():
+        nickname = acct.split('@')[0]
+        domain = acct.split('@')[1]
+        owner = local_actor_url(http_prefix, nickname, domain_full)
+
+        shares_filename = \
+            acct_dir(base_dir, nickname, domain) + '/' + \
+            shares_file_type + '.json'
+        if not os.path.isfile(shares_filename):
+            continue
+        shares_json = load_json(shares_filename, 1, 2)
+        if not shares_json:
+            continue
+
+        for item_id, item in shares_json.items():
+            if item_ids is not None and not item_ids.get(item_id):
                 continue
-            nickname = acct.split('@')[0]
-            domain = acct.split('@')[1]
-            owner = local_actor_url(http_prefix, nickname, domain_full)
-
-            shares_filename = \
-                acct_dir(base_dir, nickname, domain) + '/' + \
-                shares_file_type + '.json'
-            if not os.path.isfile(shares_filename):
+            if not item.get('dfcId'):
                 continue
-            print('Test 78363 ' + shares_filename)
-            shares_json = load_json(shares_filename, 1, 2)
-            if not shares_json:
+            if '#' not in item['dfcId']:
                 continue
-
-            for _, item in shares_json.items():
-                if not item.get('dfcId'):
+            if today:
+                if not item['published'].startswith(curr_date_str):
                     continue
-                if '#' not in item['dfcId']:
+            description = item['displayName'] + ': ' + item['summary']
+            if match_pattern:
+                if not re.match(match_pattern, description):
                     continue
-                if today:
-                    if not item['published'].startswith(curr_date_str):
-                        continue
-                if min_price is not None:
-                    if float(item['itemPrice']) < min_price:
-                        continue
-                if max_price is not None:
-                    if float(item['itemPrice']) > max_price:
-                        continue
-                description = item['displayName'] + ': ' + item['summary']
-                if match_pattern:
-                    if not re.match(match_pattern, description):
-                        continue
-
-                start_date_str = date_seconds_to_string(item['published'])
-                expire_date_str = date_seconds_to_string(item['expire'])
-                share_id = \
-                    _get_valid_shared_item_id(owner, item['displayName'])
-                if item['dfcId'].startswith('epicyon#'):
-                    dfc_id = "epicyon:" + item['dfcId'].split('#')[1]
-                else:
-                    dfc_id = "dfc-pt:" + item['dfcId'].split('#')[1]
-                price_str = item['itemPrice'] + ' ' + item['itemCurrency']
-                catalog_item = {
-                    "@id": share_id,
-                    "@type": "DFC:SuppliedProduct",
-                    "DFC:hasType": dfc_id,
-                    "DFC:startDate": start_date_str,
-                    "DFC:expiryDate": expire_date_str,
-                    "DFC:quantity": float(item['itemQty']),
-                    "DFC:price": price_str,
-                    "DFC:Image": item['imageUrl'],
-                    "DFC:description": description
-                }
-                endpoint['DFC:supplies'].append(catalog_item)
-        break
+
+            start_date_str = date_seconds_to_string(item['published'])
+            expire_date_str = date_seconds_to_string(item['expire'])
+            share_id = \
+                _get_valid_shared_item_id(owner, item['displayName'])
+            if item['dfcId'].startswith('epicyon#'):
+                dfc_id = "epicyon:" + item['dfcId'].split('#')[1]
+            else:
+                dfc_id = "dfc-pt:" + item['dfcId'].split('#')[1]
+            price_str = item['itemPrice'] + ' ' + item['itemCurrency']
+            catalog_item = {
+                "@id": share_id,
+                "@type": "DFC:SuppliedProduct",
+                "DFC:hasType": dfc_id,
+                "DFC:startDate": start_date_str,
+                "DFC:expiryDate": expire_date_str,
+                "DFC:quantity": float(item['itemQty']),
+                "DFC:price": price_str,
+                "DFC:Image": item['imageUrl'],
+                "DFC:description": description
+            }
+            endpoint['DFC:supplies'].append(catalog_item)
 
     return endpoint
 
@@ -1602,6 +1616,8 @@ def _update_federated_shares_cache(session, shared_items_federated_domains: [],
                     catalogs_dir + '/' + federated_domain_full + '.' + \
                     shares_file_type + '.json'
                 save_json(shares_json, shares_filename)
+                shares_index_update(base_dir, shares_file_type,
+                                    federated_domain_full, shares_json)
                 print('Converted shares catalog for ' + federated_domain_full)
         else:
             time.sleep(2)
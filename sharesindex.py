@@ -0,0 +1,354 @@
+__filename__ = "sharesindex.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Timeline"
+
+import os
+import math
+import json
+import shutil
+from indexlock import index_lock
+from searchindex import search_index_words
+from searchindex import search_index_endings
+from searchindex import MAX_SEARCH_WORD_LENGTH
+from utils import is_account_dir
+
+# An index of shared and wanted items, so that searching them, producing
+# the catalog and expiring old items doesn't need to load the shares of
+# every account and every federated catalog.
+# The source of each item is either an account handle, for items on
+# this instance, or the domain of a federated catalog.
+# Every ending of each word is indexed, up to a maximum length, so that
+# any part of a word can be found by matching the beginnings of the index
+# lines. The items of the sources which are found are then checked.
+# Index files within the words directory are named after the first two
+# characters of the word endings which they contain, with each line
+# containing a word ending and a source. The word endings of each source
+# are also stored so that only the changed ones need to be updated.
+# For accounts on this instance there are also price and expiry files
+# with one line per item, kept in ascending order.
+
+# width of the zero padded prices and expiry times, so that
+# the lines of the price and expiry files can be sorted
+SHARES_INDEX_VALUE_WIDTH = 14
+
+
+def _shares_index_dir(base_dir: str, shares_file_type: str) -> str:
+    """Returns the directory containing the index for shares or wanted items
+    """
+    return base_dir + '/sharesindex/' + shares_file_type
+
+
+def _shares_catalogs_dir(base_dir: str, shares_file_type: str) -> str:
+    """Returns the directory containing federated catalogs
+    """
+    if shares_file_type == 'shares':
+        return base_dir + '/cache/catalogs'
+    return base_dir + '/cache/wantedItems'
+
+
+def _share_words(shared_item: {}) -> []:
+    """Returns the endings of the words of a shared item which can
+    be searched
+    """
+    text = ''
+    for field_name in ('displayName', 'summary', 'category', 'location'):
+        if isinstance(shared_item.get(field_name), str):
+            text += shared_item[field_name] + ' '
+    return search_index_endings(search_index_words(text))
+
+
+def _read_index_lines(index_filename: str) -> []:
+    """Returns the lines of an index file
+    """
+    if not os.path.isfile(index_filename):
+        return []
+    try:
+        with open(index_filename, 'r', encoding='utf-8') as fp_index:
+            return fp_index.read().splitlines()
+    except OSError:
+        print('EX: _read_index_lines unable to read ' + index_filename)
+    return []
+
+
+def _write_index_lines(index_filename: str, lines: []) -> None:
+    """Writes the lines of an index file, or removes it if there are none
+    """
+    if not lines:
+        if os.path.isfile(index_filename):
+            try:
+                os.remove(index_filename)
+            except OSError:
+                print('EX: _write_index_lines unable to delete ' +
+                      index_filename)
+        return
+    try:
+        with open(index_filename, 'w+', encoding='utf-8') as fp_index:
+            fp_index.write('\n'.join(lines) + '\n')
+    except OSError:
+        print('EX: _write_index_lines unable to write ' + index_filename)
+
+
+def _update_sorted_index(index_filename: str, source: str,
+                         entries: []) -> None:
+    """Replaces the lines for a source within a price or expiry file.
+    Entries are tuples of a positive integer value and item id
+    """
+    source_str = '  ' + source + '  '
+    lines = []
+    for line in _read_index_lines(index_filename):
+        if source_str not in line:
+            lines.append(line)
+    for value, item_id in entries:
+        lines.append(str(value).zfill(SHARES_INDEX_VALUE_WIDTH) +
+                     source_str + item_id)
+    lines.sort()
+    _write_index_lines(index_filename, lines)
+
+
+def _index_source(index_dir: str, source: str, shares_json: {}) -> None:
+    """Replaces the index entries for the shared items of a source
+    """
+    words = {}
+    price_entries = []
+    expiry_entries = []
+    for item_id, shared_item in shares_json.items():
+        if not isinstance(shared_item, dict):
+            continue
+        for word in _share_words(shared_item):
+            words[word] = True
+        if '@' not in source or not item_id or \
+           ' ' in item_id or '\n' in item_id:
+            continue
+        # prices are stored in hundredths
+        price_str = str(shared_item.get('itemPrice'))
+        try:
+            price_float = float(price_str)
+            if math.isfinite(price_float) and price_float >= 0:
+                # very high prices are stored at the maximum width,
+                # so that the price file remains in order
+                price = min(int(round(price_float * 100)),
+                            10**SHARES_INDEX_VALUE_WIDTH - 1)
+                price_entries.append((price, item_id))
+        except (ValueError, OverflowError):
+            pass
+        if isinstance(shared_item.get('expire'), int):
+            if shared_item['expire'] >= 0:
+                expiry_entries.append((shared_item['expire'], item_id))
+
+    # only the words which have changed need to be updated
+    source_filename = index_dir + '/sources/' + source + '.txt'
+    prev_words = {}
+    for word in _read_index_lines(source_filename):
+        prev_words[word] = True
+    changed_keys = {}
+    for word in words:
+        if not prev_words.get(word):
+            changed_keys[word[:2]] = True
+    for word in prev_words:
+        if not words.get(word):
+            changed_keys[word[:2]] = True
+    source_ending = '  ' + source
+    for index_key in changed_keys:
+        words_filename = index_dir + '/words/' + index_key + '.txt'
+        lines = []
+        for line in _read_index_lines(words_filename):
+            if not line.endswith(source_ending):
+                lines.append(line)
+        for word in words:
+            if word.startswith(index_key):
+                lines.append(word + source_ending)
+        _write_index_lines(words_filename, lines)
+    _write_index_lines(source_filename, list(words.keys()))
+
+    if '@' in source:
+        _update_sorted_index(index_dir + '/price.txt', source, price_entries)
+        _update_sorted_index(index_dir + '/expiry.txt', source,
+                             expiry_entries)
+
+
+def _build_shares_index(base_dir: str, shares_file_type: str) -> bool:
+    """Creates the index for shares or wanted items from the
+    accounts on this instance and the federated catalogs
+    """
+    sources = {}
+    for _, dirs, _ in os.walk(base_dir + '/accounts'):
+        for handle in dirs:
+            if not is_account_dir(handle):
+                continue
+            shares_filename = base_dir + '/accounts/' + handle + '/' + \
+                shares_file_type + '.json'
+            if os.path.isfile(shares_filename):
+                sources[handle] = shares_filename
+        break
+    catalogs_dir = _shares_catalogs_dir(base_dir, shares_file_type)
+    if os.path.isdir(catalogs_dir):
+        for _, _, files in os.walk(catalogs_dir):
+            for fname in files:
+                if '#' in fname:
+                    continue
+                catalog_ending = '.' + shares_file_type + '.json'
+                if not fname.endswith(catalog_ending):
+                    continue
+                federated_domain = fname[:-len(catalog_ending)]
+                sources[federated_domain] = catalogs_dir + '/' + fname
+            break
+
+    # the index is written to a temporary directory first, so that
+    # a partially built index is never used
+    index_dir = _shares_index_dir(base_dir, shares_file_type)
+    new_index_dir = index_dir + '.new'
+    if os.path.isdir(new_index_dir):
+        shutil.rmtree(new_index_dir, ignore_errors=False, onerror=None)
+    os.makedirs(new_index_dir + '/words')
+    os.mkdir(new_index_dir + '/sources')
+    for source, shares_filename in sources.items():
+        try:
+            with open(shares_filename, 'r', encoding='utf-8') as fp_shares:
+                shares_json = json.loads(fp_shares.read())
+        except (OSError, ValueError):
+            print('EX: _build_shares_index unable to load ' +
+                  shares_filename)
+            continue
+        if isinstance(shares_json, dict):
+            _index_source(new_index_dir, source, shares_json)
+    try:
+        os.rename(new_index_dir, index_dir)
+    except OSError:
+        print('EX: _build_shares_index unable to rename ' + new_index_dir)
+        return False
+    return True
+
+
+def _shares_index_ready(base_dir: str, shares_file_type: str) -> str:
+    """Returns the index directory, building the index if needed
+    """
+    index_dir = _shares_index_dir(base_dir, shares_file_type)
+    with index_lock(index_dir):
+        if not os.path.isdir(index_dir):
+            if not _build_shares_index(base_dir, shares_file_type):
+                return None
+    return index_dir
+
+
+def shares_index_update(base_dir: str, shares_file_type: str,
+                        source: str, shares_json: {}) -> None:
+    """Updates the index after the shares of an account or a federated
+    catalog have been saved. If the index has not been built yet then
+    it will be when it is first used
+    """
+    index_dir = _shares_index_dir(base_dir, shares_file_type)
+    with index_lock(index_dir):
+        if not os.path.isdir(index_dir):
+            return
+        _index_source(index_dir, source, shares_json)
+
+
+def shares_index_search(base_dir: str, shares_file_type: str,
+                        search_str_lower_list: []) -> []:
+    """Returns the sources having shared items containing words which
+    contain any of the search terms, accounts first.
+    Returns None if the index can't be used for this search
+    """
+    terms = []
+    for search_substr in search_str_lower_list:
+        term_words = search_index_words(search_substr)
+        if not term_words:
+            return None
+        terms.append(term_words)
+    index_dir = _shares_index_ready(base_dir, shares_file_type)
+    if not index_dir:
+        return None
+
+    sources = {}
+    for term_words in terms:
+        # each word of a search term must be present
+        term_sources = None
+        for word in term_words:
+            word = word[:MAX_SEARCH_WORD_LENGTH]
+            word_sources = {}
+            words_filename = index_dir + '/words/' + word[:2] + '.txt'
+            for line in _read_index_lines(words_filename):
+                if line.startswith(word) and '  ' in line:
+                    word_sources[line.split('  ')[1]] = True
+            if term_sources is None:
+                term_sources = word_sources
+            else:
+                matched = {}
+                for source in term_sources:
+                    if word_sources.get(source):
+                        matched[source] = True
+                term_sources = matched
+            if not term_sources:
+                break
+        if term_sources:
+            sources.update(term_sources)
+
+    account_sources = []
+    federated_sources = []
+    for source in sources:
+        if '@' in source:
+            account_sources.append(source)
+        else:
+            federated_sources.append(source)
+    account_sources.sort()
+    federated_sources.sort()
+    return account_sources + federated_sources
+
+
+def shares_index_price_range(base_dir: str, shares_file_type: str,
+                             min_price: float, max_price: float) -> {}:
+    """Returns the ids of items on this instance with prices within the
+    given range, indexed by account handle
+    """
+    accounts = {}
+    index_dir = _shares_index_ready(base_dir, shares_file_type)
+    if not index_dir:
+        return accounts
+    for line in _read_index_lines(index_dir + '/price.txt'):
+        fields = line.split('  ')
+        if len(fields) != 3:
+            continue
+        price = int(fields[0]) / 100
+        if min_price is not None and price < min_price:
+            continue
+        if max_price is not None and price > max_price:
+            # prices are in ascending order
+            break
+        if not accounts.get(fields[1]):
+            accounts[fields[1]] = {}
+        accounts[fields[1]][fields[2]] = True
+    return accounts
+
+
+def shares_index_expired(base_dir: str, shares_file_type: str,
+                         curr_time: int) -> []:
+    """Returns the handles of accounts on this instance having items
+    which expired before the given time
+    """
+    handles = []
+    index_dir = _shares_index_ready(base_dir, shares_file_type)
+    if not index_dir:
+        return handles
+    expiry_filename = index_dir + '/expiry.txt'
+    if not os.path.isfile(expiry_filename):
+        return handles
+    try:
+        with open(expiry_filename, 'r', encoding='utf-8') as fp_expiry:
+            # items are in order of expiry, so only the
+            # expired ones need to be read
+            for line in fp_expiry:
+                fields = line.split('  ')
+                if len(fields) != 3:
+                    continue
+                if int(fields[0]) >= curr_time:
+                    break
+                if fields[1] not in handles:
+                    handles.append(fields[1])
+    except OSError:
+        print('EX: shares_index_expired unable to read ' + expiry_filename)
+    return handles
@@ -9,9 +9,18 @@ __status__ = "Production"
 __module_group__ = "Core"
 
 import http.client
+import time
 from urllib.parse import urlparse
 import ssl
 
+# seconds after which an active site is checked again
+SITE_ACTIVE_RECHECK_SECS = 60 * 60
+# seconds before an inactive site is first checked again.
+# This doubles after each failed check
+SITE_INACTIVE_BACKOFF_SECS = 60 * 5
+# maximum seconds before an inactive site is checked again
+SITE_INACTIVE_MAX_BACKOFF_SECS = 60 * 60 * 24
+
 
 class Result:
     """Holds result of an URL check.
@@ -124,6 +133,40 @@ def site_is_active(url: str, timeout: int) -> bool:
     return False
 
 
+def site_is_active_cached(url: str, timeout: int,
+                          sites_liveness: {}) -> bool:
+    """Returns true if the given url is resolvable, using the result of
+    a previous check where possible. Sites which are inactive are checked
+    again with an increasing backoff
+    """
+    if sites_liveness is None:
+        return site_is_active(url, timeout)
+    curr_time = int(time.time())
+    liveness = sites_liveness.get(url)
+    if liveness:
+        if curr_time < liveness['nextCheck']:
+            return liveness['active']
+    if site_is_active(url, timeout):
+        sites_liveness[url] = {
+            "active": True,
+            "failures": 0,
+            "nextCheck": curr_time + SITE_ACTIVE_RECHECK_SECS
+        }
+        return True
+    failures = 1
+    if liveness:
+        failures = liveness['failures'] + 1
+    backoff_secs = SITE_INACTIVE_BACKOFF_SECS * (2 ** (failures - 1))
+    if backoff_secs > SITE_INACTIVE_MAX_BACKOFF_SECS:
+        backoff_secs = SITE_INACTIVE_MAX_BACKOFF_SECS
+    sites_liveness[url] = {
+        "active": False,
+        "failures": failures,
+        "nextCheck": curr_time + backoff_secs
+    }
+    return False
+
+
 def referer_is_active(http_prefix: str,
                       referer_domain: str, ua_str: str,
                       calling_site_timeout: int) -> bool:
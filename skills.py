@@ -18,6 +18,7 @@ from utils import get_nickname_from_actor
 from utils import get_domain_from_actor
 from utils import load_json
 from utils import get_occupation_skills
+from utils import get_skills_from_list
 from utils import set_occupation_skills_list
 from utils import acct_dir
 from utils import local_actor_url
@@ -35,25 +36,6 @@ def set_skills_from_dict(actor_json: {}, skills_dict: {}) -> []:
     return skills_list
 
 
-def get_skills_from_list(skills_list: []) -> {}:
-    """Returns a dict of skills from a list
-    """
-    if isinstance(skills_list, list):
-        skills_list2 = skills_list
-    else:
-        skills_list2 = skills_list.split(',')
-    skills_dict = {}
-    for skill in skills_list2:
-        if ':' not in skill:
-            continue
-        name = skill.split(':')[0].strip().lower()
-        value_str = skill.split(':')[1]
-        if not value_str.isdigit():
-            continue
-        skills_dict[name] = int(value_str)
-    return skills_dict
-
-
 def actor_skill_value(actor_json: {}, skill_name: str) -> int:
     """Returns The skill level from an actor
     """
@@ -0,0 +1,282 @@
+__filename__ = "skillsindex.py"
+__author__ = "Bob Mottram"
+__license__ = "AGPL3+"
+__version__ = "1.3.0"
+__maintainer__ = "Bob Mottram"
+__email__ = "bob@libreserver.org"
+__status__ = "Production"
+__module_group__ = "Profile Metadata"
+
+import os
+import shutil
+from indexlock import index_lock
+from utils import load_json
+from utils import is_account_dir
+from utils import get_occupation_skills
+from utils import get_skills_from_list
+from utils import get_nickname_from_actor
+from utils import get_domain_from_actor
+
+# An index of the actors having each skill, so that a skills search
+# doesn't need to load every actor.
+# Each skill has a file containing one line per actor, in the same
+# format as skills search results: level;actor;name;avatar url
+# The skills which were indexed for each actor are also stored,
+# so that they can be removed when the actor changes.
+
+# longer skill names are not indexed, since they
+# could exceed the maximum length of a filename
+MAX_SKILL_NAME_LENGTH = 42
+
+
+def _skills_index_dir(base_dir: str) -> str:
+    """Returns the directory containing the skills index
+    """
+    return base_dir + '/skills'
+
+
+def _valid_skill_name(skill_name: str) -> bool:
+    """Can the given skill name be used as an index filename?
+    """
+    if not skill_name or skill_name.startswith('.'):
+        return False
+    if len(skill_name) > MAX_SKILL_NAME_LENGTH:
+        return False
+    if '/' in skill_name or '\\' in skill_name or '\0' in skill_name:
+        return False
+    return True
+
+
+def _skill_index_filename(index_dir: str, skill_name: str) -> str:
+    """Returns the index file for the given skill
+    """
+    return index_dir + '/' + skill_name + '.txt'
+
+
+def _skill_actor_filename(index_dir: str, actor: str) -> str:
+    """Returns the file containing the indexed skills for an actor
+    """
+    return index_dir + '/actors/' + actor.replace('/', '#') + '.txt'
+
+
+def _skill_index_entries(actor_json: {}) -> {}:
+    """Returns the index lines for an actor, indexed by skill name
+    """
+    entries = {}
+    if not actor_json.get('id') or \
+       not actor_json.get('name') or \
+       not isinstance(actor_json.get('icon'), dict):
+        return entries
+    if not actor_json['icon'].get('url'):
+        return entries
+    actor = actor_json['id']
+    skills_list = get_occupation_skills(actor_json)
+    skills = get_skills_from_list(skills_list)
+    for skill_name, skill_level in skills.items():
+        if not _valid_skill_name(skill_name):
+            continue
+        skill_level_str = str(skill_level)
+        if skill_level < 100:
+            skill_level_str = '0' + skill_level_str
+        if skill_level < 10:
+            skill_level_str = '0' + skill_level_str
+        entries[skill_name] = \
+            skill_level_str + ';' + actor + ';' + \
+            actor_json['name'] + ';' + actor_json['icon']['url']
+    return entries
+
+
+def _build_skills_index(base_dir: str) -> bool:
+    """Creates the skills index from instance accounts and
+    the actors cache
+    """
+    actor_filenames = []
+    for subdir, _, files in os.walk(base_dir + '/accounts'):
+        for fname in files:
+            if fname.endswith('.json') and is_account_dir(fname):
+                actor_filenames.append(os.path.join(subdir, fname))
+        break
+    for subdir, _, files in os.walk(base_dir + '/cache/actors'):
+        for fname in files:
+            if fname.endswith('.json'):
+                actor_filenames.append(os.path.join(subdir, fname))
+        break
+
+    skill_lines = {}
+    actor_skills = {}
+    for actor_filename in actor_filenames:
+        actor_json = load_json(actor_filename)
+        if not actor_json:
+            continue
+        if isinstance(actor_json.get('actor'), dict):
+            actor_json = actor_json['actor']
+        entries = _skill_index_entries(actor_json)
+        if not entries:
+            continue
+        actor_skills[actor_json['id']] = entries.keys()
+        for skill_name, index_str in entries.items():
+            if not skill_lines.get(skill_name):
+                skill_lines[skill_name] = {}
+            skill_lines[skill_name][actor_json['id']] = index_str
+
+    # the index is written to a temporary directory first, so that
+    # a partially built index is never searched
+    index_dir = _skills_index_dir(base_dir)
+    new_index_dir = index_dir + '.new'
+    if os.path.isdir(new_index_dir):
+        shutil.rmtree(new_index_dir, ignore_errors=False, onerror=None)
+    os.makedirs(new_index_dir + '/actors')
+    # a file which can't be written is skipped, so that
+    # one remote actor can't prevent the index from being built
+    for skill_name, lines in skill_lines.items():
+        skill_filename = _skill_index_filename(new_index_dir, skill_name)
+        try:
+            with open(skill_filename, 'w+', encoding='utf-8') as fp_skill:
+                fp_skill.write('\n'.join(lines.values()) + '\n')
+        except OSError:
+            print('EX: _build_skills_index unable to write ' +
+                  skill_filename)
+    for actor, skill_names in actor_skills.items():
+        actor_filename = _skill_actor_filename(new_index_dir, actor)
+        try:
+            with open(actor_filename, 'w+', encoding='utf-8') as fp_actor:
+                fp_actor.write('\n'.join(skill_names) + '\n')
+        except OSError:
+            print('EX: _build_skills_index unable to write ' +
+                  actor_filename)
+    try:
+        os.rename(new_index_dir, index_dir)
+    except OSError:
+        print('EX: _build_skills_index unable to rename ' + new_index_dir)
+        return False
+    return True
+
+
+def _update_skill_index_file(skill_filename: str, actor: str,
+                             index_str: str) -> None:
+    """Replaces the line for an actor within the index file for a skill.
+    If index_str is empty then the actor is removed
+    """
+    actor_str = ';' + actor + ';'
+    with index_lock(skill_filename):
+        lines = []
+        if os.path.isfile(skill_filename):
+            try:
+                with open(skill_filename, 'r', encoding='utf-8') as fp_skill:
+                    lines = fp_skill.read().splitlines()
+            except OSError:
+                print('EX: _update_skill_index_file unable to read ' +
+                      skill_filename)
+                return
+        if index_str and index_str in lines:
+            return
+        new_lines = []
+        for line in lines:
+            if actor_str not in line:
+                new_lines.append(line)
+        if index_str:
+            new_lines.append(index_str)
+        if not new_lines:
+            try:
+                os.remove(skill_filename)
+            except OSError:
+                print('EX: _update_skill_index_file unable to delete ' +
+                      skill_filename)
+            return
+        try:
+            with open(skill_filename, 'w+', encoding='utf-8') as fp_skill:
+                fp_skill.write('\n'.join(new_lines) + '\n')
+        except OSError:
+            print('EX: _update_skill_index_file unable to write ' +
+                  skill_filename)
+
+
+def skills_index_update(base_dir: str, actor: str, actor_json: {}) -> None:
+    """Updates the skills index when an actor is stored.
+    If actor_json is None then the actor is removed from the index.
+    If the index has not been built yet then it will be when skills
+    are first searched
+    """
+    index_dir = _skills_index_dir(base_dir)
+    if not os.path.isdir(index_dir):
+        return
+    entries = {}
+    if actor_json:
+        entries = _skill_index_entries(actor_json)
+    actor_filename = _skill_actor_filename(index_dir, actor)
+    if not entries and not os.path.isfile(actor_filename):
+        # most actors don't have any skills
+        return
+
+    with index_lock(actor_filename):
+        prev_skill_names = []
+        if os.path.isfile(actor_filename):
+            try:
+                with open(actor_filename, 'r', encoding='utf-8') as fp_actor:
+                    prev_skill_names = fp_actor.read().splitlines()
+            except OSError:
+                print('EX: skills_index_update unable to read ' +
+                      actor_filename)
+
+        for skill_name in prev_skill_names:
+            if entries.get(skill_name) or not _valid_skill_name(skill_name):
+                continue
+            skill_filename = _skill_index_filename(index_dir, skill_name)
+            _update_skill_index_file(skill_filename, actor, '')
+        for skill_name, index_str in entries.items():
+            skill_filename = _skill_index_filename(index_dir, skill_name)
+            _update_skill_index_file(skill_filename, actor, index_str)
+
+        if not entries:
+            try:
+                os.remove(actor_filename)
+            except OSError:
+                print('EX: skills_index_update unable to delete ' +
+                      actor_filename)
+            return
+        try:
+            with open(actor_filename, 'w+', encoding='utf-8') as fp_actor:
+                fp_actor.write('\n'.join(entries.keys()) + '\n')
+        except OSError:
+            print('EX: skills_index_update unable to write ' + actor_filename)
+
+
+def skills_index_search(base_dir: str, skillsearch: str,
+                        instance_only: bool) -> []:
+    """Returns skills search results for the given skill name,
+    in the format level;actor;name;avatar url
+    """
+    index_dir = _skills_index_dir(base_dir)
+    with index_lock(index_dir):
+        if not os.path.isdir(index_dir):
+            if not _build_skills_index(base_dir):
+                return []
+
+    results = []
+    for fname in os.listdir(index_dir):
+        if not fname.endswith('.txt'):
+            continue
+        skill_name = fname[:-len('.txt')]
+        if not (skill_name in skillsearch or skillsearch in skill_name):
+            continue
+        skill_filename = index_dir + '/' + fname
+        try:
+            with open(skill_filename, 'r', encoding='utf-8') as fp_skill:
+                lines = fp_skill.read().splitlines()
+        except OSError:
+            print('EX: skills_index_search unable to read ' + skill_filename)
+            continue
+        for index_str in lines:
+            if not index_str or index_str in results:
+                continue
+            if instance_only:
+                actor = index_str.split(';')[1]
+                nickname = get_nickname_from_actor(actor)
+                domain, _ = get_domain_from_actor(actor)
+                if not nickname or not domain:
+                    continue
+                if not os.path.isfile(base_dir + '/accounts/' +
+                                      nickname + '@' + domain + '.json'):
+                    continue
+            results.append(index_str)
+    return results
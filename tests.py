@@ -16,12 +16,16 @@ from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric import utils as hazutils
 import time
 import os
+import io
+import socket
 import shutil
 import json
 import datetime
 from shutil import copyfile
 from random import randint
 from time import gmtime, strftime
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 from pprint import pprint
 from httpsig import get_digest_algorithm_from_headers
 from httpsig import get_digest_prefix
@@ -29,14 +33,31 @@ from httpsig import create_signed_header
 from httpsig import sign_post_headers
 from httpsig import sign_post_headers_new
 from httpsig import verify_post_headers
+from httpsig import get_public_key_from_cache
+from httpsig import remove_public_keys_from_cache
 from httpsig import message_content_digest
 from cache import store_person_in_cache
 from cache import get_person_from_cache
+from cache import set_person_cache_limit
+from cache import person_cache_stats
+from cache import expire_person_cache
 from threads import thread_with_trace
 from daemon import run_daemon
+from daemon import PubServer
 from session import create_session
 from session import get_json
+from posts import queue_delivery
+from posts import send_signed_json
+from posts import process_delivery_queue
+from posts import thread_send_post
 from posts import get_actor_from_in_reply_to
+from boxindex import box_index_lines
+from boxindex import box_index_add
+from boxindex import box_index_exists
+from boxindex import box_index_contains_text
+from boxindex import box_index_create
+from boxindex import box_index_truncate
+from boxindex import migrate_box_indexes
 from posts import regenerate_index_for_box
 from posts import remove_post_interactions
 from posts import get_mentioned_people
@@ -54,7 +75,11 @@ from follow import clear_followers
 from follow import send_follow_request_via_server
 from follow import send_unfollow_request_via_server
 from siteactive import site_is_active
+from siteactive import site_is_active_cached
 from utils import remove_inverted_text
+from utils import locate_post
+from utils import update_post_location
+from utils import remove_post_location
 from utils import remove_square_capitals
 from utils import standardize_text
 from utils import remove_eol
@@ -81,6 +106,11 @@ from utils import valid_nickname
 from utils import first_paragraph_from_string
 from utils import remove_id_ending
 from utils import update_recent_posts_cache
+from utils import recent_posts_cache_summary
+from utils import remove_from_recent_posts_cache
+from utils import get_timeline_page
+from utils import store_timeline_page
+from utils import clear_timeline_pages
 from utils import follow_person
 from utils import get_nickname_from_actor
 from utils import get_domain_from_actor
@@ -96,6 +126,7 @@ from utils import acct_dir
 from pgp import extract_pgp_public_key
 from pgp import pgp_public_key_upload
 from utils import contains_pgp_public_key
+from utils import person_cache_pub_keys
 from follow import add_follower_of_person
 from follow import unfollow_account
 from follow import unfollower_of_account
@@ -116,6 +147,17 @@ from auth import constant_time_string_check
 from auth import create_basic_auth_header
 from auth import authorize_basic
 from auth import store_basic_credentials
+from auth import remove_password
+from admission import ADMISSION_BUDGETS
+from admission import ADMISSION_QUEUE_COST
+from admission import admission_post_type
+from admission import admission_client
+from admission import admission_reverse_proxies
+from admission import admit_request
+from routes import STATIC_GET_ROUTES
+from routes import static_get_route
+from routes import users_get_route
+from routes import post_route
 from like import like_post
 from like import send_like_via_server
 from reaction import reaction_post
@@ -132,11 +174,16 @@ from media import get_attachment_media_type
 from delete import send_delete_via_server
 from inbox import json_post_allows_comments
 from inbox import valid_inbox
+from inbox import inbox_queue_ready_items
 from inbox import valid_inbox_filenames
 from inbox import cache_svg_images
 from categories import guess_hashtag_category
 from content import combine_textarea_lines
 from content import detect_dogwhistles
+from filters import is_filtered_globally
+from matcher import build_matcher
+from matcher import matcher_contains
+from matcher import matcher_find
 from content import remove_script
 from content import create_edits_html
 from content import content_diff
@@ -147,6 +194,7 @@ from content import get_price_from_string
 from content import limit_repeated_words
 from content import switch_words
 from content import extract_text_fields_in_post
+from content import receive_media_in_form_post
 from content import html_replace_email_quote
 from content import html_replace_quote_marks
 from content import dangerous_css
@@ -163,9 +211,11 @@ from theme import set_css_param
 from theme import scan_themes_for_scripts
 from linked_data_sig import generate_json_signature
 from linked_data_sig import verify_json_signature
+from pyjsonld import normalize
 from newsdaemon import hashtag_rule_tree
 from newsdaemon import hashtag_rule_resolve
 from newswire import get_link_from_rss_item
+from newswire import get_dict_from_newswire
 from newswire import xml_podcast_to_dict
 from newswire import get_newswire_tags
 from newswire import parse_feed_date
@@ -188,10 +238,36 @@ from shares import update_shared_item_federation_token
 from shares import merge_shared_item_tokens
 from shares import send_share_via_server
 from shares import get_shared_items_catalog_via_server
+from shares import expire_shares
+from shares import remove_shared_item
+from shares import shares_catalog_endpoint
 from blocking import load_cw_lists
+from blocking import is_blocked
+from blocking import is_blocked_domain
+from blocking import add_block
+from blocking import remove_block
+from blocking import add_global_block
+from blocking import remove_global_block
 from blocking import add_cw_from_lists
 from happening import dav_month_via_server
 from happening import dav_day_via_server
+from happening import save_event_post
+from posts import save_post_to_box
+from utils import search_box_posts
+from searchindex import search_index_remove
+from hashtagindex import hashtag_index_add
+from hashtagindex import hashtag_index_count
+from hashtagindex import hashtag_index_lines
+from hashtagindex import hashtag_day_counts
+from hashtagindex import remove_old_hashtag_indexes
+from skillsindex import skills_index_search
+from sharesindex import shares_index_search
+from sharesindex import shares_index_price_range
+from sharesindex import shares_index_expired
+from sharesindex import shares_index_update
+from happening import get_calendar_events
+from happening import get_month_events_icalendar
+from happening import day_events_check
 from webapp_theme_designer import color_contrast
 from maps import get_map_links_from_post_content
 from maps import geocoords_from_map_link
@@ -629,6 +705,24 @@ def _test_httpsig_base(with_digest: bool, base_dir: str):
     assert verify_post_headers(http_prefix, public_key_pem, headers,
                                boxpath, getreq_method, None,
                                message_body_json_str, debug)
+
+    # verify again using the cache of parsed public keys
+    pub_key_cache = {}
+    for _ in range(2):
+        assert verify_post_headers(http_prefix, public_key_pem, headers,
+                                   boxpath, getreq_method, None,
+                                   message_body_json_str, False, False,
+                                   pub_key_cache)
+    assert len(pub_key_cache) == 1
+    key_id = list(pub_key_cache.keys())[0]
+    assert key_id.endswith('/users/' + nickname + '#main-key')
+    parsed_key = pub_key_cache[key_id]['key']
+    assert get_public_key_from_cache(public_key_pem, key_id,
+                                     pub_key_cache) is parsed_key
+    remove_public_keys_from_cache(pub_key_cache,
+                                  key_id.replace('#main-key', ''))
+    assert not pub_key_cache
+
     if with_digest:
         # everything correct except for content-length
         headers['content-length'] = str(content_length + 2)
@@ -693,6 +787,78 @@ def _test_cache():
     assert result['test'] == 'This is a test'
 
 
+def _test_person_cache_pub_keys():
+    print('test_person_cache_pub_keys')
+    person_cache = {}
+    person_url = 'https://somedomain/users/alice'
+    person_json = {
+        "id": person_url,
+        "publicKey": {
+            "publicKeyPem": "first key"
+        }
+    }
+    store_person_in_cache(None, person_url, person_json, person_cache, False)
+    pub_key_cache = person_cache_pub_keys(person_cache)
+    pub_key_cache[person_url + '#main-key'] = {
+        "pem": "first key",
+        "key": None,
+        "timestamp": 0
+    }
+    # storing the same key again doesn't invalidate the parsed key
+    store_person_in_cache(None, person_url, person_json, person_cache, False)
+    assert pub_key_cache.get(person_url + '#main-key')
+    # an actor update with a new key does
+    person_json = {
+        "id": person_url,
+        "publicKey": {
+            "publicKeyPem": "second key"
+        }
+    }
+    store_person_in_cache(None, person_url, person_json, person_cache, False)
+    assert not pub_key_cache.get(person_url + '#main-key')
+
+
+def _test_person_cache_lru():
+    print('test_person_cache_lru')
+    person_cache = {}
+    set_person_cache_limit(person_cache, 2)
+    for name in ('alice', 'bob'):
+        person_url = 'https://somedomain/users/' + name
+        person_json = {
+            "id": person_url
+        }
+        store_person_in_cache(None, person_url, person_json,
+                              person_cache, False)
+    # using alice makes bob the least recently used
+    assert get_person_from_cache(None, 'https://somedomain/users/alice',
+                                 person_cache)
+    person_url = 'https://somedomain/users/carol'
+    person_json = {
+        "id": person_url
+    }
+    store_person_in_cache(None, person_url, person_json, person_cache, False)
+    assert not get_person_from_cache(None, 'https://somedomain/users/bob',
+                                     person_cache)
+    assert get_person_from_cache(None, 'https://somedomain/users/alice',
+                                 person_cache)
+    assert get_person_from_cache(None, 'https://somedomain/users/carol',
+                                 person_cache)
+    stats = person_cache_stats(person_cache)
+    assert stats['entries'] == 2
+    assert stats['maxEntries'] == 2
+    assert stats['hits'] == 3
+    assert stats['misses'] == 1
+    assert stats['evictions'] == 1
+
+    # only old actors are expired
+    person_cache['actors']['https://somedomain/users/alice']['timestamp'] = 0
+    expire_person_cache(person_cache)
+    stats = person_cache_stats(person_cache)
+    assert stats['entries'] == 1
+    assert get_person_from_cache(None, 'https://somedomain/users/carol',
+                                 person_cache)
+
+
 def _test_threads_function(param1: str, param2: str):
     for _ in range(10000):
         time.sleep(2)
@@ -845,9 +1011,13 @@ def create_server_alice(path: str, domain: str, port: int,
     clacks = None
     map_format = 'gpx'
     max_hashtags = 20
+    inbox_queue_workers = 1
+    max_person_cache = 4096
+    delivery_max_age_hrs = 48
     print('Server running: Alice')
-    run_daemon(max_hashtags, map_format,
-               clacks, preferred_podcast_formats,
+    run_daemon(delivery_max_age_hrs, max_person_cache,
+               inbox_queue_workers, max_hashtags,
+               map_format, clacks, preferred_podcast_formats,
                check_actor_timeout,
                crawlers_allowed,
                dyslexic_font,
@@ -1009,9 +1179,13 @@ def create_server_bob(path: str, domain: str, port: int,
     clacks = None
     map_format = 'gpx'
     max_hashtags = 20
+    inbox_queue_workers = 1
+    max_person_cache = 4096
+    delivery_max_age_hrs = 48
     print('Server running: Bob')
-    run_daemon(max_hashtags, map_format,
-               clacks, preferred_podcast_formats,
+    run_daemon(delivery_max_age_hrs, max_person_cache,
+               inbox_queue_workers, max_hashtags,
+               map_format, clacks, preferred_podcast_formats,
                check_actor_timeout,
                crawlers_allowed,
                dyslexic_font,
@@ -1095,9 +1269,13 @@ def create_server_eve(path: str, domain: str, port: int, federation_list: [],
     clacks = None
     map_format = 'gpx'
     max_hashtags = 20
+    inbox_queue_workers = 1
+    max_person_cache = 4096
+    delivery_max_age_hrs = 48
     print('Server running: Eve')
-    run_daemon(max_hashtags, map_format,
-               clacks, preferred_podcast_formats,
+    run_daemon(delivery_max_age_hrs, max_person_cache,
+               inbox_queue_workers, max_hashtags,
+               map_format, clacks, preferred_podcast_formats,
                check_actor_timeout,
                crawlers_allowed,
                dyslexic_font,
@@ -1183,9 +1361,13 @@ def create_server_group(path: str, domain: str, port: int,
     clacks = None
     map_format = 'gpx'
     max_hashtags = 20
+    inbox_queue_workers = 1
+    max_person_cache = 4096
+    delivery_max_age_hrs = 48
     print('Server running: Group')
-    run_daemon(max_hashtags, map_format,
-               clacks, preferred_podcast_formats,
+    run_daemon(delivery_max_age_hrs, max_person_cache,
+               inbox_queue_workers, max_hashtags,
+               map_format, clacks, preferred_podcast_formats,
                check_actor_timeout,
                crawlers_allowed,
                dyslexic_font,
@@ -2962,24 +3144,37 @@ def _test_authentication(base_dir: str) -> None:
     assert store_basic_credentials(base_dir, 'badnick', 'otherpa:ss') is False
     assert store_basic_credentials(base_dir, nickname, password)
 
+    auth_cache = {}
     auth_header = create_basic_auth_header(nickname, password)
     assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
-                           auth_header, False)
+                           auth_header, False, auth_cache)
+    assert auth_cache['verified'].get(nickname)
+    assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
+                           auth_header, False, auth_cache)
     assert authorize_basic(base_dir, '/users/' + nickname,
-                           auth_header, False) is False
+                           auth_header, False, auth_cache) is False
     assert authorize_basic(base_dir, '/users/othernick/inbox',
-                           auth_header, False) is False
+                           auth_header, False, auth_cache) is False
 
     auth_header = create_basic_auth_header(nickname, password + '1')
     assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
-                           auth_header, False) is False
+                           auth_header, False, auth_cache) is False
 
+    # changing the password invalidates the previously verified one
+    old_auth_header = create_basic_auth_header(nickname, password)
     password = 'someOtherPassword'
     assert store_basic_credentials(base_dir, nickname, password)
+    assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
+                           old_auth_header, False, auth_cache) is False
 
     auth_header = create_basic_auth_header(nickname, password)
     assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
-                           auth_header, False)
+                           auth_header, False, auth_cache)
+
+    remove_password(base_dir, nickname)
+    assert authorize_basic(base_dir, '/users/' + nickname + '/inbox',
+                           auth_header, False, auth_cache) is False
+    assert not auth_cache['verified'].get(nickname)
 
     os.chdir(curr_dir)
     shutil.rmtree(base_dir, ignore_errors=False, onerror=None)
@@ -3858,8 +4053,31 @@ def _test_recent_posts_cache():
         update_recent_posts_cache(recent_posts_cache, max_recent_posts,
                                   post_json_object, html_str)
     assert len(recent_posts_cache['index']) == max_recent_posts
-    assert len(recent_posts_cache['json'].items()) == max_recent_posts
+    assert len(recent_posts_cache['boxes'].items()) == max_recent_posts
     assert len(recent_posts_cache['html'].items()) == max_recent_posts
+    assert len(recent_posts_cache['posts'].items()) == max_recent_posts
+    # the oldest posts were evicted
+    first_id = 'https:##somesite.whatever#users#someuser#statuses#0'
+    last_id = 'https:##somesite.whatever#users#someuser#statuses#4'
+    assert first_id not in recent_posts_cache['index']
+    assert recent_posts_cache['posts'][last_id]['id'] == \
+        "https://somesite.whatever/users/someuser/statuses/4"
+    summary = recent_posts_cache_summary(recent_posts_cache)
+    assert summary['evictions'] == 2
+    assert summary['entries'] == max_recent_posts
+    # the size includes the parsed copy of each post
+    post_str = json.dumps(recent_posts_cache['posts'][last_id])
+    assert summary['bytes'] > \
+        max_recent_posts * (len(post_str) + len(html_str)) * 2
+    # the cached post is a copy, which isn't changed by the caller
+    post_json_object['id'] += '/changed'
+    assert recent_posts_cache['posts'][last_id]['id'] == \
+        "https://somesite.whatever/users/someuser/statuses/4"
+    assert remove_from_recent_posts_cache(recent_posts_cache, last_id)
+    assert not remove_from_recent_posts_cache(recent_posts_cache, last_id)
+    assert last_id not in recent_posts_cache['html']
+    summary2 = recent_posts_cache_summary(recent_posts_cache)
+    assert summary2['bytes'] < summary['bytes']
 
 
 def _test_remove_txt_formatting():
@@ -3962,6 +4180,113 @@ def _test_jsonld():
     print('json-ld tests passed')
 
 
+def _test_jsonld_benchmark():
+    print("test_jsonld_benchmark")
+    mastodon_activity = {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            "https://w3id.org/security/v1",
+            {
+                "manuallyApprovesFollowers": "as:manuallyApprovesFollowers",
+                "toot": "http://joinmastodon.org/ns#",
+                "sensitive": "as:sensitive",
+                "Hashtag": "as:Hashtag",
+                "ostatus": "http://ostatus.org#",
+                "atomUri": "ostatus:atomUri",
+                "inReplyToAtomUri": "ostatus:inReplyToAtomUri",
+                "conversation": "ostatus:conversation",
+                "blurhash": "toot:blurhash",
+                "focalPoint": {
+                    "@container": "@list",
+                    "@id": "toot:focalPoint"
+                }
+            }
+        ],
+        "id": "https://mastodon.example/users/alice/statuses/1/activity",
+        "type": "Create",
+        "actor": "https://mastodon.example/users/alice",
+        "published": "2022-06-01T12:00:00Z",
+        "to": ["https://www.w3.org/ns/activitystreams#Public"],
+        "cc": ["https://mastodon.example/users/alice/followers"],
+        "object": {
+            "id": "https://mastodon.example/users/alice/statuses/1",
+            "type": "Note",
+            "summary": None,
+            "inReplyTo": None,
+            "published": "2022-06-01T12:00:00Z",
+            "url": "https://mastodon.example/@alice/1",
+            "attributedTo": "https://mastodon.example/users/alice",
+            "to": ["https://www.w3.org/ns/activitystreams#Public"],
+            "cc": ["https://mastodon.example/users/alice/followers"],
+            "sensitive": False,
+            "atomUri": "https://mastodon.example/users/alice/statuses/1",
+            "conversation": "tag:mastodon.example,2022:objectId=1",
+            "content": "<p>Down the rabbit hole <a href=\"" +
+            "https://mastodon.example/tags/wonderland\">#wonderland</a></p>",
+            "contentMap": {
+                "en": "<p>Down the rabbit hole</p>"
+            },
+            "attachment": [],
+            "tag": [{
+                "type": "Hashtag",
+                "href": "https://mastodon.example/tags/wonderland",
+                "name": "#wonderland"
+            }]
+        }
+    }
+    pleroma_activity = {
+        "@context": [
+            "https://www.w3.org/ns/activitystreams",
+            "https://pleroma.example/schemas/litepub-0.1.jsonld",
+            {
+                "@language": "und"
+            }
+        ],
+        "id": "https://pleroma.example/activities/2",
+        "type": "Announce",
+        "actor": "https://pleroma.example/users/hatter",
+        "published": "2022-06-01T12:05:00.000000Z",
+        "to": [
+            "https://pleroma.example/users/hatter/followers",
+            "https://www.w3.org/ns/activitystreams#Public"
+        ],
+        "cc": ["https://mastodon.example/users/alice"],
+        "object": "https://mastodon.example/users/alice/statuses/1",
+        "context": "https://pleroma.example/contexts/3",
+        "context_id": 3
+    }
+    options = {
+        "algorithm": "URDNA2015",
+        "format": "application/nquads"
+    }
+    itterations = 50
+    activities = {
+        'Mastodon': (mastodon_activity,
+                     '19af27fe77608cae4d86dccd31d513d3' +
+                     '532aff60fdc583fcb0eca6b3f8018a75'),
+        'Pleroma': (pleroma_activity,
+                    'e225164dc716503a4fba8a32070754b0' +
+                    'f69a622dac7ca1b4bdde1ebb189e02f6')
+    }
+    for software, activity in activities.items():
+        activity_json = activity[0]
+        expected_hash = activity[1]
+        # the active context is reused on subsequent calls
+        # and must give the same result
+        start = time.time()
+        for _ in range(itterations):
+            normalized = normalize(activity_json, options)
+            normalized_hash = get_sha_256(normalized.encode('utf-8')).hex()
+            assert normalized_hash == expected_hash
+        end = time.time()
+        # the original document should be unchanged
+        assert activity_json['@context'][0] == \
+            'https://www.w3.org/ns/activitystreams'
+        normalize_per_sec = int(itterations / (end - start))
+        print('JSON-LD normalize ' + software + ': ' +
+              str(normalize_per_sec) + ' per second')
+
+
 def _test_site_active():
     print('test_site_is_active')
     timeout = 10
@@ -3972,6 +4297,44 @@ def _test_site_active():
     assert not site_is_active('https://notarealwebsite.a.b.c', timeout)
 
 
+def _test_site_active_cached():
+    print('test_site_is_active_cached')
+    timeout = 10
+    curr_time = int(time.time())
+    url = 'https://notarealwebsite.a.b.c'
+    # previous results are used until the next check is due
+    sites_liveness = {
+        url: {
+            "active": True,
+            "failures": 0,
+            "nextCheck": curr_time + 60
+        }
+    }
+    assert site_is_active_cached(url, timeout, sites_liveness)
+    sites_liveness[url]['active'] = False
+    assert not site_is_active_cached(url, timeout, sites_liveness)
+
+    # the backoff increases for sites which remain inactive
+    sites_liveness[url] = {
+        "active": False,
+        "failures": 2,
+        "nextCheck": curr_time - 1
+    }
+    assert not site_is_active_cached(url, timeout, sites_liveness)
+    assert sites_liveness[url]['failures'] == 3
+    assert sites_liveness[url]['nextCheck'] >= curr_time + (60 * 5 * 4)
+
+    # onion sites are assumed to be active
+    url = 'http://someaddress.onion'
+    sites_liveness[url] = {
+        "active": False,
+        "failures": 1,
+        "nextCheck": curr_time - 1
+    }
+    assert site_is_active_cached(url, timeout, sites_liveness)
+    assert sites_liveness[url]['failures'] == 0
+
+
 def _test_strip_html():
     print('test_remove_html')
     test_str = 'This string has no html.'
@@ -5462,6 +5825,10 @@ def _test_functions():
         'fitness_thread',
         'thread_send_post',
         'send_to_followers',
+        '_send_to_followers_worker',
+        '_get_feeds_worker',
+        'run_delivery_queue',
+        'run_delivery_queue_watchdog',
         'expire_cache',
         'get_mutuals_of_person',
         'run_posts_queue',
@@ -5471,6 +5838,8 @@ def _test_functions():
         'get_this_weeks_events',
         'get_availability',
         '_test_threads_function',
+        '_test_box_index_add_thread',
+        '_run_newswire_feed_stub',
         'create_server_group',
         'create_server_alice',
         'create_server_bob',
@@ -5479,7 +5848,39 @@ def _test_functions():
         'setOrganizationScheme',
         'fill_headers',
         '_nothing',
-        'check_for_changed_actor'
+        'check_for_changed_actor',
+        # handlers within the route tables of the daemon
+        '_get_route_inbox',
+        '_get_route_dm',
+        '_get_route_tlreplies',
+        '_get_route_tlmedia',
+        '_get_route_tlblogs',
+        '_get_route_tlnews',
+        '_get_route_tlfeatures',
+        '_get_route_tlshares',
+        '_get_route_tlwanted',
+        '_get_route_bookmarks',
+        '_get_route_outbox',
+        '_get_route_moderation',
+        '_get_route_roles',
+        '_get_route_skills',
+        '_post_route_sethashtagcategory',
+        '_post_route_profiledata',
+        '_post_route_linksdata',
+        '_post_route_newswiredata',
+        '_post_route_citationsdata',
+        '_post_route_newseditdata',
+        '_post_route_moderationaction',
+        '_post_route_rmshare',
+        '_post_route_rmwanted',
+        '_post_route_rmpost',
+        '_post_route_followconfirm',
+        '_post_route_unfollowconfirm',
+        '_post_route_unblockconfirm',
+        '_post_route_blockconfirm',
+        '_post_route_personoptions',
+        '_post_route_access_keys',
+        '_post_route_theme_settings'
     ]
     exclude_imports = [
         'link',
@@ -6998,6 +7399,169 @@ def _test_get_actor_from_in_reply_to() -> None:
     assert reply_actor is None
 
 
+class _NewswireFeedStub(BaseHTTPRequestHandler):
+    """Serves a feed, which supports conditional requests
+    """
+    def do_GET(self):
+        if self.path != '/feed.xml':
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"feed1"':
+            self.server.feed_requests.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.server.feed_requests.append(200)
+        msg = self.server.feed_xml.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', 'application/rss+xml')
+        self.send_header('Content-Length', str(len(msg)))
+        self.send_header('ETag', '"feed1"')
+        self.end_headers()
+        self.wfile.write(msg)
+
+
+def _run_newswire_feed_stub(feed_server, poll_interval: float) -> None:
+    """Thread which serves the test feed
+    """
+    feed_server.serve_forever(poll_interval)
+
+
+def _test_newswire_conditional_get(base_dir: str) -> None:
+    print('test_newswire_conditional_get')
+    newswire_base_dir = base_dir + '/.tests_newswire'
+    if os.path.isdir(newswire_base_dir):
+        shutil.rmtree(newswire_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(newswire_base_dir + '/accounts')
+
+    feed_server = ThreadingHTTPServer(('127.0.0.1', 0), _NewswireFeedStub)
+    feed_server.feed_requests = []
+    feed_port = feed_server.server_address[1]
+    pub_date = strftime("%a, %d %b %Y %H:%M:%S +0000", gmtime())
+    feed_server.feed_xml = \
+        '<?xml version="1.0" encoding="UTF-8" ?>\n' + \
+        '<rss version="2.0">\n<channel>\n' + \
+        '<title>Test feed</title>\n' + \
+        '<item>\n<title>Conditional requests</title>\n' + \
+        '<link>http://127.0.0.1:' + str(feed_port) + \
+        '/article1</link>\n' + \
+        '<description>Some description</description>\n' + \
+        '<pubDate>' + pub_date + '</pubDate>\n</item>\n' + \
+        '</channel>\n</rss>\n'
+    feed_thread = \
+        thread_with_trace(target=_run_newswire_feed_stub,
+                          args=(feed_server, 0.1), daemon=True)
+    feed_thread.start()
+
+    with open(newswire_base_dir + '/accounts/newswire.txt', 'w+',
+              encoding='utf-8') as fp_sub:
+        fp_sub.write('http://127.0.0.1:' + str(feed_port) + '/feed.xml\n')
+    session = create_session(None)
+    titles = []
+    for _ in range(2):
+        newswire = \
+            get_dict_from_newswire(session, newswire_base_dir,
+                                   'somedomain.net', 5, 1024, 16, 64, 32,
+                                   64, 'en', False, [], 10)
+        assert len(newswire.items()) == 1
+        for _, item in newswire.items():
+            titles.append(item[0])
+
+    # a filter added after the feed was fetched also
+    # applies to the unchanged items
+    with open(newswire_base_dir + '/accounts/filters.txt', 'w+',
+              encoding='utf-8') as fp_filters:
+        fp_filters.write('Conditional\n')
+    newswire = \
+        get_dict_from_newswire(session, newswire_base_dir,
+                               'somedomain.net', 5, 1024, 16, 64, 32,
+                               64, 'en', False, [], 10)
+    assert not newswire
+    feed_server.shutdown()
+
+    # the later requests are conditional, and the feed is unchanged
+    assert feed_server.feed_requests == [200, 304, 304]
+    assert titles == ['Conditional requests', 'Conditional requests']
+    assert os.path.isfile(newswire_base_dir + '/accounts/.newswirefeeds.json')
+    shutil.rmtree(newswire_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_newswire_streaming(base_dir: str) -> None:
+    print('test_newswire_streaming')
+    newswire_base_dir = base_dir + '/.tests_newswire_streaming'
+    if os.path.isdir(newswire_base_dir):
+        shutil.rmtree(newswire_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(newswire_base_dir + '/accounts')
+
+    feed_server = ThreadingHTTPServer(('127.0.0.1', 0), _NewswireFeedStub)
+    feed_server.feed_requests = []
+    feed_port = feed_server.server_address[1]
+    # a feed of around 40K, with each item published a minute apart
+    feed_xml = \
+        '<?xml version="1.0" encoding="UTF-8" ?>\n' + \
+        '<rss version="2.0">\n<channel>\n' + \
+        '<title>Large feed</title>\n'
+    curr_time = time.time()
+    for item_index in range(40):
+        pub_date = strftime("%a, %d %b %Y %H:%M:%S +0000",
+                            gmtime(curr_time - (item_index * 60)))
+        feed_xml += \
+            '<item>\n<title>Item ' + str(item_index) + '</title>\n' + \
+            '<link>http://127.0.0.1:' + str(feed_port) + \
+            '/article' + str(item_index) + '</link>\n' + \
+            '<description>' + ('x' * 1000) + '</description>\n' + \
+            '<pubDate>' + pub_date + '</pubDate>\n</item>\n'
+    feed_xml += '</channel>\n</rss>\n'
+    feed_server.feed_xml = feed_xml
+    feed_thread = \
+        thread_with_trace(target=_run_newswire_feed_stub,
+                          args=(feed_server, 0.1), daemon=True)
+    feed_thread.start()
+
+    with open(newswire_base_dir + '/accounts/newswire.txt', 'w+',
+              encoding='utf-8') as fp_sub:
+        fp_sub.write('http://127.0.0.1:' + str(feed_port) + '/feed.xml\n')
+    feeds_state_filename = newswire_base_dir + '/accounts/.newswirefeeds.json'
+    session = create_session(None)
+
+    # reading stops after the maximum number of posts
+    newswire = \
+        get_dict_from_newswire(session, newswire_base_dir,
+                               'somedomain.net', 5, 1024, 16, 64, 1000,
+                               64, 'en', False, [], 10)
+    titles = []
+    for _, item in newswire.items():
+        titles.append(item[0])
+    assert sorted(titles) == ['Item 0', 'Item 1', 'Item 2', 'Item 3', 'Item 4']
+
+    # only the items which arrive within the size limit are read
+    os.remove(feeds_state_filename)
+    newswire = \
+        get_dict_from_newswire(session, newswire_base_dir,
+                               'somedomain.net', 5, 3, 16, 64, 1000,
+                               64, 'en', False, [], 10)
+    titles = []
+    for _, item in newswire.items():
+        titles.append(item[0])
+    assert sorted(titles) == ['Item 0', 'Item 1']
+
+    # the feed is rejected if its first item is beyond the size limit
+    os.remove(feeds_state_filename)
+    feed_server.feed_xml = \
+        feed_xml.replace('<title>Large feed</title>',
+                         '<title>' + ('x' * 2048) + '</title>')
+    newswire = \
+        get_dict_from_newswire(session, newswire_base_dir,
+                               'somedomain.net', 5, 2, 16, 64, 1000,
+                               64, 'en', False, [], 10)
+    assert not newswire
+    feed_server.shutdown()
+
+    assert feed_server.feed_requests == [200, 200, 200]
+    shutil.rmtree(newswire_base_dir, ignore_errors=False, onerror=None)
+
+
 def _test_xml_podcast_dict(base_dir: str) -> None:
     print('test_xml_podcast_dict')
     xml_str = \
@@ -7422,6 +7986,833 @@ def _test_dogwhistles():
     assert result['hamstered']['count'] == 2
     assert result['hamstered']['category'] == "hamsterism"
 
+    # changed dogwhistles are compiled again
+    content = 'A dormouse at the startofteaend'
+    assert not detect_dogwhistles(content, dogwhistles).get('dormouse')
+    dogwhistles = dogwhistles.copy()
+    dogwhistles['dormouse'] = 'sleepy'
+    result = detect_dogwhistles(content, dogwhistles)
+    assert result['dormouse']['category'] == 'sleepy'
+    assert result['start*end']['category'] == 'something'
+
+
+def _test_calendar_index(base_dir: str) -> None:
+    print('test_calendar_index')
+    calendar_base_dir = base_dir + '/.tests_calendar'
+    if os.path.isdir(calendar_base_dir):
+        shutil.rmtree(calendar_base_dir, ignore_errors=False, onerror=None)
+    nickname = 'alice'
+    domain = 'wonderland.net'
+    handle = nickname + '@' + domain
+    outbox_dir = calendar_base_dir + '/accounts/' + handle + '/outbox'
+    os.makedirs(outbox_dir)
+
+    actor = 'https://' + domain + '/users/' + nickname
+    post_id = actor + '/statuses/1234567890'
+    event_tag = {
+        "type": "Event",
+        "name": "Tea party",
+        "startTime": "2030-05-10T16:00:00+00:00",
+        "endTime": "2030-05-10T18:00:00+00:00"
+    }
+    post_json_object = {
+        "id": post_id + '/activity',
+        "type": "Create",
+        "actor": actor,
+        "to": ['https://www.w3.org/ns/activitystreams#Public'],
+        "object": {
+            "id": post_id,
+            "type": "Note",
+            "attributedTo": actor,
+            "to": ['https://www.w3.org/ns/activitystreams#Public'],
+            "published": "2030-04-01T10:00:00Z",
+            "content": "Tea party at the March Hare's house",
+            "tag": [
+                event_tag,
+                {
+                    "type": "Place",
+                    "name": "March Hare's house"
+                }
+            ]
+        }
+    }
+    post_filename = outbox_dir + '/' + post_id.replace('/', '#') + '.json'
+    save_json(post_json_object, post_filename)
+    calendar_post_id = post_id.replace('/', '#')
+    assert save_event_post(calendar_base_dir, handle,
+                           calendar_post_id, event_tag,
+                           post_json_object)
+
+    # the event is added to the index for the month
+    index_filename = \
+        calendar_base_dir + '/accounts/' + handle + '/calendar/2030/5.json'
+    assert os.path.isfile(index_filename)
+    calendar_index = load_json(index_filename)
+    entry = calendar_index[calendar_post_id]
+    assert entry['public'] is True
+    assert entry['published'] == "2030-04-01T10:00:00Z"
+    assert len(entry['tags']) == 2
+
+    # events are obtained from the index rather than the post
+    entry['tags'][0]['name'] = 'Indexed tea party'
+    save_json(calendar_index, index_filename)
+    events = get_calendar_events(calendar_base_dir, nickname, domain,
+                                 2030, 5, '')
+    assert len(events['10']) == 1
+    assert events['10'][0][0]['name'] == 'Indexed tea party'
+    assert events['10'][0][0]['id'] == post_id
+    assert events['10'][0][1]['name'] == "March Hare's house"
+    assert not get_calendar_events(calendar_base_dir, nickname, domain,
+                                   2030, 5, 'croquet')
+    assert day_events_check(calendar_base_dir, nickname, domain,
+                            datetime.datetime(2030, 5, 10))
+    assert not day_events_check(calendar_base_dir, nickname, domain,
+                                datetime.datetime(2030, 5, 11))
+    ical_str = \
+        get_month_events_icalendar(calendar_base_dir, nickname, domain,
+                                   2030, 5, {}, '')
+    assert 'SUMMARY:Indexed tea party' in ical_str
+    assert 'DTSTAMP:20300401T100000Z' in ical_str
+
+    # if the post changes then its index entry is updated
+    post_json_object['object']['tag'][0]['name'] = 'Croquet'
+    save_json(post_json_object, post_filename)
+    post_time = time.time() + 10
+    os.utime(post_filename, (post_time, post_time))
+    events = get_calendar_events(calendar_base_dir, nickname, domain,
+                                 2030, 5, '')
+    assert events['10'][0][0]['name'] == 'Croquet'
+
+    # deleted posts are removed from the calendar and its index
+    os.remove(post_filename)
+    assert not get_calendar_events(calendar_base_dir, nickname, domain,
+                                   2030, 5, '')
+    assert not load_json(index_filename)
+    shutil.rmtree(calendar_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_search_index(base_dir: str) -> None:
+    print('test_search_index')
+    search_base_dir = base_dir + '/.tests_searchindex'
+    if os.path.isdir(search_base_dir):
+        shutil.rmtree(search_base_dir, ignore_errors=False, onerror=None)
+    nickname = 'alice'
+    domain = 'wonderland.net'
+    http_prefix = 'https'
+    account_dir = search_base_dir + '/accounts/' + nickname + '@' + domain
+    os.makedirs(account_dir + '/outbox')
+
+    actor = http_prefix + '://' + domain + '/users/' + nickname
+    posts_content = (
+        ('2022-03-01T10:00:00Z', 'The <b>Mad Hatter</b> hosts a tea party'),
+        ('2022-03-05T10:00:00Z', 'A tea party with the March Hare'),
+        ('2022-03-03T10:00:00Z', 'Playing croquet with the Queen'),
+        ('2022-03-02T10:00:00Z', 'Tea and cakes'),
+        ('2022-03-04T10:00:00Z', 'Attery battery')
+    )
+    post_filenames = []
+    for published, content in posts_content:
+        status_number = published.replace('-', '').replace(':', '')
+        post_id = actor + '/statuses/' + status_number[:15]
+        post_json_object = {
+            "id": post_id + '/activity',
+            "type": "Create",
+            "actor": actor,
+            "object": {
+                "id": post_id,
+                "type": "Note",
+                "published": published,
+                "content": '<p>' + content + '</p>',
+                "attachment": []
+            }
+        }
+        post_filename = \
+            account_dir + '/outbox/' + post_id.replace('/', '#') + '.json'
+        save_json(post_json_object, post_filename)
+        post_filenames.append(post_filename)
+
+    # the index is created by the first search
+    assert not os.path.isdir(account_dir + '/searchindex/outbox')
+    res = search_box_posts(search_base_dir, nickname, domain,
+                           'tea party', 10, 'outbox')
+    assert os.path.isdir(account_dir + '/searchindex/outbox')
+    assert res == [post_filenames[1], post_filenames[0]]
+
+    # post filenames are only stored within the posts file
+    index_dir = account_dir + '/searchindex/outbox'
+    for fname in os.listdir(index_dir):
+        if fname == 'posts.txt':
+            continue
+        with open(index_dir + '/' + fname, 'r',
+                  encoding='utf-8') as fp_index:
+            assert 'statuses' not in fp_index.read()
+
+    # markup is ignored, and all words or phrases must match
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'hatter+party', 10, 'outbox') == \
+        [post_filenames[0]]
+    assert not search_box_posts(search_base_dir, nickname, domain,
+                                'hatter+croquet', 10, 'outbox')
+    res = search_box_posts(search_base_dir, nickname, domain,
+                           'tea', 10, 'outbox')
+    assert res == [post_filenames[1], post_filenames[3], post_filenames[0]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'tea', 2, 'outbox') == res[:2]
+
+    # any part of a word is found within the index
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'hatt', 10, 'outbox') == [post_filenames[0]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'cake', 10, 'outbox') == [post_filenames[3]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'attery', 10, 'outbox') == [post_filenames[4]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'atter', 10, 'outbox') == \
+        [post_filenames[4], post_filenames[0]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'ueen', 10, 'outbox') == [post_filenames[2]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'dormouse', 10, 'outbox') == []
+
+    # new posts are added to the index
+    post_id = actor + '/statuses/20220306100000'
+    post_json_object = {
+        "id": post_id + '/activity',
+        "type": "Create",
+        "actor": actor,
+        "object": {
+            "id": post_id,
+            "type": "Note",
+            "published": '2022-03-06T10:00:00Z',
+            "content": '<p>Croquet with flamingos</p>',
+            "attachment": [{
+                "type": "Document",
+                "name": "A hedgehog"
+            }]
+        }
+    }
+    new_filename = \
+        save_post_to_box(search_base_dir, http_prefix, post_id,
+                         nickname, domain, post_json_object, 'outbox', {})
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'croquet', 10, 'outbox') == \
+        [new_filename, post_filenames[2]]
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'hedgehog', 10, 'outbox') == [new_filename]
+
+    # removed posts are no longer found
+    search_index_remove(account_dir, 'outbox', new_filename, post_json_object)
+    assert search_box_posts(search_base_dir, nickname, domain,
+                            'croquet', 10, 'outbox') == [post_filenames[2]]
+    os.remove(post_filenames[2])
+    os.remove(new_filename)
+    assert not search_box_posts(search_base_dir, nickname, domain,
+                                'croquet', 10, 'outbox')
+    shutil.rmtree(search_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_hashtag_index(base_dir: str) -> None:
+    print('test_hashtag_index')
+    tags_base_dir = base_dir + '/.tests_hashtagindex'
+    if os.path.isdir(tags_base_dir):
+        shutil.rmtree(tags_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(tags_base_dir + '/tags')
+    days_diff = datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
+    days_since_epoch = days_diff.days
+
+    # an existing hashtag which has not been used recently
+    old_tag_filename = tags_base_dir + '/tags/croquet.txt'
+    with open(old_tag_filename, 'w+', encoding='utf-8') as fp_tag:
+        fp_tag.write('100  queen  https:##wonderland.net#statuses#2\n' +
+                     '99  queen  https:##wonderland.net#statuses#1\n')
+    with open(tags_base_dir + '/tags/croquet.category', 'w+',
+              encoding='utf-8') as fp_cat:
+        fp_cat.write('games')
+
+    post_url = 'https:##wonderland.net#users#alice#statuses#'
+    for post_number in range(5):
+        assert hashtag_index_add(tags_base_dir, 'tea', 'alice',
+                                 post_url + str(post_number))
+    assert not hashtag_index_add(tags_base_dir, 'tea', 'alice',
+                                 post_url + '3')
+    assert hashtag_index_add(tags_base_dir, 'party', 'alice',
+                             post_url + '4')
+    assert hashtag_index_count(tags_base_dir, 'tea') == 5
+    assert hashtag_index_count(tags_base_dir, 'croquet') == 2
+    assert hashtag_index_count(tags_base_dir, 'cakes') == 0
+    # no temporary directories remain after creating the daily files
+    for fname in os.listdir(tags_base_dir + '/tags'):
+        assert '.new' not in fname
+
+    # existing hashtag files are converted into append only logs
+    assert hashtag_index_lines(tags_base_dir, 'croquet', 0, 1) == \
+        ['100  queen  https:##wonderland.net#statuses#2']
+    with open(tags_base_dir + '/tags/tea.txt', 'r',
+              encoding='utf-8') as fp_tag:
+        assert fp_tag.readline().endswith(post_url + '0\n')
+
+    # pages of posts, newest first
+    lines = hashtag_index_lines(tags_base_dir, 'tea', 1, 2)
+    assert lines == [
+        str(days_since_epoch) + '  alice  ' + post_url + '3',
+        str(days_since_epoch) + '  alice  ' + post_url + '2'
+    ]
+    lines = hashtag_index_lines(tags_base_dir, 'tea', 4, 10)
+    assert len(lines) == 1
+    assert lines[0].endswith(post_url + '0')
+
+    # recently used hashtags
+    tag_counts = hashtag_day_counts(tags_base_dir, days_since_epoch - 1)
+    assert tag_counts == {'tea': 5, 'party': 1}
+    assert hashtag_day_counts(tags_base_dir, 50)['croquet'] == 2
+
+    # hashtags which have not been used recently are removed
+    assert remove_old_hashtag_indexes(tags_base_dir,
+                                      days_since_epoch - 30) == 1
+    assert not os.path.isfile(old_tag_filename)
+    assert not os.path.isfile(tags_base_dir + '/tags/croquet.category')
+    assert hashtag_index_count(tags_base_dir, 'tea') == 5
+    assert not hashtag_day_counts(tags_base_dir, 50).get('croquet')
+    shutil.rmtree(tags_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_skills_index(base_dir: str) -> None:
+    print('test_skills_index')
+    skills_base_dir = base_dir + '/.tests_skillsindex'
+    if os.path.isdir(skills_base_dir):
+        shutil.rmtree(skills_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(skills_base_dir + '/accounts')
+    os.makedirs(skills_base_dir + '/cache/actors')
+
+    local_actor = 'https://wonderland.net/users/alice'
+    remote_actor = 'https://looking.glass/users/queen'
+    # a skill name which is too long to be a filename
+    long_skill_name = 'croquet' * 50
+    actors = []
+    for actor, name, skills_dict in (
+            (local_actor, 'Alice', {'croquet': 40, 'tea': 70}),
+            (remote_actor, 'Red Queen', {'croquet': 95,
+                                         long_skill_name: 50})):
+        actor_json = {
+            'id': actor,
+            'name': name,
+            'icon': {'url': actor + '/avatar.png'},
+            'hasOccupation': [{
+                '@type': 'Occupation',
+                'name': 'Sysop',
+                'skills': []
+            }]
+        }
+        set_skills_from_dict(actor_json, skills_dict)
+        actors.append(actor_json)
+    save_json(actors[0],
+              skills_base_dir + '/accounts/alice@wonderland.net.json')
+    cache_filename = \
+        skills_base_dir + '/cache/actors/' + \
+        remote_actor.replace('/', '#') + '.json'
+    save_json(actors[1], cache_filename)
+
+    # the index is created by the first search
+    results = skills_index_search(skills_base_dir, 'croquet', False)
+    results.sort(reverse=True)
+    assert results == [
+        '095;' + remote_actor + ';Red Queen;' + remote_actor + '/avatar.png',
+        '040;' + local_actor + ';Alice;' + local_actor + '/avatar.png'
+    ]
+    results = skills_index_search(skills_base_dir, 'croquet', True)
+    assert len(results) == 1
+    assert results[0].startswith('040;' + local_actor + ';')
+    assert len(skills_index_search(skills_base_dir, 'tea', False)) == 1
+    assert not skills_index_search(skills_base_dir, 'baking', False)
+
+    # storing an actor updates the index
+    person_cache = {}
+    set_skills_from_dict(actors[1], {'tea': 5})
+    store_person_in_cache(skills_base_dir, remote_actor, actors[1],
+                          person_cache, True)
+    results = skills_index_search(skills_base_dir, 'croquet', False)
+    assert len(results) == 1
+    results = skills_index_search(skills_base_dir, 'tea', False)
+    results.sort()
+    assert results[0].startswith('005;' + remote_actor + ';')
+    assert len(results) == 2
+
+    # actors without skills are removed from the index
+    actors[1]['hasOccupation'][0]['skills'] = []
+    store_person_in_cache(skills_base_dir, remote_actor, actors[1],
+                          person_cache, True)
+    assert len(skills_index_search(skills_base_dir, 'tea', False)) == 1
+    shutil.rmtree(skills_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_shares_index(base_dir: str) -> None:
+    print('test_shares_index')
+    shares_base_dir = base_dir + '/.tests_sharesindex'
+    if os.path.isdir(shares_base_dir):
+        shutil.rmtree(shares_base_dir, ignore_errors=False, onerror=None)
+    nickname = 'alice'
+    domain = 'wonderland.net'
+    handle = nickname + '@' + domain
+    account_dir = shares_base_dir + '/accounts/' + handle
+    os.makedirs(account_dir)
+    os.makedirs(shares_base_dir + '/cache/catalogs')
+
+    curr_time = int(time.time())
+    shares_json = {}
+    items = (
+        ('teapot', 'Teapot', 'A very large teapot', '4.50', curr_time + 600),
+        ('croquet', 'Croquet mallet', 'Flamingo', '12', curr_time - 600),
+        ('cakes', 'Cakes', 'Eat me', '1', curr_time + 60)
+    )
+    for item_id, display_name, summary, price, expire in items:
+        shares_json[item_id] = {
+            "displayName": display_name,
+            "summary": summary,
+            "imageUrl": None,
+            "itemQty": 1.0,
+            "dfcId": 'epicyon#' + item_id,
+            "itemType": item_id,
+            "category": 'tableware',
+            "location": 'Wonderland',
+            "published": curr_time - 1000,
+            "expire": expire,
+            "itemPrice": price,
+            "itemCurrency": 'GBP'
+        }
+    save_json(shares_json, account_dir + '/shares.json')
+    federated_json = {
+        'https://looking.glass/shares/1': {
+            "displayName": 'Tea tray',
+            "summary": 'Silver',
+            "category": 'tableware',
+            "location": '',
+            "expire": curr_time + 600,
+            "itemPrice": '3'
+        }
+    }
+    save_json(federated_json,
+              shares_base_dir + '/cache/catalogs/looking.glass.shares.json')
+
+    # the index is created when first used
+    assert shares_index_search(shares_base_dir, 'shares', ['tea']) == \
+        [handle, 'looking.glass']
+    assert os.path.isdir(shares_base_dir + '/sharesindex/shares')
+    assert shares_index_search(shares_base_dir, 'shares',
+                               ['flamingo', 'silver']) == \
+        [handle, 'looking.glass']
+    assert shares_index_search(shares_base_dir, 'shares',
+                               ['tea tray']) == ['looking.glass']
+    assert not shares_index_search(shares_base_dir, 'shares', ['hatter'])
+    assert shares_index_search(shares_base_dir, 'shares', ['t']) is None
+
+    # any part of a word is found
+    assert shares_index_search(shares_base_dir, 'shares', ['pot']) == \
+        [handle]
+    assert shares_index_search(shares_base_dir, 'shares', ['ray']) == \
+        ['looking.glass']
+    assert shares_index_search(shares_base_dir, 'shares', ['ablew']) == \
+        [handle, 'looking.glass']
+    assert not shares_index_search(shares_base_dir, 'wanted', ['tea'])
+
+    # federated items are not within the price or expiry indexes
+    assert shares_index_price_range(shares_base_dir, 'shares', 1, 5) == \
+        {handle: {'cakes': True, 'teapot': True}}
+    assert shares_index_price_range(shares_base_dir, 'shares', 5, 20) == \
+        {handle: {'croquet': True}}
+    assert shares_index_expired(shares_base_dir, 'shares',
+                                curr_time) == [handle]
+
+    # expired and removed items are removed from the index
+    expire_shares(shares_base_dir)
+    assert not shares_index_expired(shares_base_dir, 'shares', curr_time)
+    assert 'croquet' not in load_json(account_dir + '/shares.json')
+    assert shares_index_search(shares_base_dir, 'shares',
+                               ['flamingo']) == []
+    remove_shared_item(shares_base_dir, nickname, domain,
+                       'teapot', 'shares')
+    assert shares_index_search(shares_base_dir, 'shares',
+                               ['teapot']) == []
+    assert shares_index_search(shares_base_dir, 'shares',
+                               ['eat']) == [handle]
+    assert shares_index_price_range(shares_base_dir, 'shares', 0, 100) == \
+        {handle: {'cakes': True}}
+
+    # prices which are not finite are not indexed, and very high
+    # prices remain in order
+    shares_json = load_json(account_dir + '/shares.json')
+    shares_json['cakes']['itemPrice'] = 'inf'
+    shares_json['hat'] = shares_json['cakes'].copy()
+    shares_json['hat']['itemPrice'] = '2e12'
+    shares_json['tarts'] = shares_json['cakes'].copy()
+    shares_json['tarts']['itemPrice'] = '6'
+    save_json(shares_json, account_dir + '/shares.json')
+    shares_index_update(shares_base_dir, 'shares', handle, shares_json)
+    assert shares_index_price_range(shares_base_dir, 'shares', 0, None) == \
+        {handle: {'tarts': True, 'hat': True}}
+    assert shares_index_price_range(shares_base_dir, 'shares', 0, 10) == \
+        {handle: {'tarts': True}}
+
+    # without a price range every item is within the catalog
+    catalog_json = \
+        shares_catalog_endpoint(shares_base_dir, 'https', domain,
+                                '/catalog', 'shares')
+    assert len(catalog_json['DFC:supplies']) == 3
+    catalog_json = \
+        shares_catalog_endpoint(shares_base_dir, 'https', domain,
+                                '/catalog?maxPrice=10', 'shares')
+    assert len(catalog_json['DFC:supplies']) == 1
+    shutil.rmtree(shares_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_streamed_form_post(base_dir: str) -> None:
+    print('test_streamed_form_post')
+    upload_dir = base_dir + '/.tests_receivemedia'
+    if os.path.isdir(upload_dir):
+        shutil.rmtree(upload_dir, ignore_errors=False, onerror=None)
+    os.mkdir(upload_dir)
+    filename_base = upload_dir + '/upload.temp'
+
+    # media spanning several chunks, containing bytes which
+    # resemble the start of a boundary
+    media_bytes = b''
+    for ctr in range(20000):
+        media_bytes += b'\r\n-' + str(ctr).encode('utf-8') + b'\x00\xff'
+    boundary = '---------------------------3107298713445'
+    form_data = \
+        b'--' + boundary.encode('utf-8') + b'\r\n' + \
+        b'Content-Disposition: form-data; name="message"\r\n\r\n' + \
+        b'Down the rabbit hole\r\n' + \
+        b'--' + boundary.encode('utf-8') + b'\r\n' + \
+        b'Content-Disposition: form-data; name="attachpic"; ' + \
+        b'filename="rabbit.png"\r\nContent-Type: image/png\r\n\r\n' + \
+        media_bytes + b'\r\n' + \
+        b'--' + boundary.encode('utf-8') + b'\r\n' + \
+        b'Content-Disposition: form-data; name="location"\r\n\r\n' + \
+        b'Wonderland\r\n' + \
+        b'--' + boundary.encode('utf-8') + b'--\r\n'
+    assert len(media_bytes) > 65536 * 2
+    upload_data = form_data
+    upload_length = len(form_data)
+    rfile = io.BytesIO(form_data)
+    length = len(form_data)
+    post_bytes, filename, attachment_media_type = \
+        receive_media_in_form_post(rfile, length, boundary,
+                                   'attachpic', filename_base, False)
+    assert filename == filename_base + '.png'
+    assert attachment_media_type == 'image'
+    with open(filename, 'rb') as fp_media:
+        assert fp_media.read() == media_bytes
+    assert b'rabbit.png' not in post_bytes
+    fields = extract_text_fields_in_post(post_bytes, boundary, False)
+    assert fields['message'] == 'Down the rabbit hole'
+    assert fields['location'] == 'Wonderland'
+
+    # no media, so the previous upload is removed
+    form_data = \
+        b'--' + boundary.encode('utf-8') + b'\r\n' + \
+        b'Content-Disposition: form-data; name="message"\r\n\r\n' + \
+        b'Curiouser and curiouser\r\n' + \
+        b'--' + boundary.encode('utf-8') + b'--\r\n'
+    rfile = io.BytesIO(form_data)
+    length = len(form_data)
+    post_bytes, filename, attachment_media_type = \
+        receive_media_in_form_post(rfile, length, boundary,
+                                   'attachpic', filename_base, False)
+    assert not filename
+    assert not attachment_media_type
+    assert not os.path.isfile(filename_base + '.png')
+    assert post_bytes == form_data
+
+    # svg containing a script is not saved
+    svg_bytes = b'<svg><script>alert(1)</script></svg>'
+    form_data = \
+        b'--' + boundary.encode('utf-8') + b'\r\n' + \
+        b'Content-Disposition: form-data; name="attachpic"; ' + \
+        b'filename="cat.svg"\r\nContent-Type: image/svg+xml\r\n\r\n' + \
+        svg_bytes + b'\r\n' + \
+        b'--' + boundary.encode('utf-8') + b'--\r\n'
+    rfile = io.BytesIO(form_data)
+    length = len(form_data)
+    post_bytes, filename, attachment_media_type = \
+        receive_media_in_form_post(rfile, length, boundary,
+                                   'attachpic', filename_base, False)
+    assert not filename
+    assert not os.path.isfile(filename_base + '.svg')
+
+    # the connection closes part way through the media,
+    # so the partial upload is removed and there is no post
+    partial_data = upload_data[:100000]
+    read_sock, write_sock = socket.socketpair()
+    write_sock.sendall(partial_data)
+    write_sock.shutdown(socket.SHUT_WR)
+    rfile = read_sock.makefile('rb')
+    post_bytes, filename, attachment_media_type = \
+        receive_media_in_form_post(rfile, upload_length, boundary,
+                                   'attachpic', filename_base, False)
+    assert post_bytes is None
+    assert not filename
+    assert not os.path.isfile(filename_base + '.png')
+    rfile.close()
+    read_sock.close()
+    write_sock.close()
+
+    # reading times out part way through the media
+    read_sock, write_sock = socket.socketpair()
+    write_sock.sendall(partial_data)
+    read_sock.settimeout(0.5)
+    rfile = read_sock.makefile('rb')
+    timed_out = False
+    try:
+        receive_media_in_form_post(rfile, upload_length, boundary,
+                                   'attachpic', filename_base, False)
+    except OSError:
+        timed_out = True
+    assert timed_out
+    assert not os.path.isfile(filename_base + '.png')
+    rfile.close()
+    read_sock.close()
+    write_sock.close()
+
+    shutil.rmtree(upload_dir, ignore_errors=False, onerror=None)
+
+
+def _test_admission() -> None:
+    print('test_admission')
+    headers = {
+        'Signature': 'keyId="https://wonderland.net/users/alice#main-key",' +
+        'algorithm="rsa-sha256",headers="(request-target) host date"',
+        'Content-type': 'application/activity+json'
+    }
+    assert admission_post_type(headers) == 'inbox'
+    reverse_proxies = admission_reverse_proxies(None)
+    assert reverse_proxies == ['127.0.0.1', '::1']
+    # unverified signature keyIds are not used to identify the client
+    assert admission_client(headers, '192.168.1.20', reverse_proxies) == \
+        '192.168.1.20'
+    headers = {
+        'Content-type': 'application/x-www-form-urlencoded',
+        'X-Forwarded-For': '10.0.0.7, 10.0.0.5'
+    }
+    assert admission_post_type(headers) == 'ui'
+    # only the address added by a reverse proxy is used
+    assert admission_client(headers, '127.0.0.1', reverse_proxies) == \
+        '10.0.0.5'
+    assert admission_client(headers, '192.168.1.20', reverse_proxies) == \
+        '192.168.1.20'
+    reverse_proxies = admission_reverse_proxies(' 192.168.1.2 ,10.0.0.1')
+    assert reverse_proxies == ['192.168.1.2', '10.0.0.1']
+    assert admission_client(headers, '127.0.0.1', reverse_proxies) == \
+        '127.0.0.1'
+    assert admission_client(headers, '10.0.0.1', reverse_proxies) == \
+        '10.0.0.5'
+    headers = {
+        'Content-type': 'application/json'
+    }
+    assert admission_post_type(headers) == 'c2s'
+    assert admission_client(headers, '10.0.0.1', reverse_proxies) == \
+        '10.0.0.1'
+
+    # one client using up its budget doesn't block another
+    buckets = {}
+    curr_time = 1000.0
+    capacity = ADMISSION_BUDGETS['ui']['capacity']
+    for _ in range(capacity):
+        assert admit_request(buckets, 'ui', '10.0.0.5', curr_time, 0, 64)
+    assert not admit_request(buckets, 'ui', '10.0.0.5', curr_time, 0, 64)
+    assert admit_request(buckets, 'ui', '10.0.0.6', curr_time, 0, 64)
+    # other types of request have their own budget
+    assert admit_request(buckets, 'get', '10.0.0.5', curr_time, 0, 64)
+
+    # tokens are replenished over time
+    curr_time += 1.0
+    assert admit_request(buckets, 'ui', '10.0.0.5', curr_time, 0, 64)
+
+    # inbox deliveries cost more when the inbox queue is full
+    capacity = ADMISSION_BUDGETS['inbox']['capacity']
+    cost = 1 + ADMISSION_QUEUE_COST
+    admitted = 0
+    for _ in range(capacity):
+        if admit_request(buckets, 'inbox', 'wonderland.net',
+                         curr_time, 64, 64):
+            admitted += 1
+    assert admitted == capacity // cost
+    assert admit_request(buckets, 'inbox', 'lookingglass.net',
+                         curr_time, 0, 64)
+
+
+def _test_static_get_route() -> None:
+    print('test_static_get_route')
+    assert static_get_route('/icons/like.png') == 'icons'
+    assert static_get_route('/icons/default/like.png') == 'icons'
+    assert static_get_route('/media/2022/abc.png') == 'media'
+    assert static_get_route('/fonts/') == 'fonts'
+    assert not static_get_route('/icons')
+    assert not static_get_route('/users/alice/media/abc.png')
+    assert not static_get_route('/users/alice')
+    assert not static_get_route('/')
+    assert not static_get_route('')
+    assert not static_get_route('icons/like.png')
+    for route_name, route in STATIC_GET_ROUTES.items():
+        route_path = '/' + route_name + '/test.png'
+        assert static_get_route(route_path) == route_name
+        assert isinstance(route['crawlers'], bool)
+        assert isinstance(route['admission'], bool)
+    # large files have an admission control budget
+    assert STATIC_GET_ROUTES['media']['admission']
+    assert STATIC_GET_ROUTES['sharefiles']['admission']
+    assert not STATIC_GET_ROUTES['icons']['admission']
+
+
+def _test_users_get_routes() -> None:
+    print('test_users_get_routes')
+    routes = PubServer.users_get_routes
+    assert users_get_route('/users/alice/inbox', routes) == 'inbox'
+    assert users_get_route('/users/alice/tlblogs?page=2', routes) == 'tlblogs'
+    assert users_get_route('/users/alice/outbox?page=true', routes) == \
+        'outbox'
+    assert users_get_route('/users/alice/bookmarks', routes) == 'bookmarks'
+    assert users_get_route('/users/alice/roles', routes) == 'roles'
+    # only paged routes may have a page number
+    assert routes['inbox']['paged']
+    assert not routes['roles']['paged']
+    assert users_get_route('/users/alice/inbox?page=2', routes) == 'inbox'
+    assert not users_get_route('/users/alice/roles?page=2', routes)
+    # other parameters go through the checks for GET requests
+    assert not users_get_route('/users/alice/inbox?page=2;x=y', routes)
+    assert not users_get_route('/users/alice/inbox?options=abc', routes)
+    assert not users_get_route('/users/alice?page=2/inbox', routes)
+    assert not users_get_route('/users/alice/statuses/123/inbox', routes)
+    assert not users_get_route('/users/alice/followers', routes)
+    assert not users_get_route('/users/al.ice/inbox', routes)
+    assert not users_get_route('/users/al@ice/inbox', routes)
+    assert not users_get_route('/users//inbox', routes)
+    assert not users_get_route('/users/alice', routes)
+    assert not users_get_route('/inbox', routes)
+    assert not users_get_route('', routes)
+    for route_name, route in routes.items():
+        assert users_get_route('/users/alice/' + route_name, routes) == \
+            route_name
+        assert isinstance(route['paged'], bool)
+        assert callable(route['handler'])
+
+
+def _test_post_routes() -> None:
+    print('test_post_routes')
+    routes = PubServer.post_routes
+    assert post_route('/users/alice/profiledata', routes) == 'profiledata'
+    assert post_route('/users/alice/followconfirm', routes) == \
+        'followconfirm'
+    assert post_route('/users/alice/unfollowconfirm', routes) == \
+        'unfollowconfirm'
+    assert post_route('/users/alice/rmpost', routes) == 'rmpost'
+    # some forms are only received for accounts
+    assert routes['rmpost']['users']
+    assert not routes['newswiredata']['users']
+    # some forms change how the timelines of the account appear
+    assert routes['profiledata']['timeline']
+    assert not routes['linksdata']['timeline']
+    assert not post_route('/rmpost', routes)
+    assert post_route('/newswiredata', routes) == 'newswiredata'
+    assert not post_route('/users/alice/rmpost?page=2', routes)
+    assert not post_route('/users/alice/searchhandle', routes)
+    assert not post_route('/users/alice/outbox', routes)
+    assert not post_route('/inbox', routes)
+    assert not post_route('profiledata', routes)
+    assert not post_route('', routes)
+    for route_name, route in routes.items():
+        assert post_route('/users/alice/' + route_name, routes) == route_name
+        assert isinstance(route['users'], bool)
+        assert isinstance(route['timeline'], bool)
+        assert callable(route['handler'])
+
+
+def _test_timeline_page_cache() -> None:
+    print('test_timeline_page_cache')
+    recent_posts_cache = {}
+    post_id = 'https://somesite.whatever/users/someuser/statuses/1'
+    announced_id = 'https://othersite.whatever/users/other/statuses/2'
+    items = [{
+        "id": post_id + '/activity',
+        "type": "Create",
+        "object": {"id": post_id}
+    }, {
+        "id": 'https://somesite.whatever/users/someuser/statuses/3',
+        "type": "Announce",
+        "object": announced_id
+    }]
+    page_key = 'html /users/someuser/inbox?page=1 someagent'
+    store_timeline_page(recent_posts_cache, 'someuser', page_key, 'v1',
+                        '<html></html>', 'abc', items)
+    page = get_timeline_page(recent_posts_cache, page_key, 'v1')
+    assert page
+    assert page['etag'] == 'abc'
+    assert page['content'] == '<html></html>'
+    # the timeline index has changed
+    assert not get_timeline_page(recent_posts_cache, page_key, 'v2')
+    assert not get_timeline_page(recent_posts_cache, page_key, 'v1')
+
+    # a post within the page changes
+    store_timeline_page(recent_posts_cache, 'someuser', page_key, 'v1',
+                        '<html></html>', 'abc', items)
+    assert not remove_from_recent_posts_cache(recent_posts_cache,
+                                              'https:##unrelated')
+    assert get_timeline_page(recent_posts_cache, page_key, 'v1')
+    remove_from_recent_posts_cache(recent_posts_cache,
+                                   announced_id.replace('/', '#'))
+    assert not get_timeline_page(recent_posts_cache, page_key, 'v1')
+
+    store_timeline_page(recent_posts_cache, 'someuser', page_key, 'v1',
+                        '<html></html>', 'abc', items)
+    # changes made by another account don't alter this page
+    other_page_key = 'html /users/otheruser/inbox?page=1 someagent'
+    store_timeline_page(recent_posts_cache, 'otheruser', other_page_key,
+                        'v1', '<html></html>', 'def', items)
+    clear_timeline_pages(recent_posts_cache, 'otheruser')
+    assert not get_timeline_page(recent_posts_cache, other_page_key, 'v1')
+    assert get_timeline_page(recent_posts_cache, page_key, 'v1')
+    clear_timeline_pages(recent_posts_cache, 'someuser')
+    assert not get_timeline_page(recent_posts_cache, page_key, 'v1')
+
+
+def _test_word_filters(base_dir: str) -> None:
+    print('test_word_filters')
+    matcher = build_matcher(['he', 'she', 'his', 'hers'])
+    assert matcher_contains(matcher, 'ushers')
+    assert not matcher_contains(matcher, 'nothing to see')
+    assert sorted(matcher_find(matcher, 'ushers')) == ['he', 'hers', 'she']
+    assert not matcher_find(matcher, '')
+
+    filters_base_dir = base_dir + '/.tests_word_filters'
+    if os.path.isdir(filters_base_dir):
+        shutil.rmtree(filters_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(filters_base_dir + '/accounts')
+    filters_filename = filters_base_dir + '/accounts/filters.txt'
+    with open(filters_filename, 'w+', encoding='utf-8') as fp_filt:
+        fp_filt.write('bread+circuses\nbananas\n')
+    filters_cache = {}
+    assert not is_filtered_globally(filters_base_dir, 'Some text',
+                                    'en', filters_cache)
+    assert filters_cache.get(filters_filename)
+    # later lines are checked even when an earlier rule does not match
+    assert is_filtered_globally(filters_base_dir, 'I like bananas',
+                                'en', filters_cache)
+    assert not is_filtered_globally(filters_base_dir, 'Bread only',
+                                    'en', filters_cache)
+    assert is_filtered_globally(filters_base_dir,
+                                'circuses and bread', 'en', filters_cache)
+
+    # the filters are rebuilt when the file changes
+    with open(filters_filename, 'w+', encoding='utf-8') as fp_filt:
+        fp_filt.write('apples and oranges\n')
+    assert not is_filtered_globally(filters_base_dir, 'I like bananas',
+                                    'en', filters_cache)
+    assert is_filtered_globally(filters_base_dir,
+                                'no apples and oranges here', 'en',
+                                filters_cache)
+    assert is_filtered_globally(filters_base_dir,
+                                'no apples and oranges here', 'en')
+    shutil.rmtree(filters_base_dir, ignore_errors=False, onerror=None)
+
 
 def _test_text_standardize():
     print('text_standardize')
@@ -7590,6 +8981,439 @@ def _test_uninvert():
     assert result == expected
 
 
+def _test_box_index_add_thread(index_filename: str, thread_ctr: int):
+    for post_ctr in range(50):
+        box_index_add({}, index_filename,
+                      'thread' + str(thread_ctr) + 'post' + str(post_ctr))
+
+
+def _test_box_index(base_dir: str) -> None:
+    print('test_box_index')
+    index_dir = base_dir + '/.tests_box_index'
+    if os.path.isdir(index_dir):
+        shutil.rmtree(index_dir, ignore_errors=False, onerror=None)
+    os.mkdir(index_dir)
+    account_dir = index_dir + '/accounts/someuser@somedomain'
+    os.makedirs(account_dir)
+    index_filename = account_dir + '/inbox.index'
+    box_index_cache = {}
+    assert not box_index_exists(index_filename)
+    assert box_index_lines(index_filename, 0, 10) == []
+    for post_ctr in range(25):
+        assert box_index_add(box_index_cache, index_filename,
+                             'post' + str(post_ctr))
+    assert box_index_exists(index_filename)
+    assert not os.path.isfile(index_filename)
+    # duplicates are not added
+    assert box_index_add(box_index_cache, index_filename, 'post7')
+    assert box_index_lines(index_filename, 0, 3) == \
+        ['post24', 'post23', 'post22']
+    assert box_index_lines(index_filename, 10, 5) == \
+        ['post14', 'post13', 'post12', 'post11', 'post10']
+    assert box_index_lines(index_filename, 23, 5) == ['post1', 'post0']
+    assert box_index_lines(index_filename, 25, 5) == []
+    assert box_index_contains_text(index_filename, 'post13')
+    assert not box_index_contains_text(index_filename, 'post99')
+
+    # duplicates are still detected without a cache
+    assert box_index_add({}, index_filename, 'post24')
+    assert box_index_lines(index_filename, 0, 2) == ['post24', 'post23']
+
+    box_index_truncate(index_filename, 4)
+    assert box_index_lines(index_filename, 0, 10) == \
+        ['post24', 'post23', 'post22', 'post21']
+    # the log was changed, so the cached entries are reloaded
+    assert box_index_add(box_index_cache, index_filename, 'post3')
+    assert box_index_lines(index_filename, 0, 2) == ['post3', 'post24']
+
+    # an older index stored newest first
+    dm_index_filename = account_dir + '/dm.index'
+    with open(dm_index_filename, 'w+', encoding='utf-8') as fp_index:
+        for post_ctr in range(10):
+            fp_index.write('dm' + str(9 - post_ctr) + '\n')
+    assert box_index_lines(dm_index_filename, 0, 2) == ['dm9', 'dm8']
+    assert box_index_lines(dm_index_filename, 8, 5) == ['dm1', 'dm0']
+    # prepended without updating the offsets
+    with open(dm_index_filename, 'r+', encoding='utf-8') as fp_index:
+        content = fp_index.read()
+        fp_index.seek(0, 0)
+        fp_index.write('dm10\n' + content)
+    assert box_index_lines(dm_index_filename, 0, 2) == ['dm10', 'dm9']
+    assert migrate_box_indexes(index_dir) == 1
+    assert not os.path.isfile(dm_index_filename)
+    assert box_index_lines(dm_index_filename, 0, 2) == ['dm10', 'dm9']
+    assert box_index_lines(dm_index_filename, 9, 5) == ['dm1', 'dm0']
+
+    blogs_index_filename = account_dir + '/tlblogs.index'
+    assert box_index_create(blogs_index_filename, ['blog0', 'blog1'])
+    assert box_index_lines(blogs_index_filename, 0, 5) == ['blog1', 'blog0']
+
+    # posts added by several threads at once are not lost
+    threads_index_filename = account_dir + '/outbox.index'
+    add_threads = []
+    for thread_ctr in range(4):
+        thr = \
+            thread_with_trace(target=_test_box_index_add_thread,
+                              args=(threads_index_filename, thread_ctr),
+                              daemon=True)
+        add_threads.append(thr)
+        thr.start()
+    for thr in add_threads:
+        thr.join()
+    threads_lines = box_index_lines(threads_index_filename, 0, 500)
+    assert len(threads_lines) == 200
+    assert len(set(threads_lines)) == 200
+    assert 'thread3post49' in threads_lines
+    shutil.rmtree(index_dir, ignore_errors=False, onerror=None)
+
+
+class _DeliveryServerStub:
+    """The server properties used when sending queued deliveries
+    """
+    def __init__(self):
+        self.session = None
+        self.session_onion = None
+        self.session_i2p = None
+        self.proxy_type = None
+        self.domain = 'somedomain'
+        self.onion_domain = None
+        self.i2p_domain = None
+        self.cached_webfingers = {}
+        self.person_cache = {}
+        self.project_version = '1.3.0'
+        self.signing_priv_key_pem = None
+        self.federation_list = []
+        self.debug = False
+
+
+def _test_delivery_queue(base_dir: str) -> None:
+    print('test_delivery_queue')
+    delivery_base_dir = base_dir + '/.tests_delivery_queue'
+    if os.path.isdir(delivery_base_dir):
+        shutil.rmtree(delivery_base_dir, ignore_errors=False, onerror=None)
+    os.makedirs(delivery_base_dir + '/accounts')
+    delivery_dir = delivery_base_dir + '/accounts/delivery'
+    inbox_url = 'https://otherdomain/inbox'
+    delivery_item = {
+        "nickname": 'someuser',
+        "domain": 'somedomain',
+        "port": 443,
+        "accountDomain": 'somedomain',
+        "toDomain": 'otherdomain',
+        "toPort": 443,
+        "path": '/inbox',
+        "httpPrefix": 'https',
+        "sharesToken": None,
+        "post": '{"type": "Create"}'
+    }
+    queue_filename = queue_delivery(delivery_base_dir, inbox_url,
+                                    delivery_item)
+    assert os.path.isfile(queue_filename)
+    # the same post to the same inbox is only queued once
+    assert queue_delivery(delivery_base_dir, inbox_url,
+                          delivery_item) == queue_filename
+    delivery_item2 = delivery_item.copy()
+    delivery_item2['post'] = '{"type": "Delete"}'
+    queue_filename2 = queue_delivery(delivery_base_dir, inbox_url,
+                                     delivery_item2)
+    assert queue_filename2 != queue_filename
+    # both are for the same destination
+    assert os.path.basename(queue_filename).split('_')[0] == \
+        os.path.basename(queue_filename2).split('_')[0]
+
+    # nothing is sent to a destination which is waiting to be retried
+    destination_id = os.path.basename(queue_filename).split('_')[0]
+    destinations = {
+        destination_id: {
+            "inbox": inbox_url,
+            "failures": 3,
+            "nextAttempt": int(time.time()) + 600
+        }
+    }
+    save_json(destinations, delivery_dir + '/destinations.json')
+    assert process_delivery_queue(delivery_base_dir, None, 48) == 0
+    assert os.path.isfile(queue_filename)
+    assert os.path.isfile(queue_filename2)
+
+    # old deliveries become dead letters
+    queue_json = load_json(queue_filename)
+    queue_json['queued'] = int(time.time()) - (60 * 60 * 49)
+    save_json(queue_json, queue_filename)
+    assert process_delivery_queue(delivery_base_dir, None, 48) == 0
+    assert not os.path.isfile(queue_filename)
+    assert os.path.isfile(delivery_dir + '/deadletter/' +
+                          os.path.basename(queue_filename))
+    assert os.path.isfile(queue_filename2)
+    destinations = load_json(delivery_dir + '/destinations.json')
+    assert destinations.get(destination_id)
+
+    # posts to an inactive domain are queued without looking up the inbox
+    os.makedirs(delivery_base_dir + '/keys/private')
+    with open(delivery_base_dir + '/keys/private/someuser@somedomain.key',
+              'w+', encoding='utf-8') as fp_key:
+        fp_key.write('not a private key which can be used')
+    sites_liveness = {
+        'https://inactivedomain': {
+            "active": False,
+            "failures": 1,
+            "nextCheck": int(time.time()) + 600
+        }
+    }
+    post_json_object = {
+        "type": "Create",
+        "actor": "https://somedomain/users/someuser",
+        "object": "https://somedomain/users/someuser/statuses/1",
+        "signature": "unchecked"
+    }
+    session = create_session(None)
+    assert send_signed_json(post_json_object, session,
+                            delivery_base_dir, 'someuser', 'somedomain',
+                            443, 'other', 'inactivedomain', 443, 'https',
+                            False, [], None, [], {}, {}, False, '1.3.0',
+                            None, False, None, 0, 'somedomain',
+                            None, None, sites_liveness) == 9
+    inactive_filenames = []
+    for fname in os.listdir(delivery_dir):
+        if fname.endswith('.json') and fname != 'destinations.json':
+            queue_json = load_json(delivery_dir + '/' + fname)
+            if queue_json['toDomain'] == 'inactivedomain':
+                inactive_filenames.append(delivery_dir + '/' + fname)
+    assert len(inactive_filenames) == 1
+    queue_json = load_json(inactive_filenames[0])
+    assert queue_json.get('handle') == 'https://inactivedomain/@other'
+    assert not queue_json.get('inbox')
+    # the domain waits before it is tried again
+    inactive_id = os.path.basename(inactive_filenames[0]).split('_')[0]
+    destinations = load_json(delivery_dir + '/destinations.json')
+    assert destinations[inactive_id]['failures'] == 1
+    assert process_delivery_queue(delivery_base_dir, None, 48) == 0
+    assert os.path.isfile(inactive_filenames[0])
+    destinations = load_json(delivery_dir + '/destinations.json')
+    assert destinations.get(inactive_id)
+
+    # the inbox of an inactive domain can't be looked up when retrying
+    destinations[inactive_id]['nextAttempt'] = int(time.time()) - 1
+    save_json(destinations, delivery_dir + '/destinations.json')
+    delivery_server = _DeliveryServerStub()
+    delivery_server.session = session
+    assert process_delivery_queue(delivery_base_dir,
+                                  delivery_server, 48) == 0
+    assert os.path.isfile(inactive_filenames[0])
+    destinations = load_json(delivery_dir + '/destinations.json')
+    assert destinations[inactive_id]['failures'] == 2
+    assert not destinations[inactive_id].get('inbox')
+
+    # and it expires without an inbox
+    queue_json = load_json(inactive_filenames[0])
+    queue_json['queued'] = int(time.time()) - (60 * 60 * 49)
+    save_json(queue_json, inactive_filenames[0])
+    assert process_delivery_queue(delivery_base_dir,
+                                  delivery_server, 48) == 0
+    assert not os.path.isfile(inactive_filenames[0])
+    assert os.path.isfile(delivery_dir + '/deadletter/' +
+                          os.path.basename(inactive_filenames[0]))
+
+    # a failed send is queued straight away rather than waiting to retry
+    unreachable_inbox_url = 'http://127.0.0.1:1/inbox'
+    thr = \
+        thread_with_trace(target=thread_send_post,
+                          args=(session, delivery_item['post'], [],
+                                unreachable_inbox_url, delivery_base_dir,
+                                {}, {}, [], False, 'https', 'somedomain',
+                                delivery_item), daemon=True)
+    thr.start()
+    thr.join(30)
+    assert thr.is_alive() is False
+    unreachable_filenames = []
+    for fname in os.listdir(delivery_dir):
+        if fname.endswith('.json') and fname != 'destinations.json':
+            queue_json = load_json(delivery_dir + '/' + fname)
+            if queue_json.get('inbox') == unreachable_inbox_url:
+                unreachable_filenames.append(fname)
+    assert len(unreachable_filenames) == 1
+
+    shutil.rmtree(delivery_base_dir, ignore_errors=False, onerror=None)
+
+
+def _test_post_locations(base_dir: str) -> None:
+    print('test_post_locations')
+    locations_dir = base_dir + '/.tests_post_locations'
+    if os.path.isdir(locations_dir):
+        shutil.rmtree(locations_dir, ignore_errors=False, onerror=None)
+    nickname = 'someuser'
+    domain = 'somedomain'
+    account_dir = locations_dir + '/accounts/' + nickname + '@' + domain
+    os.makedirs(account_dir + '/inbox')
+    os.makedirs(account_dir + '/outbox')
+    post_url = 'https://otherdomain/users/other/statuses/123'
+    post_file = post_url.replace('/', '#') + '.json'
+    outbox_filename = account_dir + '/outbox/' + post_file
+    with open(outbox_filename, 'w+', encoding='utf-8') as fp_post:
+        fp_post.write('{}')
+
+    # without a cache the boxes are searched
+    assert locate_post(locations_dir, nickname, domain,
+                       post_url) == outbox_filename
+    recent_posts_cache = {}
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == outbox_filename
+    assert recent_posts_cache['locations']
+    assert os.path.isfile(account_dir + '/postlocations.txt')
+
+    # the index persists
+    recent_posts_cache = {}
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == outbox_filename
+
+    # the inbox takes precedence
+    inbox_filename = account_dir + '/inbox/' + post_file
+    with open(inbox_filename, 'w+', encoding='utf-8') as fp_post:
+        fp_post.write('{}')
+    update_post_location(recent_posts_cache, locations_dir,
+                         nickname, domain, inbox_filename)
+    update_post_location(recent_posts_cache, locations_dir,
+                         nickname, domain, outbox_filename)
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == inbox_filename
+    recent_posts_cache = {}
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == inbox_filename
+
+    # removed posts are no longer found
+    os.remove(inbox_filename)
+    remove_post_location(recent_posts_cache, locations_dir,
+                         nickname, domain, inbox_filename)
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == outbox_filename
+    os.remove(outbox_filename)
+    remove_post_location(recent_posts_cache, locations_dir,
+                         nickname, domain, outbox_filename)
+    assert not locate_post(locations_dir, nickname, domain, post_url,
+                           False, recent_posts_cache)
+
+    # posts which were not found are found after they are stored
+    with open(outbox_filename, 'w+', encoding='utf-8') as fp_post:
+        fp_post.write('{}')
+    assert locate_post(locations_dir, nickname, domain, post_url,
+                       False, recent_posts_cache) == outbox_filename
+
+    # posts moved by another process, such as archiving, are not found
+    archive_dir = locations_dir + '/archive'
+    os.makedirs(archive_dir)
+    os.rename(outbox_filename, archive_dir + '/' + post_file)
+    assert not locate_post(locations_dir, nickname, domain, post_url,
+                           False, recent_posts_cache)
+    recent_posts_cache = {}
+    assert not locate_post(locations_dir, nickname, domain, post_url,
+                           False, recent_posts_cache)
+    shutil.rmtree(locations_dir, ignore_errors=False, onerror=None)
+
+
+def _test_blocked_cache(base_dir: str) -> None:
+    print('test_blocked_cache')
+    blocking_dir = base_dir + '/.tests_blocked_cache'
+    if os.path.isdir(blocking_dir):
+        shutil.rmtree(blocking_dir, ignore_errors=False, onerror=None)
+    nickname = 'someuser'
+    domain = 'somedomain.net'
+    os.makedirs(blocking_dir + '/accounts/' + nickname + '@' + domain)
+    blocked_cache = {}
+    assert not is_blocked_domain(blocking_dir, 'blocked.net', blocked_cache)
+
+    assert add_global_block(blocking_dir, '*', 'blocked.net', None)
+    assert is_blocked_domain(blocking_dir, 'blocked.net', blocked_cache)
+    assert is_blocked_domain(blocking_dir, 'blocked.net', None)
+    # subdomains are also blocked
+    assert is_blocked_domain(blocking_dir, 'a.b.blocked.net', blocked_cache)
+    assert is_blocked_domain(blocking_dir, 'a.b.blocked.net', None)
+    assert not is_blocked_domain(blocking_dir, 'notblocked.net',
+                                 blocked_cache)
+    assert is_blocked(blocking_dir, nickname, domain,
+                      'someone', 'sub.blocked.net', blocked_cache)
+
+    # account level blocks
+    assert not is_blocked(blocking_dir, nickname, domain,
+                          'troll', 'otherdomain.net', blocked_cache)
+    assert add_block(blocking_dir, nickname, domain,
+                     'troll', 'otherdomain.net')
+    assert is_blocked(blocking_dir, nickname, domain,
+                      'troll', 'otherdomain.net', blocked_cache)
+    assert is_blocked(blocking_dir, nickname, domain,
+                      'troll', 'otherdomain.net', None)
+    assert not is_blocked(blocking_dir, nickname, domain,
+                          'nottroll', 'otherdomain.net', blocked_cache)
+
+    # changes to the block lists are noticed
+    assert remove_block(blocking_dir, nickname, domain,
+                        'troll', 'otherdomain.net')
+    assert not is_blocked(blocking_dir, nickname, domain,
+                          'troll', 'otherdomain.net', blocked_cache)
+    assert remove_global_block(blocking_dir, '*', 'blocked.net')
+    assert not is_blocked_domain(blocking_dir, 'blocked.net', blocked_cache)
+    assert not is_blocked_domain(blocking_dir, 'a.b.blocked.net', None)
+    shutil.rmtree(blocking_dir, ignore_errors=False, onerror=None)
+
+
+def _test_inbox_queue_ordering(base_dir: str) -> None:
+    print('test_inbox_queue_ordering')
+    queue_dir = base_dir + '/.tests_inbox_queue'
+    if os.path.isdir(queue_dir):
+        shutil.rmtree(queue_dir, ignore_errors=False, onerror=None)
+    os.mkdir(queue_dir)
+    post_url = 'https://somedomain/users/someone/statuses/1'
+    items = (
+        ('https://domain1/users/actor1', 'Create', None),
+        ('https://domain1/users/actor1', 'Like', post_url),
+        ('https://domain2/users/actor2', 'Like', post_url),
+        ('https://domain3/users/actor3', 'Create', None),
+        ('https://domain4/users/actor4', 'Announce', post_url)
+    )
+    queue = []
+    ctr = 0
+    for actor, activity_type, object_url in items:
+        queue_filename = queue_dir + '/' + str(ctr) + '.json'
+        post_json_object = {
+            'actor': actor,
+            'type': activity_type
+        }
+        if object_url:
+            post_json_object['object'] = object_url
+        else:
+            post_json_object['object'] = {
+                'id': actor + '/statuses/' + str(ctr),
+                'type': 'Note'
+            }
+        save_json({'actor': actor, 'post': post_json_object}, queue_filename)
+        queue.append(queue_filename)
+        ctr += 1
+
+    queue_keys = {}
+    ready_items = inbox_queue_ready_items(queue, queue_keys, [], 10)
+    # the second item has the same actor as the first, and the
+    # third and fifth items are about the same post as the second
+    assert ready_items == [queue[0], queue[3]]
+    assert len(queue_keys) == len(queue)
+
+    # only a limited number of items at a time
+    assert inbox_queue_ready_items(queue, queue_keys, [], 1) == [queue[0]]
+
+    # items being processed hold back later related items
+    inbox_workers = [{
+        'thread': None,
+        'filename': queue[0],
+        'keys': queue_keys[queue[0]]
+    }]
+    ready_items = \
+        inbox_queue_ready_items(queue, queue_keys, inbox_workers, 10)
+    assert ready_items == [queue[3]]
+
+    # when the first item has been processed the like can proceed
+    queue.pop(0)
+    ready_items = inbox_queue_ready_items(queue, queue_keys, [], 10)
+    assert ready_items == [queue[0], queue[2]]
+    shutil.rmtree(queue_dir, ignore_errors=False, onerror=None)
+
+
 def run_all_tests():
     base_dir = os.getcwd()
     print('Running tests...')
@@ -7607,11 +9431,28 @@ def run_all_tests():
     _test_checkbox_names()
     _test_thread_functions()
     _test_functions()
+    _test_box_index(base_dir)
+    _test_post_locations(base_dir)
+    _test_delivery_queue(base_dir)
+    _test_blocked_cache(base_dir)
+    _test_inbox_queue_ordering(base_dir)
     _test_uninvert()
     _test_hashtag_maps()
     _test_combine_lines()
     _test_text_standardize()
     _test_dogwhistles()
+    _test_word_filters(base_dir)
+    _test_timeline_page_cache()
+    _test_calendar_index(base_dir)
+    _test_search_index(base_dir)
+    _test_hashtag_index(base_dir)
+    _test_skills_index(base_dir)
+    _test_shares_index(base_dir)
+    _test_streamed_form_post(base_dir)
+    _test_admission()
+    _test_static_get_route()
+    _test_users_get_routes()
+    _test_post_routes()
     _test_remove_end_of_line()
     _test_translation_labels()
     _test_color_contrast_value(base_dir)
@@ -7621,6 +9462,8 @@ def run_all_tests():
     _test_safe_webtext()
     _test_link_from_rss_item()
     _test_xml_podcast_dict(base_dir)
+    _test_newswire_conditional_get(base_dir)
+    _test_newswire_streaming(base_dir)
     _test_get_actor_from_in_reply_to()
     _test_valid_emoji_content()
     _test_add_cw_lists(base_dir)
@@ -7673,7 +9516,9 @@ def run_all_tests():
     _test_danger_markup()
     _test_strip_html()
     _test_site_active()
+    _test_site_active_cached()
     _test_jsonld()
+    _test_jsonld_benchmark()
     _test_remove_txt_formatting()
     _test_web_links()
     _test_recent_posts_cache()
@@ -7689,6 +9534,8 @@ def run_all_tests():
     _test_httpsig_base_new(True, base_dir, 'rsa-sha256', 'rsa-sha256')
     _test_httpsig_base_new(False, base_dir, 'rsa-sha256', 'rsa-sha256')
     _test_cache()
+    _test_person_cache_lru()
+    _test_person_cache_pub_keys()
     _test_threads()
     _test_create_person_account(base_dir)
     _test_authentication(base_dir)
@@ -15,11 +15,18 @@ import datetime
 import json
 import idna
 import locale
+from collections import OrderedDict
 from dateutil.tz import tz
 from pprint import pprint
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from followingCalendar import add_person_to_calendar
+from indexlock import index_lock
+from boxindex import box_index_lines
+from boxindex import box_index_exists
+from boxindex import box_index_contains_text
+from searchindex import search_index_find
+from searchindex import search_index_remove
 
 VALID_HASHTAG_CHARS = \
     set('_0123456789' +
@@ -1141,17 +1148,38 @@ def dangerous_svg(content: str, allow_local_network_access: bool) -> bool:
                                     separators, invalid_strings)
 
 
+def person_cache_actors(person_cache: {}) -> {}:
+    """Returns the actors held in memory, least recently used first
+    """
+    return person_cache.setdefault('actors', {})
+
+
+def person_cache_pub_keys(person_cache: {}) -> {}:
+    """Returns the parsed public keys held in memory, indexed by keyId
+    """
+    return person_cache.setdefault('pubKeys', {})
+
+
+def get_cached_actor(person_cache: {}, actor: str) -> {}:
+    """Returns the cache entry for the given actor, if it is in memory
+    """
+    if not person_cache:
+        return None
+    return person_cache.get('actors', {}).get(actor)
+
+
 def get_display_name(base_dir: str, actor: str, person_cache: {}) -> str:
     """Returns the display name for the given actor
     """
     if '/statuses/' in actor:
         actor = actor.split('/statuses/')[0]
-    if not person_cache.get(actor):
+    cached = get_cached_actor(person_cache, actor)
+    if not cached:
         return None
     name_found = None
-    if person_cache[actor].get('actor'):
-        if person_cache[actor]['actor'].get('name'):
-            name_found = person_cache[actor]['actor']['name']
+    if cached.get('actor'):
+        if cached['actor'].get('name'):
+            name_found = cached['actor']['name']
     else:
         # Try to obtain from the cached actors
         cached_actor_filename = \
@@ -1219,7 +1247,8 @@ def get_gender_from_bio(base_dir: str, actor: str, person_cache: {},
     default_gender = 'They/Them'
     if '/statuses/' in actor:
         actor = actor.split('/statuses/')[0]
-    if not person_cache.get(actor):
+    cached = get_cached_actor(person_cache, actor)
+    if not cached:
         return default_gender
     bio_found = None
     if translate:
@@ -1227,8 +1256,8 @@ def get_gender_from_bio(base_dir: str, actor: str, person_cache: {},
     else:
         pronoun_str = 'pronoun'
     actor_json = None
-    if person_cache[actor].get('actor'):
-        actor_json = person_cache[actor]['actor']
+    if cached.get('actor'):
+        actor_json = cached['actor']
     else:
         # Try to obtain from the cached actors
         cached_actor_filename = \
@@ -1585,21 +1614,187 @@ def clear_from_post_caches(base_dir: str, recent_posts_cache: {},
                     print('EX: clear_from_post_caches file not removed ' +
                           str(post_filename))
             # if the post is in the recent posts cache then remove it
-            if recent_posts_cache.get('index'):
-                if post_id in recent_posts_cache['index']:
-                    recent_posts_cache['index'].remove(post_id)
-            if recent_posts_cache.get('json'):
-                if recent_posts_cache['json'].get(post_id):
-                    del recent_posts_cache['json'][post_id]
-            if recent_posts_cache.get('html'):
-                if recent_posts_cache['html'].get(post_id):
-                    del recent_posts_cache['html'][post_id]
+            remove_from_recent_posts_cache(recent_posts_cache, post_id)
         break
 
 
+# maximum number of recently located posts held in memory
+MAX_RECENT_POST_LOCATIONS = 4096
+
+# places where posts may be stored, in order of precedence
+POST_LOCATION_BOXES = ('inbox', 'outbox', 'tlblogs', 'news', 'announce')
+
+
+def _post_location_path(base_dir: str, nickname: str, domain: str,
+                        post_file: str, box_name: str) -> str:
+    """Returns the full filename for a post stored in the given place
+    """
+    if box_name == 'news':
+        return base_dir + '/accounts/news@' + domain + '/outbox/' + post_file
+    if box_name == 'announce':
+        return base_dir + '/cache/announce/' + nickname + '/' + post_file
+    return acct_dir(base_dir, nickname, domain) + '/' + box_name + '/' + \
+        post_file
+
+
+def _post_location_box(base_dir: str, nickname: str, domain: str,
+                       post_filename: str) -> str:
+    """Returns the place where the given post file is stored
+    """
+    post_file = post_filename.split('/')[-1]
+    for box_name in POST_LOCATION_BOXES:
+        if post_filename == \
+           _post_location_path(base_dir, nickname, domain,
+                               post_file, box_name):
+            return box_name
+    return None
+
+
+def _load_post_locations(recent_posts_cache: {}, base_dir: str,
+                         nickname: str, domain: str) -> {}:
+    """Returns the index of post locations for an account, loading it
+    from file if needed. Later entries within the file replace earlier
+    ones, and a location of - indicates that the post was removed
+    """
+    handle = nickname + '@' + domain
+    if not recent_posts_cache.get('postindex'):
+        recent_posts_cache['postindex'] = {}
+    if recent_posts_cache['postindex'].get(handle) is not None:
+        return recent_posts_cache['postindex'][handle]
+    locations_filename = acct_dir(base_dir, nickname, domain) + \
+        '/postlocations.txt'
+    with index_lock(locations_filename):
+        # was it loaded by another thread?
+        if recent_posts_cache['postindex'].get(handle) is not None:
+            return recent_posts_cache['postindex'][handle]
+        locations = {}
+        lines_ctr = 0
+        if os.path.isfile(locations_filename):
+            try:
+                with open(locations_filename, 'r',
+                          encoding='utf-8') as fp_locations:
+                    for line in fp_locations:
+                        lines_ctr += 1
+                        if ' ' not in line:
+                            continue
+                        post_file = line.split(' ')[0]
+                        box_name = line.split(' ')[1].strip()
+                        if box_name == '-':
+                            if locations.get(post_file):
+                                del locations[post_file]
+                            continue
+                        locations[post_file] = box_name
+            except OSError:
+                print('EX: unable to load post locations ' +
+                      locations_filename)
+        if lines_ctr > 256 and lines_ctr > len(locations) * 2:
+            # remove replaced or deleted entries from the file
+            try:
+                with open(locations_filename, 'w+',
+                          encoding='utf-8') as fp_locations:
+                    for post_file, box_name in locations.items():
+                        fp_locations.write(post_file + ' ' +
+                                           box_name + '\n')
+            except OSError:
+                print('EX: unable to compact post locations ' +
+                      locations_filename)
+        recent_posts_cache['postindex'][handle] = locations
+    return locations
+
+
+def _save_post_location(base_dir: str, nickname: str, domain: str,
+                        post_file: str, box_name: str) -> None:
+    """Appends a post location to the index file for an account
+    """
+    account_dir = acct_dir(base_dir, nickname, domain)
+    if not os.path.isdir(account_dir):
+        return
+    locations_filename = account_dir + '/postlocations.txt'
+    with index_lock(locations_filename):
+        try:
+            with open(locations_filename, 'a+',
+                      encoding='utf-8') as fp_locations:
+                fp_locations.write(post_file + ' ' + box_name + '\n')
+        except OSError:
+            print('EX: unable to append post location ' +
+                  locations_filename)
+
+
+def _add_recent_post_location(recent_posts_cache: {}, key: str,
+                              post_filename: str) -> None:
+    """Adds a post location to the least recently used cache
+    """
+    if not recent_posts_cache.get('locations'):
+        recent_posts_cache['locations'] = OrderedDict()
+    recent_locations = recent_posts_cache['locations']
+    recent_locations[key] = post_filename
+    try:
+        recent_locations.move_to_end(key)
+        while len(recent_locations) > MAX_RECENT_POST_LOCATIONS:
+            recent_locations.popitem(last=False)
+    except KeyError:
+        # changed by another inbox queue worker
+        pass
+
+
+def update_post_location(recent_posts_cache: {}, base_dir: str,
+                         nickname: str, domain: str,
+                         post_filename: str) -> None:
+    """Records where a post is stored, so that it can later be
+    located without checking each of the possible places
+    """
+    if recent_posts_cache is None:
+        return
+    box_name = _post_location_box(base_dir, nickname, domain, post_filename)
+    if not box_name:
+        return
+    post_file = post_filename.split('/')[-1]
+    locations = \
+        _load_post_locations(recent_posts_cache, base_dir, nickname, domain)
+    curr_box_name = locations.get(post_file)
+    if curr_box_name == box_name:
+        return
+    if curr_box_name in POST_LOCATION_BOXES:
+        # don't replace a location which takes precedence
+        if POST_LOCATION_BOXES.index(curr_box_name) < \
+           POST_LOCATION_BOXES.index(box_name):
+            curr_filename = \
+                _post_location_path(base_dir, nickname, domain,
+                                    post_file, curr_box_name)
+            if os.path.isfile(curr_filename):
+                return
+    locations[post_file] = box_name
+    _save_post_location(base_dir, nickname, domain, post_file, box_name)
+    _add_recent_post_location(recent_posts_cache,
+                              nickname + '@' + domain + ' ' + post_file,
+                              post_filename)
+
+
+def remove_post_location(recent_posts_cache: {}, base_dir: str,
+                         nickname: str, domain: str,
+                         post_filename: str) -> None:
+    """Removes a post from the index of post locations
+    """
+    if recent_posts_cache is None:
+        return
+    post_file = post_filename.split('/')[-1]
+    key = nickname + '@' + domain + ' ' + post_file
+    if recent_posts_cache.get('locations'):
+        recent_posts_cache['locations'].pop(key, None)
+    locations = \
+        _load_post_locations(recent_posts_cache, base_dir, nickname, domain)
+    if not locations.get(post_file):
+        return
+    del locations[post_file]
+    _save_post_location(base_dir, nickname, domain, post_file, '-')
+
+
 def locate_post(base_dir: str, nickname: str, domain: str,
-                post_url: str, replies: bool = False) -> str:
+                post_url: str, replies: bool = False,
+                recent_posts_cache: {} = None) -> str:
     """Returns the filename for the given status post url
+    If the recent posts cache is given then the index of post
+    locations is used
     """
     if not replies:
         extension = 'json'
@@ -1612,25 +1807,49 @@ def locate_post(base_dir: str, nickname: str, domain: str,
     # add the extension
     post_url = post_url + '.' + extension
 
-    # search boxes
-    boxes = ('inbox', 'outbox', 'tlblogs')
-    account_dir = acct_dir(base_dir, nickname, domain) + '/'
-    for box_name in boxes:
-        post_filename = account_dir + box_name + '/' + post_url
+    stale_filename = None
+    if recent_posts_cache is not None:
+        # Posts may be moved or removed by another process, such as
+        # when archiving, so the file is checked for each location
+        # which is found
+        key = nickname + '@' + domain + ' ' + post_url
+        if recent_posts_cache.get('locations'):
+            post_filename = recent_posts_cache['locations'].get(key)
+            if post_filename:
+                if os.path.isfile(post_filename):
+                    try:
+                        recent_posts_cache['locations'].move_to_end(key)
+                    except KeyError:
+                        pass
+                    return post_filename
+                recent_posts_cache['locations'].pop(key, None)
+        # is it within the index?
+        locations = \
+            _load_post_locations(recent_posts_cache, base_dir,
+                                 nickname, domain)
+        if locations.get(post_url):
+            post_filename = \
+                _post_location_path(base_dir, nickname, domain,
+                                    post_url, locations[post_url])
+            if os.path.isfile(post_filename):
+                _add_recent_post_location(recent_posts_cache, key,
+                                          post_filename)
+                return post_filename
+            stale_filename = post_filename
+
+    # posts stored before the index existed, or elsewhere
+    for box_name in POST_LOCATION_BOXES:
+        post_filename = \
+            _post_location_path(base_dir, nickname, domain,
+                                post_url, box_name)
         if os.path.isfile(post_filename):
+            update_post_location(recent_posts_cache, base_dir,
+                                 nickname, domain, post_filename)
             return post_filename
 
-    # check news posts
-    account_dir = base_dir + '/accounts/news' + '@' + domain + '/'
-    post_filename = account_dir + 'outbox/' + post_url
-    if os.path.isfile(post_filename):
-        return post_filename
-
-    # is it in the announce cache?
-    post_filename = base_dir + '/cache/announce/' + nickname + '/' + post_url
-    if os.path.isfile(post_filename):
-        return post_filename
-
+    if stale_filename:
+        remove_post_location(recent_posts_cache, base_dir,
+                             nickname, domain, stale_filename)
     # print('WARN: unable to locate ' + nickname + ' ' + post_url)
     return None
 
@@ -1793,11 +2012,11 @@ def _is_reply_to_blog_post(base_dir: str, nickname: str, domain: str,
         return False
     blogs_index_filename = \
         acct_dir(base_dir, nickname, domain) + '/tlblogs.index'
-    if not os.path.isfile(blogs_index_filename):
+    if not box_index_exists(blogs_index_filename):
         return False
     post_id = remove_id_ending(post_json_object['object']['inReplyTo'])
     post_id = post_id.replace('/', '#')
-    if text_in_file(post_id, blogs_index_filename):
+    if box_index_contains_text(blogs_index_filename, post_id):
         return True
     return False
 
@@ -1853,27 +2072,11 @@ def remove_post_from_cache(post_json_object: {},
     if not post_json_object.get('id'):
         return
 
-    if not recent_posts_cache.get('index'):
-        return
-
     post_id = post_json_object['id']
     if '#' in post_id:
         post_id = post_id.split('#', 1)[0]
     post_id = remove_id_ending(post_id).replace('/', '#')
-    if post_id not in recent_posts_cache['index']:
-        return
-
-    if recent_posts_cache.get('index'):
-        if post_id in recent_posts_cache['index']:
-            recent_posts_cache['index'].remove(post_id)
-
-    if recent_posts_cache.get('json'):
-        if recent_posts_cache['json'].get(post_id):
-            del recent_posts_cache['json'][post_id]
-
-    if recent_posts_cache.get('html'):
-        if recent_posts_cache['html'].get(post_id):
-            del recent_posts_cache['html'][post_id]
+    remove_from_recent_posts_cache(recent_posts_cache, post_id)
 
 
 def delete_cached_html(base_dir: str, nickname: str, domain: str,
@@ -2074,6 +2277,8 @@ def delete_post(base_dir: str, http_prefix: str,
                                     http_prefix, post_filename,
                                     recent_posts_cache, debug, manual)
         # finally, remove the post itself
+        remove_post_location(recent_posts_cache, base_dir, nickname, domain,
+                             post_filename)
         try:
             os.remove(post_filename)
         except OSError:
@@ -2104,6 +2309,12 @@ def delete_post(base_dir: str, http_prefix: str,
     # remove from conversation index
     _delete_conversation_post(base_dir, nickname, domain, post_json_object)
 
+    # remove from the search index
+    if '/outbox/' in post_filename:
+        account_dir = acct_dir(base_dir, nickname, domain)
+        search_index_remove(account_dir, 'outbox',
+                            post_filename, post_json_object)
+
     # remove any attachment
     _remove_attachment(base_dir, http_prefix, domain, post_json_object)
 
@@ -2151,6 +2362,8 @@ def delete_post(base_dir: str, http_prefix: str,
                                 http_prefix, post_filename,
                                 recent_posts_cache, debug, manual)
     # finally, remove the post itself
+    remove_post_location(recent_posts_cache, base_dir, nickname, domain,
+                         post_filename)
     try:
         os.remove(post_filename)
     except OSError:
@@ -2433,9 +2646,222 @@ def get_cached_post_filename(base_dir: str, nickname: str, domain: str,
     return cached_post_filename + '.html'
 
 
+# upper limit on the memory used by the recent posts cache
+MAX_RECENT_POSTS_CACHE_BYTES = 64 * 1024 * 1024
+
+# approximate memory used by a parsed post, as a multiple of
+# the length of its json
+RECENT_POSTS_PARSED_SIZE = 4
+
+# timelines for which posts within the recent posts cache are checked.
+# Other timelines are the same as the inbox, and posts within the
+# replies timeline also need to mention the account
+RECENT_POSTS_BOXES = ('inbox', 'dm', 'tlreplies', 'tlmedia',
+                      'tlblogs', 'tlnews')
+
+# rendered timeline pages are kept for a limited time, because they
+# also contain notifications and the newswire
+TIMELINE_PAGE_CACHE_SECS = 60
+MAX_TIMELINE_PAGES = 128
+
+
+def recent_posts_cache_stats(recent_posts_cache: {}) -> {}:
+    """Returns the hit and miss counters of the recent posts cache
+    """
+    if not recent_posts_cache.get('stats'):
+        recent_posts_cache['stats'] = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+    return recent_posts_cache['stats']
+
+
+def recent_posts_cache_summary(recent_posts_cache: {}) -> {}:
+    """Returns the counters and size of the recent posts cache
+    """
+    stats = recent_posts_cache_stats(recent_posts_cache).copy()
+    stats['entries'] = 0
+    if recent_posts_cache.get('index'):
+        stats['entries'] = len(recent_posts_cache['index'])
+    stats['bytes'] = recent_posts_cache.get('bytes', 0)
+    return stats
+
+
+def _remove_recent_post(recent_posts_cache: {}, post_id: str) -> bool:
+    """Removes a post from the recent posts cache, given an id
+    which has already been converted into a cache index key
+    """
+    if not recent_posts_cache.get('index'):
+        return False
+    size = recent_posts_cache['index'].pop(post_id, None)
+    if size is None:
+        return False
+    recent_posts_cache['bytes'] = \
+        max(0, recent_posts_cache.get('bytes', 0) - size)
+    recent_posts_cache['boxes'].pop(post_id, None)
+    recent_posts_cache['posts'].pop(post_id, None)
+    recent_posts_cache['html'].pop(post_id, None)
+    return True
+
+
+def remove_from_recent_posts_cache(recent_posts_cache: {},
+                                   post_id: str) -> bool:
+    """Removes a post which has changed from the recent posts cache,
+    together with any rendered timeline pages which contain it
+    """
+    _remove_timeline_pages_with_post(recent_posts_cache, post_id)
+    return _remove_recent_post(recent_posts_cache, post_id)
+
+
+def get_timeline_page(recent_posts_cache: {}, page_key: str,
+                      version: str) -> {}:
+    """Returns a previously rendered timeline page, provided that
+    the timeline index has not changed since it was rendered
+    """
+    if not recent_posts_cache.get('timelines'):
+        return None
+    pages = recent_posts_cache['timelines']
+    page = pages.get(page_key)
+    if not page:
+        return None
+    if page['version'] != version or \
+       int(time.time()) - page['created'] > TIMELINE_PAGE_CACHE_SECS:
+        pages.pop(page_key, None)
+        return None
+    return page
+
+
+def store_timeline_page(recent_posts_cache: {}, nickname: str,
+                        page_key: str, version: str, content: str,
+                        etag: str, items: []) -> None:
+    """Stores a rendered timeline page for the given account, together
+    with the ids of the posts within it so that it can be removed if
+    any of them change
+    """
+    if not recent_posts_cache.get('timelines'):
+        recent_posts_cache['timelines'] = OrderedDict()
+    pages = recent_posts_cache['timelines']
+    post_ids = {}
+    for item in items:
+        if not item.get('id'):
+            continue
+        post_ids[remove_id_ending(item['id']).replace('/', '#')] = True
+        if has_object_string(item, False):
+            post_ids[remove_id_ending(item['object']).replace('/', '#')] = \
+                True
+    pages.pop(page_key, None)
+    pages[page_key] = {
+        "nickname": nickname,
+        "version": version,
+        "created": int(time.time()),
+        "content": content,
+        "etag": etag,
+        "postIds": post_ids
+    }
+    while len(pages) > MAX_TIMELINE_PAGES:
+        try:
+            oldest_key = next(iter(pages))
+        except (StopIteration, RuntimeError):
+            break
+        pages.pop(oldest_key, None)
+
+
+def clear_timeline_pages(recent_posts_cache: {}, nickname: str) -> None:
+    """Removes the rendered timeline pages for the given account
+    """
+    if not recent_posts_cache.get('timelines'):
+        return
+    pages = recent_posts_cache['timelines']
+    try:
+        pages_list = list(pages.items())
+    except RuntimeError:
+        # changed by another thread, so play safe
+        pages.clear()
+        return
+    for page_key, page in pages_list:
+        if page['nickname'] == nickname:
+            pages.pop(page_key, None)
+
+
+def _remove_timeline_pages_with_post(recent_posts_cache: {},
+                                     post_id: str) -> None:
+    """Removes rendered timeline pages which contain the given post
+    """
+    if not recent_posts_cache.get('timelines'):
+        return
+    pages = recent_posts_cache['timelines']
+    try:
+        pages_list = list(pages.items())
+    except RuntimeError:
+        # changed by another thread, so play safe
+        pages.clear()
+        return
+    for page_key, page in pages_list:
+        if post_id in page['postIds']:
+            pages.pop(page_key, None)
+
+
+def is_timeline_post_str(post_str: str, boxname: str,
+                         box_actor: str) -> bool:
+    """ is this a valid timeline post?
+    """
+    # must be a recognized ActivityPub type
+    if ('"Note"' in post_str or
+        '"EncryptedMessage"' in post_str or
+        '"ChatMessage"' in post_str or
+        '"Event"' in post_str or
+        '"Article"' in post_str or
+        '"Patch"' in post_str or
+        '"Announce"' in post_str or
+        ('"Question"' in post_str and
+         ('"Create"' in post_str or '"Update"' in post_str))):
+
+        if boxname == 'dm':
+            if '#Public' in post_str or '/followers' in post_str:
+                return False
+        elif boxname == 'tlreplies':
+            if box_actor not in post_str:
+                return False
+        elif boxname in ('tlblogs', 'tlnews', 'tlfeatures'):
+            if '"Create"' not in post_str:
+                return False
+            if '"Article"' not in post_str:
+                return False
+        elif boxname == 'tlmedia':
+            if '"Create"' in post_str:
+                if ('mediaType' not in post_str or
+                    ('image/' not in post_str and
+                     'video/' not in post_str and
+                     'audio/' not in post_str)):
+                    return False
+        return True
+    return False
+
+
+def copy_json_object(json_object):
+    """Returns a copy of a parsed json object, so that the copy can be
+    changed without changing the original
+    """
+    if isinstance(json_object, dict):
+        json_copy = {}
+        for key, value in json_object.items():
+            json_copy[key] = copy_json_object(value)
+        return json_copy
+    if isinstance(json_object, list):
+        json_copy = []
+        for item in json_object:
+            json_copy.append(copy_json_object(item))
+        return json_copy
+    return json_object
+
+
 def update_recent_posts_cache(recent_posts_cache: {}, max_recent_posts: int,
                               post_json_object: {}, html_str: str) -> None:
-    """Store recent posts in memory so that they can be quickly recalled
+    """Store recent posts in memory so that they can be quickly recalled.
+    The index is ordered from oldest to newest, with the size in bytes
+    of each entry, so that the oldest posts can be evicted when either
+    the number of posts or their total size exceeds the limits
     """
     if not post_json_object.get('id'):
         return
@@ -2443,27 +2869,37 @@ def update_recent_posts_cache(recent_posts_cache: {}, max_recent_posts: int,
     if '#' in post_id:
         post_id = post_id.split('#', 1)[0]
     post_id = remove_id_ending(post_id).replace('/', '#')
-    if recent_posts_cache.get('index'):
-        if post_id in recent_posts_cache['index']:
-            return
-        recent_posts_cache['index'].append(post_id)
-        post_json_object['muted'] = False
-        recent_posts_cache['json'][post_id] = json.dumps(post_json_object)
-        recent_posts_cache['html'][post_id] = html_str
-
-        while len(recent_posts_cache['html'].items()) > max_recent_posts:
-            post_id = recent_posts_cache['index'][0]
-            recent_posts_cache['index'].pop(0)
-            if recent_posts_cache['json'].get(post_id):
-                del recent_posts_cache['json'][post_id]
-            if recent_posts_cache['html'].get(post_id):
-                del recent_posts_cache['html'][post_id]
-    else:
-        recent_posts_cache['index'] = [post_id]
-        recent_posts_cache['json'] = {}
+    if not recent_posts_cache.get('index'):
+        recent_posts_cache['index'] = OrderedDict()
+        recent_posts_cache['boxes'] = {}
+        recent_posts_cache['posts'] = {}
         recent_posts_cache['html'] = {}
-        recent_posts_cache['json'][post_id] = json.dumps(post_json_object)
-        recent_posts_cache['html'][post_id] = html_str
+        recent_posts_cache['bytes'] = 0
+    elif post_id in recent_posts_cache['index']:
+        return
+    post_json_object['muted'] = False
+    post_str = json.dumps(post_json_object)
+    # the timelines which the post can appear within are found now, so
+    # that timelines don't need to check the json of each post
+    boxes = {}
+    for boxname in RECENT_POSTS_BOXES:
+        boxes[boxname] = is_timeline_post_str(post_str, boxname, '')
+    # the parsed post uses several times more memory than its json
+    size = len(post_str) * RECENT_POSTS_PARSED_SIZE + len(html_str)
+    recent_posts_cache['index'][post_id] = size
+    recent_posts_cache['boxes'][post_id] = boxes
+    recent_posts_cache['posts'][post_id] = copy_json_object(post_json_object)
+    recent_posts_cache['html'][post_id] = html_str
+    recent_posts_cache['bytes'] = recent_posts_cache.get('bytes', 0) + size
+
+    stats = recent_posts_cache_stats(recent_posts_cache)
+    index = recent_posts_cache['index']
+    while index and \
+        (len(index) > max_recent_posts or
+         recent_posts_cache['bytes'] > MAX_RECENT_POSTS_CACHE_BYTES):
+        oldest_post_id = next(iter(index))
+        _remove_recent_post(recent_posts_cache, oldest_post_id)
+        stats['evictions'] += 1
 
 
 def file_last_modified(filename: str) -> str:
@@ -2534,15 +2970,15 @@ def _search_virtual_box_posts(base_dir: str, nickname: str, domain: str,
         search_words = [search_str]
 
     res = []
-    with open(index_filename, 'r', encoding='utf-8') as index_file:
-        post_filename = 'start'
-        while post_filename:
-            post_filename = index_file.readline()
-            if not post_filename:
-                break
+    index_line_number = 0
+    index_lines = ['start']
+    while index_lines:
+        index_lines = box_index_lines(index_filename, index_line_number, 256)
+        index_line_number += len(index_lines)
+        for post_filename in index_lines:
             if '.json' not in post_filename:
-                break
-            post_filename = path + '/' + post_filename.strip()
+                return res
+            post_filename = path + '/' + post_filename
             if not os.path.isfile(post_filename):
                 continue
             with open(post_filename, 'r', encoding='utf-8') as post_file:
@@ -2568,10 +3004,20 @@ def search_box_posts(base_dir: str, nickname: str, domain: str,
     """Search your posts and return a list of the filenames
     containing matching strings
     """
+    # use the search index if possible
+    search_words = []
+    for search_word in search_str.lower().strip().split('+'):
+        search_words.append(search_word.strip())
+    account_dir = acct_dir(base_dir, nickname, domain)
+    res = search_index_find(account_dir, box_name,
+                            search_words, max_results)
+    if res is not None:
+        return res
+
     path = acct_dir(base_dir, nickname, domain) + '/' + box_name
     # is this a virtual box, such as direct messages?
     if not os.path.isdir(path):
-        if os.path.isfile(path + '.index'):
+        if box_index_exists(path + '.index'):
             return _search_virtual_box_posts(base_dir, nickname, domain,
                                              search_str, max_results, box_name)
         return []
@@ -3031,11 +3477,7 @@ def reject_post_id(base_dir: str, nickname: str, domain: str,
         post_url = remove_eol(index_filename)
         post_url = post_url.replace('.json', '').strip()
 
-        if post_url in recent_posts_cache['index']:
-            if recent_posts_cache['json'].get(post_url):
-                del recent_posts_cache['json'][post_url]
-            if recent_posts_cache['html'].get(post_url):
-                del recent_posts_cache['html'][post_url]
+        remove_from_recent_posts_cache(recent_posts_cache, post_url)
 
     with open(post_filename + '.reject', 'w+',
               encoding='utf-8') as reject_file:
@@ -3186,6 +3628,25 @@ def get_occupation_skills(actor_json: {}) -> []:
     return []
 
 
+def get_skills_from_list(skills_list: []) -> {}:
+    """Returns a dict of skills from a list
+    """
+    if isinstance(skills_list, list):
+        skills_list2 = skills_list
+    else:
+        skills_list2 = skills_list.split(',')
+    skills_dict = {}
+    for skill in skills_list2:
+        if ':' not in skill:
+            continue
+        name = skill.split(':')[0].strip().lower()
+        value_str = skill.split(':')[1]
+        if not value_str.isdigit():
+            continue
+        skills_dict[name] = int(value_str)
+    return skills_dict
+
+
 def get_occupation_name(actor_json: {}) -> str:
     """Returns the occupation name an actor
     """
@@ -3446,15 +3907,15 @@ def is_group_actor(base_dir: str, actor: str, person_cache: {},
                    debug: bool = False) -> bool:
     """Is the given actor a group?
     """
-    if person_cache:
-        if person_cache.get(actor):
-            if person_cache[actor].get('actor'):
-                if person_cache[actor]['actor'].get('type'):
-                    if person_cache[actor]['actor']['type'] == 'Group':
-                        if debug:
-                            print('Cached actor ' + actor + ' has Group type')
-                        return True
-                return False
+    cached = get_cached_actor(person_cache, actor)
+    if cached:
+        if cached.get('actor'):
+            if cached['actor'].get('type'):
+                if cached['actor']['type'] == 'Group':
+                    if debug:
+                        print('Cached actor ' + actor + ' has Group type')
+                    return True
+            return False
     if debug:
         print('Actor ' + actor + ' not in cache')
     cached_actor_filename = \
@@ -11,6 +11,7 @@ import os
 from datetime import datetime
 from utils import get_nickname_from_actor
 from utils import get_config_param
+from hashtagindex import hashtag_day_counts
 from categories import get_hashtag_categories
 from categories import get_hashtag_category
 from webapp_utils import set_custom_background
@@ -67,12 +68,9 @@ def html_hash_tag_swarm(base_dir: str, actor: str, translate: {}) -> str:
     max_tag_length = 42
     curr_time = datetime.utcnow()
     days_since_epoch = (curr_time - datetime(1970, 1, 1)).days
-    days_since_epoch_str = str(days_since_epoch) + ' '
-    days_since_epoch_str2 = str(days_since_epoch - 1) + ' '
     recently = days_since_epoch - 1
     tag_swarm = []
     category_swarm = []
-    domain_histogram = {}
 
     # Load the blocked hashtags into memory.
     # This avoids needing to repeatedly load the blocked file for each hashtag
@@ -83,85 +81,34 @@ def html_hash_tag_swarm(base_dir: str, actor: str, translate: {}) -> str:
                   encoding='utf-8') as fp_block:
             blocked_str = fp_block.read()
 
-    for _, _, files in os.walk(base_dir + '/tags'):
-        for fname in files:
-            if not fname.endswith('.txt'):
-                continue
-            tags_filename = os.path.join(base_dir + '/tags', fname)
-            if not os.path.isfile(tags_filename):
-                continue
-
-            # get last modified datetime
-            mod_time_since_epoc = os.path.getmtime(tags_filename)
-            last_modified_date = datetime.fromtimestamp(mod_time_since_epoc)
-            file_days_since_epoch = \
-                (last_modified_date - datetime(1970, 1, 1)).days
-
-            # check if the file was last modified within the previous
-            # two days
-            if file_days_since_epoch < recently:
-                continue
-
-            hash_tag_name = fname.split('.')[0]
-            if len(hash_tag_name) > max_tag_length:
-                # NoIncrediblyLongAndBoringHashtagsShownHere
-                continue
-            if '#' in hash_tag_name or \
-               '&' in hash_tag_name or \
-               '"' in hash_tag_name or \
-               "'" in hash_tag_name:
-                continue
-            if '#' + hash_tag_name + '\n' in blocked_str:
-                continue
-            with open(tags_filename, 'r', encoding='utf-8') as fp_tags:
-                # only read one line, which saves time and memory
-                last_tag = fp_tags.readline()
-                if not last_tag.startswith(days_since_epoch_str):
-                    if not last_tag.startswith(days_since_epoch_str2):
-                        continue
-            with open(tags_filename, 'r', encoding='utf-8') as fp_tags:
-                while True:
-                    line = fp_tags.readline()
-                    if not line:
-                        break
-                    if '  ' not in line:
-                        break
-                    sections = line.split('  ')
-                    if len(sections) != 3:
-                        break
-                    post_days_since_epoch_str = sections[0]
-                    if not post_days_since_epoch_str.isdigit():
-                        break
-                    post_days_since_epoch = int(post_days_since_epoch_str)
-                    if post_days_since_epoch < recently:
-                        break
-                    post_url = sections[2]
-                    if '##' not in post_url:
-                        break
-                    post_domain = post_url.split('##')[1]
-                    if '#' in post_domain:
-                        post_domain = post_domain.split('#')[0]
-
-                    if domain_histogram.get(post_domain):
-                        domain_histogram[post_domain] = \
-                            domain_histogram[post_domain] + 1
-                    else:
-                        domain_histogram[post_domain] = 1
-                    tag_swarm.append(hash_tag_name)
-                    category_filename = \
-                        tags_filename.replace('.txt', '.category')
-                    if os.path.isfile(category_filename):
-                        category_str = \
-                            get_hashtag_category(base_dir, hash_tag_name)
-                        if len(category_str) < max_tag_length:
-                            if '#' not in category_str and \
-                               '&' not in category_str and \
-                               '"' not in category_str and \
-                               "'" not in category_str:
-                                if category_str not in category_swarm:
-                                    category_swarm.append(category_str)
-                    break
-        break
+    # hashtags used within the previous two days
+    tag_counts = hashtag_day_counts(base_dir, recently)
+    for hash_tag_name in tag_counts:
+        if len(hash_tag_name) > max_tag_length:
+            # NoIncrediblyLongAndBoringHashtagsShownHere
+            continue
+        if '#' in hash_tag_name or \
+           '&' in hash_tag_name or \
+           '"' in hash_tag_name or \
+           "'" in hash_tag_name:
+            continue
+        if '#' + hash_tag_name + '\n' in blocked_str:
+            continue
+        tags_filename = base_dir + '/tags/' + hash_tag_name + '.txt'
+        if not os.path.isfile(tags_filename):
+            continue
+        tag_swarm.append(hash_tag_name)
+        category_filename = base_dir + '/tags/' + hash_tag_name + '.category'
+        if os.path.isfile(category_filename):
+            category_str = \
+                get_hashtag_category(base_dir, hash_tag_name)
+            if len(category_str) < max_tag_length:
+                if '#' not in category_str and \
+                   '&' not in category_str and \
+                   '"' not in category_str and \
+                   "'" not in category_str:
+                    if category_str not in category_swarm:
+                        category_swarm.append(category_str)
 
     if not tag_swarm:
         return ''
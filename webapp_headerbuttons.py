@@ -8,8 +8,8 @@ __status__ = "Production"
 __module_group__ = "Timeline"
 
 
-import os
 import time
+from boxindex import box_index_exists
 from utils import acct_dir
 from datetime import datetime
 from datetime import timedelta
@@ -117,7 +117,7 @@ def header_buttons_timeline(default_timeline: str,
 
             replies_index_filename = \
                 acct_dir(base_dir, nickname, domain) + '/tlreplies.index'
-            if os.path.isfile(replies_index_filename):
+            if box_index_exists(replies_index_filename):
                 tl_str += \
                     '<a href="' + users_path + '/tlreplies" tabindex="2"'
                 if box_name == 'tlreplies':
@@ -95,7 +95,8 @@ def html_account_info(translate: {},
                       base_dir: str, http_prefix: str,
                       nickname: str, domain: str, port: int,
                       search_handle: str, debug: bool,
-                      system_language: str, signing_priv_key_pem: str) -> str:
+                      system_language: str, signing_priv_key_pem: str,
+                      blocked_cache: {}) -> str:
     """Shows which domains a search handle interacts with.
     This screen is shown if a moderator enters a handle and selects info
     on the moderation screen
@@ -160,7 +161,8 @@ def html_account_info(translate: {},
         follower_domain, follower_port = get_domain_from_actor(follower_actor)
         follower_domain_full = get_full_domain(follower_domain, follower_port)
         if is_blocked(base_dir, nickname, domain,
-                      follower_nickname, follower_domain_full):
+                      follower_nickname, follower_domain_full,
+                      blocked_cache):
             blocked_followers.append(follower_actor)
 
     # get a list of any blocked following
@@ -178,7 +180,8 @@ def html_account_info(translate: {},
         following_domain_full = \
             get_full_domain(following_domain, following_port)
         if is_blocked(base_dir, nickname, domain,
-                      following_nickname, following_domain_full):
+                      following_nickname, following_domain_full,
+                      blocked_cache):
             blocked_following.append(following_actor)
 
     info_form += '<div class="accountInfoDomains">\n'
@@ -189,7 +192,7 @@ def html_account_info(translate: {},
             http_prefix + '://' + post_domain + '" ' + \
             'target="_blank" rel="nofollow noopener noreferrer">' + \
             post_domain + '</a> '
-        if is_blocked_domain(base_dir, post_domain):
+        if is_blocked_domain(base_dir, post_domain, blocked_cache):
             blocked_posts_links = ''
             url_ctr = 0
             for url in blocked_post_urls:
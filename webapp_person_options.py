@@ -163,7 +163,7 @@ def html_person_options(default_timeline: str,
                         authorized: bool,
                         access_keys: {},
                         is_group: bool,
-                        theme: str) -> str:
+                        theme: str, blocked_cache: {}) -> str:
     """Show options for a person: view/follow/block/report
     """
     options_domain, options_port = get_domain_from_actor(options_actor)
@@ -208,7 +208,8 @@ def html_person_options(default_timeline: str,
                                   nickname, domain,
                                   options_nickname, options_domain_full)
         if is_blocked(base_dir, nickname, domain,
-                      options_nickname, options_domain_full):
+                      options_nickname, options_domain_full,
+                      blocked_cache):
             block_str = 'Block'
 
     options_link_str = ''
@@ -463,7 +463,7 @@ def _get_reply_icon_html(base_dir: str, nickname: str, domain: str,
         block_domain, _ = \
             get_domain_from_actor(post_json_object['object']['replyTo'])
         if not is_blocked(base_dir, nickname, domain,
-                          block_nickname, block_domain, {}):
+                          block_nickname, block_domain, None):
             reply_to_link = post_json_object['object']['replyTo']
 
     if post_json_object['object'].get('attributedTo'):
@@ -1846,7 +1846,6 @@ def individual_post_as_html(signing_priv_key_pem: str,
     announce_json_object = None
     if post_json_object['type'] == 'Announce':
         announce_json_object = post_json_object.copy()
-        blocked_cache = {}
         post_json_announce = \
             download_announce(session, base_dir, http_prefix,
                               nickname, domain, post_json_object,
@@ -1858,7 +1857,7 @@ def individual_post_as_html(signing_priv_key_pem: str,
                               system_language,
                               domain_full, person_cache,
                               signing_priv_key_pem,
-                              blocked_cache, bold_reading)
+                              None, bold_reading)
         if not post_json_announce:
             # if the announce could not be downloaded then mark it as rejected
             announced_post_id = remove_id_ending(post_json_object['id'])
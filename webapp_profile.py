@@ -159,7 +159,8 @@ def html_profile_after_search(recent_posts_cache: {}, max_recent_posts: int,
                               timezone: str,
                               onion_domain: str, i2p_domain: str,
                               bold_reading: bool, dogwhistles: {},
-                              min_images_for_accounts: []) -> str:
+                              min_images_for_accounts: [],
+                              blocked_cache: {}) -> str:
     """Show a profile page after a search for a fediverse address
     """
     http = False
@@ -320,7 +321,8 @@ def html_profile_after_search(recent_posts_cache: {}, max_recent_posts: int,
         follow_is_permitted = False
 
     blocked = \
-        is_blocked(base_dir, nickname, domain, search_nickname, search_domain)
+        is_blocked(base_dir, nickname, domain, search_nickname, search_domain,
+                   blocked_cache)
 
     if follow_is_permitted:
         follow_str = 'Follow'
@@ -25,8 +25,6 @@ from utils import search_box_posts
 from utils import get_alt_path
 from utils import acct_dir
 from utils import local_actor_url
-from skills import no_of_actor_skills
-from skills import get_skills_from_list
 from categories import get_hashtag_category
 from feeds import rss2tag_header
 from feeds import rss2tag_footer
@@ -42,6 +40,10 @@ from webapp_utils import html_search_result_share
 from webapp_post import individual_post_as_html
 from webapp_hashtagswarm import html_hash_tag_swarm
 from maps import html_hashtag_maps
+from hashtagindex import hashtag_index_lines
+from hashtagindex import hashtag_index_count
+from skillsindex import skills_index_search
+from sharesindex import shares_index_search
 
 
 def html_search_emoji(translate: {}, base_dir: str, search_str: str,
@@ -294,74 +296,68 @@ def html_search_shared_items(translate: {},
         '<center><h1>' + \
         '<a href="' + actor + '/search">' + title_str + '</a></h1></center>'
     results_exist = False
-    for _, dirs, files in os.walk(base_dir + '/accounts'):
-        for handle in dirs:
-            if not is_account_dir(handle):
-                continue
-            contact_nickname = handle.split('@')[0]
-            shares_filename = base_dir + '/accounts/' + handle + \
-                '/' + shares_file_type + '.json'
-            if not os.path.isfile(shares_filename):
-                continue
-
-            shares_json = load_json(shares_filename)
-            if not shares_json:
-                continue
-
-            (results_exist, curr_page, ctr,
-             result_str) = _html_shares_result(base_dir, shares_json,
-                                               page_number,
-                                               results_per_page,
-                                               search_str_lower_list,
-                                               curr_page, ctr,
-                                               calling_domain, http_prefix,
-                                               domain_full,
-                                               contact_nickname,
-                                               actor, results_exist,
-                                               search_str_lower, translate,
-                                               shares_file_type)
-            shared_items_form += result_str
-
-            if curr_page > page_number:
-                break
-        break
 
-    # search federated shared items
+    # accounts and federated catalogs which may contain matching items
     if shares_file_type == 'shares':
         catalogs_dir = base_dir + '/cache/catalogs'
     else:
         catalogs_dir = base_dir + '/cache/wantedItems'
-    if curr_page <= page_number and os.path.isdir(catalogs_dir):
-        for _, dirs, files in os.walk(catalogs_dir):
-            for fname in files:
-                if '#' in fname:
-                    continue
-                if not fname.endswith('.' + shares_file_type + '.json'):
-                    continue
-                federated_domain = fname.split('.')[0]
-                if federated_domain not in shared_items_federated_domains:
-                    continue
-                shares_filename = catalogs_dir + '/' + fname
-                shares_json = load_json(shares_filename)
-                if not shares_json:
-                    continue
+    sources = \
+        shares_index_search(base_dir, shares_file_type,
+                            search_str_lower_list)
+    if sources is None:
+        sources = []
+        for _, dirs, _ in os.walk(base_dir + '/accounts'):
+            for handle in dirs:
+                if is_account_dir(handle):
+                    sources.append(handle)
+            break
+        sources.sort()
+        if os.path.isdir(catalogs_dir):
+            catalog_ending = '.' + shares_file_type + '.json'
+            for _, _, files in os.walk(catalogs_dir):
+                for fname in files:
+                    if '#' in fname or not fname.endswith(catalog_ending):
+                        continue
+                    sources.append(fname[:-len(catalog_ending)])
+                break
 
-                (results_exist, curr_page, ctr,
-                 result_str) = _html_shares_result(base_dir, shares_json,
-                                                   page_number,
-                                                   results_per_page,
-                                                   search_str_lower_list,
-                                                   curr_page, ctr,
-                                                   calling_domain, http_prefix,
-                                                   domain_full,
-                                                   contact_nickname,
-                                                   actor, results_exist,
-                                                   search_str_lower, translate,
-                                                   shares_file_type)
-                shared_items_form += result_str
+    contact_nickname = ''
+    for source in sources:
+        if '@' in source:
+            if not is_account_dir(source):
+                continue
+            contact_nickname = source.split('@')[0]
+            shares_filename = base_dir + '/accounts/' + source + \
+                '/' + shares_file_type + '.json'
+        else:
+            # search federated shared items
+            if source not in shared_items_federated_domains:
+                continue
+            shares_filename = \
+                catalogs_dir + '/' + source + '.' + shares_file_type + '.json'
+        if not os.path.isfile(shares_filename):
+            continue
 
-                if curr_page > page_number:
-                    break
+        shares_json = load_json(shares_filename)
+        if not shares_json:
+            continue
+
+        (results_exist, curr_page, ctr,
+         result_str) = _html_shares_result(base_dir, shares_json,
+                                           page_number,
+                                           results_per_page,
+                                           search_str_lower_list,
+                                           curr_page, ctr,
+                                           calling_domain, http_prefix,
+                                           domain_full,
+                                           contact_nickname,
+                                           actor, results_exist,
+                                           search_str_lower, translate,
+                                           shares_file_type)
+        shared_items_form += result_str
+
+        if curr_page > page_number:
             break
 
     if not results_exist:
@@ -532,82 +528,8 @@ def html_skills_search(actor: str, translate: {}, base_dir: str,
 
     skillsearch = skillsearch.lower().strip('\n').strip('\r')
 
-    results = []
-    # search instance accounts
-    for subdir, _, files in os.walk(base_dir + '/accounts/'):
-        for fname in files:
-            if not fname.endswith('.json'):
-                continue
-            if not is_account_dir(fname):
-                continue
-            actor_filename = os.path.join(subdir, fname)
-            actor_json = load_json(actor_filename)
-            if not actor_json:
-                continue
-            if actor_json.get('id') and \
-               no_of_actor_skills(actor_json) > 0 and \
-               actor_json.get('name') and \
-               actor_json.get('icon'):
-                actor = actor_json['id']
-                actor_skills_list = actor_json['hasOccupation']['skills']
-                skills = get_skills_from_list(actor_skills_list)
-                for skill_name, skill_level in skills.items():
-                    skill_name = skill_name.lower()
-                    if not (skill_name in skillsearch or
-                            skillsearch in skill_name):
-                        continue
-                    skill_level_str = str(skill_level)
-                    if skill_level < 100:
-                        skill_level_str = '0' + skill_level_str
-                    if skill_level < 10:
-                        skill_level_str = '0' + skill_level_str
-                    index_str = \
-                        skill_level_str + ';' + actor + ';' + \
-                        actor_json['name'] + \
-                        ';' + actor_json['icon']['url']
-                    if index_str not in results:
-                        results.append(index_str)
-        break
-    if not instance_only:
-        # search actor cache
-        for subdir, _, files in os.walk(base_dir + '/cache/actors/'):
-            for fname in files:
-                if not fname.endswith('.json'):
-                    continue
-                if not is_account_dir(fname):
-                    continue
-                actor_filename = os.path.join(subdir, fname)
-                cached_actor_json = load_json(actor_filename)
-                if not cached_actor_json:
-                    continue
-                if cached_actor_json.get('actor'):
-                    actor_json = cached_actor_json['actor']
-                    if actor_json.get('id') and \
-                       no_of_actor_skills(actor_json) > 0 and \
-                       actor_json.get('name') and \
-                       actor_json.get('icon'):
-                        actor = actor_json['id']
-                        actor_skills_list = \
-                            actor_json['hasOccupation']['skills']
-                        skills = get_skills_from_list(actor_skills_list)
-                        for skill_name, skill_level in skills.items():
-                            skill_name = skill_name.lower()
-                            if not (skill_name in skillsearch or
-                                    skillsearch in skill_name):
-                                continue
-                            skill_level_str = str(skill_level)
-                            if skill_level < 100:
-                                skill_level_str = '0' + skill_level_str
-                            if skill_level < 10:
-                                skill_level_str = '0' + skill_level_str
-                            index_str = \
-                                skill_level_str + ';' + actor + ';' + \
-                                actor_json['name'] + \
-                                ';' + actor_json['icon']['url']
-                            if index_str not in results:
-                                results.append(index_str)
-            break
-
+    # instance accounts and cached actors having the skill
+    results = skills_index_search(base_dir, skillsearch, instance_only)
     results.sort(reverse=True)
 
     css_filename = base_dir + '/epicyon-profile.css'
@@ -857,10 +779,6 @@ def html_hashtag_search(nickname: str, domain: str, port: int,
         if not os.path.isdir(account_dir):
             nickname = None
 
-    # read the index
-    with open(hashtag_index_file, 'r', encoding='utf-8') as fp_hash:
-        lines = fp_hash.readlines()
-
     # read the css
     css_filename = base_dir + '/epicyon-profile.css'
     if os.path.isfile(base_dir + '/epicyon.css'):
@@ -875,10 +793,14 @@ def html_hashtag_search(nickname: str, domain: str, port: int,
     # get the start end end within the index file
     start_index = int((page_number - 1) * posts_per_page)
     end_index = start_index + posts_per_page
-    no_of_lines = len(lines)
+    no_of_lines = hashtag_index_count(base_dir, hashtag)
     if end_index >= no_of_lines and no_of_lines > 0:
         end_index = no_of_lines - 1
 
+    # read only the lines of the index for this page
+    lines = hashtag_index_lines(base_dir, hashtag, start_index,
+                                end_index + 1 - start_index)
+
     instance_title = \
         get_config_param(base_dir, 'instanceTitle')
     hashtag_search_form = \
@@ -957,31 +879,25 @@ def html_hashtag_search(nickname: str, domain: str, port: int,
             translate['Page up'] + \
             '" alt="' + translate['Page up'] + \
             '"></a>\n  </center>\n'
-    index = start_index
-    while index <= end_index:
-        post_id = lines[index].strip('\n').strip('\r')
+    for line in lines:
+        post_id = line.strip('\n').strip('\r')
         if '  ' not in post_id:
             nickname = get_nickname_from_actor(post_id)
             if not nickname:
-                index += 1
                 continue
         else:
             post_fields = post_id.split('  ')
             if len(post_fields) != 3:
-                index += 1
                 continue
             nickname = post_fields[1]
             post_id = post_fields[2]
         post_filename = locate_post(base_dir, nickname, domain, post_id)
         if not post_filename:
-            index += 1
             continue
         post_json_object = load_json(post_filename)
         if not post_json_object:
-            index += 1
             continue
         if not is_public_post(post_json_object):
-            index += 1
             continue
         show_individual_post_icons = False
         if nickname:
@@ -1027,7 +943,6 @@ def html_hashtag_search(nickname: str, domain: str, port: int,
                                     minimize_all_images)
         if post_str:
             hashtag_search_form += separator_str + post_str
-        index += 1
 
     if end_index < no_of_lines - 1:
         # next page link
@@ -1074,16 +989,14 @@ def rss_hashtag_search(nickname: str, domain: str, port: int,
         if not os.path.isdir(account_dir):
             nickname = None
 
-    # read the index
-    lines = []
-    with open(hashtag_index_file, 'r', encoding='utf-8') as fp_hash:
-        lines = fp_hash.readlines()
+    # read only the most recent lines of the index
+    max_feed_length = 10
+    lines = hashtag_index_lines(base_dir, hashtag, 0, max_feed_length)
     if not lines:
         return None
 
     domain_full = get_full_domain(domain, port)
 
-    max_feed_length = 10
     hashtag_feed = rss2tag_header(hashtag, http_prefix, domain_full)
     for index, _ in enumerate(lines):
         post_id = lines[index].strip('\n').strip('\r')
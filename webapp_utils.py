@@ -29,6 +29,7 @@ from utils import get_image_extensions
 from utils import local_actor_url
 from utils import text_in_file
 from utils import remove_eol
+from utils import get_cached_actor
 from cache import store_person_in_cache
 from content import add_html_tags
 from content import replace_emoji_from_tags
@@ -423,9 +424,10 @@ def update_avatar_image_cache(signing_priv_key_pem: str,
                 return None
             if person_json['id'] != actor:
                 return None
-            if not person_cache.get(actor):
+            cached = get_cached_actor(person_cache, actor)
+            if not cached:
                 return None
-            if person_cache[actor]['actor']['publicKey']['publicKeyPem'] != \
+            if cached['actor']['publicKey']['publicKeyPem'] != \
                person_json['publicKey']['publicKeyPem']:
                 print("ERROR: " +
                       "public keys don't match when downloading actor for " +